@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+chunk_store.py 传输量基准
+
+功能：
+- 生成两个合成发布目录：若干 MB 级"二进制"大文件（随机段、重复段、零填充混合）和大量小文件
+- 新版本对大文件施加不同改动：原样、少量字节修补、中间插入、删除一段、整体重写，另有新增、删除、改名
+- 两个版本分别发布到临时块存储，比较按块下载与整文件替换的传输字节数，并按改动类型列出明细
+- 把块级更新应用到旧目录的副本，核对结果与新版本逐文件一致
+
+使用方法：
+    python scripts/bench_chunk_store.py
+    python scripts/bench_chunk_store.py --large 20 --max-mb 8 --seed 1
+    python scripts/bench_chunk_store.py --keep /tmp/chunk-bench
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_manifest import scan_tree  # noqa: E402
+from chunk_store import ChunkStore, apply_chunk_plan, build_chunk_index, dump_index, plan_chunk_update  # noqa: E402
+from manifest_diff import format_size  # noqa: E402
+
+
+EDIT_KINDS = ('unchanged', 'patch', 'insert', 'delete', 'rewrite')
+
+
+def make_binary(rng: random.Random, size: int) -> bytes:
+    """生成类似二进制文件的内容：随机段（代码/压缩数据）、重复段（表）、零填充（对齐）"""
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        length = rng.randint(512, 64 * 1024)
+        if kind < 0.6:
+            part = rng.randbytes(length)
+        elif kind < 0.85:
+            unit = rng.randbytes(rng.randint(4, 64))
+            part = (unit * (length // len(unit) + 1))[:length]
+        else:
+            part = bytes(length)
+        parts.append(part)
+        total += length
+    return b''.join(parts)[:size]
+
+
+def edit_binary(rng: random.Random, data: bytes, kind: str) -> bytes:
+    """按改动类型修改内容"""
+    if kind == 'patch':
+        buf = bytearray(data)
+        for _ in range(rng.randint(1, 8)):
+            pos = rng.randrange(len(buf) - 16)
+            buf[pos:pos + 16] = rng.randbytes(16)
+        return bytes(buf)
+    if kind == 'insert':
+        for _ in range(rng.randint(1, 3)):
+            pos = rng.randrange(len(data))
+            data = data[:pos] + rng.randbytes(rng.randint(100, 8192)) + data[pos:]
+        return data
+    if kind == 'delete':
+        pos = rng.randrange(len(data) // 2)
+        return data[:pos] + data[pos + rng.randint(1000, 50_000):]
+    if kind == 'rewrite':
+        return make_binary(rng, len(data))
+    return data
+
+
+def make_trees(base: Path, large: int, max_mb: float, small: int, seed: int) -> tuple[Path, Path, dict]:
+    """生成旧、新两个发布目录，返回 (旧目录, 新目录, 路径 → 改动类型)"""
+    rng = random.Random(seed)
+    old, new = base / 'old', base / 'new'
+    kinds = {}
+    for i in range(large):
+        size = rng.randint(1024 * 1024, int(max_mb * 1024 * 1024))
+        data = make_binary(rng, size)
+        path = f'_internal/lib{i:03d}.dll'
+        kind = EDIT_KINDS[i % len(EDIT_KINDS)]
+        kinds[path] = kind
+        for root, content in ((old, data), (new, edit_binary(rng, data, kind))):
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+            (root / path).write_bytes(content)
+    for i in range(small):
+        path = f'_internal/pkg{i % 20:02d}/mod{i:04d}.pyc'
+        data = rng.randbytes(rng.randint(200, 50_000))
+        for root in (old, new):
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (old / path).write_bytes(data)
+        roll = rng.random()
+        if roll < 0.05:
+            (new / path).write_bytes(rng.randbytes(len(data)))
+            kinds[path] = 'small-changed'
+        elif roll < 0.07:
+            moved = path.replace('/mod', '/renamed_mod')
+            (new / moved).write_bytes(data)
+            kinds[moved] = 'renamed'
+        elif roll > 0.98:
+            kinds[path] = 'removed'
+        else:
+            (new / path).write_bytes(data)
+    extra = '_internal/new_plugin.dll'
+    (new / extra).write_bytes(make_binary(rng, int(max_mb * 1024 * 1024 / 2)))
+    kinds[extra] = 'added'
+    return old, new, kinds
+
+
+def per_file_fetch(plan) -> dict[str, int]:
+    """把需下载的块归到第一个引用它的文件上"""
+    seen = set()
+    result = {}
+    for path, _file_hash, chunks in plan.rebuild:
+        total = 0
+        for digest, size in chunks:
+            if digest in plan.fetch and digest not in seen:
+                seen.add(digest)
+                total += size
+        result[path] = total
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='内容定义分块存储传输量基准')
+    parser.add_argument('--large', type=int, default=10, help='大文件个数')
+    parser.add_argument('--max-mb', type=float, default=4.0, help='大文件最大大小（MB，最小 1 MB）')
+    parser.add_argument('--small', type=int, default=300, help='小文件个数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--jobs', type=int, default=None, help='分块进程数')
+    parser.add_argument('--keep', help='把合成目录和块存储保留到该目录（默认用完即删）')
+    args = parser.parse_args()
+
+    base = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix='chunk-bench-'))
+    if args.keep and base.exists():
+        shutil.rmtree(base)
+    try:
+        print(f"📦 生成合成发布目录（{args.large} 个大文件，{args.small} 个小文件）...")
+        old, new, kinds = make_trees(base, args.large, args.max_mb, args.small, args.seed)
+        store = ChunkStore(base / 'store')
+
+        start = time.perf_counter()
+        old_index, old_stats = build_chunk_index(old, '1.0.0', store, jobs=args.jobs)
+        new_index, new_stats = build_chunk_index(new, '1.0.1', store, jobs=args.jobs)
+        elapsed = time.perf_counter() - start
+        chunked_mb = (old_stats.chunked_bytes + new_stats.chunked_bytes) / 1024 / 1024
+        print(f"   分块: {chunked_mb:,.1f} MB，耗时 {elapsed:.2f} s（{chunked_mb / elapsed:,.1f} MB/s）")
+        print(f"   块索引: {len(dump_index(new_index)):,} 字节，{new_stats.unique_chunks} 个块"
+              f"（平均 {format_size(new_stats.unique_bytes // max(new_stats.unique_chunks, 1))}）")
+        print(f"   发布新版本写入存储: {format_size(new_stats.written_bytes)}")
+
+        plan = plan_chunk_update(old_index, new_index)
+        fetched = per_file_fetch(plan)
+        sizes = {p: s for p, s, _h, _r in new_index['files']}
+        print("\n📊 按改动类型（新文件大小 → 按块下载）:")
+        by_kind: dict[str, list[int]] = {}
+        for path, _file_hash, _chunks in plan.rebuild:
+            kind = kinds.get(path, 'other')
+            totals = by_kind.setdefault(kind, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += sizes[path]
+            totals[2] += fetched[path]
+        for kind, (count, size, fetch) in sorted(by_kind.items()):
+            print(f"   {kind:<14} {count:>4} 个  {format_size(size):>10} → {format_size(fetch):>10}"
+                  f"（{fetch / max(size, 1):.1%}）")
+
+        print()
+        print(f"   整文件替换: {format_size(plan.whole_file_bytes)}")
+        print(f"   按块下载:   {format_size(plan.download_bytes)}（本地复用 {format_size(plan.local_bytes)}）")
+        saved = 1 - plan.download_bytes / max(plan.whole_file_bytes, 1)
+        print(f"   节省: {saved:.1%}")
+
+        target = base / 'install'
+        shutil.copytree(old, target)
+        start = time.perf_counter()
+        apply_chunk_plan(plan, target, store.get)
+        apply_seconds = time.perf_counter() - start
+        expected = [(f.path, f.size) for f in scan_tree(new)]
+        actual = [(f.path, f.size) for f in scan_tree(target)]
+        same = expected == actual and all(
+            (target / p).read_bytes() == (new / p).read_bytes() for p, _ in expected)
+        if not same:
+            print("❌ 应用块级更新后与新版本不一致")
+            return 1
+        print(f"✅ 应用块级更新 {apply_seconds * 1000:.0f} ms，结果与新版本逐文件一致")
+        return 0
+    finally:
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+deploy_website.py 增量部署的正确性与耗时基准
+
+在临时目录里生成一个网站目录，部署到本地目录目标（LocalTarget，代替服务器），逐项检查：
+- 首次部署：上传全部文件，排除的 Cloudflare 配置不上传，部署状态写在目标目录之外
+- 无变化重新部署：不上传、不删除、不重写状态
+- 修改 / 删除 / 移动文件：只上传变化的文件，删除已移除的文件及变空的目录
+- --dry-run：只报告，不改动目标
+- --force：全部重新上传，已移除的文件仍然删除
+- 部署中途失败：状态不更新，重新运行后补齐未确认的文件
+- 旧版本写在网站目录里的 .deploy-manifest.json：读取后迁移到目录外并删除
+每一步之后目标目录的内容都必须与网站目录（去掉排除的文件）逐字节一致。
+
+使用方法：
+    python scripts/bench_deploy_website.py
+    python scripts/bench_deploy_website.py --files 2000 --jobs 8
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deploy_website import (DEFAULT_EXCLUDE, LEGACY_STATE_FILE, DeployError, LocalTarget,  # noqa: E402
+                            deploy)
+
+
+class FlakyTarget(LocalTarget):
+    """上传到第 fail_after 个文件时失败，模拟连接中断"""
+
+    def __init__(self, root: Path, fail_after: int):
+        super().__init__(root)
+        self.remaining = fail_after
+
+    def upload(self, root: Path, paths: list[str]):
+        for path in paths:
+            if self.remaining <= 0:
+                raise DeployError('模拟上传中断')
+            self.remaining -= 1
+            super().upload(root, [path])
+
+
+def make_site(root: Path, count: int, seed: int):
+    """生成网站目录：页面、分目录的资源，以及不应部署的 Cloudflare 配置"""
+    rng = random.Random(seed)
+    for name in ('worker.js', '_headers', '_redirects'):
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(f'# {name}\n', encoding='utf-8')
+    (root / 'index.html').write_text('<!DOCTYPE html><title>首页</title>', encoding='utf-8')
+    for i in range(count):
+        path = root / f'assets/{i % 7}/file{i}.{rng.choice(["png", "css", "js", "woff2"])}'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(rng.randbytes(rng.randint(0, 20000)))
+
+
+def snapshot(root: Path) -> dict[str, bytes]:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob('*') if p.is_file()}
+
+
+def expected(site: Path) -> dict[str, bytes]:
+    """网站目录中应部署的文件（去掉排除项）"""
+    from fnmatch import fnmatch
+    return {path: data for path, data in snapshot(site).items()
+            if not any(fnmatch(path.rsplit('/', 1)[-1], pattern) for pattern in DEFAULT_EXCLUDE)}
+
+
+def empty_dirs(root: Path) -> list[str]:
+    return [p.relative_to(root).as_posix() for p in root.rglob('*') if p.is_dir() and not any(p.iterdir())]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='增量部署正确性基准（本地目录目标）')
+    parser.add_argument('--files', type=int, default=500, help='生成的资源文件数')
+    parser.add_argument('--jobs', type=int, default=4, help='并发上传批数')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix='deploy-bench-'))
+    site, dest = base / 'site', base / 'www' / 'hudawang'
+    target = LocalTarget(dest)
+    ok = True
+
+    def check(label: str, result, uploaded: list[str], deleted: list[str], conditions: tuple = ()) -> bool:
+        """目标内容与网站目录一致，且上传 / 删除列表符合预期"""
+        problems = []
+        if snapshot(dest) != expected(site):
+            problems.append('目标目录内容与网站目录不一致')
+        if empty_dirs(dest):
+            problems.append(f'残留空目录: {", ".join(empty_dirs(dest))}')
+        if (dest / LEGACY_STATE_FILE).exists():
+            problems.append('部署状态写进了网站目录')
+        if result.uploaded != sorted(uploaded):
+            problems.append(f'上传 {len(result.uploaded)} 个，预期 {len(uploaded)} 个')
+        if result.deleted != sorted(deleted):
+            problems.append(f'删除 {result.deleted}，预期 {sorted(deleted)}')
+        state = json.loads(target.state.read_bytes())
+        if sorted(e['path'] for e in state['files']) != sorted(expected(site)):
+            problems.append('部署状态与网站目录不一致')
+        problems += [message for passed, message in conditions if not passed]
+        print(f"   {'✅' if not problems else '❌'} {label}: 上传 {len(result.uploaded)}，删除 {len(result.deleted)}，"
+              f"未变化 {result.unchanged}，{result.seconds * 1000:.0f} ms")
+        for problem in problems:
+            print(f"      ❌ {problem}")
+        return not problems
+
+    try:
+        make_site(site, args.files, args.seed)
+        files = sorted(expected(site))
+        print(f"🚀 部署 {len(files)} 个文件到本地目录目标（{args.jobs} 批并发）")
+
+        result = deploy(site, target, jobs=args.jobs)
+        ok &= check('首次部署', result, uploaded=files, deleted=[], conditions=(
+            (result.first_deploy, '未识别为首次部署'),
+            (target.state.parent == dest.parent, f'部署状态不在网站目录之外: {target.state}')))
+
+        state_mtime = target.state.stat().st_mtime_ns
+        result = deploy(site, target, jobs=args.jobs)
+        ok &= check('无变化重新部署', result, uploaded=[], deleted=[], conditions=(
+            (target.state.stat().st_mtime_ns == state_mtime, '部署状态被重写'),))
+
+        kept = [p for p in files if p.startswith('assets/0/')]
+        modified, moved, later_removed = kept[0], kept[1], kept[2]
+        (site / modified).write_bytes(b'changed' + (site / modified).read_bytes())
+        for path in [p for p in files if p.startswith('assets/6/')]:
+            (site / path).unlink()
+        (site / 'assets/6').rmdir()
+        renamed = 'assets/moved/' + moved.rsplit('/', 1)[-1]
+        (site / renamed).parent.mkdir()
+        os.replace(site / moved, site / renamed)
+        gone = [p for p in files if p.startswith('assets/6/')] + [moved]
+
+        before = snapshot(dest)
+        result = deploy(site, target, jobs=args.jobs, dry_run=True)
+        passed = (snapshot(dest) == before and result.uploaded == sorted([modified, renamed])
+                  and result.deleted == sorted(gone))
+        ok &= passed
+        print(f"   {'✅' if passed else '❌'} --dry-run: 将上传 {len(result.uploaded)}，将删除 {len(result.deleted)}，目标未改动")
+
+        result = deploy(site, target, jobs=args.jobs)
+        ok &= check(f'修改 1 个、删除目录 assets/6（{len(gone) - 1} 个文件）、移动 1 个', result,
+                    uploaded=[modified, renamed], deleted=gone)
+
+        (site / later_removed).unlink()
+        result = deploy(site, target, jobs=args.jobs, force=True)
+        ok &= check('--force（另删除 1 个文件）', result, uploaded=sorted(expected(site)), deleted=[later_removed])
+
+        # 中途失败：前几个文件已替换，状态仍是上次的；重新部署补齐
+        changed = [p for p in sorted(expected(site)) if p.startswith('assets/1/')]
+        for path in changed:
+            (site / path).write_bytes(os.urandom(100))
+        state_before = target.state.read_bytes()
+        flaky = FlakyTarget(dest, fail_after=len(changed) // 2)
+        try:
+            deploy(site, flaky, jobs=1)
+            failed = False
+        except DeployError:
+            failed = True
+        passed = failed and target.state.read_bytes() == state_before
+        ok &= passed
+        print(f"   {'✅' if passed else '❌'} 上传中断: {'抛出 DeployError' if failed else '未报错'}，"
+              f"部署状态{'未更新' if target.state.read_bytes() == state_before else '被更新'}")
+        result = deploy(site, target, jobs=args.jobs)
+        ok &= check('中断后重新部署', result, uploaded=changed, deleted=[])
+
+        # 旧位置的部署状态：读取后迁移到网站目录之外
+        os.replace(target.state, dest / LEGACY_STATE_FILE)
+        result = deploy(site, target, jobs=args.jobs)
+        ok &= check('迁移网站目录内的旧部署状态', result, uploaded=[], deleted=[], conditions=(
+            (not result.first_deploy, '没有读到旧位置的部署状态'),))
+
+        print()
+        print("✅ 全部通过" if ok else "❌ 存在不符合预期的部署结果")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+download_client.py 基准与故障场景测试（本地 range_server.py 充当下载服务器）
+
+场景：
+1. 限速链路：每连接限速时，单连接与多段并行的耗时对比
+2. 故障注入：随机中途断开（50%）+ 503（20%），下载仍完成且哈希正确
+3. 中断续传：服务器发送一半后断开，恢复后续传只下载剩余部分
+4. 进程被杀：子进程运行命令行下载，中途 SIGKILL，再次运行从进度文件续传
+5. 文件变化：中断后服务器上的文件被替换，续传时识别并从头下载
+6. 数据损坏：服务器翻转一个字节，报告哈希不符且不生成目标文件
+7. 不支持 Range：退化为单连接下载
+8. 乱序到达：直接按指定顺序向哈希器写入各段数据（不经网络），摘要必须正确；
+   内存上限足够时不从 .part 读回，上限很小时只读回放不下的部分
+
+任一场景不符合预期即返回 1。
+
+使用方法：
+    python scripts/bench_download_client.py
+    python scripts/bench_download_client.py --size-mb 64 --throttle 8MB --segments 8
+"""
+
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from download_client import (HASH_BUFFER_LIMIT, DownloadError, HashMismatch, _StreamHasher, download,  # noqa: E402
+                             split_segments)
+from manifest_budget import parse_size  # noqa: E402
+from range_server import Faults, serve  # noqa: E402
+
+
+def make_file(path: Path, size: int) -> str:
+    """写出随机内容的文件，返回 SHA-256"""
+    h = hashlib.sha256()
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            block = os.urandom(min(remaining, 1024 * 1024))
+            f.write(block)
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+def sha256_of(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Checker:
+    def __init__(self):
+        self.ok = True
+
+    def check(self, passed: bool, message: str):
+        print(f"   {'✅' if passed else '❌'} {message}")
+        self.ok &= passed
+
+
+def cleanup(dest: Path):
+    for path in (dest, dest.with_name(dest.name + '.part'), dest.with_name(dest.name + '.part.json')):
+        path.unlink(missing_ok=True)
+
+
+def replay(part: Path, data: bytes, count: int, arrivals: list[tuple[int, int, int]],
+           block: int = 1024, buffer_limit: int = HASH_BUFFER_LIMIT) -> tuple[str, int]:
+    """按 arrivals（段号, 起, 止）的顺序写入 .part 并交给哈希器，返回 (摘要, 读回字节数)"""
+    with open(part, 'wb') as f:
+        f.truncate(len(data))
+    segments = split_segments(len(data), count, min_size=1)
+    hasher = _StreamHasher(part, segments, len(data), buffer_limit)
+    try:
+        with open(part, 'r+b', buffering=0) as f:
+            for index, start, end in arrivals:
+                for offset in range(start, end, block):
+                    chunk = data[offset:min(end, offset + block)]
+                    f.seek(offset)
+                    f.write(chunk)
+                    hasher.feed(segments[index], offset, chunk)
+        return hasher.hexdigest(), hasher.reread
+    finally:
+        hasher.close()
+
+
+def shuffled_arrivals(size: int, count: int, block: int, seed: int) -> list[tuple[int, int, int]]:
+    """各段按自身顺序、段间随机交错地到达"""
+    rng = random.Random(seed)
+    bounds = [size * i // count for i in range(count + 1)]
+    cursors = list(bounds[:-1])
+    arrivals = []
+    while True:
+        active = [i for i in range(count) if cursors[i] < bounds[i + 1]]
+        if not active:
+            return arrivals
+        i = rng.choice(active)
+        end = min(bounds[i + 1], cursors[i] + rng.randint(1, 4) * block)
+        arrivals.append((i, cursors[i], end))
+        cursors[i] = end
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='下载器基准与故障场景测试')
+    parser.add_argument('--size-mb', type=int, default=24, help='测试文件大小（MB）')
+    parser.add_argument('--segments', type=int, default=8, help='并行段数')
+    parser.add_argument('--throttle', default='4MB', help='场景 1 的每连接限速（每秒）')
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    throttle = parse_size(args.throttle)
+    c = Checker()
+    with tempfile.TemporaryDirectory(prefix='download-bench-') as tmp:
+        root = Path(tmp) / 'www'
+        out = Path(tmp) / 'out'
+        root.mkdir()
+        out.mkdir()
+        name = 'HuGeScreenshot-9.9.9-Setup.exe'
+        expected = make_file(root / name, size)
+        dest = out / name
+        server, base = serve(root)
+        url = base + name
+        try:
+            print(f"📦 测试文件 {args.size_mb} MB，{args.segments} 段")
+
+            print(f"\n1️⃣ 每连接限速 {args.throttle}/s")
+            server.faults = Faults(throttle=throttle)
+            timings = {}
+            for segments in (1, args.segments):
+                cleanup(dest)
+                stats = download(url, dest, sha256=expected, segments=segments)
+                timings[segments] = stats.seconds
+                print(f"   {stats.segments} 段: {stats.seconds:6.2f} s，"
+                      f"{stats.downloaded / stats.seconds / 1024 / 1024:6.1f} MB/s，"
+                      f"哈希时从 .part 读回 {stats.reread / size:.0%}")
+            c.check(timings[args.segments] < timings[1] * 0.6,
+                    f"并行加速 {timings[1] / timings[args.segments]:.1f} 倍")
+
+            print("\n2️⃣ 随机断开 50% + 503 20%")
+            server.faults = Faults(drop_rate=0.5, error_rate=0.2, seed=1)
+            cleanup(dest)
+            stats = download(url, dest, sha256=expected, segments=args.segments, retries=20)
+            c.check(sha256_of(dest) == expected, f"完成且哈希正确（重试 {stats.retries} 次）")
+            c.check(stats.downloaded < size * 2, f"重试只补下缺失部分：共传输 {stats.downloaded / size:.2f} 倍文件大小")
+
+            print("\n3️⃣ 发送一半后服务器断开")
+            cleanup(dest)
+            server.faults = Faults(stop_after=size // 2)
+            server.sent_bytes = 0
+            try:
+                download(url, dest, sha256=expected, segments=args.segments, retries=1)
+                c.check(False, '应当失败')
+            except DownloadError as e:
+                c.check(dest.with_name(name + '.part.json').exists(), f"失败并保留进度：{e}")
+            server.faults = Faults()
+            stats = download(url, dest, sha256=expected, segments=args.segments)
+            c.check(sha256_of(dest) == expected, '续传完成且哈希正确')
+            c.check(stats.resumed > 0 and stats.resumed + stats.downloaded == size,
+                    f"已有 {stats.resumed / size:.0%}，本次只下载 {stats.downloaded / size:.0%}")
+            c.check(not dest.with_name(name + '.part.json').exists(), '完成后删除进度文件')
+
+            print("\n4️⃣ 命令行进程中途被杀")
+            cleanup(dest)
+            server.faults = Faults(throttle=size // 32)
+            command = [sys.executable, str(Path(__file__).parent / 'download_client.py'), url,
+                       '-o', str(dest), '--sha256', expected, '--segments', '4', '--quiet']
+            proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            time.sleep(2.5)
+            proc.kill()
+            proc.wait()
+            c.check(not dest.exists() and dest.with_name(name + '.part.json').exists(), '被杀后只留下 .part 与进度文件')
+            server.faults = Faults()
+            stats = download(url, dest, sha256=expected, segments=4)
+            c.check(sha256_of(dest) == expected,
+                    f"续传完成且哈希正确（已有 {stats.resumed / size:.0%}，本次下载 {stats.downloaded / size:.0%}）")
+            c.check(stats.resumed > 0, '利用了被杀前的进度')
+
+            print("\n5️⃣ 中断后服务器上的文件被替换")
+            cleanup(dest)
+            server.faults = Faults(stop_after=size // 2)
+            server.sent_bytes = 0
+            try:
+                download(url, dest, sha256=None, segments=args.segments, retries=0)
+            except DownloadError:
+                pass
+            server.faults = Faults()
+            expected_new = make_file(root / name, size)
+            stats = download(url, dest, segments=args.segments)
+            c.check(stats.resumed == 0 and stats.sha256 == expected_new == sha256_of(dest),
+                    '识别出文件变化，从头下载新文件')
+            expected = expected_new
+
+            print("\n6️⃣ 服务器返回的数据被篡改一个字节")
+            cleanup(dest)
+            server.faults = Faults(corrupt_offset=size // 3)
+            try:
+                download(url, dest, sha256=expected, segments=args.segments)
+                c.check(False, '应当报告哈希不符')
+            except HashMismatch as e:
+                c.check(not dest.exists() and not dest.with_name(name + '.part').exists(),
+                        f"报告哈希不符且未留下文件：{str(e)[:40]}…")
+
+            print("\n7️⃣ 服务器不支持 Range")
+            cleanup(dest)
+            server.faults = Faults(no_range=True)
+            stats = download(url, dest, sha256=expected, segments=args.segments)
+            c.check(stats.segments == 1 and sha256_of(dest) == expected, '退化为单连接下载，哈希正确')
+
+            print("\n8️⃣ 乱序到达（直接驱动哈希器）")
+            part = out / 'order.part'
+            data = os.urandom(30 * 1024)
+            digest, _ = replay(part, data, 3, [(1, 10240, 20470), (0, 0, 10240), (2, 20480, 30720),
+                                               (1, 20470, 20480)])
+            c.check(digest == hashlib.sha256(data).hexdigest(),
+                    '段 1 先到大部分、段 0 与段 2 完成后段 1 末尾 10 字节才到，摘要正确')
+            data = os.urandom(4 * 1024 * 1024)
+            for limit, label in ((HASH_BUFFER_LIMIT, '默认内存上限'), (256 * 1024, '内存上限 256 KB')):
+                wrong, reread = 0, []
+                for seed in range(20):
+                    digest, n = replay(part, data, 8, shuffled_arrivals(len(data), 8, 16 * 1024, seed),
+                                       buffer_limit=limit)
+                    wrong += digest != hashlib.sha256(data).hexdigest()
+                    reread.append(n)
+                spilled = limit < len(data)
+                c.check(wrong == 0 and (min(reread) > 0 if spilled else max(reread) == 0),
+                        f"8 段随机交错 20 次（{label}），摘要全部正确，"
+                        f"从 .part 读回 {min(reread) / len(data):.0%}–{max(reread) / len(data):.0%}")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print(f"\n{'✅ 全部场景通过' if c.ok else '❌ 有场景未通过'}")
+    return 0 if c.ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+edge_emulator.py 规则与缓存逻辑的自检
+
+不启动服务器，直接调用各个组件，逐项核对：
+- _headers：多条规则匹配同一路径时同名头用逗号拼接，"! 名称" 删除之前添加的头，:name 与 * 模式
+- _redirects：不带 ! 的规则被已有文件遮蔽、带 ! 的规则总是生效，占位符与 :splat 替换、查询串保留、
+  200 改写、404；_headers / _redirects 本身不对外提供；ETag 条件请求与预压缩副本协商
+- HttpCache（用可控时钟）：max-age 新鲜期内命中、过期后带 ETag 重新验证（304 后重新计时）、
+  源站内容变化时取回新内容、s-maxage 只对共享缓存生效、private / no-store / no-cache、
+  max-age=0, must-revalidate 每次回源、Vary: Accept-Encoding 分开存储、POST 使缓存失效、
+  客户端条件请求、按容量淘汰
+- 命中率只计直接命中，重新验证计入回源
+
+使用方法：
+    python scripts/bench_edge_emulator.py
+"""
+
+import asyncio
+import gzip
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from edge_emulator import (CacheStats, HttpCache, LoadReport, PagesOrigin, Request, Response,  # noqa: E402
+                           apply_header_rules, parse_headers)
+
+
+HEADERS = """\
+# 注释与空行忽略
+/*
+  Cache-Control: public, max-age=60
+  X-Frame-Options: DENY
+
+/assets/*
+  Cache-Control: immutable
+
+/assets/:name.css
+  ! X-Frame-Options
+
+https://example.com/docs/*
+  X-Robots-Tag: noindex
+"""
+
+REDIRECTS = """\
+# 来源 目标 [状态码][!]
+/old.html    /guide        301
+/forced.html /guide        302!
+/blog/:slug  /posts/:slug  301
+/app/*       /index.html   200
+/files/*     /assets/:splat 301
+/gone        /404.html     404
+"""
+
+
+class Checker:
+    def __init__(self):
+        self.ok = True
+
+    def __call__(self, passed: bool, label: str, detail: str = ''):
+        self.ok &= bool(passed)
+        print(f"   {'✅' if passed else '❌'} {label}{'' if passed or not detail else f'（实际: {detail}）'}")
+
+
+def check_headers(check: Checker):
+    print("📋 _headers")
+    rules = parse_headers(HEADERS)
+    headers = {}
+    apply_header_rules(rules, '/assets/app.css', headers)
+    check(headers == {'cache-control': 'public, max-age=60, immutable'},
+          '/assets/app.css：两条规则的 Cache-Control 用逗号拼接，"! X-Frame-Options" 删除前面添加的头', headers)
+    headers = {}
+    apply_header_rules(rules, '/assets/logo.png', headers)
+    check(headers.get('x-frame-options') == 'DENY' and headers['cache-control'] == 'public, max-age=60, immutable',
+          '/assets/logo.png：:name.css 规则不匹配，X-Frame-Options 保留', headers)
+    headers = {'cache-control': 'no-store'}
+    apply_header_rules(rules, '/index.html', headers)
+    check(headers['cache-control'] == 'public, max-age=60', '/index.html：只匹配 /*，规则覆盖源站的同名头', headers)
+    headers = {}
+    apply_header_rules(rules, '/docs/a/b', headers)
+    check(headers.get('x-robots-tag') == 'noindex', '带域名的规则按路径部分匹配，* 跨越多级目录', headers)
+
+
+def make_site(root: Path):
+    files = {'index.html': 'INDEX', 'old.html': 'OLD', 'forced.html': 'FORCED', 'guide.html': 'GUIDE',
+             '404.html': 'NOT FOUND', 'assets/app.css': 'body{}', '_headers': HEADERS, '_redirects': REDIRECTS}
+    for name, text in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text, encoding='utf-8')
+    (root / 'guide.html.gz').write_bytes(gzip.compress(b'GUIDE'))
+
+
+def check_pages(check: Checker, site: Path):
+    print("\n🔀 _redirects 与 Pages")
+    pages = PagesOrigin(site)
+
+    def get(path: str, query: str = '', **headers) -> Response:
+        return asyncio.run(pages.handle(Request('GET', path, query, headers)))
+
+    r = get('/old.html')
+    check(r.status == 200 and r.body == b'OLD', '不带 ! 的 301 被已有文件 old.html 遮蔽', f'{r.status} {r.body!r}')
+    r = get('/forced.html')
+    check(r.status == 302 and r.headers.get('location') == '/guide', '带 ! 的 302 在文件存在时仍生效',
+          f"{r.status} {r.headers.get('location')}")
+    r = get('/blog/hello', 'ref=1')
+    check(r.status == 301 and r.headers.get('location') == '/posts/hello?ref=1', ':slug 替换并保留查询串',
+          f"{r.status} {r.headers.get('location')}")
+    r = get('/files/img/a.png')
+    check(r.status == 301 and r.headers.get('location') == '/assets/img/a.png', '* 作为 :splat 替换',
+          f"{r.status} {r.headers.get('location')}")
+    r = get('/app/settings/profile')
+    check(r.status == 200 and r.body == b'INDEX', '200 规则改写为 index.html，地址不变', f'{r.status} {r.body!r}')
+    r = get('/gone')
+    check(r.status == 404 and r.body == b'NOT FOUND', '404 规则返回 404.html 内容', f'{r.status} {r.body!r}')
+    r = get('/missing')
+    check(r.status == 404 and r.body == b'NOT FOUND', '没有规则也没有文件时返回 404.html', f'{r.status}')
+    r = get('/_headers')
+    check(r.status == 404, '_headers 不对外提供', f'{r.status}')
+    r = get('/guide', **{'accept-encoding': 'gzip'})
+    check(r.headers.get('content-encoding') == 'gzip' and gzip.decompress(r.body) == b'GUIDE'
+          and r.headers['etag'].endswith('-gzip"'), '/guide → guide.html，按 Accept-Encoding 发送 .gz 副本',
+          f"{r.headers}")
+    etag = get('/guide').headers['etag']
+    r = get('/guide', **{'if-none-match': etag})
+    check(r.status == 304 and not r.body, 'If-None-Match 与 ETag 一致时返回 304', f'{r.status}')
+    r = get('/assets/app.css')
+    check(r.headers['cache-control'] == 'public, max-age=60, immutable' and 'x-frame-options' not in r.headers,
+          '响应头经过 _headers 规则', f"{r.headers}")
+
+
+class Origin:
+    """可编程的上游：按路径返回设定的 Cache-Control / ETag / 内容，处理 If-None-Match，记录调用次数"""
+
+    def __init__(self):
+        self.resources: dict[str, tuple[str, str, bytes]] = {}
+        self.calls = 0
+
+    async def __call__(self, request: Request) -> Response:
+        self.calls += 1
+        if request.method != 'GET':
+            return Response(204, {})
+        cache_control, etag, body = self.resources[request.path]
+        headers = {'cache-control': cache_control, 'vary': 'Accept-Encoding'}
+        if etag:
+            headers['etag'] = etag
+        if etag and request.headers.get('if-none-match') == etag:
+            return Response(304, headers)
+        return Response(200, headers, body)
+
+
+def check_cache(check: Checker):
+    print("\n🗄️ HttpCache")
+    now = [0.0]
+    origin = Origin()
+
+    def run(cache: HttpCache, path: str, at: float, method: str = 'GET', **headers) -> tuple[Response, str, int]:
+        """在时刻 at 请求 path，返回 (响应, 缓存状态, 本次上游调用次数)"""
+        now[0] = at
+        before = origin.calls
+        headers.setdefault('accept-encoding', 'br')
+        response, state = asyncio.run(cache.fetch(Request(method, path, '', headers), origin))
+        return response, state, origin.calls - before
+
+    def states(cache: HttpCache, path: str, times: list[float], **headers) -> list[str]:
+        return [run(cache, path, t, **headers)[1] for t in times]
+
+    edge = HttpCache(shared=True, clock=lambda: now[0])
+    browser = HttpCache(shared=False, clock=lambda: now[0])
+
+    origin.resources['/fresh'] = ('public, max-age=10', '"v1"', b'one')
+    got = states(edge, '/fresh', [0, 5, 11, 15, 22])
+    check(got == ['MISS', 'HIT', 'REVALIDATED', 'HIT', 'REVALIDATED'],
+          'max-age=10：新鲜期内命中，过期后用 ETag 重新验证，304 后重新计时', got)
+    response, _, _ = run(edge, '/fresh', 25)
+    check(response.headers.get('age') == '3' and response.body == b'one', '命中时 Age 为已缓存的秒数',
+          response.headers.get('age'))
+
+    origin.resources['/fresh'] = ('public, max-age=10', '"v2"', b'two')
+    response, state, calls = run(edge, '/fresh', 40)
+    check(state == 'MISS' and response.body == b'two' and calls == 1, '过期后源站内容已变化：取回新内容',
+          f'{state} {response.body!r}')
+    check(run(edge, '/fresh', 41)[0].body == b'two', '新内容被存入缓存')
+
+    origin.resources['/noetag'] = ('public, max-age=10', '', b'x')
+    got = states(edge, '/noetag', [0, 5, 11])
+    check(got == ['MISS', 'HIT', 'MISS'], '没有 ETag 时过期即未命中', got)
+
+    origin.resources['/smax'] = ('public, max-age=0, s-maxage=100', '"s"', b's')
+    got_edge = states(edge, '/smax', [0, 50, 101])
+    got_browser = states(browser, '/smax', [0, 1])
+    check(got_edge == ['MISS', 'HIT', 'REVALIDATED'] and got_browser == ['MISS', 'REVALIDATED'],
+          's-maxage 只对共享缓存生效，浏览器按 max-age=0 每次重新验证', f'{got_edge} {got_browser}')
+
+    origin.resources['/private'] = ('private, max-age=60', '"p"', b'p')
+    got_edge = states(edge, '/private', [0, 1])
+    got_browser = states(browser, '/private', [0, 1])
+    check(got_edge == ['MISS', 'MISS'] and got_browser == ['MISS', 'HIT'], 'private 不进共享缓存，浏览器可以缓存',
+          f'{got_edge} {got_browser}')
+
+    origin.resources['/nostore'] = ('no-store, max-age=60', '"n"', b'n')
+    got = states(edge, '/nostore', [0, 1])
+    check(got == ['MISS', 'MISS'], 'no-store 不缓存', got)
+
+    origin.resources['/nocache'] = ('no-cache, max-age=60', '"c"', b'c')
+    got = states(edge, '/nocache', [0, 1, 2])
+    check(got == ['MISS', 'REVALIDATED', 'REVALIDATED'], 'no-cache 有 ETag 时每次重新验证', got)
+
+    page = HttpCache(shared=True, clock=lambda: now[0])
+    origin.resources['/page'] = ('public, max-age=0, must-revalidate', '"page"', b'<html>')
+    got = states(page, '/page', [0, 1, 2, 3, 4])
+    check(got == ['MISS'] + ['REVALIDATED'] * 4 and page.stats.hit_ratio == 0 and page.stats.origin_ratio == 1,
+          'max-age=0, must-revalidate：每次回源重新验证，命中率 0%、回源 100%',
+          f'{got} 命中率 {page.stats.hit_ratio:.0%}')
+
+    vary = HttpCache(shared=True, clock=lambda: now[0])
+    origin.resources['/vary'] = ('public, max-age=60', '"v"', b'v')
+    got = [run(vary, '/vary', 0, **{'accept-encoding': enc})[1] for enc in ('br', 'gzip', 'br', 'gzip, br', 'gzip')]
+    check(got == ['MISS', 'MISS', 'HIT', 'HIT', 'HIT'],
+          'Vary: Accept-Encoding：br 与 gzip 分开存储，"gzip, br" 归一化为 br', got)
+
+    _, state, _ = run(vary, '/vary', 1, method='POST')
+    got = run(vary, '/vary', 2)[1]
+    check(state == 'BYPASS' and got == 'MISS', 'POST 绕过缓存并使该 URL 的缓存失效', f'{state} {got}')
+
+    response, state, calls = run(vary, '/vary', 3, **{'if-none-match': '"v"'})
+    check(response.status == 304 and state == 'HIT' and calls == 0, '客户端条件请求由缓存直接回 304',
+          f'{response.status} {state}')
+
+    small = HttpCache(capacity=600, shared=True, clock=lambda: now[0])
+    for name in 'abc':
+        origin.resources[f'/{name}'] = ('public, max-age=60', '', bytes(250))
+    states(small, '/a', [0])
+    states(small, '/b', [0])
+    states(small, '/a', [1])
+    states(small, '/c', [2])
+    got = [states(small, f'/{name}', [3])[0] for name in 'ab']
+    check(got == ['HIT', 'MISS'] and small.stats.evictions >= 1, '超出容量时淘汰最久未使用的条目', got)
+
+
+def check_ratios(check: Checker):
+    print("\n📊 命中率")
+    stats = CacheStats(hits=1, revalidated=7, misses=2)
+    check(abs(stats.hit_ratio - 0.1) < 1e-9 and abs(stats.origin_ratio - 0.9) < 1e-9,
+          'CacheStats：重新验证不计为命中，计入回源', f'{stats.hit_ratio:.0%} / {stats.origin_ratio:.0%}')
+    report = LoadReport(edge={'HIT': 2, 'REVALIDATED': 10786, 'MISS': 2, 'DYNAMIC': 5})
+    check(report.edge_hit_ratio < 0.001 and report.edge_origin_ratio > 0.999,
+          'LoadReport：10,790 次查找中 10,788 次回源时命中率约 0%（DYNAMIC 不计入）',
+          f'{report.edge_hit_ratio:.1%} / {report.edge_origin_ratio:.1%}')
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='边缘节点模拟的规则与缓存逻辑自检')
+    parser.parse_args()
+
+    check = Checker()
+    site = Path(tempfile.mkdtemp(prefix='edge-bench-'))
+    try:
+        make_site(site)
+        check_headers(check)
+        check_pages(check, site)
+        check_cache(check)
+        check_ratios(check)
+    finally:
+        shutil.rmtree(site, ignore_errors=True)
+    print()
+    print("✅ 全部通过" if check.ok else "❌ 存在不符合预期的结果")
+    return 0 if check.ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+html_minify.py 压缩结果的渲染等价检查
+
+功能：
+- 压缩给定页面（默认 website/*.html 与由 README.md 生成的 guide），逐个检查压缩前后渲染等价：
+  元素树与属性、按块级边界折叠空白后的可见文本、每个元素命中的 CSS 声明及其引用的 @keyframes
+- 元素树与可见文本另用标准库 html.parser 独立解析再比较一次，被删除的选择器也在独立解析的树上
+  用另一套求值逻辑确认匹配不到任何元素
+- 负例：故意改动压缩结果（删属性、改文字、删元素、加回被删选择器命中的元素），检查器必须报告差异
+- check_equivalence 也供 bench_readme_to_guide.py 的 minify 基准使用
+
+使用方法：
+    python scripts/bench_html_minify.py
+    python scripts/bench_html_minify.py website/guide.html --keep .active
+"""
+
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from html_minify import (BLOCK_ELEMENTS, DYNAMIC_PSEUDO_CLASSES, LEGACY_PSEUDO_ELEMENTS,  # noqa: E402
+                         PRESERVE_ELEMENTS, VOID_ELEMENTS, _WS_RE, CssAtRule, CssRule, Element, ElementIndex,
+                         Text, UnsupportedSelector, _animation_names, iter_elements, matches, minify_declarations,
+                         minify_html, minify_prelude, parse_css, parse_html, parse_selector, serialize_css)
+
+
+def _rendered_text(root: Element) -> str:
+    """按 CSS 正常流规则折叠空白后的可见文本
+
+    行内元素对空白折叠透明，只保留文本；块级元素边界记为换行，
+    紧邻换行的空白不可见。
+    """
+    parts: list[str] = []
+
+    def walk(el: Element):
+        for child in el.children:
+            if isinstance(child, Text):
+                if el.tag in PRESERVE_ELEMENTS:
+                    parts.append(f'\x02{child.data}\x02')
+                else:
+                    parts.append(_WS_RE.sub(' ', child.data))
+            elif isinstance(child, Element):
+                if child.tag in ('style', 'script', 'template'):
+                    continue
+                if child.is_block:
+                    parts.append('\x01')
+                    walk(child)
+                    parts.append('\x01')
+                else:
+                    walk(child)
+
+    walk(root)
+    text = re.sub(r' +', ' ', ''.join(parts))
+    return re.sub(r'[ \x01]*\x01[ \x01]*', '\n', text)
+
+
+def _cascade(root: Element) -> tuple[list[list[tuple]], dict]:
+    """每个元素（文档顺序）命中的 (上下文, 声明) 列表，以及被引用的 @keyframes 定义"""
+    index = ElementIndex(root)
+    styles = [''.join(c.data for c in el.children if isinstance(c, Text))
+              for el in index.elements if el.tag == 'style']
+    position = {id(el): i for i, el in enumerate(index.elements)}
+    matched: list[list[tuple]] = [[] for _ in index.elements]
+    keyframes: dict[str, str] = {}
+
+    def visit(items: list, context: tuple):
+        for item in items:
+            if isinstance(item, CssRule):
+                decls = minify_declarations(item.declarations)
+                for text in item.selectors:
+                    try:
+                        selector = parse_selector(text)
+                    except UnsupportedSelector:
+                        continue
+                    for el in index.candidates(selector):
+                        if matches(el, selector):
+                            matched[position[id(el)]].append((context, decls))
+            elif isinstance(item, CssAtRule) and item.keyword.endswith('keyframes'):
+                keyframes[item.prelude.strip()] = serialize_css(item.children)
+            elif isinstance(item, CssAtRule) and item.children is not None:
+                visit(item.children, context + (f'@{item.keyword} {minify_prelude(item.prelude)}',))
+
+    for css in styles:
+        visit(parse_css(css), ())
+    return matched, keyframes
+
+
+# ----------------------------------------------------------------------------
+# 独立校验：标准库 html.parser 建树，另写一套选择器求值，不复用 html_minify 的正则解析与匹配
+# ----------------------------------------------------------------------------
+
+class _StdNode:
+    """html.parser 建出的元素节点"""
+    __slots__ = ('tag', 'attrs', 'parent', 'children', 'elements', 'position')
+
+    def __init__(self, tag: str, attrs: dict, parent: Optional['_StdNode']):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children: list = []  # _StdNode 或 str
+        self.elements: list['_StdNode'] = []  # 子元素
+        self.position = 0  # 在父元素的子元素中的位置
+
+
+class _StdTreeBuilder(HTMLParser):
+    """按 html.parser 的事件建树：空元素不入栈，结束标签闭合最近的同名元素，找不到则忽略"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _StdNode('#document', {}, None)
+        self.stack = [self.root]
+
+    def _open(self, tag: str, attrs: list) -> _StdNode:
+        values: dict[str, str] = {}
+        for name, value in attrs:
+            values.setdefault(name, value or '')
+        parent = self.stack[-1]
+        node = _StdNode(tag, values, parent)
+        node.position = len(parent.elements)
+        parent.children.append(node)
+        parent.elements.append(node)
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._open(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        children = self.stack[-1].children
+        if children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+
+
+def _std_parse(html: str) -> _StdNode:
+    builder = _StdTreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _std_outline(root: _StdNode) -> list[tuple]:
+    """元素树轮廓：按文档顺序的 (深度, 标签, 属性, <script> 的原样内容)"""
+    outline = []
+
+    def walk(node: _StdNode, depth: int):
+        for child in node.elements:
+            script = ''.join(c for c in child.children if isinstance(c, str)) if child.tag == 'script' else None
+            outline.append((depth, child.tag, sorted(child.attrs.items()), script))
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return outline
+
+
+def _std_text(root: _StdNode) -> str:
+    """可见文本：块级元素处断行，行内连续空白折叠为一个空格，行首行尾空白丢弃；<pre> 等原样保留"""
+    lines: list[list[tuple[str, bool]]] = [[]]
+
+    def walk(node: _StdNode, preserve: bool):
+        for child in node.children:
+            if isinstance(child, str):
+                lines[-1].append((child, preserve))
+            elif child.tag in ('style', 'script', 'template'):
+                continue
+            elif child.tag in BLOCK_ELEMENTS:
+                lines.append([])
+                walk(child, preserve or child.tag in PRESERVE_ELEMENTS)
+                lines.append([])
+            else:
+                walk(child, preserve or child.tag in PRESERVE_ELEMENTS)
+
+    walk(root, False)
+    rendered = []
+    for line in lines:
+        out = ''
+        space = True  # 行首或刚输出过空格：之后的空白不可见
+        for text, preserve in line:
+            if not preserve:
+                text = re.sub(r'[ \t\n\r\f]+', ' ', text)
+                if space and text.startswith(' '):
+                    text = text[1:]
+            if text:
+                out += text
+                space = not preserve and text.endswith(' ')
+        if space and out.endswith(' '):
+            out = out[:-1]
+        if out:
+            rendered.append(out)
+    return '\n'.join(rendered)
+
+
+def _std_split(text: str) -> list[str]:
+    """按顶层逗号切分选择器列表（忽略括号、方括号与引号内的逗号）"""
+    parts, depth, quote, start = [], 0, '', 0
+    for i, ch in enumerate(text):
+        if quote:
+            quote = '' if ch == quote else quote
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts]
+
+
+def _std_nth(arg: str) -> tuple[int, int]:
+    """an+b → (a, b)"""
+    arg = arg.replace(' ', '').lower()
+    if arg in ('odd', 'even'):
+        return 2, int(arg == 'odd')
+    if 'n' not in arg:
+        return 0, int(arg)
+    a, _, b = arg.partition('n')
+    a = int(a + '1') if a in ('', '+', '-') else int(a)
+    return a, int(b) if b else 0
+
+
+class _StdSelectorEngine:
+    """在 html.parser 建出的树上求选择器命中的元素集合
+
+    从左到右逐段求集合：先求第一段复合选择器命中的元素，再按组合符筛出与上一段集合相邻 / 嵌套的元素。
+    :not() / :is() 的参数整体求出集合后按成员判断。遇到不认识的写法抛出 ValueError。
+    """
+
+    def __init__(self, root: _StdNode):
+        self.elements: list[_StdNode] = []
+        stack = list(reversed(root.elements))
+        while stack:
+            node = stack.pop()
+            self.elements.append(node)
+            stack.extend(reversed(node.elements))
+        self._cache: dict[str, set[int]] = {}
+
+    def select(self, selector: str) -> set[int]:
+        """命中元素的 id() 集合"""
+        selector = selector.strip()
+        if selector not in self._cache:
+            self._cache[selector] = self._evaluate(selector)
+        return self._cache[selector]
+
+    def _evaluate(self, selector: str) -> set[int]:
+        matched: Optional[set[int]] = None
+        for combinator, tests in self._split(selector):
+            ids = set()
+            for node in self.elements:
+                if all(test(node) for test in tests) and (matched is None or self._related(node, combinator, matched)):
+                    ids.add(id(node))
+            matched = ids
+        return matched or set()
+
+    @staticmethod
+    def _related(node: _StdNode, combinator: str, previous: set[int]) -> bool:
+        siblings = node.parent.elements
+        if combinator == '>':
+            return id(node.parent) in previous
+        if combinator == '+':
+            return node.position > 0 and id(siblings[node.position - 1]) in previous
+        if combinator == '~':
+            return any(id(s) in previous for s in siblings[:node.position])
+        parent = node.parent
+        while parent.parent is not None:
+            if id(parent) in previous:
+                return True
+            parent = parent.parent
+        return False
+
+    def _split(self, selector: str) -> list[tuple[str, list]]:
+        """切成 [(组合符, 复合选择器的测试函数列表)]，第一段的组合符为空"""
+        steps = []
+        combinator, pos = '', 0
+        while pos < len(selector):
+            ch = selector[pos]
+            if ch.isspace():
+                combinator = combinator or ' '
+                pos += 1
+            elif ch in '>+~':
+                combinator = ch
+                pos += 1
+            else:
+                tests, pos = self._compound(selector, pos)
+                if steps and not combinator:
+                    raise ValueError(selector)
+                steps.append((combinator, tests))
+                combinator = ''
+        if not steps or combinator.strip():
+            raise ValueError(selector)
+        return steps
+
+    @staticmethod
+    def _ident(text: str, pos: int) -> tuple[str, int]:
+        end = pos
+        while end < len(text) and (text[end].isalnum() or text[end] in '-_' or ord(text[end]) > 127):
+            end += 1
+        if end == pos:
+            raise ValueError(text[pos:])
+        return text[pos:end], end
+
+    def _compound(self, text: str, pos: int) -> tuple[list, int]:
+        tests = []
+        while pos < len(text) and not text[pos].isspace() and text[pos] not in '>+~':
+            ch = text[pos]
+            if ch == '*':
+                pos += 1
+            elif ch == '#':
+                name, pos = self._ident(text, pos + 1)
+                tests.append(lambda n, v=name: n.attrs.get('id') == v)
+            elif ch == '.':
+                name, pos = self._ident(text, pos + 1)
+                tests.append(lambda n, v=name: v in n.attrs.get('class', '').split())
+            elif ch == '[':
+                end = text.index(']', pos)
+                tests.append(self._attribute(text[pos + 1:end]))
+                pos = end + 1
+            elif ch == ':':
+                element = text.startswith('::', pos)
+                name, pos = self._ident(text, pos + 2 if element else pos + 1)
+                arg = None
+                if text.startswith('(', pos):
+                    depth, end = 0, pos
+                    for end in range(pos, len(text)):
+                        depth += {'(': 1, ')': -1}.get(text[end], 0)
+                        if depth == 0:
+                            break
+                    arg, pos = text[pos + 1:end], end + 1
+                test = None if element else self._pseudo(name.lower(), arg)
+                if test is not None:
+                    tests.append(test)
+            else:
+                name, pos = self._ident(text, pos)
+                tests.append(lambda n, v=name.lower(): n.tag == v)
+        return tests, pos
+
+    @staticmethod
+    def _attribute(body: str):
+        m = re.fullmatch(r'''\s*([^\s~|^$*=]+)\s*(?:([~|^$*]?=)\s*("[^"]*"|'[^']*'|[^\s"']+)\s*([iIsS])?\s*)?''', body)
+        if not m:
+            raise ValueError(body)
+        name, op, value, flag = m.group(1).lower(), m.group(2), m.group(3), m.group(4)
+        if op is None:
+            return lambda n: name in n.attrs
+        if value[0] in '"\'':
+            value = value[1:-1]
+        fold = flag in ('i', 'I')
+        if fold:
+            value = value.lower()
+        compare = {
+            '=': lambda actual: actual == value,
+            '~=': lambda actual: value in actual.split(),
+            '|=': lambda actual: actual == value or actual.startswith(value + '-'),
+            '^=': lambda actual: value != '' and actual.startswith(value),
+            '$=': lambda actual: value != '' and actual.endswith(value),
+            '*=': lambda actual: value != '' and value in actual,
+        }[op]
+        return lambda n: name in n.attrs and compare(n.attrs[name].lower() if fold else n.attrs[name])
+
+    def _pseudo(self, name: str, arg: Optional[str]):
+        """伪类的测试函数；交互状态与旧式伪元素视为可能成立，返回 None"""
+        if name in DYNAMIC_PSEUDO_CLASSES or name in LEGACY_PSEUDO_ELEMENTS:
+            return None
+        if name in ('not', 'is', 'where') and arg:
+            ids = set().union(*(self.select(s) for s in _std_split(arg)))
+            return (lambda n: id(n) not in ids) if name == 'not' else (lambda n: id(n) in ids)
+        if name == 'root' and arg is None:
+            return lambda n: n.parent.parent is None
+        if name == 'empty' and arg is None:
+            return lambda n: not any(isinstance(c, _StdNode) or c for c in n.children)
+        kinds = {'first-child': (0, 1, False), 'last-child': (0, 1, True), 'first-of-type': (0, 1, False),
+                 'last-of-type': (0, 1, True)}
+        if name in kinds and arg is None:
+            a, b, reverse = kinds[name]
+        elif name in ('only-child', 'only-of-type') and arg is None:
+            typed = name.endswith('of-type')
+            return lambda n: len([s for s in n.parent.elements if not typed or s.tag == n.tag]) == 1
+        elif name.startswith('nth-') and name[4:] in ('child', 'last-child', 'of-type', 'last-of-type') and arg:
+            a, b = _std_nth(arg)
+            reverse = '-last-' in name
+        else:
+            raise ValueError(f':{name}')
+        typed = name.endswith('of-type')
+
+        def test(n: _StdNode) -> bool:
+            siblings = [s for s in n.parent.elements if not typed or s.tag == n.tag]
+            if reverse:
+                siblings.reverse()
+            k = next(i for i, s in enumerate(siblings) if s is n) + 1
+            return k == b if a == 0 else (k - b) % a == 0 and (k - b) // a >= 0
+        return test
+
+
+def _check_independent(original: str, minified: str, removed: Iterable[str]) -> list[str]:
+    """用 html.parser 重新解析两份页面，比较元素树与可见文本，并确认被删除的选择器确实匹配不到任何元素"""
+    problems = []
+    a, b = _std_parse(original), _std_parse(minified)
+    oa, ob = _std_outline(a), _std_outline(b)
+    if oa != ob:
+        pos = next((i for i, (x, y) in enumerate(zip(oa, ob)) if x != y), min(len(oa), len(ob)))
+        got = ob[pos][1] if pos < len(ob) else '（无）'
+        want = oa[pos][1] if pos < len(oa) else '（无）'
+        problems.append(f'html.parser 元素树在第 {pos} 个元素处不同: <{want}> != <{got}>')
+    ta, tb = _std_text(a), _std_text(b)
+    if ta != tb:
+        pos = next((i for i, (p, q) in enumerate(zip(ta, tb)) if p != q), min(len(ta), len(tb)))
+        problems.append(f'html.parser 可见文本在第 {pos} 个字符处不同: {ta[max(0, pos - 30):pos + 30]!r} != '
+                        f'{tb[max(0, pos - 30):pos + 30]!r}')
+    engine = None
+    for selector in removed:
+        engine = engine or _StdSelectorEngine(a)
+        try:
+            hits = engine.select(selector)
+        except ValueError:
+            problems.append(f'已删除的选择器无法独立验证: {selector}')
+            continue
+        if hits:
+            problems.append(f'已删除的选择器在 html.parser 解析结果中命中 {len(hits)} 个元素: {selector}')
+    return problems
+
+
+def check_equivalence(original: str, minified: str, removed: Iterable[str] = ()) -> list[str]:
+    """比较两份页面的渲染等价性，返回差异描述（空列表表示等价）
+
+    检查三项：元素树（标签与属性）、按块级边界折叠空白后的可见文本、
+    每个元素命中的 CSS 声明（同一元素上规则的先后顺序也需一致）及其引用的 @keyframes。
+    前两项另用 html.parser 独立解析再比较一次；removed 为压缩时删除的选择器（MinifyStats.removed_selectors），
+    在独立解析的原页面上逐个求值，命中任何元素或无法求值都算失败。
+    """
+    problems = _check_independent(original, minified, removed)
+    a, b = parse_html(original), parse_html(minified)
+    ea, eb = list(iter_elements(a)), list(iter_elements(b))
+    if len(ea) != len(eb):
+        return problems + [f'元素数量不同: {len(ea)} != {len(eb)}']
+    for x, y in zip(ea, eb):
+        if x.tag != y.tag or x.attrs != y.attrs:
+            problems.append(f'元素不同: <{x.tag} {x.attrs}> != <{y.tag} {y.attrs}>')
+            return problems
+        if (x.parent.tag, x.index) != (y.parent.tag, y.index):
+            problems.append(f'元素位置不同: <{x.tag}>')
+            return problems
+
+    ta, tb = _rendered_text(a), _rendered_text(b)
+    if ta != tb:
+        pos = next((i for i, (p, q) in enumerate(zip(ta, tb)) if p != q), min(len(ta), len(tb)))
+        problems.append(f'可见文本在第 {pos} 个字符处不同: {ta[max(0, pos - 30):pos + 30]!r} != '
+                        f'{tb[max(0, pos - 30):pos + 30]!r}')
+
+    ca, ka = _cascade(a)
+    cb, kb = _cascade(b)
+    for el, x, y in zip(ea, ca, cb):
+        if x != y:
+            problems.append(f'<{el.tag} class="{el.attrs.get("class", "")}"> 命中的样式不同')
+            break
+    used = set()
+    for decls in ca:
+        for _, d in decls:
+            used |= _animation_names(d)
+    for name in sorted(used & set(ka)):
+        if ka[name] != kb.get(name):
+            problems.append(f'@keyframes {name} 不同')
+    return problems
+
+
+# 负例：(名称, 改动压缩结果的函数)。改动后检查器必须报告至少一处差异
+MUTATIONS = [
+    ("删除一个 class 属性", lambda html: re.sub(r' class="[^"]*"', '', html, count=1)),
+    ("改动一段可见文字", lambda html: re.sub(r'>([^<\s][^<]*)<', lambda m: '>X' + m.group(1)[1:] + '<', html, count=1)),
+    ("删除一个空元素", lambda html: re.sub(r'<(br|img|hr|meta|link)\b[^>]*>', '', html, count=1)),
+    ("块级边界处插入文字", lambda html: html.replace('</div>', 'x</div>', 1)),
+]
+
+
+def check_page(name: str, html: str, keep: list[str], prune_with_scripts: bool) -> bool:
+    """压缩一个页面并检查等价；返回是否通过"""
+    start = time.perf_counter()
+    minified, stats = minify_html(html, keep=keep, prune_with_scripts=prune_with_scripts)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    problems = check_equivalence(html, minified, stats.removed_selectors)
+    checked = time.perf_counter() - start
+    ratio = stats.minified_bytes / max(stats.original_bytes, 1)
+    flag = '❌' if problems else '✅'
+    print(f"   {flag} {name}: {stats.original_bytes:,} → {stats.minified_bytes:,} 字节（{ratio:.1%}），"
+          f"剔除 {len(stats.removed_selectors)} 个选择器，压缩 {elapsed * 1000:.1f} ms，检查 {checked * 1000:.1f} ms")
+    if stats.prune_skipped:
+        print(f"      ⚠️ 未剔除 CSS 规则: {stats.prune_skipped}")
+    for problem in problems:
+        print(f"      ❌ {problem}")
+    return not problems
+
+
+def check_mutations(html: str) -> bool:
+    """改动压缩结果后检查器必须报告差异，避免检查本身失效而一律通过"""
+    minified, stats = minify_html(html)
+    ok = True
+    for name, mutate in MUTATIONS:
+        broken = mutate(minified)
+        if broken == minified:
+            print(f"   ⚠️ {name}: 页面中没有可改动之处，跳过")
+            continue
+        problems = check_equivalence(html, broken, stats.removed_selectors)
+        ok = ok and bool(problems)
+        print(f"   {'✅' if problems else '❌'} {name}: {problems[0] if problems else '未发现差异'}")
+    if stats.removed_selectors:
+        # 声称删除了一个实际会命中元素的选择器
+        problems = check_equivalence(html, minified, stats.removed_selectors + ['div'])
+        hit = any('div' in problem for problem in problems)
+        ok = ok and hit
+        print(f"   {'✅' if hit else '❌'} 删除列表中混入命中元素的选择器: {'已报告' if hit else '未发现'}")
+    return ok
+
+
+def main():
+    import argparse
+    from readme_to_guide import generate_guide_html, parse_readme
+    parser = argparse.ArgumentParser(description='检查 html_minify 压缩前后渲染等价')
+    parser.add_argument('files', nargs='*', help='HTML 文件（默认 website/*.html 与由 README.md 生成的 guide）')
+    parser.add_argument('--keep', action='append', default=[], help='始终保留的选择器（可多次指定）')
+    parser.add_argument('--prune-with-scripts', action='store_true',
+                        help='页面含 <script> 时也剔除规则（需用 --keep 列出脚本添加的选择器）')
+    args = parser.parse_args()
+
+    root = Path(__file__).parent.parent
+    pages = [(name, Path(name).read_text(encoding='utf-8')) for name in args.files]
+    if not args.files:
+        pages = [(f'website/{p.name}', p.read_text(encoding='utf-8'))
+                 for p in sorted((root / 'website').glob('*.html'))]
+        readme = root / 'README.md'
+        if readme.exists():
+            pages.append(('README.md → guide', generate_guide_html(parse_readme(readme))))
+
+    print(f"🔍 压缩前后渲染等价（{len(pages)} 个页面）")
+    ok = True
+    for name, html in pages:
+        ok = check_page(name, html, args.keep, args.prune_with_scripts) and ok
+
+    if pages:
+        name, html = pages[-1]
+        print(f"\n💥 负例：改动 {name} 的压缩结果")
+        ok = check_mutations(html) and ok
+
+    print()
+    print("✅ 全部通过" if ok else "❌ 存在压缩前后不等价的页面")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+manifest_bin.py 性能基准：二进制 manifest 与 json.load 对比
+
+功能：
+- 以 resources/manifest.json 为基础，按倍数放大生成更大的清单（路径加上不同的目录前缀）
+- 文件大小：JSON 与二进制
+- 加载：json.load 整体解析 与 mmap 打开二进制（以及二进制完整解码为字典）
+- 内存：tracemalloc 峰值；缺页次数（ru_minflt，反映实际触及的页数）
+- 查找：打开后随机按路径查找的单次耗时；以及"冷启动只查一个文件"的端到端耗时
+- 往返：JSON → 二进制 → JSON 逐字节一致
+
+使用方法：
+    python scripts/bench_manifest_bin.py
+    python scripts/bench_manifest_bin.py --scales 1,10,100 --lookups 50000
+"""
+
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_manifest import dump_manifest  # noqa: E402
+from manifest_bin import BinaryManifest, decode_manifest, encode_manifest  # noqa: E402
+
+
+def scale_manifest(manifest: dict, factor: int) -> dict:
+    """把清单放大 factor 倍：每份副本的路径加上不同的前缀（仍按路径排序）"""
+    if factor == 1:
+        return manifest
+    files = [{'path': f"v{k:03d}/{e['path']}", 'size': e['size'], 'hash': e['hash']}
+             for k in range(factor) for e in manifest['files']]
+    return {**manifest, 'total_size': manifest['total_size'] * factor, 'files': files}
+
+
+def best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_memory(func) -> tuple[int, int]:
+    """返回 (tracemalloc 峰值字节数, 缺页次数)"""
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+    del result
+    return peak, faults
+
+
+def bench_scale(manifest: dict, factor: int, workdir: Path, lookups: int, repeat: int, seed: int) -> bool:
+    scaled = scale_manifest(manifest, factor)
+    json_bytes = dump_manifest(scaled)
+    bin_bytes = encode_manifest(scaled)
+    json_path = workdir / f'manifest-{factor}.json'
+    bin_path = workdir / f'manifest-{factor}.bin'
+    json_path.write_bytes(json_bytes)
+    bin_path.write_bytes(bin_bytes)
+    count = len(scaled['files'])
+    print(f"\n📦 {count:,} 个文件（×{factor}）")
+    print(f"   大小: JSON {len(json_bytes):,} 字节 → 二进制 {len(bin_bytes):,} 字节"
+          f"（{len(bin_bytes) / len(json_bytes):.1%}）")
+
+    roundtrip_ok = dump_manifest(decode_manifest(bin_bytes)) == json_bytes
+    print(f"   往返转换: {'✅ 逐字节一致' if roundtrip_ok else '❌ 不一致'}")
+
+    def load_json():
+        with open(json_path, 'rb') as f:
+            return json.load(f)
+
+    def open_bin():
+        bm = BinaryManifest.open(bin_path)
+        bm.close()
+
+    def decode_bin():
+        with BinaryManifest.open(bin_path) as bm:
+            return bm.to_manifest()
+
+    t_json = best_of(load_json, repeat)
+    t_open = best_of(open_bin, repeat)
+    t_decode = best_of(decode_bin, max(1, repeat // 2))
+    print(f"   加载: json.load {t_json * 1000:,.2f} ms | mmap 打开 {t_open * 1000:,.3f} ms"
+          f"（{t_json / t_open:,.0f}×）| 完整解码 {t_decode * 1000:,.1f} ms")
+
+    rng = random.Random(seed)
+    paths = [e['path'] for e in scaled['files']]
+    targets = [rng.choice(paths) for _ in range(lookups)]
+
+    def cold_json():
+        data = load_json()
+        return {e['path']: e for e in data['files']}[targets[0]]
+
+    def cold_bin():
+        with BinaryManifest.open(bin_path) as bm:
+            return bm.lookup(targets[0])
+
+    peak_json, faults_json = measure_memory(cold_json)
+    peak_bin, faults_bin = measure_memory(cold_bin)
+    print(f"   内存（冷启动查 1 个文件）: json {peak_json / 1024 / 1024:,.1f} MB，缺页 {faults_json:,} | "
+          f"二进制 {peak_bin / 1024:,.1f} KB，缺页 {faults_bin:,}")
+    t_cold_json = best_of(cold_json, repeat)
+    t_cold_bin = best_of(cold_bin, repeat)
+    print(f"   冷启动查 1 个文件: json {t_cold_json * 1000:,.2f} ms | 二进制 {t_cold_bin * 1e6:,.1f} µs")
+
+    index = {e['path']: e for e in load_json()['files']}
+    with BinaryManifest.open(bin_path) as bm:
+        start = time.perf_counter()
+        for p in targets:
+            bm.lookup(p)
+        t_bin = (time.perf_counter() - start) / lookups
+        found = all(bm.lookup(p) == index[p] for p in targets[:1000])
+    start = time.perf_counter()
+    for p in targets:
+        index.get(p)
+    t_dict = (time.perf_counter() - start) / lookups
+    print(f"   热查找（单次）: dict {t_dict * 1e6:,.2f} µs | 二进制 {t_bin * 1e6:,.2f} µs"
+          f"（抽查结果一致: {'✅' if found else '❌'}）")
+    return roundtrip_ok and found
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='二进制 manifest 与 json.load 的性能对比')
+    parser.add_argument('--manifest', default=str(Path(__file__).parent.parent / 'resources' / 'manifest.json'),
+                        help='基础 manifest.json')
+    parser.add_argument('--scales', default='1,10', help='放大倍数，逗号分隔')
+    parser.add_argument('--lookups', type=int, default=20_000, help='热查找次数')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数（取最短）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    manifest = json.loads(Path(args.manifest).read_text(encoding='utf-8'))
+    ok = True
+    with tempfile.TemporaryDirectory(prefix='manifest-bench-') as tmp:
+        for factor in (int(s) for s in args.scales.split(',')):
+            ok &= bench_scale(manifest, factor, Path(tmp), args.lookups, args.repeat, args.seed)
+    print()
+    print("✅ 全部通过" if ok else "❌ 存在不一致")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+manifest_diff.py 差异与更新计划基准
+
+功能：
+- 生成两个版本的小型安装目录，覆盖新增、删除、修改、移动（含整个目录改名）、两个文件互换内容、
+  旧版本与新版本中的重复内容；检查差异分类、更新计划与需下载的字节数
+- 把更新计划应用到旧目录的副本，核对结果与新版本逐文件一致、移动是改名而不是复制、暂存目录已清理
+- 注入故障：fetch 中途失败；替换阶段第 k 次改名失败（逐个 k 测试）；撤销也失败。
+  前两种安装目录必须保持旧版本原样，最后一种抛出 UpdateError 并保留暂存目录
+- 大清单比较耗时
+
+使用方法：
+    python scripts/bench_manifest_diff.py
+    python scripts/bench_manifest_diff.py --entries 500000
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import manifest_diff  # noqa: E402
+from build_manifest import build_manifest  # noqa: E402
+from manifest_diff import UpdateError, apply_update_plan, diff_manifests, make_update_plan  # noqa: E402
+
+
+def make_versions(rng: random.Random) -> tuple[dict[str, bytes], dict[str, bytes]]:
+    """两个版本的文件内容（相对路径 → 内容）"""
+    blob = lambda size: rng.randbytes(size)  # noqa: E731
+    old = {f'lib/keep{i}.dll': blob(rng.randint(100, 5000)) for i in range(20)}
+    shared, dup, swap_a, swap_b = blob(3000), blob(2000), blob(1500), blob(1600)
+    old.update({
+        'app.exe': blob(8000),                      # 修改为新内容：下载
+        'config.ini': blob(300),                    # 修改为另一个旧文件的内容：本地复制
+        'readme.txt': shared,
+        'obsolete.txt': blob(700),                  # 删除
+        'plugins/old/a.dll': blob(1200),            # 目录改名：移动
+        'plugins/old/b.dll': blob(1300),
+        'swap/x.bin': swap_a,                       # 互换内容
+        'swap/y.bin': swap_b,
+        'dup/one.dat': dup,                         # 旧版本中的重复内容，均移到新路径
+        'dup/two.dat': dup,
+    })
+    new = {path: data for path, data in old.items() if path.startswith('lib/')}
+    fresh = blob(4000)
+    new.update({
+        'app.exe': blob(8200),
+        'config.ini': shared,
+        'readme.txt': shared,
+        'plugins/new/a.dll': old['plugins/old/a.dll'],
+        'plugins/new/b.dll': old['plugins/old/b.dll'],
+        'swap/x.bin': swap_b,
+        'swap/y.bin': swap_a,
+        'data/one.dat': dup,
+        'data/two.dat': dup,
+        'assets/1.bin': fresh,                      # 新版本中的重复内容：只下载一次
+        'assets/2.bin': fresh,
+        'assets/3.bin': fresh,
+        'added.txt': blob(900),                     # 新增
+    })
+    return old, new
+
+
+def write_tree(root: Path, files: dict[str, bytes]):
+    for path, data in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_bytes(data)
+
+
+def snapshot(root: Path) -> dict[str, bytes]:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob('*') if p.is_file()}
+
+
+def all_dirs(root: Path) -> set[str]:
+    return {p.relative_to(root).as_posix() for p in root.rglob('*') if p.is_dir()}
+
+
+class ReplaceFaults:
+    """替换 os.replace：第 fail_at 次（及之后 extra 次）调用抛出 PermissionError，模拟文件被占用"""
+
+    def __init__(self, fail_at: int = 0, extra: int = 0):
+        self.calls = 0
+        self.fail = set(range(fail_at, fail_at + extra + 1)) if fail_at else set()
+        self.original = os.replace
+
+    def __call__(self, src, dest):
+        self.calls += 1
+        if self.calls in self.fail:
+            raise PermissionError(13, '模拟文件被占用', str(dest))
+        self.original(src, dest)
+
+    def __enter__(self):
+        manifest_diff.os.replace = self
+        return self
+
+    def __exit__(self, *exc):
+        manifest_diff.os.replace = self.original
+
+
+def synthetic_manifest(rng: random.Random, count: int) -> dict:
+    files = [{'path': f'dir{i % 97}/file{i}.bin', 'size': rng.randint(0, 1 << 20),
+              'hash': hashlib.sha256(str(i).encode()).hexdigest()} for i in range(count)]
+    return {'version': '1', 'files': files}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='清单差异与更新计划基准')
+    parser.add_argument('--entries', type=int, default=200_000, help='大清单比较的条目数')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    old_files, new_files = make_versions(rng)
+    by_hash = {hashlib.sha256(data).hexdigest(): data for data in new_files.values()}
+    base = Path(tempfile.mkdtemp(prefix='manifest-diff-bench-'))
+    ok = True
+
+    def report(passed: bool, label: str):
+        nonlocal ok
+        ok &= passed
+        print(f"   {'✅' if passed else '❌'} {label}")
+
+    try:
+        write_tree(base / 'old', old_files)
+        write_tree(base / 'new', new_files)
+        old, _ = build_manifest(base / 'old', '1.0.0')
+        new, _ = build_manifest(base / 'new', '1.0.1')
+
+        print("🔍 差异与更新计划")
+        diff = diff_manifests(old, new)
+        plan = make_update_plan(diff, old, new)
+        moved = sorted(n['path'] for _, n in diff.moved)
+        report([e['path'] for e in diff.added] == ['added.txt', 'assets/1.bin', 'assets/2.bin', 'assets/3.bin']
+               and [e['path'] for e in diff.removed] == ['obsolete.txt']
+               and sorted(n['path'] for _, n in diff.modified) == ['app.exe', 'config.ini', 'swap/x.bin', 'swap/y.bin']
+               and moved == ['data/one.dat', 'data/two.dat', 'plugins/new/a.dll', 'plugins/new/b.dll']
+               and diff.unchanged == 21,
+               f"新增 {len(diff.added)}，删除 {len(diff.removed)}，修改 {len(diff.modified)}，"
+               f"移动 {len(diff.moved)}，未变化 {diff.unchanged}")
+        expected_bytes = len(new_files['app.exe']) + len(new_files['assets/1.bin']) + len(new_files['added.txt'])
+        report(plan['download_files'] == 3 and plan['download_bytes'] == expected_bytes
+               and sorted(c[1] for c in plan['copy']) == ['config.ini', 'swap/x.bin', 'swap/y.bin'],
+               f"下载 {plan['download_files']} 份（{plan['download_bytes']:,} 字节，重复内容只下载一次），"
+               f"本地复制 {len(plan['copy'])} 个，移动 {len(plan['move'])} 个")
+
+        fetched = []
+
+        def fetch(digest: str, size: int, dest: Path):
+            fetched.append(digest)
+            data = by_hash[digest]
+            assert len(data) == size
+            dest.write_bytes(data)
+
+        print("\n📦 应用更新计划")
+        install = base / 'install'
+        shutil.copytree(base / 'old', install)
+        inode = (install / 'plugins/old/a.dll').stat().st_ino
+        with ReplaceFaults() as counter:
+            apply_update_plan(plan, install, fetch)
+        renames = counter.calls
+        report(snapshot(install) == new_files and all_dirs(install) == all_dirs(base / 'new'),
+               f"结果与新版本逐文件一致，旧目录已删除、无暂存目录残留（{renames} 次改名）")
+        report((install / 'plugins/new/a.dll').stat().st_ino == inode, "移动通过改名完成，未复制内容")
+        report(len(fetched) == 3, f"fetch 调用 {len(fetched)} 次")
+
+        print("\n💥 注入故障")
+        shutil.rmtree(install)
+        shutil.copytree(base / 'old', install)
+        old_dirs = all_dirs(install)
+
+        def broken_fetch(digest: str, size: int, dest: Path):
+            if fetched:
+                raise ConnectionError('模拟下载中断')
+            fetch(digest, size, dest)
+
+        fetched.clear()
+        try:
+            apply_update_plan(plan, install, broken_fetch)
+            raised = False
+        except ConnectionError:
+            raised = True
+        report(raised and snapshot(install) == old_files and all_dirs(install) == old_dirs,
+               "fetch 第 2 次失败：异常抛出，安装目录保持旧版本原样")
+
+        rolled_back = 0
+        for k in range(1, renames + 1):
+            try:
+                with ReplaceFaults(fail_at=k):
+                    apply_update_plan(plan, install, fetch)
+                raised = None
+            except PermissionError as e:
+                raised = e
+            if raised is not None and snapshot(install) == old_files and all_dirs(install) == old_dirs:
+                rolled_back += 1
+            else:
+                print(f"      ❌ 第 {k} 次改名失败后安装目录未恢复: {raised}")
+                shutil.rmtree(install)
+                shutil.copytree(base / 'old', install)
+        report(rolled_back == renames, f"替换阶段第 1–{renames} 次改名分别失败：{rolled_back} 次完整回滚")
+
+        try:
+            with ReplaceFaults(fail_at=renames // 2, extra=1):
+                apply_update_plan(plan, install, fetch)
+            error = None
+        except UpdateError as e:
+            error = e
+        leftovers = [p for p in install.iterdir() if p.name.startswith('.update-')]
+        report(error is not None and len(leftovers) == 1, "撤销也失败：抛出 UpdateError，保留暂存目录")
+
+        print(f"\n⏱ 大清单比较（{args.entries:,} 个条目，10% 修改、5% 删除、5% 新增、2% 移动）")
+        big_old = synthetic_manifest(rng, args.entries)
+        big_new = {'version': '2', 'files': []}
+        for i, entry in enumerate(big_old['files']):
+            r = i % 100
+            if r < 10:
+                entry = dict(entry, hash=hashlib.sha256(f'm{i}'.encode()).hexdigest())
+            elif r < 15:
+                continue
+            elif r < 17:
+                entry = dict(entry, path='moved/' + entry['path'])
+            big_new['files'].append(entry)
+        big_new['files'] += [{'path': f'new/{i}.bin', 'size': 1, 'hash': hashlib.sha256(f'n{i}'.encode()).hexdigest()}
+                             for i in range(args.entries // 20)]
+        start = time.perf_counter()
+        big_diff = diff_manifests(big_old, big_new)
+        big_plan = make_update_plan(big_diff, big_old, big_new)
+        elapsed = time.perf_counter() - start
+        report(len(big_diff.moved) == args.entries // 50 and len(big_plan['download']) == args.entries // 10
+               + args.entries // 20,
+               f"{elapsed * 1000:.0f} ms（{args.entries / elapsed / 1e6:.2f} M 条目/秒），"
+               f"移动 {len(big_diff.moved):,}，下载 {len(big_plan['download']):,}")
+
+        print()
+        print("✅ 全部通过" if ok else "❌ 存在不符合预期的结果")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    exit(main())
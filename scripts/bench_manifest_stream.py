@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+manifest_stream.py 内存基准：峰值内存不随条目数增长
+
+功能：
+- 用 ManifestWriter 流式写出不同规模（默认 8k 与 800k 条）的合成 manifest
+- 用 ManifestReader 流式读回，边读边累加 total_size 并与写入时核对
+- 对比 json.load 整体读取的峰值内存
+- 小规模时核对流式写出与 dump_manifest 逐字节一致
+- 流式读写的峰值内存（tracemalloc）在最大规模与最小规模之间相差超过 --max-ratio 倍即失败
+
+使用方法：
+    python scripts/bench_manifest_stream.py
+    python scripts/bench_manifest_stream.py --sizes 8000,80000,800000 --max-ratio 1.5
+"""
+
+import hashlib
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_manifest import dump_manifest  # noqa: E402
+from manifest_stream import ManifestReader, ManifestWriter  # noqa: E402
+
+
+FIELDS = {'version': '9.9.9', 'build_time': '2026-01-01T00:00:00+00:00'}
+
+
+def synthetic_entries(count: int):
+    """按路径有序的合成条目（逐个生成，不占用与规模相关的内存）"""
+    for i in range(count):
+        digest = hashlib.sha256(i.to_bytes(8, 'little')).hexdigest()
+        yield f'_internal/pkg{i // 1000:04d}/模块{i:07d}.pyd', (i * 7919) % 5_000_000, digest
+
+
+def measure(func) -> tuple[object, int, float]:
+    """返回 (结果, tracemalloc 峰值字节数, 耗时)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, seconds
+
+
+def write_stream(path: Path, count: int) -> int:
+    with ManifestWriter(path, FIELDS) as writer:
+        for entry in synthetic_entries(count):
+            writer.add(*entry)
+    return writer.total_size
+
+
+def read_stream(path: Path) -> tuple[int, int]:
+    with ManifestReader(path) as reader:
+        total = 0
+        for entry in reader:
+            total += entry['size']
+        if reader.fields.get('total_size') != total:
+            raise ValueError('total_size 与条目之和不一致')
+        return reader.count, total
+
+
+def read_json(path: Path) -> int:
+    with open(path, 'rb') as f:
+        return len(json.load(f)['files'])
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='流式 manifest 读写的峰值内存基准')
+    parser.add_argument('--sizes', default='8000,800000', help='条目数，逗号分隔')
+    parser.add_argument('--max-ratio', type=float, default=1.5, help='最大与最小规模的峰值内存允许比值')
+    parser.add_argument('--skip-json', action='store_true', help='不测 json.load（大规模时很占内存）')
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    print("ℹ️ 耗时在 tracemalloc 开启时测得，绝对值偏高，仅供同一行内对比")
+    peaks = {}
+    ok = True
+    with tempfile.TemporaryDirectory(prefix='manifest-stream-') as tmp:
+        for count in sizes:
+            path = Path(tmp) / f'manifest-{count}.json'
+            total, write_peak, write_s = measure(lambda: write_stream(path, count))
+            (read_count, read_total), read_peak, read_s = measure(lambda: read_stream(path))
+            size_mb = path.stat().st_size / 1024 / 1024
+            print(f"\n📦 {count:,} 条，{size_mb:,.1f} MB")
+            print(f"   流式写出: {write_s:6.2f} s，峰值 {write_peak / 1024:,.0f} KB")
+            print(f"   流式读取: {read_s:6.2f} s，峰值 {read_peak / 1024:,.0f} KB")
+            if read_count != count or read_total != total:
+                print("   ❌ 读回的条目数或 total_size 不一致")
+                ok = False
+            if not args.skip_json:
+                _, json_peak, json_s = measure(lambda: read_json(path))
+                print(f"   json.load: {json_s:6.2f} s，峰值 {json_peak / 1024 / 1024:,.1f} MB"
+                      f"（流式的 {json_peak / max(read_peak, 1):,.0f} 倍）")
+            if count <= 100_000:
+                manifest = {**FIELDS, 'total_size': total,
+                            'files': [{'path': p, 'size': s, 'hash': h} for p, s, h in synthetic_entries(count)]}
+                same = dump_manifest(manifest) == path.read_bytes()
+                print(f"   与 dump_manifest {'✅ 逐字节一致' if same else '❌ 不一致'}")
+                ok &= same
+            peaks[count] = (write_peak, read_peak)
+
+    if len(sizes) > 1:
+        small, large = peaks[sizes[0]], peaks[sizes[-1]]
+        print()
+        for label, a, b in (('写出', small[0], large[0]), ('读取', small[1], large[1])):
+            ratio = b / max(a, 1)
+            passed = ratio <= args.max_ratio
+            ok &= passed
+            print(f"{'✅' if passed else '❌'} {label}峰值内存 {sizes[-1]:,} 条 / {sizes[0]:,} 条 = {ratio:.2f}"
+                  f"（上限 {args.max_ratio}）")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
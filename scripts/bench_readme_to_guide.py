@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+readme_to_guide.py 性能基准
+
+功能：
+- 生成指定规模的合成 README
+- 测量 parse_readme 随 README 大小的耗时增长（应为线性）
+- 与旧版"每个段落一次全文正则搜索"的实现（逐字保留的旧 parse_readme）对比，
+  解析结果必须一致，1 MB 及以上的输入新版耗时不得超过旧版的 --parse-target 倍
+- 病态输入（大量未闭合标记、超长列表）耗时上限检查
+- 行内格式解析的随机模糊测试
+- 批量渲染：预编译模板与旧版 f-string 对比
+- 批量模式：进程池输出与逐个顺序生成逐字节一致，并对比耗时
+- 压缩：各种规模与随机 README 的页面压缩前后字节数、耗时，并逐份做 DOM 等价检查
+- 回归门禁：parse / render / 端到端 main() 的耗时与 HTML 字节数写入基线 JSON，
+  之后与基线对比，任一指标劣化超过阈值即以非零状态退出
+
+使用方法：
+    python scripts/bench_readme_to_guide.py
+    python scripts/bench_readme_to_guide.py --max-size 4 --repeat 5
+    python scripts/bench_readme_to_guide.py --suite pathological --time-bound 0.2
+    python scripts/bench_readme_to_guide.py --suite render --render-count 10000
+    python scripts/bench_readme_to_guide.py --suite minify --minify-count 200
+    python scripts/bench_readme_to_guide.py --suite gate --save-baseline bench_baseline.json
+    python scripts/bench_readme_to_guide.py --suite gate --compare bench_baseline.json --time-threshold 0.25
+    python scripts/bench_readme_to_guide.py --write-readme /tmp/README.md --features 500 --noise 100
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import readme_to_guide  # noqa: E402
+from readme_to_guide import (  # noqa: E402
+    GUIDE_TEMPLATE, Feature, ReadmeContent, Shortcut, convert_markdown_inline, generate_guide_html,
+    parse_readme_text,
+)
+from bench_html_minify import check_equivalence  # noqa: E402
+from html_minify import minify_html  # noqa: E402
+from page_template import _PLACEHOLDER_RE, load_template  # noqa: E402
+
+
+FEATURE_ICONS_CYCLE = ["📸", "🎨", "🔤", "🌐", "📌", "📚", "🎬", "📝", "🖱️", "🔧", "⏰", "🔄"]
+
+
+def make_readme(features: int = 16, shortcuts: int = 8, steps: int = 4,
+                noise_sections: int = 0, items_per_feature: int = 4) -> str:
+    """生成结构与正式 README 一致的合成 README"""
+    parts = [
+        "# 虎哥截图 (HuGe Screenshot)\n\n",
+        "![version](https://img.shields.io/badge/version-2.9.2-blue)\n\n",
+        "## ✨ 功能特性\n\n",
+    ]
+    for i in range(features):
+        icon = FEATURE_ICONS_CYCLE[i % len(FEATURE_ICONS_CYCLE)]
+        parts.append(f"### {icon} 功能 {i}\n")
+        for j in range(items_per_feature):
+            parts.append(f"- 功能 {i} 的第 {j} 项说明，支持 **粗体** 与 `代码`\n")
+        parts.append("\n")
+    parts.append("### 👤 账户与订阅\n- 免费版：基础功能 + 每日限制\n- 终身 VIP：解锁所有高级功能，无使用限制\n\n---\n\n")
+    parts.append("## 🚀 快速开始\n\n")
+    for i in range(steps):
+        parts.append(f"{i + 1}. 第 {i + 1} 步：按 `Alt+X` 开始\n")
+    parts.append("\n## ⌨️ 快捷键\n\n| 快捷键 | 功能 |\n|--------|------|\n")
+    for i in range(shortcuts):
+        parts.append(f"| `Ctrl+{i}` | 动作 {i} |\n")
+    parts.append("\n## 🔧 配置\n\n配置文件位置：`~/.screenshot_tool/config.json`\n")
+    parts.append("支持便携模式：将 `config.json` 放在程序同目录下即可。\n\n---\n\n")
+    for i in range(noise_sections):
+        parts.append(f"## 📄 其他说明 {i}\n\n")
+        parts.append("这是一段与生成页面无关的说明文字，用于模拟更大的 README。\n" * 8)
+        if i % 3 == 1:
+            parts.append("\n```bash\n# 代码块中的标题不应被识别\npython scripts/readme_to_guide.py\n```\n")
+        elif i % 3 == 2:
+            parts.append("\n| 列 A | 列 B |\n|------|------|\n| `x` | 与快捷键表格同形的噪声 |\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+def make_readme_of_size(target_bytes: int) -> str:
+    """生成约 target_bytes 字节的 README：功能特性与无关段落各占一半"""
+    base = len(make_readme(features=0).encode('utf-8'))
+    one_feature = len(make_readme(features=1).encode('utf-8')) - base
+    one_noise = len(make_readme(features=0, noise_sections=1).encode('utf-8')) - base
+    budget = max(0, target_bytes - base) // 2
+    return make_readme(features=budget // one_feature, noise_sections=budget // one_noise)
+
+
+def legacy_parse_readme_text(content: str) -> ReadmeContent:
+    """旧版 parse_readme：每个段落各做一次全文 re.DOTALL 搜索（仅用于对比）
+
+    逐字取自改为段落索引之前的 readme_to_guide.parse_readme，只去掉了读文件这一行
+    （新版计时同样不含读文件）。
+    """
+    result = ReadmeContent()
+
+    # 提取版本号
+    version_match = re.search(r'badge/version-(\d+\.\d+\.\d+)-', content)
+    if version_match:
+        result.version = version_match.group(1)
+
+    # 提取功能特性
+    features_section = re.search(r'## ✨ 功能特性\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
+    if features_section:
+        features_text = features_section.group(1)
+        # 匹配每个功能块：### 图标 标题 + 列表项
+        feature_blocks = re.findall(
+            r'### ([^\n]+)\n((?:- [^\n]+\n?)+)',
+            features_text
+        )
+        for title_line, items in feature_blocks:
+            # 提取图标和标题
+            icon_match = re.match(r'([^\s]+)\s+(.+)', title_line.strip())
+            if icon_match:
+                icon = icon_match.group(1)
+                title = icon_match.group(2)
+                # 合并列表项为描述
+                items_list = [item.strip('- \n') for item in items.strip().split('\n') if item.strip()]
+                description = '、'.join(items_list)
+                result.features.append(Feature(icon=icon, title=title, description=description))
+
+    # 提取快捷键
+    shortcuts_section = re.search(r'## ⌨️ 快捷键\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
+    if shortcuts_section:
+        shortcuts_text = shortcuts_section.group(1)
+        # 匹配表格行
+        shortcut_rows = re.findall(r'\|\s*`([^`]+)`\s*\|\s*([^|]+)\s*\|', shortcuts_text)
+        for key, action in shortcut_rows:
+            if key and action.strip():
+                result.shortcuts.append(Shortcut(key=key, action=action.strip()))
+
+    # 提取快速开始
+    quick_start_section = re.search(r'## 🚀 快速开始\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
+    if quick_start_section:
+        quick_start_text = quick_start_section.group(1)
+        steps = re.findall(r'\d+\.\s+(.+)', quick_start_text)
+        result.quick_start = steps
+
+    # 如果没有用户友好的步骤，使用默认步骤
+    if not result.quick_start:
+        result.quick_start = [
+            "下载安装包（Windows: `.exe` / macOS: `.dmg`）",
+            "按照向导完成安装（macOS 拖入 Applications 即可）",
+            "默认热键 `Alt+X`（macOS: `Option+X`）开始截图",
+            "系统托盘会显示虎哥截图图标",
+        ]
+
+    # 提取配置信息
+    config_section = re.search(r'## 🔧 配置\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
+    if config_section:
+        config_text = config_section.group(1)
+        config_path_match = re.search(r'配置文件位置：`([^`]+)`', config_text)
+        if config_path_match:
+            result.config_path = config_path_match.group(1)
+        portable_match = re.search(r'支持便携模式：(.+?)(?:\n|$)', config_text)
+        if portable_match:
+            result.portable_mode = portable_match.group(1).strip()
+
+    # 提取订阅信息
+    subscription_section = re.search(r'### 👤 账户与订阅\s*(.*?)(?=\n---|\n## |\n###|$)', content, re.DOTALL)
+    if not subscription_section:
+        subscription_section = re.search(r'账户与订阅\s*(.*?)(?=\n---|\n## |$)', content, re.DOTALL)
+    if subscription_section:
+        sub_text = subscription_section.group(1)
+        free_match = re.search(r'免费版[：:]\s*(.+?)(?:\n|$)', sub_text)
+        if free_match:
+            result.subscription_free = free_match.group(1).strip()
+        vip_match = re.search(r'终身 VIP[：:]\s*(.+?)(?:\n|$)', sub_text)
+        if vip_match:
+            result.subscription_vip = vip_match.group(1).strip()
+
+    return result
+
+
+def best_of(func, arg, repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_parse_scaling(max_size_mb: float, repeat: int, target: float) -> bool:
+    """parse_readme 随输入大小增长的耗时，与旧版对比
+
+    新旧版交替运行各取最短耗时，减少机器负载波动的影响；两者解析结果必须一致。
+    不小于 1 MB 的输入上新版耗时超过旧版的 target 倍即失败。
+    """
+    print(f"📏 parse_readme 随 README 大小的耗时（≥1 MB 时要求新版 ≤ 旧版 × {target:.2f}）")
+    print(f"   {'大小':>10}  {'新版 (ms)':>10}  {'旧版 (ms)':>10}  {'µs/KB':>8}  {'加速':>6}")
+    ok = True
+    size = 16 * 1024
+    max_size = int(max_size_mb * 1024 * 1024)
+    while size <= max_size:
+        text = make_readme_of_size(size)
+        kb = len(text.encode('utf-8')) / 1024
+        same = parse_readme_text(text) == legacy_parse_readme_text(text)
+        new = old = float('inf')
+        for _ in range(max(repeat, 5)):
+            new = min(new, best_of(parse_readme_text, text, 1))
+            old = min(old, best_of(legacy_parse_readme_text, text, 1))
+        passed = same and (kb < 1024 or new <= old * target)
+        ok = ok and passed
+        print(f"   {kb:>8.0f}KB  {new * 1000:>10.2f}  {old * 1000:>10.2f}  "
+              f"{new * 1e6 / kb:>8.2f}  {old / new:>5.1f}x"
+              f"{'' if same else '  ❌ 解析结果与旧版不同'}{'  ❌' if not passed and same else ''}")
+        size *= 2
+    return ok
+
+
+def legacy_convert_markdown_inline(text: str) -> str:
+    """旧版行内格式转换（仅用于对比）"""
+    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
+    return re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+
+
+def legacy_parse_features(features_text: str) -> list:
+    """旧版功能块正则（嵌套量词，仅用于对比）"""
+    return re.findall(r'### ([^\n]+)\n((?:- [^\n]+\n?)+)', features_text)
+
+
+def legacy_parse_quick_start(quick_start_text: str) -> list:
+    """旧版快速开始正则（仅用于对比）"""
+    return re.findall(r'\d+\.\s+(.+)', quick_start_text)
+
+
+# 计时时绕过 convert_markdown_inline 的结果缓存
+inline_uncached = convert_markdown_inline.__wrapped__
+
+# 病态输入：(名称, 生成约 n 个字符的函数, 新版函数, 旧版函数)
+PATHOLOGICAL_CASES = [
+    ("未闭合 **", lambda n: "a**" * (n // 3), inline_uncached, legacy_convert_markdown_inline),
+    ("未闭合 `", lambda n: "`" + "a" * n, inline_uncached, legacy_convert_markdown_inline),
+    ("连续 *", lambda n: "*" * n, inline_uncached, legacy_convert_markdown_inline),
+    ("未闭合 [..](", lambda n: "[a](" * (n // 4), inline_uncached, legacy_convert_markdown_inline),
+    ("交错标记", lambda n: "*`[**]" * (n // 6), inline_uncached, legacy_convert_markdown_inline),
+    ("超长列表块", lambda n: "### 📸 功能\n" + "- 列表项 **粗体**\n" * (n // 8),
+     readme_to_guide._parse_features, legacy_parse_features),
+    ("单行连续列表标记", lambda n: "### 📸 功能\n" + "- " * (n // 2),
+     readme_to_guide._parse_features, legacy_parse_features),
+    ("超长数字串", lambda n: "1" * n, readme_to_guide._parse_quick_start, legacy_parse_quick_start),
+]
+
+
+def bench_pathological(size: int, time_bound: float, repeat: int) -> bool:
+    """病态输入耗时检查：新版任一用例超过 time_bound 秒即失败"""
+    print(f"🧨 病态输入（约 {size} 字符，上限 {time_bound * 1000:.0f} ms）")
+    print(f"   {'用例':<16}  {'新版 (ms)':>10}  {'旧版 (ms)':>10}")
+    ok = True
+    for name, make, new_func, old_func in PATHOLOGICAL_CASES:
+        text = make(size)
+        new = best_of(new_func, text, repeat)
+        # 旧版可能是平方复杂度，只跑一次并缩小规模估算
+        small = make(size // 10)
+        old = best_of(old_func, small, 1)
+        flag = "✅" if new <= time_bound else "❌"
+        ok = ok and new <= time_bound
+        print(f"   {name:<16}  {new * 1000:>10.2f}  {old * 1000:>8.2f}*  {flag}")
+    print("   * 旧版为 1/10 规模的耗时")
+
+    # 固定 10 万项的单个功能块，直接走 _parse_features，同时核对结果
+    items = 100_000
+    text = "### 📸 功能\n" + "".join(f"- 第 {i} 项\n" for i in range(items)) + "- - -\n"
+    new = best_of(readme_to_guide._parse_features, text, repeat)
+    features = readme_to_guide._parse_features(text)
+    passed = (new <= time_bound and len(features) == 1
+              and features[0].description.count('、') == items - 1
+              and features[0].description.endswith(f"第 {items - 1} 项"))
+    ok = ok and passed
+    print(f"   {'✅' if passed else '❌'} {items:,} 项的功能块（末项为空）: {new * 1000:.2f} ms，"
+          f"解析出 {len(features)} 个功能")
+    return ok
+
+
+FUZZ_TOKENS = ["*", "**", "`", "[", "]", "(", ")", "a", "中", " ", "\n", "- ", "### ", "1. ", "|"]
+INLINE_TAGS = ("strong", "em", "code", "a")
+
+
+def _check_tags_balanced(html: str) -> bool:
+    """检查生成的标签成对且正确嵌套"""
+    stack = []
+    for m in re.finditer(r'<(/?)(strong|em|code|a)(?: href="[^"]*")?>', html):
+        closing, tag = m.groups()
+        if not closing:
+            stack.append(tag)
+        elif not stack or stack.pop() != tag:
+            return False
+    return not stack
+
+
+def fuzz_inline(iterations: int, seed: int, time_bound: float) -> bool:
+    """随机拼接标记做模糊测试：不抛异常、标签配对、单次耗时不超限"""
+    print(f"🎲 模糊测试（{iterations} 次，种子 {seed}）")
+    rng = random.Random(seed)
+    slowest = 0.0
+    for n in range(iterations):
+        text = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 2000)))
+        start = time.perf_counter()
+        html = inline_uncached(text)
+        readme_to_guide._parse_features(text)
+        readme_to_guide._parse_quick_start(text)
+        parse_readme_text(text)
+        elapsed = time.perf_counter() - start
+        slowest = max(slowest, elapsed)
+        if not _check_tags_balanced(html):
+            print(f"   ❌ 第 {n} 次：标签不配对\n   输入: {text!r}")
+            return False
+        if elapsed > time_bound:
+            print(f"   ❌ 第 {n} 次：耗时 {elapsed * 1000:.1f} ms 超限\n   输入: {text!r}")
+            return False
+    print(f"   ✅ 全部通过，最慢 {slowest * 1000:.2f} ms")
+    return True
+
+
+def make_legacy_fstring_renderer():
+    """把模板还原成旧版的单个 f-string 渲染函数（仅用于对比）"""
+    source = GUIDE_TEMPLATE.read_text(encoding='utf-8')
+    assert "'''" not in source and '\\' not in source
+    names = sorted(set(_PLACEHOLDER_RE.findall(source)))
+    body = source.replace('{', '{{').replace('}', '}}')
+    body = re.sub(r'\{\{\{\{\s*(\w+)\s*\}\}\}\}', r'{\1}', body)
+    code = f"def render({', '.join(names)}):\n    return f'''{body}'''\n"
+    namespace = {}
+    exec(compile(code, '<legacy f-string>', 'exec'), namespace)
+    return namespace['render']
+
+
+def legacy_generate_guide_html(render, content: ReadmeContent) -> str:
+    """旧版生成方式：每次重新生成片段，再套入 f-string（仅用于对比）"""
+    def feature_html(feature):
+        svg = readme_to_guide.get_svg_icon.__wrapped__(feature.icon)
+        description = legacy_convert_markdown_inline(feature.description)
+        return f'''                <div class="feature-item">
+                    <strong>
+                        {svg}
+                        {feature.title}
+                    </strong>
+                    <span>{description}</span>
+                </div>'''
+
+    def step_html(index, step):
+        step = legacy_convert_markdown_inline(step)
+        return f'''                <div class="step">
+                    <div class="step-num">{index}</div>
+                    <div class="step-content">{step}</div>
+                </div>'''
+
+    icons = {f'icon_{name}': f'<svg viewBox="0 0 24 24" {readme_to_guide.SVG_STROKE_ATTRS}>{readme_to_guide.SVG_ICONS[name]}</svg>'
+             for name in readme_to_guide.PAGE_ICONS}
+    return render(
+        svg_sprite='',
+        **icons,
+        version=content.version,
+        steps_html='\n'.join(step_html(i + 1, s) for i, s in enumerate(content.quick_start)),
+        features_html='\n'.join(feature_html(f) for f in content.features),
+        shortcuts_html='\n'.join(readme_to_guide.generate_shortcut_row(s) for s in content.shortcuts),
+        config_path=content.config_path,
+        subscription_free=content.subscription_free,
+        subscription_vip=content.subscription_vip,
+    )
+
+
+def bench_render(count: int, repeat: int):
+    """批量渲染 count 份 guide 的耗时"""
+    print(f"🖨️ 批量渲染 {count} 份 guide")
+    contents = []
+    base = parse_readme_text(make_readme())
+    for i in range(count):
+        content = ReadmeContent(**{**base.__dict__, 'version': f'2.{i // 100}.{i % 100}'})
+        contents.append(content)
+    legacy_render = make_legacy_fstring_renderer()
+
+    template = load_template(GUIDE_TEMPLATE)
+    new = best_of(lambda cs: [generate_guide_html(c, template) for c in cs], contents, repeat)
+    old = best_of(lambda cs: [legacy_generate_guide_html(legacy_render, c) for c in cs], contents, repeat)
+    print(f"   预编译模板: {new * 1000:>8.1f} ms（{new * 1e6 / count:.1f} µs/份）")
+    print(f"   旧版 f-string: {old * 1000:>6.1f} ms（{old * 1e6 / count:.1f} µs/份）")
+
+    # 只比较套模板这一步：片段预先生成好
+    ctx = dict(version='2.9.2', steps_html='s' * 1000, features_html='f' * 10000, shortcuts_html='k' * 500,
+               config_path='c', subscription_free='free', subscription_vip='vip', svg_sprite='x' * 3000,
+               **{f'icon_{name}': 'i' * 40 for name in readme_to_guide.PAGE_ICONS})
+    new = best_of(lambda n: [template.render(**ctx) for _ in range(n)], count, repeat)
+    old = best_of(lambda n: [legacy_render(**ctx) for _ in range(n)], count, repeat)
+    print(f"   仅套模板: 预编译 {new * 1e6 / count:.1f} µs/份，f-string {old * 1e6 / count:.1f} µs/份")
+
+
+def bench_batch(count: int, jobs: int) -> bool:
+    """批量模式与顺序模式对比：自动选择（本进程 / 进程池）与强制进程池两种方式的输出都必须与顺序模式逐字节一致"""
+    cpus = os.cpu_count() or 1
+    print(f"📚 批量模式（{count} 个 README，--jobs {jobs}，{cpus} 核）")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        pairs = {'seq': [], 'auto': [], 'pool': []}
+        for i in range(count):
+            readme = root / f'README.{i}.md'
+            readme.write_text(make_readme(features=10 + i * 7, shortcuts=4 + i % 5, noise_sections=i), encoding='utf-8')
+            for mode, items in pairs.items():
+                items.append((readme, root / mode / f'guide-{i}.html'))
+        total_mb = sum(readme.stat().st_size for readme, _ in pairs['seq']) / 1024 / 1024
+
+        start = time.perf_counter()
+        for readme, guide in pairs['seq']:
+            readme_to_guide.build_guide(readme, guide)
+        sequential = time.perf_counter() - start
+
+        def run_batch(mode: str) -> tuple[float, float, str]:
+            output = io.StringIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                results = readme_to_guide.build_batch(pairs[mode], jobs=jobs)
+            wall = time.perf_counter() - start
+            return wall, sum(seconds for _, _, seconds in results), output.getvalue()
+
+        auto_wall, auto_render, log = run_batch('auto')
+        in_process = cpus == 1 or jobs <= 1 or '在本进程内渲染' in log
+        # 强制使用进程池：假装有 jobs 个核、启动开销为 0
+        saved = os.cpu_count, dict(readme_to_guide.POOL_STARTUP_SECONDS)
+        os.cpu_count = lambda: max(jobs, 2)
+        readme_to_guide.POOL_STARTUP_SECONDS.update({name: 0.0 for name in saved[1]})
+        try:
+            pool_wall, pool_render, _ = run_batch('pool')
+        finally:
+            os.cpu_count = saved[0]
+            readme_to_guide.POOL_STARTUP_SECONDS.update(saved[1])
+
+        mismatched = [f'{mode}/{guide.name}' for mode in ('auto', 'pool')
+                      for (_, guide), (_, other) in zip(pairs['seq'], pairs[mode])
+                      if guide.read_bytes() != other.read_bytes()]
+    print(f"   顺序 build_guide: 墙钟 {sequential * 1000:.0f} ms（{total_mb / sequential:.2f} MB/s）")
+    print(f"   build_batch 自动（{'本进程' if in_process else '进程池'}）: 墙钟 {auto_wall * 1000:.0f} ms"
+          f"（{total_mb / auto_wall:.2f} MB/s），各文件渲染合计 {auto_render * 1000:.0f} ms")
+    print(f"   build_batch 强制进程池: 墙钟 {pool_wall * 1000:.0f} ms（{total_mb / pool_wall:.2f} MB/s），"
+          f"各文件渲染合计 {pool_render * 1000:.0f} ms（子进程内测量，不含排队与启动）")
+    if cpus < max(jobs, 2):
+        print(f"   ℹ️ 强制进程池时 {max(jobs, 2)} 个子进程分时共用 {cpus} 核，子进程内的渲染耗时包含被抢占的时间；"
+              f"正常运行时进程数不超过核数")
+    if mismatched:
+        print(f"   ❌ 输出不一致: {', '.join(mismatched)}")
+        return False
+    print("   ✅ 两种批量方式的输出都与顺序输出逐字节一致")
+    return True
+
+
+def bench_minify(count: int, seed: int) -> bool:
+    """压缩前后字节数与耗时；每份输出都要通过 DOM 等价检查"""
+    print(f"🗜️ 页面压缩（{count} 份随机 README + 固定规模）")
+    rng = random.Random(seed)
+    readmes = [('空 README', ''), ('small', make_readme()), ('medium', make_readme(features=200, shortcuts=40)),
+               ('large', make_readme(features=2000, shortcuts=200, steps=20))]
+    for n in range(count):
+        readmes.append((f'随机 #{n}', make_readme(features=rng.randint(0, 40), shortcuts=rng.randint(0, 12),
+                                                 steps=rng.randint(0, 8), noise_sections=rng.randint(0, 5))))
+    total_before = total_after = 0
+    total_time = 0.0
+    for name, text in readmes:
+        html = generate_guide_html(parse_readme_text(text))
+        start = time.perf_counter()
+        minified, stats = minify_html(html)
+        elapsed = time.perf_counter() - start
+        total_time += elapsed
+        total_before += stats.original_bytes
+        total_after += stats.minified_bytes
+        problems = check_equivalence(html, minified, stats.removed_selectors)
+        if problems:
+            print(f"   ❌ {name}: {problems[0]}")
+            return False
+        if not name.startswith('随机'):
+            print(f"   {name:<10} {stats.original_bytes:>10,} → {stats.minified_bytes:>10,} 字节"
+                  f"（{stats.minified_bytes / stats.original_bytes:.1%}），{elapsed * 1000:.1f} ms，"
+                  f"剔除 {len(stats.removed_selectors)} 个选择器")
+    print(f"   合计 {total_before:,} → {total_after:,} 字节（{total_after / total_before:.1%}），"
+          f"共 {total_time * 1000:.0f} ms")
+    print(f"   ✅ {len(readmes)} 份输出全部渲染等价")
+    return True
+
+
+# 回归门禁使用的合成 README 规模
+GATE_PROFILES = {
+    'small': dict(features=16, shortcuts=8, steps=4, noise_sections=0),
+    'medium': dict(features=200, shortcuts=40, steps=8, noise_sections=50),
+    'large': dict(features=2000, shortcuts=200, steps=20, noise_sections=500),
+}
+
+# 耗时类指标（越小越好，按 --time-threshold 判定）与体积类指标（按 --size-threshold 判定）
+TIME_METRICS = ('parse_ms', 'render_ms', 'main_ms')
+SIZE_METRICS = ('html_bytes', 'guide_bytes')
+
+
+def run_main_quietly(argv: list[str]) -> int:
+    """以给定参数在进程内调用 readme_to_guide.main()，屏蔽其输出"""
+    old_argv = sys.argv
+    sys.argv = ['readme_to_guide.py', *argv]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return readme_to_guide.main()
+    finally:
+        sys.argv = old_argv
+
+
+def measure_profile(params: dict, repeat: int) -> dict:
+    """测量一种规模下 parse / render / 端到端 main() 的耗时与输出大小"""
+    text = make_readme(**params)
+    readme_bytes = len(text.encode('utf-8'))
+    parse_s = best_of(parse_readme_text, text, repeat)
+    content = parse_readme_text(text)
+    template = load_template(GUIDE_TEMPLATE)
+    render_s = best_of(lambda c: generate_guide_html(c, template), content, repeat)
+    html_bytes = len(generate_guide_html(content, template).encode('utf-8'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        readme = Path(tmp) / 'README.md'
+        readme.write_text(text, encoding='utf-8')
+        guide = Path(tmp) / 'guide.html'
+        argv = ['--readme', str(readme), '--guide', str(guide), '--no-cache']
+        main_s = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if run_main_quietly(argv) != 0:
+                raise RuntimeError('readme_to_guide.main() 执行失败')
+            main_s = min(main_s, time.perf_counter() - start)
+        # main() 实际写出的页面（默认经过压缩）
+        guide_bytes = guide.stat().st_size
+
+    return {
+        'params': params,
+        'readme_bytes': readme_bytes,
+        'html_bytes': html_bytes,
+        'guide_bytes': guide_bytes,
+        'parse_ms': round(parse_s * 1000, 4),
+        'render_ms': round(render_s * 1000, 4),
+        'main_ms': round(main_s * 1000, 4),
+        'main_mb_s': round(readme_bytes / 1024 / 1024 / main_s, 3),
+    }
+
+
+def collect_gate_metrics(profiles: dict, repeat: int) -> dict:
+    """按各规模收集指标"""
+    print("🎯 基准指标")
+    print(f"   {'规模':<8} {'README':>10} {'HTML':>10} {'parse':>10} {'render':>10} {'main()':>10} {'吞吐':>10}")
+    results = {}
+    for name, params in profiles.items():
+        m = results[name] = measure_profile(params, repeat)
+        print(f"   {name:<8} {m['readme_bytes']:>10,} {m['html_bytes']:>10,} {m['parse_ms']:>8.2f}ms "
+              f"{m['render_ms']:>8.2f}ms {m['main_ms']:>8.2f}ms {m['main_mb_s']:>6.2f}MB/s")
+    return results
+
+
+def compare_with_baseline(current: dict, baseline: dict, time_threshold: float, size_threshold: float) -> bool:
+    """与基线对比：耗时或 HTML 字节数劣化超过阈值即失败"""
+    print(f"⚖️ 与基线对比（耗时阈值 +{time_threshold:.0%}，体积阈值 +{size_threshold:.0%}）")
+    ok = True
+    for name, metrics in current.items():
+        base = baseline.get('profiles', {}).get(name)
+        if base is None:
+            print(f"   ⚠️ {name}: 基线中没有该规模，跳过")
+            continue
+        if base.get('params') != metrics['params']:
+            print(f"   ⚠️ {name}: 合成参数与基线不同，跳过")
+            continue
+        for key in TIME_METRICS + SIZE_METRICS:
+            if key not in base:
+                continue  # 旧基线中没有的指标
+            old, new = base[key], metrics[key]
+            threshold = time_threshold if key in TIME_METRICS else size_threshold
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold
+            ok = ok and not regressed
+            flag = "❌" if regressed else "✅"
+            print(f"   {flag} {name:<8} {key:<11} {old:>12,.2f} → {new:>12,.2f}  ({change:+.1%})")
+    return ok
+
+
+def bench_gate(args) -> bool:
+    """回归门禁：收集指标，可保存为基线或与基线对比"""
+    profiles = dict(GATE_PROFILES)
+    if args.features is not None:
+        profiles['custom'] = dict(features=args.features, shortcuts=args.shortcuts,
+                                  steps=args.steps, noise_sections=args.noise)
+    results = collect_gate_metrics(profiles, args.repeat)
+    ok = True
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        ok = compare_with_baseline(results, baseline, args.time_threshold, args.size_threshold)
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'profiles': results,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 基线已写入: {path}")
+    return ok
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='readme_to_guide.py 性能基准')
+    parser.add_argument('--max-size', type=float, default=1.0, help='最大 README 大小（MB）')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数（取最短）')
+    parser.add_argument('--suite', default='parse,pathological,fuzz,render,batch,minify',
+                        help='要运行的基准，逗号分隔：parse, pathological, fuzz, render, batch, minify, gate')
+    parser.add_argument('--parse-target', type=float, default=0.75,
+                        help='不小于 1 MB 的输入上新版解析耗时与旧版之比的上限')
+    parser.add_argument('--pathological-size', type=int, default=100_000, help='病态输入规模（字符数）')
+    parser.add_argument('--time-bound', type=float, default=0.5, help='病态输入/模糊测试单次耗时上限（秒）')
+    parser.add_argument('--fuzz-iterations', type=int, default=500, help='模糊测试次数')
+    parser.add_argument('--seed', type=int, default=0, help='模糊测试随机种子')
+    parser.add_argument('--render-count', type=int, default=10_000, help='批量渲染份数')
+    parser.add_argument('--batch-count', type=int, default=32, help='批量模式 README 个数')
+    parser.add_argument('--jobs', type=int, default=4, help='批量模式进程数')
+    parser.add_argument('--minify-count', type=int, default=50, help='压缩基准的随机 README 数')
+    parser.add_argument('--save-baseline', help='门禁：把本次指标写入基线 JSON')
+    parser.add_argument('--compare', help='门禁：与该基线 JSON 对比，劣化超过阈值时返回非零')
+    parser.add_argument('--time-threshold', type=float, default=0.25, help='门禁：耗时允许的相对劣化')
+    parser.add_argument('--size-threshold', type=float, default=0.01, help='门禁：HTML 字节数允许的相对增长')
+    synth = parser.add_argument_group('合成 README')
+    synth.add_argument('--features', type=int, default=None, help='功能特性数（同时为门禁增加 custom 规模）')
+    synth.add_argument('--shortcuts', type=int, default=8, help='快捷键数')
+    synth.add_argument('--steps', type=int, default=4, help='快速开始步骤数')
+    synth.add_argument('--noise', type=int, default=0, help='无关段落数')
+    synth.add_argument('--write-readme', help='只把合成 README 写到该路径后退出')
+    args = parser.parse_args()
+
+    if args.write_readme:
+        text = make_readme(features=16 if args.features is None else args.features,
+                           shortcuts=args.shortcuts, steps=args.steps, noise_sections=args.noise)
+        Path(args.write_readme).write_text(text, encoding='utf-8')
+        print(f"📝 合成 README 已写入: {args.write_readme}（{len(text.encode('utf-8')):,} 字节）")
+        return 0
+
+    suites = {name.strip() for name in args.suite.split(',')}
+    ok = True
+    if 'parse' in suites:
+        ok = bench_parse_scaling(args.max_size, args.repeat, args.parse_target) and ok
+    if 'pathological' in suites:
+        ok = bench_pathological(args.pathological_size, args.time_bound, args.repeat) and ok
+    if 'fuzz' in suites:
+        ok = fuzz_inline(args.fuzz_iterations, args.seed, args.time_bound) and ok
+    if 'render' in suites:
+        bench_render(args.render_count, args.repeat)
+    if 'batch' in suites:
+        ok = bench_batch(args.batch_count, args.jobs) and ok
+    if 'minify' in suites:
+        ok = bench_minify(args.minify_count, args.seed) and ok
+    if 'gate' in suites or args.save_baseline or args.compare:
+        ok = bench_gate(args) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    exit(main())
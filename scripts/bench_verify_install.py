@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+verify_install.py 性能与正确性基准
+
+功能：
+- 按 resources/manifest.json 的路径和大小（按比例缩小）生成本地安装目录，并生成对应清单
+- 对比：朴素的顺序整文件读取 + 哈希 / 完整模式（线程池）/ 快速模式（有校验记录时）
+- 注入损坏：改一个字节（修改时间随之改变）、改一个字节后恢复修改时间、截断、删除、多出文件，
+  检查快速模式、完整模式和 fail-fast 分别能发现哪些
+
+使用方法：
+    python scripts/bench_verify_install.py
+    python scripts/bench_verify_install.py --scale 1 --jobs 8        # 原始大小（约 1.3 GB）
+    python scripts/bench_verify_install.py --keep /tmp/verify-bench
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_cache import BuildCache  # noqa: E402
+from build_manifest import build_manifest  # noqa: E402
+from verify_install import verify_install  # noqa: E402
+
+
+def make_tree(root: Path, manifest: dict, scale: float):
+    """按清单的路径与大小生成随机内容文件"""
+    for entry in manifest['files']:
+        path = root / entry['path']
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(int(entry['size'] * scale)))
+
+
+def naive_verify(root: Path, manifest: dict) -> list[str]:
+    """朴素实现：逐个文件整体读入后计算哈希"""
+    bad = []
+    for entry in manifest['files']:
+        path = root / entry['path']
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            bad.append(entry['path'])
+            continue
+        if len(data) != entry['size'] or hashlib.sha256(data).hexdigest() != entry['hash']:
+            bad.append(entry['path'])
+    return bad
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def flip_byte(path: Path, keep_mtime: bool):
+    st = path.stat()
+    with open(path, 'r+b') as f:
+        b = f.read(1)
+        f.seek(0)
+        f.write(bytes([b[0] ^ 0xFF]))
+    if keep_mtime:
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    else:
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='安装目录校验基准')
+    parser.add_argument('--manifest', default=str(Path(__file__).parent.parent / 'resources' / 'manifest.json'),
+                        help='提供路径与大小分布的清单')
+    parser.add_argument('--scale', type=float, default=0.125, help='文件大小缩放比例（1 为原始大小）')
+    parser.add_argument('--jobs', type=int, default=None, help='哈希线程数')
+    parser.add_argument('--keep', help='把生成的安装目录保留到该目录（默认用完即删）')
+    args = parser.parse_args()
+
+    source = json.loads(Path(args.manifest).read_text(encoding='utf-8'))
+    base = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix='verify-bench-'))
+    if args.keep and base.exists():
+        shutil.rmtree(base)
+    root = base / 'install'
+    try:
+        print(f"📦 生成安装目录（{len(source['files'])} 个文件，缩放 {args.scale}）...")
+        make_tree(root, source, args.scale)
+        manifest, _ = build_manifest(root, source.get('version', '0'), jobs=args.jobs)
+        total_mb = manifest['total_size'] / 1024 / 1024
+        print(f"   共 {total_mb:,.1f} MB")
+
+        # 预热页缓存，使各方案都从内存读取，比较的是计算本身
+        naive_verify(root, manifest)
+        bad, t_naive = timed(lambda: naive_verify(root, manifest))
+        assert not bad
+        cache = BuildCache(base / 'verify.json')
+        full, t_full = timed(lambda: verify_install(root, manifest, full=True, jobs=args.jobs, cache=cache))
+        quick, t_quick = timed(lambda: verify_install(root, manifest, jobs=args.jobs, cache=cache))
+        assert full.ok and quick.ok and quick.hashed_files == 0
+
+        print("\n⏱ 无损坏时:")
+        print(f"   朴素顺序读取:      {t_naive:7.2f} s（{total_mb / t_naive:,.0f} MB/s）")
+        print(f"   完整模式（并行）:  {t_full:7.2f} s（{total_mb / t_full:,.0f} MB/s，{t_full / t_naive:.0%}）")
+        print(f"   快速模式（有记录）:{t_quick:7.2f} s（{t_quick / t_naive:.1%}）")
+
+        files = [e for e in manifest['files'] if e['size'] > 0]
+        flipped, silent, truncated, deleted = files[10]['path'], files[20]['path'], files[30]['path'], files[40]['path']
+        flip_byte(root / flipped, keep_mtime=False)
+        flip_byte(root / silent, keep_mtime=True)
+        with open(root / truncated, 'r+b') as f:
+            f.truncate(max(0, manifest['files'][30]['size'] - 1))
+        (root / deleted).unlink()
+        (root / 'extra.tmp').write_bytes(b'x')
+
+        expected = {flipped, silent, truncated, deleted}
+        print("\n🧪 注入损坏（改字节、改字节但保留修改时间、截断、删除、多余文件）:")
+        ok = True
+        for label, kwargs, should_find in (
+            ('快速模式', {}, expected - {silent}),
+            ('完整模式', {'full': True}, expected),
+        ):
+            result, seconds = timed(lambda: verify_install(root, manifest, jobs=args.jobs, cache=cache, **kwargs))
+            found = {issue.path for issue in result.issues}
+            passed = found == should_find and result.extra == ['extra.tmp']
+            ok &= passed
+            kinds = ', '.join(sorted(issue.kind for issue in result.issues))
+            print(f"   {'✅' if passed else '❌'} {label}: {len(found)} 处（{kinds}），"
+                  f"多余 {len(result.extra)} 个，{seconds:.2f} s")
+        result, seconds = timed(lambda: verify_install(root, manifest, full=True, jobs=args.jobs, fail_fast=True))
+        passed = len(result.issues) >= 1 and result.stopped_early
+        ok &= passed
+        print(f"   {'✅' if passed else '❌'} fail-fast: 首个问题 {result.issues[0].path if result.issues else '-'}，"
+              f"{seconds * 1000:.0f} ms")
+        print()
+        print("✅ 全部通过" if ok else "❌ 存在未按预期发现的问题")
+        return 0 if ok else 1
+    finally:
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    exit(main())
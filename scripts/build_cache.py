@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+构建缓存
+
+按内容哈希记录各构建步骤的输入与产物，输入未变化时跳过重复工作。
+缓存是一个 JSON 文件，按"命名空间 → 键 → 记录"组织，写入时原子替换。
+
+使用方法：
+    from build_cache import BuildCache, sha256_bytes
+
+    cache = BuildCache.load(repo_root / '.build_cache' / 'readme_to_guide.json')
+    entry = cache.get('guide', 'website/guide.html')
+    ...
+    cache.set('guide', 'website/guide.html', {...})
+    cache.save()
+
+    # 较大的产物（图片变体、字体子集、压缩文件）按内容哈希存入 BlobStore，缓存记录里只存哈希
+    store = BlobStore(repo_root / '.build_cache' / 'blobs')
+    digest = store.put(data)
+    data = store.get(digest)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+
+CACHE_FORMAT_VERSION = 1
+
+# 默认缓存目录（相对仓库根目录）
+DEFAULT_CACHE_DIR = '.build_cache'
+
+# 产物存放目录（相对仓库根目录）
+DEFAULT_BLOB_DIR = f'{DEFAULT_CACHE_DIR}/blobs'
+
+
+def sha256_bytes(data: bytes) -> str:
+    """计算字节串的 SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件的 SHA-256"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_key(*parts: Any) -> str:
+    """把若干可 JSON 序列化的部分组合成一个稳定的缓存键"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return sha256_bytes(payload.encode('utf-8'))
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """内容不同时才写入，避免无谓地更新修改时间；返回是否写入"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+class BuildCache:
+    """持久化的构建缓存"""
+
+    def __init__(self, path: Path, data: Optional[dict] = None):
+        self.path = path
+        self._data = data if data is not None else {'version': CACHE_FORMAT_VERSION, 'entries': {}}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> 'BuildCache':
+        """读取缓存文件；文件不存在、损坏或格式版本不符时返回空缓存"""
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get('version') != CACHE_FORMAT_VERSION:
+            return cls(path)
+        data.setdefault('entries', {})
+        return cls(path, data)
+
+    def get(self, namespace: str, key: str) -> Optional[dict]:
+        """读取一条记录"""
+        return self._data['entries'].get(namespace, {}).get(key)
+
+    def set(self, namespace: str, key: str, entry: dict):
+        """写入一条记录（调用 save() 后落盘）"""
+        self._data['entries'].setdefault(namespace, {})[key] = entry
+        self._dirty = True
+
+    def save(self):
+        """有改动时原子写回缓存文件"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._dirty = False
+
+
+class BlobStore:
+    """按 SHA-256 存放构建产物，内容相同的产物只存一份"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """读取产物；不存在或内容与哈希不符时返回 None"""
+        try:
+            data = self.path(digest).read_bytes()
+        except OSError:
+            return None
+        return data if sha256_bytes(data) == digest else None
+
+    def put(self, data: bytes) -> str:
+        """原子写入产物，返回其哈希"""
+        digest = sha256_bytes(data)
+        path = self.path(digest)
+        if path.is_file():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=digest[:8], suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return digest
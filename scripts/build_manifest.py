@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+生成发布目录的文件清单 manifest.json
+
+功能：
+- 遍历发布目录，记录每个文件的相对路径、大小和 SHA-256
+- 线程池并行计算哈希：大文件用 mmap，小文件用大块缓冲读取
+- 增量：构建缓存（.build_cache/manifest.json）按路径记录 (大小, mtime_ns, 哈希)，
+  大小与 mtime_ns 都未变的文件复用哈希，只对改动的文件重新计算；没有缓存时全部重新计算
+  （上一份 manifest 没有 mtime，无法可靠判断文件是否改动过，不用于复用哈希）
+- 输出格式与现有 resources/manifest.json 一致：
+  {"version", "build_time", "total_size", "files": [{"path", "size", "hash"}, ...]}，
+  files 按路径排序，两空格缩进，不转义中文
+
+使用方法：
+    python scripts/build_manifest.py D:/hugescreenshot/dist/虎哥截图
+    python scripts/build_manifest.py dist/虎哥截图 --version 2.3.1 -o resources/manifest.json
+    python scripts/build_manifest.py dist/虎哥截图 --rehash          # 忽略缓存，全部重新计算
+    python scripts/build_manifest.py dist/虎哥截图 --exclude "*.log" --jobs 8
+    python scripts/build_manifest.py dist/虎哥截图 --binary          # 同时写出二进制 manifest.bin
+"""
+
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from build_cache import DEFAULT_CACHE_DIR, BuildCache
+
+
+# 不小于该大小的文件用 mmap 计算哈希
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+# 普通读取的缓冲区大小
+READ_BUFFER_SIZE = 1024 * 1024
+
+# 空文件的 SHA-256
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+_local = threading.local()
+
+
+@dataclass(slots=True)
+class FileStat:
+    """遍历得到的文件信息"""
+    path: str  # 相对发布目录、以 / 分隔
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class ManifestStats:
+    """一次构建的统计"""
+    files: int = 0
+    total_bytes: int = 0
+    hashed_files: int = 0
+    hashed_bytes: int = 0
+    reused_files: int = 0
+    scan_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    hashed_paths: list[str] = field(default_factory=list)
+
+
+def hash_file(path: str, size: Optional[int] = None) -> str:
+    """计算文件的 SHA-256
+
+    大文件映射到内存后整体交给 hashlib（计算期间释放 GIL，多线程可并行），
+    小文件用每个线程复用的缓冲区分块 readinto，避免反复分配。
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    if size == 0:
+        return EMPTY_SHA256
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+            return h.hexdigest()
+        buf = getattr(_local, 'buf', None)
+        if buf is None:
+            buf = _local.buf = memoryview(bytearray(READ_BUFFER_SIZE))
+        while n := f.readinto(buf):
+            h.update(buf[:n])
+    return h.hexdigest()
+
+
+def scan_tree(root: Path, exclude: tuple[str, ...] = ()) -> list[FileStat]:
+    """递归列出目录下的文件（os.scandir，stat 结果来自目录项），按路径排序
+
+    exclude 为 fnmatch 模式，匹配相对路径或文件名的文件被跳过。
+    """
+    files = []
+    stack = [(os.fspath(root), '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                rel = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel + '/'))
+                    continue
+                if not entry.is_file():
+                    continue
+                if exclude and any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(entry.name, p) for p in exclude):
+                    continue
+                st = entry.stat()
+                files.append(FileStat(rel, st.st_size, st.st_mtime_ns))
+    files.sort(key=lambda f: f.path)
+    return files
+
+
+def load_manifest(path: Path) -> dict:
+    """读取 manifest.json"""
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def dump_manifest(manifest: dict) -> bytes:
+    """序列化为与现有文件相同的格式（两空格缩进、不转义中文、无末尾换行）"""
+    return json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def write_manifest(path: Path, manifest: dict):
+    """原子写出 manifest.json"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dump_manifest(manifest))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _cache_key(root: Path) -> str:
+    return os.fspath(root.resolve())
+
+
+def build_manifest(root: Path, version: str, cache: Optional[BuildCache] = None,
+                   jobs: Optional[int] = None, exclude: tuple[str, ...] = ()) -> tuple[dict, ManifestStats]:
+    """生成 manifest，返回 (manifest, 统计)
+
+    只有 cache 中该路径记录的大小与 mtime_ns 均与当前一致时才复用哈希。
+    """
+    stats = ManifestStats()
+    build_time = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    files = scan_tree(root, exclude)
+    stats.scan_seconds = time.perf_counter() - start
+    stats.files = len(files)
+    stats.total_bytes = sum(f.size for f in files)
+
+    namespace = 'manifest'
+    key = _cache_key(root)
+    cached = (cache.get(namespace, key) or {}) if cache is not None else {}
+
+    hashes: dict[str, str] = {}
+    pending: list[FileStat] = []
+    for f in files:
+        hit = cached.get(f.path)
+        if hit and hit[0] == f.size and hit[1] == f.mtime_ns:
+            hashes[f.path] = hit[2]
+            continue
+        pending.append(f)
+    stats.reused_files = len(files) - len(pending)
+
+    start = time.perf_counter()
+    if pending:
+        # 大文件优先提交，避免最后剩一个大文件单线程收尾
+        pending.sort(key=lambda f: f.size, reverse=True)
+        root_str = os.fspath(root)
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(hash_file, os.path.join(root_str, f.path), f.size): f for f in pending}
+            for future in as_completed(futures):
+                hashes[futures[future].path] = future.result()
+        stats.hashed_files = len(pending)
+        stats.hashed_bytes = sum(f.size for f in pending)
+        stats.hashed_paths = sorted(f.path for f in pending)
+    stats.hash_seconds = time.perf_counter() - start
+
+    if cache is not None:
+        cache.set(namespace, key, {f.path: [f.size, f.mtime_ns, hashes[f.path]] for f in files})
+
+    manifest = {
+        'version': version,
+        'build_time': build_time,
+        'total_size': stats.total_bytes,
+        'files': [{'path': f.path, 'size': f.size, 'hash': hashes[f.path]} for f in files],
+    }
+    return manifest, stats
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='生成发布目录的 manifest.json')
+    parser.add_argument('root', help='发布目录（打包输出目录）')
+    parser.add_argument('-o', '--output', default='resources/manifest.json',
+                        help='输出路径（相对仓库根目录，默认 resources/manifest.json）')
+    parser.add_argument('--version', help='版本号（默认沿用上一份 manifest 的版本号）')
+    parser.add_argument('--previous', help='沿用其版本号的上一份 manifest（默认为输出路径上的现有文件）')
+    parser.add_argument('--jobs', type=int, default=None, help='哈希线程数（默认 CPU 核数）')
+    parser.add_argument('--exclude', action='append', default=[], help='跳过的文件（fnmatch 模式，可多次指定）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/manifest.json', help='构建缓存文件路径')
+    parser.add_argument('--rehash', action='store_true', help='忽略构建缓存，全部重新计算哈希')
+    parser.add_argument('--binary', action='store_true', help='同时写出二进制 manifest（同名 .bin，见 manifest_bin.py）')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    root = Path(args.root)
+    output = repo_root / args.output
+    if not root.is_dir():
+        print(f"❌ 找不到发布目录: {root}")
+        return 1
+
+    version = args.version
+    previous_path = repo_root / args.previous if args.previous else output
+    if not version and previous_path.exists():
+        try:
+            version = load_manifest(previous_path).get('version')
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 无法读取上一份 manifest: {e}")
+    if not version:
+        print("❌ 请用 --version 指定版本号")
+        return 1
+
+    exclude = tuple(args.exclude)
+    # 输出文件位于发布目录内时不把它自己列进清单（其哈希写入前无法确定）
+    outputs = [output, output.with_suffix('.bin')] if args.binary else [output]
+    for out in outputs:
+        try:
+            exclude += (out.resolve().relative_to(root.resolve()).as_posix(),)
+        except ValueError:
+            pass
+
+    cache = None if args.rehash else BuildCache.load(repo_root / args.cache)
+    print(f"📦 扫描 {root}...")
+    start = time.perf_counter()
+    manifest, stats = build_manifest(root, version, cache, args.jobs, exclude)
+    elapsed = time.perf_counter() - start
+
+    mb = stats.hashed_bytes / 1024 / 1024
+    print(f"   文件: {stats.files} 个，共 {stats.total_bytes / 1024 / 1024:,.1f} MB（扫描 {stats.scan_seconds * 1000:.0f} ms）")
+    print(f"   复用哈希: {stats.reused_files} 个")
+    print(f"   重新计算: {stats.hashed_files} 个，{mb:,.1f} MB，耗时 {stats.hash_seconds:.2f} s"
+          f"（{mb / max(stats.hash_seconds, 1e-9):,.0f} MB/s）")
+    for path in stats.hashed_paths[:10]:
+        print(f"      {path}")
+    if len(stats.hashed_paths) > 10:
+        print(f"      ... 另有 {len(stats.hashed_paths) - 10} 个")
+
+    write_manifest(output, manifest)
+    if args.binary:
+        from manifest_bin import write_binary_manifest
+        write_binary_manifest(output.with_suffix('.bin'), manifest)
+        print(f"   二进制 manifest: {output.with_suffix('.bin')}")
+    if cache is not None:
+        cache.save()
+    print(f"✅ manifest 已写入: {output}（v{version}，总耗时 {elapsed:.2f} s）")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
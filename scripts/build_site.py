@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+构建网站发布目录（website/ → site-dist/）
+
+流程：
+1. 把 website/ 复制到临时构建目录（源目录不被修改）
+2. 依次运行各构建阶段：
+   - images：图片无损重压缩、WebP / AVIF 与响应式变体、<img> → <picture>（见 optimize_images.py）
+   - fonts：按页面子集化 Noto Sans SC，CDN 字体链接 → 本地 @font-face（见 subset_fonts.py）
+   - hash：静态资源改为内容哈希文件名并改写引用，重新生成 _headers（见 hash_assets.py）
+   - compress：为文本资源生成最高级别的 .br / .gz 预压缩副本（见 precompress.py；必须最后运行）
+3. 与输出目录同步：内容不同的文件才改写（修改时间不变，deploy_website.py 可复用哈希），
+   输出目录中多余的文件删除
+
+各阶段的产物按输入内容哈希缓存在 .build_cache/ 中，输入未变时重复构建几乎不花时间。
+
+使用方法：
+    python scripts/build_site.py
+    python scripts/build_site.py --out /tmp/site --skip images
+    python scripts/build_site.py --font-dir ~/fonts/noto-sans-sc
+    python scripts/deploy_website.py --site site-dist
+"""
+
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from build_cache import DEFAULT_BLOB_DIR, DEFAULT_CACHE_DIR, BlobStore, BuildCache, write_if_changed
+from build_manifest import scan_tree
+from manifest_diff import remove_empty_dirs
+
+
+DEFAULT_OUT = 'site-dist'
+
+STAGES = ('images', 'fonts', 'hash', 'compress')
+
+
+@dataclass
+class SiteBuildResult:
+    """一次网站构建的结果"""
+    written: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    files: int = 0
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    reports: dict[str, object] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def sync_tree(src: Path, dst: Path) -> tuple[list[str], list[str]]:
+    """让 dst 与 src 内容一致，返回 (改写的文件, 删除的文件)"""
+    src_files = {f.path for f in scan_tree(src)}
+    written = []
+    for rel in sorted(src_files):
+        if write_if_changed(dst / rel, (src / rel).read_bytes()):
+            written.append(rel)
+    removed = []
+    if dst.exists():
+        removed = sorted(f.path for f in scan_tree(dst) if f.path not in src_files)
+        for rel in removed:
+            (dst / rel).unlink()
+        remove_empty_dirs(dst, removed)
+    return written, removed
+
+
+def build_site(src: Path, out: Path, cache: Optional[BuildCache], store: BlobStore,
+               skip: tuple[str, ...] = (), jobs: Optional[int] = None,
+               font_dir: Optional[Path] = None) -> SiteBuildResult:
+    """构建网站发布目录"""
+    start = time.perf_counter()
+    result = SiteBuildResult()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=out.parent, prefix='.site-build-'))
+    try:
+        shutil.copytree(src, staging, dirs_exist_ok=True)
+        for stage in STAGES:
+            if stage in skip:
+                continue
+            stage_start = time.perf_counter()
+            if stage == 'images':
+                from optimize_images import optimize_site
+                result.reports[stage] = optimize_site(staging, cache, store, jobs=jobs)
+            elif stage == 'fonts':
+                from subset_fonts import DEFAULT_FONT_DIR, subset_site
+                fonts = font_dir or Path(__file__).parent.parent / DEFAULT_FONT_DIR
+                result.reports[stage] = subset_site(staging, fonts, cache, store, jobs=jobs)
+            elif stage == 'hash':
+                from hash_assets import hash_site
+                result.reports[stage] = hash_site(staging)
+            elif stage == 'compress':
+                from precompress import precompress_site
+                result.reports[stage] = precompress_site(staging, cache, store, jobs=jobs)
+            result.stage_seconds[stage] = time.perf_counter() - stage_start
+        result.files = len(scan_tree(staging))
+        result.written, result.removed = sync_tree(staging, out)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='构建网站发布目录')
+    parser.add_argument('--src', default=None, help='网站源目录（默认 website/）')
+    parser.add_argument('--out', default=None, help=f'输出目录（默认 {DEFAULT_OUT}/）')
+    parser.add_argument('--skip', action='append', default=[], choices=STAGES, help='跳过的阶段（可重复）')
+    parser.add_argument('--font-dir', default=None, help='Noto Sans SC 字体文件目录（默认 resources/fonts/）')
+    parser.add_argument('--jobs', type=int, default=None, help='并行数（默认 CPU 核数）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/site.json', help='构建缓存文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不使用缓存，全部重新处理')
+    parser.add_argument('--quiet', action='store_true', help='只输出汇总')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    src = Path(args.src) if args.src else repo_root / 'website'
+    out = Path(args.out) if args.out else repo_root / DEFAULT_OUT
+    if not src.is_dir():
+        print(f"❌ 找不到网站目录: {src}")
+        return 1
+    if out.resolve() == src.resolve() or src.resolve() in out.resolve().parents:
+        print("❌ 输出目录不能是源目录或其子目录")
+        return 1
+
+    cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+    store = BlobStore(repo_root / DEFAULT_BLOB_DIR)
+    print(f"🏗️ 构建 {src} → {out}")
+    result = build_site(src, out, cache, store, skip=tuple(args.skip), jobs=args.jobs,
+                        font_dir=Path(args.font_dir) if args.font_dir else None)
+    if cache is not None:
+        cache.save()
+
+    if 'images' in result.reports:
+        from optimize_images import print_report
+        print_report(result.reports['images'], verbose=not args.quiet)
+    if 'fonts' in result.reports:
+        from subset_fonts import print_report
+        print_report(result.reports['fonts'])
+    if 'hash' in result.reports:
+        from hash_assets import print_report
+        print_report(result.reports['hash'], verbose=not args.quiet)
+    if 'compress' in result.reports:
+        from precompress import print_report
+        print_report(result.reports['compress'], verbose=not args.quiet)
+    if not args.quiet:
+        for rel in result.written:
+            print(f"   📝 {rel}")
+        for rel in result.removed:
+            print(f"   🗑️ {rel}")
+    stages = '，'.join(f'{name} {seconds:.2f} s' for name, seconds in result.stage_seconds.items())
+    print(f"✅ {result.files} 个文件，改写 {len(result.written)} 个，删除 {len(result.removed)} 个，"
+          f"耗时 {result.seconds:.2f} s{'（' + stages + '）' if stages else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
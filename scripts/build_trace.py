@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+构建阶段计时与追踪
+
+记录每个阶段的墙钟耗时和内存分配（tracemalloc），
+可输出 Chrome trace-event 格式的 JSON（chrome://tracing、Perfetto 均可打开）。
+
+未启用时 stage() 返回空上下文，几乎没有开销，业务代码可以放心埋点。
+
+使用方法：
+    import build_trace
+
+    tracer = build_trace.enable(track_memory=True)
+    with build_trace.stage('parse.features'):
+        ...
+    tracer.print_summary()
+    tracer.write_chrome_trace(Path('trace.json'))
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class StageEvent:
+    """一次阶段执行记录（时间单位为微秒，相对追踪开始时刻）"""
+    name: str
+    start_us: float
+    duration_us: float
+    depth: int
+    alloc_bytes: int = 0
+    peak_bytes: int = 0
+    tid: int = 0
+    args: dict = field(default_factory=dict)
+
+
+class _Frame:
+    __slots__ = ('name', 'start', 'mem_start', 'abs_peak', 'args')
+
+    def __init__(self, name: str, start: float, mem_start: int, args: dict):
+        self.name = name
+        self.start = start
+        self.mem_start = mem_start
+        self.abs_peak = mem_start
+        self.args = args
+
+
+class Tracer:
+    """阶段追踪器"""
+
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.events: list[StageEvent] = []
+        self._origin = time.perf_counter()
+        self._stack: list[_Frame] = []
+        self._started_tracemalloc = False
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **args):
+        """计时一个阶段；可嵌套，内层阶段的内存峰值会计入外层"""
+        mem = 0
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1].abs_peak = max(self._stack[-1].abs_peak, peak)
+            tracemalloc.reset_peak()
+            mem = current
+        frame = _Frame(name, self._now_us(), mem, args)
+        self._stack.append(frame)
+        try:
+            yield frame.args
+        finally:
+            end = self._now_us()
+            self._stack.pop()
+            alloc = peak = 0
+            if self.track_memory:
+                current, abs_peak = tracemalloc.get_traced_memory()
+                frame.abs_peak = max(frame.abs_peak, abs_peak)
+                alloc = current - frame.mem_start
+                peak = frame.abs_peak - frame.mem_start
+                if self._stack:
+                    self._stack[-1].abs_peak = max(self._stack[-1].abs_peak, frame.abs_peak)
+            self.events.append(StageEvent(name, frame.start, end - frame.start, len(self._stack),
+                                          alloc, peak, threading.get_ident(), frame.args))
+
+    def add_event(self, name: str, start: float, end: float, tid: int = 0, **args):
+        """追加一条外部测得的事件（start/end 为 time.perf_counter() 读数）"""
+        self.events.append(StageEvent(name, (start - self._origin) * 1e6, (end - start) * 1e6,
+                                      0, tid=tid, args=args))
+
+    def close(self):
+        """停止由本追踪器开启的 tracemalloc"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def to_chrome_trace(self) -> dict:
+        """转换为 Chrome trace-event 格式（完整事件 ph='X'）"""
+        pid = os.getpid()
+        events = []
+        for e in sorted(self.events, key=lambda e: e.start_us):
+            args = dict(e.args)
+            if self.track_memory:
+                args['alloc_bytes'] = e.alloc_bytes
+                args['peak_bytes'] = e.peak_bytes
+            events.append({
+                'name': e.name,
+                'cat': e.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round(e.start_us, 3),
+                'dur': round(e.duration_us, 3),
+                'pid': pid,
+                'tid': e.tid,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: Path):
+        """写出 trace JSON"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), ensure_ascii=False, indent=1), encoding='utf-8')
+
+    def print_summary(self):
+        """按开始时间打印各阶段耗时（与内存）"""
+        print("⏱️ 阶段耗时:")
+        for e in sorted(self.events, key=lambda e: e.start_us):
+            line = f"   {'  ' * e.depth}{e.name:<{32 - 2 * e.depth}} {e.duration_us / 1000:>9.3f} ms"
+            if self.track_memory:
+                line += f"  分配 {e.alloc_bytes / 1024:>9.1f} KB  峰值 {e.peak_bytes / 1024:>9.1f} KB"
+            print(line)
+
+
+_active: Optional[Tracer] = None
+
+
+def enable(track_memory: bool = False) -> Tracer:
+    """启用全局追踪器"""
+    global _active
+    _active = Tracer(track_memory=track_memory)
+    return _active
+
+
+def disable():
+    """关闭全局追踪器"""
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def active() -> Optional[Tracer]:
+    """当前启用的追踪器"""
+    return _active
+
+
+_NULL_CONTEXT = contextlib.nullcontext({})
+
+
+def stage(name: str, **args):
+    """在全局追踪器上计时一个阶段；未启用时为空操作"""
+    if _active is None:
+        return _NULL_CONTEXT
+    return _active.stage(name, **args)
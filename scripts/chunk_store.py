@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+内容定义分块（CDC）存储：大文件按块增量更新
+
+manifest.json 对整个文件计算哈希，大文件（如 PySide6 / Qt 的 DLL）改动一个字节也要整个重新下载。
+这里用 Gear 滚动哈希（FastCDC 归一化分块）把文件切成内容定义的块，按 SHA-256 去重存放；
+块边界只取决于附近内容，文件中间插入或删除数据后，其余的块保持不变。
+
+功能：
+- publish：把发布目录切块写入块存储（chunks/<前两位>/<哈希>），并生成本版本的块索引 index-<版本>.json
+  - 小于 1 MB 的文件整体作为一个块（块哈希即文件哈希）
+  - 按 (大小, mtime_ns) 缓存每个文件的分块结果，只对改动的文件重新分块
+  - 分块是纯 Python 循环（单核约 5 MB/s），用进程池并行
+- plan：比较两个版本的块索引，列出客户端缺少的块和需下载的字节数，并与整文件替换对比
+- apply：用本地已有的块（旧版本文件中的对应区段）加上下载的块重建新版本文件，逐个校验 SHA-256
+
+块索引格式：
+    {
+      "format": 1, "version": "2.3.1", "total_size": ...,
+      "chunking": {"algorithm": "gear-fastcdc", "min_size": ..., "avg_size": ..., "max_size": ..., "min_file_size": ...},
+      "chunks": [[块哈希, 大小], ...],                  # 去重后的块表
+      "files": [[路径, 大小, 文件哈希, [块序号, ...]], ...]
+    }
+
+使用方法：
+    python scripts/chunk_store.py publish dist/虎哥截图 --version 2.3.1 --store chunk-store
+    python scripts/chunk_store.py plan chunk-store/index-2.3.0.json chunk-store/index-2.3.1.json
+    python scripts/chunk_store.py apply D:/虎哥截图 chunk-store/index-2.3.0.json chunk-store/index-2.3.1.json --store chunk-store
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from build_cache import DEFAULT_CACHE_DIR, BuildCache
+from build_manifest import scan_tree
+from manifest_diff import diff_manifests, format_size, make_update_plan, remove_empty_dirs
+
+
+INDEX_FORMAT_VERSION = 1
+
+CHUNK_ALGORITHM = 'gear-fastcdc'
+
+_MASK64 = (1 << 64) - 1
+
+# Gear 表：256 个固定的 64 位随机数（由 SHA-256 派生，属于格式的一部分，不能改动）
+GEAR = [int.from_bytes(hashlib.sha256(b'gear' + bytes([i])).digest()[:8], 'little') for i in range(256)]
+
+
+@dataclass(frozen=True)
+class ChunkParams:
+    """分块参数"""
+    min_size: int = 16 * 1024
+    avg_size: int = 64 * 1024
+    max_size: int = 256 * 1024
+    # 小于该大小的文件不切分
+    min_file_size: int = 1024 * 1024
+
+    def to_dict(self) -> dict:
+        return {'algorithm': CHUNK_ALGORITHM, **asdict(self)}
+
+
+DEFAULT_PARAMS = ChunkParams()
+
+
+def chunk_boundaries(data, params: ChunkParams = DEFAULT_PARAMS) -> list[int]:
+    """返回各块的结束位置（FastCDC 归一化分块）
+
+    每块先跳过 min_size 字节；到平均大小之前用位数更多的掩码（更难切），之后用位数更少的掩码（更容易切），
+    块大小集中在平均值附近。掩码取哈希的高位，使判断依赖最近 64 个字节。
+    """
+    bits = params.avg_size.bit_length() - 1
+    mask_s = ((1 << (bits + 1)) - 1) << (64 - bits - 1)
+    mask_l = ((1 << (bits - 1)) - 1) << (64 - bits + 1)
+    gear = GEAR
+    n = len(data)
+    cuts = []
+    start = 0
+    while start < n:
+        end = min(start + params.max_size, n)
+        pos = start + params.min_size
+        if pos >= end:
+            cuts.append(end)
+            start = end
+            continue
+        normal = min(start + params.avg_size, end)
+        h = 0
+        cut = end
+        for mask, stop in ((mask_s, normal), (mask_l, end)):
+            found = False
+            for b in data[pos:stop]:
+                h = ((h << 1) + gear[b]) & _MASK64
+                pos += 1
+                if not h & mask:
+                    found = True
+                    break
+            if found:
+                cut = pos
+                break
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+class ChunkStore:
+    """按 SHA-256 存放块的目录"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def chunk_path(self, digest: str) -> Path:
+        return self.root / 'chunks' / digest[:2] / digest
+
+    def index_path(self, version: str) -> Path:
+        return self.root / f'index-{version}.json'
+
+    def has(self, digest: str) -> bool:
+        return self.chunk_path(digest).exists()
+
+    def put(self, digest: str, data) -> bool:
+        """写入块，已存在时跳过；返回是否新写入"""
+        path = self.chunk_path(digest)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return True
+
+    def get(self, digest: str) -> bytes:
+        """读取块并校验哈希"""
+        data = self.chunk_path(digest).read_bytes()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f'块内容与哈希不符: {digest}')
+        return data
+
+
+def chunk_file(path: str, size: int, store_root: str, params: ChunkParams = DEFAULT_PARAMS
+               ) -> tuple[str, list[tuple[str, int]], int]:
+    """切分一个文件并把块写入存储，返回 (文件哈希, [(块哈希, 大小)], 新写入的字节数)
+
+    顶层函数，供进程池调用。
+    """
+    store = ChunkStore(Path(store_root))
+    written = 0
+    with open(path, 'rb') as f:
+        if size < params.min_file_size:
+            data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if store.put(digest, data):
+                written += len(data)
+            return digest, [(digest, len(data))], written
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            file_hash = hashlib.sha256(mm).hexdigest()
+            chunks = []
+            start = 0
+            for end in chunk_boundaries(mm, params):
+                piece = mm[start:end]
+                digest = hashlib.sha256(piece).hexdigest()
+                if store.put(digest, piece):
+                    written += len(piece)
+                chunks.append((digest, end - start))
+                start = end
+    return file_hash, chunks, written
+
+
+@dataclass
+class ChunkIndexStats:
+    """一次发布的统计"""
+    files: int = 0
+    total_bytes: int = 0
+    chunked_files: int = 0
+    chunked_bytes: int = 0
+    reused_files: int = 0
+    chunks: int = 0
+    unique_chunks: int = 0
+    unique_bytes: int = 0
+    written_bytes: int = 0
+    seconds: float = 0.0
+    chunked_paths: list[str] = field(default_factory=list)
+
+
+def build_chunk_index(root: Path, version: str, store: ChunkStore, params: ChunkParams = DEFAULT_PARAMS,
+                      cache: Optional[BuildCache] = None, jobs: Optional[int] = None,
+                      exclude: tuple[str, ...] = ()) -> tuple[dict, ChunkIndexStats]:
+    """切分发布目录并写入块存储，返回 (块索引, 统计)
+
+    缓存中大小与 mtime_ns 都未变、且所有块仍在存储中的文件直接沿用上次的分块结果。
+    """
+    stats = ChunkIndexStats()
+    start = time.perf_counter()
+    files = scan_tree(root, exclude)
+    stats.files = len(files)
+    stats.total_bytes = sum(f.size for f in files)
+
+    namespace = 'chunks'
+    key = _cache_key(root, params)
+    cached = (cache.get(namespace, key) or {}) if cache is not None else {}
+
+    results: dict[str, tuple[str, list]] = {}
+    pending = []
+    for f in files:
+        hit = cached.get(f.path)
+        if hit and hit[0] == f.size and hit[1] == f.mtime_ns and all(store.has(d) for d, _ in hit[3]):
+            results[f.path] = (hit[2], hit[3])
+        else:
+            pending.append(f)
+    stats.reused_files = len(files) - len(pending)
+
+    if pending:
+        # 大文件优先逐个提交：空闲的进程随时领取下一个文件，不会把最大的一批文件分给同一个进程
+        pending.sort(key=lambda f: f.size, reverse=True)
+        root_str = os.fspath(root)
+        store_root = os.fspath(store.root)
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+        outputs = {}
+        if workers == 1:
+            for f in pending:
+                outputs[f.path] = chunk_file(os.path.join(root_str, f.path), f.size, store_root, params)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(chunk_file, os.path.join(root_str, f.path), f.size, store_root, params): f
+                           for f in pending}
+                for future in as_completed(futures):
+                    outputs[futures[future].path] = future.result()
+        for path, (file_hash, chunks, written) in outputs.items():
+            results[path] = (file_hash, [list(c) for c in chunks])
+            stats.written_bytes += written
+        stats.chunked_files = sum(1 for f in pending if f.size >= params.min_file_size)
+        stats.chunked_bytes = sum(f.size for f in pending if f.size >= params.min_file_size)
+        stats.chunked_paths = sorted(f.path for f in pending if f.size >= params.min_file_size)
+
+    if cache is not None:
+        cache.set(namespace, key, {f.path: [f.size, f.mtime_ns, *results[f.path]] for f in files})
+
+    table: dict[str, int] = {}
+    chunk_list = []
+    entries = []
+    for f in files:
+        file_hash, chunks = results[f.path]
+        refs = []
+        for digest, size in chunks:
+            idx = table.get(digest)
+            if idx is None:
+                idx = table[digest] = len(chunk_list)
+                chunk_list.append([digest, size])
+            refs.append(idx)
+        stats.chunks += len(refs)
+        entries.append([f.path, f.size, file_hash, refs])
+    stats.unique_chunks = len(chunk_list)
+    stats.unique_bytes = sum(s for _, s in chunk_list)
+    stats.seconds = time.perf_counter() - start
+
+    index = {
+        'format': INDEX_FORMAT_VERSION,
+        'version': version,
+        'total_size': stats.total_bytes,
+        'chunking': params.to_dict(),
+        'chunks': chunk_list,
+        'files': entries,
+    }
+    return index, stats
+
+
+def _cache_key(root: Path, params: ChunkParams) -> str:
+    """缓存键：发布目录 + 分块参数（参数变化后旧结果作废）"""
+    p = params
+    return f'{os.fspath(root.resolve())}|{p.min_size},{p.avg_size},{p.max_size},{p.min_file_size}'
+
+
+def load_index(path: Path) -> dict:
+    """读取块索引"""
+    index = json.loads(path.read_text(encoding='utf-8'))
+    if index.get('format') != INDEX_FORMAT_VERSION:
+        raise ValueError(f"不支持的块索引格式: {index.get('format')}")
+    return index
+
+
+def dump_index(index: dict) -> bytes:
+    """紧凑序列化"""
+    return json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def manifest_from_index(index: dict) -> dict:
+    """把块索引还原为 manifest 结构（用于和整文件更新对比）"""
+    return {
+        'version': index['version'],
+        'total_size': index['total_size'],
+        'files': [{'path': p, 'size': s, 'hash': h} for p, s, h, _ in index['files']],
+    }
+
+
+@dataclass
+class ChunkPlan:
+    """块级更新计划"""
+    from_version: str
+    to_version: str
+    # 需要重建的文件：(路径, 文件哈希, [(块哈希, 大小), ...])
+    rebuild: list[tuple[str, str, list[tuple[str, int]]]]
+    # 需删除的旧文件
+    delete: list[str]
+    # 本地没有、需要下载的块（去重）：块哈希 → 大小
+    fetch: dict[str, int]
+    # 本地已有的块：块哈希 → (旧文件路径, 偏移, 大小)
+    local: dict[str, tuple[str, int, int]]
+    download_bytes: int = 0
+    local_bytes: int = 0
+    whole_file_bytes: int = 0
+
+
+def plan_chunk_update(old_index: dict, new_index: dict) -> ChunkPlan:
+    """比较两个版本的块索引：路径和文件哈希都相同的文件跳过，其余文件按块重建"""
+    old_chunks = old_index['chunks']
+    local: dict[str, tuple[str, int, int]] = {}
+    old_files = {}
+    for path, _size, file_hash, refs in old_index['files']:
+        old_files[path] = file_hash
+        offset = 0
+        for idx in refs:
+            digest, size = old_chunks[idx]
+            local.setdefault(digest, (path, offset, size))
+            offset += size
+
+    new_chunks = new_index['chunks']
+    rebuild = []
+    fetch: dict[str, int] = {}
+    needed_local: set[str] = set()
+    new_paths = set()
+    local_bytes = 0
+    for path, _size, file_hash, refs in new_index['files']:
+        new_paths.add(path)
+        if old_files.get(path) == file_hash:
+            continue
+        chunks = [tuple(new_chunks[idx]) for idx in refs]
+        for digest, size in chunks:
+            if digest in local:
+                needed_local.add(digest)
+                local_bytes += size
+            else:
+                fetch[digest] = size
+        rebuild.append((path, file_hash, chunks))
+
+    old_manifest = manifest_from_index(old_index)
+    new_manifest = manifest_from_index(new_index)
+    whole = make_update_plan(diff_manifests(old_manifest, new_manifest), old_manifest, new_manifest)
+    return ChunkPlan(
+        from_version=old_index['version'],
+        to_version=new_index['version'],
+        rebuild=rebuild,
+        delete=sorted(p for p in old_files if p not in new_paths),
+        fetch=fetch,
+        local={d: local[d] for d in needed_local},
+        download_bytes=sum(fetch.values()),
+        local_bytes=local_bytes,
+        whole_file_bytes=whole['download_bytes'],
+    )
+
+
+def apply_chunk_plan(plan: ChunkPlan, install_dir: Path, fetch_chunk: Callable[[str], bytes]):
+    """按块重建新版本文件
+
+    fetch_chunk(块哈希) 返回块内容（如 ChunkStore.get 或 HTTP 下载），返回后会校验哈希。
+    新文件全部在暂存目录拼好并校验通过后，才删除旧文件、替换到位；中途失败时安装目录保持原样。
+    """
+    staging = Path(tempfile.mkdtemp(prefix='.update-', dir=install_dir))
+    handles: dict[str, object] = {}
+    try:
+        chunk_dir = staging / 'chunks'
+        chunk_dir.mkdir()
+        for digest in plan.fetch:
+            data = fetch_chunk(digest)
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f'下载的块与哈希不符: {digest}')
+            (chunk_dir / digest).write_bytes(data)
+
+        staged = []
+        for n, (path, file_hash, chunks) in enumerate(plan.rebuild):
+            tmp = staging / str(n)
+            h = hashlib.sha256()
+            with open(tmp, 'wb') as out:
+                for digest, size in chunks:
+                    source = plan.local.get(digest)
+                    if source is None:
+                        data = (chunk_dir / digest).read_bytes()
+                    else:
+                        src_path, offset, _ = source
+                        f = handles.get(src_path)
+                        if f is None:
+                            f = handles[src_path] = open(install_dir / src_path, 'rb')
+                        f.seek(offset)
+                        data = f.read(size)
+                    h.update(data)
+                    out.write(data)
+            if h.hexdigest() != file_hash:
+                raise ValueError(f'重建后的文件哈希不符（本地文件可能已被改动）: {path}')
+            staged.append((tmp, path))
+
+        for f in handles.values():
+            f.close()
+        handles.clear()
+        for path in plan.delete:
+            (install_dir / path).unlink(missing_ok=True)
+        for tmp, path in staged:
+            dest = install_dir / path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dest)
+        remove_empty_dirs(install_dir, plan.delete)
+    finally:
+        for f in handles.values():
+            f.close()
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def print_plan(plan: ChunkPlan):
+    """打印块级更新计划摘要"""
+    print(f"🔍 v{plan.from_version} → v{plan.to_version}")
+    print(f"   重建文件: {len(plan.rebuild)} 个，删除: {len(plan.delete)} 个")
+    print(f"   本地复用: {format_size(plan.local_bytes)}（{len(plan.local)} 个块）")
+    print(f"   📥 按块下载: {format_size(plan.download_bytes)}（{len(plan.fetch)} 个块）")
+    print(f"   整文件替换需下载: {format_size(plan.whole_file_bytes)}")
+    if plan.whole_file_bytes:
+        print(f"   节省: {1 - plan.download_bytes / plan.whole_file_bytes:.1%}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='内容定义分块存储：发布块索引、计算并应用块级增量更新')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('publish', help='切分发布目录并写入块存储和块索引')
+    p.add_argument('root', help='发布目录（打包输出目录）')
+    p.add_argument('--version', required=True, help='版本号')
+    p.add_argument('--store', default='chunk-store', help='块存储目录')
+    p.add_argument('--jobs', type=int, default=None, help='分块进程数（默认 CPU 核数）')
+    p.add_argument('--exclude', action='append', default=[], help='跳过的文件（fnmatch 模式，可多次指定）')
+    p.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/chunks.json', help='构建缓存文件路径')
+    p.add_argument('--rehash', action='store_true', help='忽略缓存，全部重新分块')
+
+    p = sub.add_parser('plan', help='比较两个块索引')
+    p.add_argument('old', help='旧版本块索引')
+    p.add_argument('new', help='新版本块索引')
+
+    p = sub.add_parser('apply', help='用本地块和块存储把安装目录更新到新版本')
+    p.add_argument('install_dir', help='安装目录（内容须与旧版本块索引一致）')
+    p.add_argument('old', help='旧版本块索引')
+    p.add_argument('new', help='新版本块索引')
+    p.add_argument('--store', default='chunk-store', help='块存储目录')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        root = Path(args.root)
+        if not root.is_dir():
+            print(f"❌ 找不到发布目录: {root}")
+            return 1
+        store = ChunkStore(Path(args.store))
+        cache_path = Path(__file__).parent.parent / args.cache
+        cache = None if args.rehash else BuildCache.load(cache_path)
+        print(f"📦 切分 {root}...")
+        index, stats = build_chunk_index(root, args.version, store, cache=cache, jobs=args.jobs,
+                                         exclude=tuple(args.exclude))
+        data = dump_index(index)
+        index_path = store.index_path(args.version)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        index_path.write_bytes(data)
+        if cache is not None:
+            cache.save()
+        mb = stats.chunked_bytes / 1024 / 1024
+        print(f"   文件: {stats.files} 个，{format_size(stats.total_bytes)}（复用分块结果 {stats.reused_files} 个）")
+        print(f"   重新分块: {stats.chunked_files} 个大文件，{mb:,.1f} MB")
+        print(f"   块: {stats.chunks} 个，去重后 {stats.unique_chunks} 个，{format_size(stats.unique_bytes)}")
+        print(f"   新写入存储: {format_size(stats.written_bytes)}")
+        print(f"✅ 块索引已写入: {index_path}（{len(data):,} 字节，耗时 {stats.seconds:.2f} s）")
+        return 0
+
+    try:
+        old_index = load_index(Path(args.old))
+        new_index = load_index(Path(args.new))
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取块索引失败: {e}")
+        return 1
+    plan = plan_chunk_update(old_index, new_index)
+    print_plan(plan)
+    if args.command == 'apply':
+        store = ChunkStore(Path(args.store))
+        try:
+            apply_chunk_plan(plan, Path(args.install_dir), store.get)
+        except (OSError, ValueError) as e:
+            print(f"❌ 更新失败，安装目录未改动: {e}")
+            return 1
+        print(f"✅ 已更新到 v{plan.to_version}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+增量部署网站发布目录（默认 site-dist/，只上传变化的文件）
+
+功能：
+- 为发布目录生成哈希清单（复用 build_manifest，大小与修改时间未变的文件不重新计算哈希）
+- 与目标上记录的上次部署状态比较，只上传新增 / 修改的文件、删除已移除的文件；
+  状态记录在网站目录之外（与网站目录同级的 <目录名>.deploy-manifest.json），不会被 Web 服务器对外提供
+- 上传按大小均分为若干批，由少量并发连接同时传输（SSH 目标每批一个连接）
+- 先上传、再删除、最后写入部署状态；中途失败时状态不更新，下次部署会重新上传未确认的文件
+- 目标可插拔：
+  - ssh://user@host[:port]/path：通过 ssh + tar 传输（与原 deploy_website.ps1 相同的服务器与密钥），
+    文件先解包到目标下的临时目录再逐个 mv，访问者不会读到写了一半的文件
+  - 本地目录：逐文件写临时文件后原子替换，可在测试中代替服务器（bench_deploy_website.py）
+- 默认部署 build_site.py 构建的 site-dist/；--site website 可直接部署未经优化的源目录
+- 默认不部署 worker.js、_headers、_redirects（Cloudflare 配置，腾讯云服务器不使用）
+
+使用方法：
+    python scripts/build_site.py && python scripts/deploy_website.py   # 构建后部署到腾讯云服务器
+    python scripts/deploy_website.py --dry-run                # 只显示将要上传 / 删除的文件
+    python scripts/deploy_website.py --target /tmp/site       # 部署到本地目录
+    python scripts/deploy_website.py --force --jobs 4         # 全部重新上传（仍删除已移除的文件）
+"""
+
+import json
+import os
+import posixpath
+import shlex
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from build_cache import DEFAULT_CACHE_DIR, BuildCache
+from build_manifest import build_manifest, dump_manifest
+from manifest_diff import diff_manifests, format_size, remove_empty_dirs
+
+
+# 部署状态写在与网站目录同级的 <目录名>.deploy-manifest.json：
+# 放在网站目录里会被 nginx 当作普通文件对外提供，暴露全部文件路径与哈希
+STATE_SUFFIX = '.deploy-manifest.json'
+
+# 旧版本写在网站目录根下的部署状态：仍会读取，写入新位置后删除
+LEGACY_STATE_FILE = '.deploy-manifest.json'
+
+# build_site.py 的输出目录，发布流程部署的是它而不是 website/ 源目录
+DEFAULT_SITE = 'site-dist'
+
+DEFAULT_TARGET = 'ssh://root@122.51.187.21/www/wwwroot/hudawang'
+
+# worker.js / _headers / _redirects 是 Cloudflare 的配置，不部署到服务器
+DEFAULT_EXCLUDE = ('worker.js', 'worker.js.*', '_headers', '_redirects', '.*')
+
+DEFAULT_JOBS = 4
+
+
+class DeployError(Exception):
+    """部署失败"""
+
+
+class DeployTarget:
+    """部署目标：读写部署状态、批量上传、删除"""
+
+    name = ''
+    # read_state 读到的是网站目录内的旧部署状态，本次部署需要写到新位置
+    migrate_state = False
+
+    def read_state(self) -> Optional[bytes]:
+        """读取上次部署状态；从未部署过时返回 None"""
+        raise NotImplementedError
+
+    def upload(self, root: Path, paths: list[str]):
+        """上传 root 下的一批文件（相对路径，以 / 分隔）"""
+        raise NotImplementedError
+
+    def delete(self, paths: list[str]):
+        """删除文件，并删除因此变空的目录"""
+        raise NotImplementedError
+
+    def write_state(self, data: bytes):
+        """写入部署状态"""
+        raise NotImplementedError
+
+
+class LocalTarget(DeployTarget):
+    """本地目录目标"""
+
+    def __init__(self, root: Path, state: Optional[Path] = None):
+        self.root = Path(root)
+        self.name = os.fspath(self.root)
+        if state is None:
+            absolute = self.root.resolve()
+            state = absolute.with_name(absolute.name + STATE_SUFFIX)
+        self.state = Path(state)
+
+    def read_state(self) -> Optional[bytes]:
+        for path in (self.state, self.root / LEGACY_STATE_FILE):
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            self.migrate_state = path != self.state
+            return data
+        return None
+
+    def _write(self, dest: Path, src: Optional[Path] = None, data: bytes = b''):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix='.' + dest.name, suffix='.tmp')
+        try:
+            # mkstemp 创建的文件权限是 0600，Web 服务器读不到
+            os.chmod(tmp, 0o644)
+            with os.fdopen(fd, 'wb') as out:
+                if src is None:
+                    out.write(data)
+                else:
+                    with open(src, 'rb') as f:
+                        shutil.copyfileobj(f, out, 1024 * 1024)
+            os.replace(tmp, dest)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def upload(self, root: Path, paths: list[str]):
+        for path in paths:
+            self._write(self.root / path, src=root / path)
+
+    def delete(self, paths: list[str]):
+        for path in paths:
+            (self.root / path).unlink(missing_ok=True)
+        remove_empty_dirs(self.root, paths)
+
+    def write_state(self, data: bytes):
+        self._write(self.state, data=data)
+        (self.root / LEGACY_STATE_FILE).unlink(missing_ok=True)
+
+
+class SshTarget(DeployTarget):
+    """通过 ssh 部署到远程服务器（需要本机有 OpenSSH 客户端与远端的 tar）"""
+
+    def __init__(self, host: str, path: str, user: Optional[str] = None, port: Optional[int] = None,
+                 key: Optional[Path] = None, timeout: float = 300.0, state: Optional[str] = None):
+        self.host = host
+        self.path = path.rstrip('/') or '/'
+        if state is None:
+            if self.path == '/':
+                raise ValueError("网站目录为 / 时需要用 --state 指定部署状态文件")
+            state = self.path + STATE_SUFFIX
+        self.state = state
+        self.user = user
+        self.port = port
+        self.key = key
+        self.timeout = timeout
+        self.name = f"{user + '@' if user else ''}{host}:{self.path}"
+
+    def _command(self, script: str) -> list[str]:
+        args = ['ssh', '-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=accept-new']
+        if self.key:
+            args += ['-i', os.fspath(self.key)]
+        if self.port:
+            args += ['-p', str(self.port)]
+        args.append(f'{self.user}@{self.host}' if self.user else self.host)
+        args.append(script)
+        return args
+
+    def _run(self, script: str, data: bytes = b'') -> subprocess.CompletedProcess:
+        try:
+            return subprocess.run(self._command(script), input=data, capture_output=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise DeployError(f"ssh {self.host} 失败: {e}") from e
+
+    def _check(self, result: subprocess.CompletedProcess, action: str):
+        if result.returncode != 0:
+            detail = result.stderr.decode('utf-8', 'replace').strip()
+            raise DeployError(f"{action}失败（退出码 {result.returncode}）: {detail}")
+
+    def read_state(self) -> Optional[bytes]:
+        state = shlex.quote(self.state)
+        legacy = shlex.quote(posixpath.join(self.path, LEGACY_STATE_FILE))
+        result = self._run(f'if [ -f {state} ]; then cat {state}; '
+                           f'elif [ -f {legacy} ]; then cat {legacy} && exit 4; else exit 3; fi')
+        if result.returncode == 3:
+            return None
+        if result.returncode == 4:
+            self.migrate_state = True
+            return result.stdout
+        self._check(result, '读取部署状态')
+        return result.stdout
+
+    def upload(self, root: Path, paths: list[str]):
+        # 解包到目标目录下的临时目录，再逐个 mv（同一文件系统内 rename 是原子的）
+        dest = shlex.quote(self.path)
+        script = (
+            f'set -e; mkdir -p {dest}; staging=$(mktemp -d {dest}/.deploy-XXXXXX); '
+            f'trap \'rm -rf "$staging"\' EXIT; tar -xf - -C "$staging"; cd "$staging"; '
+            f'find . -type f | while IFS= read -r f; do '
+            f'mkdir -p {dest}/"$(dirname "$f")"; chmod 644 "$f"; mv -f "$f" {dest}/"$f"; done'
+        )
+        try:
+            proc = subprocess.Popen(self._command(script), stdin=subprocess.PIPE,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except OSError as e:
+            raise DeployError(f"ssh {self.host} 失败: {e}") from e
+        try:
+            with tarfile.open(fileobj=proc.stdin, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                for path in paths:
+                    tar.add(root / path, arcname=path, recursive=False)
+        except BrokenPipeError:
+            # 远端已退出，错误信息在 stderr 中
+            pass
+        finally:
+            # communicate 会关闭 stdin 并读取 stderr
+            try:
+                stderr = proc.communicate(timeout=self.timeout)[1]
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                stderr = proc.communicate()[1]
+        self._check(subprocess.CompletedProcess(proc.args, proc.returncode, b'', stderr), '上传')
+
+    def delete(self, paths: list[str]):
+        if not paths:
+            return
+        dirs = sorted({posixpath.dirname(p) for p in paths} - {''}, key=lambda d: d.count('/'), reverse=True)
+        script = f'cd {shlex.quote(self.path)} || exit 1; rm -f -- ' + ' '.join(shlex.quote(p) for p in paths)
+        if dirs:
+            script += '; rmdir -p -- ' + ' '.join(shlex.quote(d) for d in dirs) + ' 2>/dev/null'
+        script += '; true'
+        self._check(self._run(script), '删除')
+
+    def write_state(self, data: bytes):
+        state = shlex.quote(self.state)
+        legacy = shlex.quote(posixpath.join(self.path, LEGACY_STATE_FILE))
+        self._check(self._run(f'cat > {state}.tmp && mv -f {state}.tmp {state} && rm -f {legacy}', data),
+                    '写入部署状态')
+
+
+def make_target(spec: str, key: Optional[Path] = None, state: Optional[str] = None) -> DeployTarget:
+    """ssh://user@host[:port]/path 为 SSH 目标，其余视为本地目录；state 为部署状态文件（目标上的路径）"""
+    if spec.startswith('ssh://'):
+        url = urllib.parse.urlsplit(spec)
+        if not url.hostname or not url.path:
+            raise ValueError(f"无效的 SSH 目标: {spec}")
+        return SshTarget(url.hostname, urllib.parse.unquote(url.path), url.username, url.port, key, state=state)
+    return LocalTarget(Path(spec), Path(state) if state else None)
+
+
+@dataclass
+class DeployResult:
+    """一次部署的结果"""
+    uploaded: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    upload_bytes: int = 0
+    batches: int = 0
+    first_deploy: bool = False
+    seconds: float = 0.0
+
+
+def split_batches(files: list[tuple[str, int]], count: int) -> list[list[str]]:
+    """按大小把文件均分为至多 count 批（大文件优先放入当前最轻的一批）"""
+    count = max(1, min(count, len(files)))
+    batches: list[list[str]] = [[] for _ in range(count)]
+    loads = [0] * count
+    for path, size in sorted(files, key=lambda f: f[1], reverse=True):
+        i = loads.index(min(loads))
+        batches[i].append(path)
+        # 每个文件另计一点固定开销，避免大量小文件挤在一批
+        loads[i] += size + 4096
+    return [sorted(b) for b in batches if b]
+
+
+def deploy(site: Path, target: DeployTarget, jobs: int = DEFAULT_JOBS, exclude: tuple[str, ...] = DEFAULT_EXCLUDE,
+           cache: Optional[BuildCache] = None, force: bool = False, dry_run: bool = False) -> DeployResult:
+    """把 site 增量部署到 target"""
+    start = time.perf_counter()
+    manifest, _ = build_manifest(site, 'website', cache=cache, exclude=tuple(exclude) + (LEGACY_STATE_FILE,))
+
+    # --force 时同样读取部署状态：只是不用它判断哪些文件无需上传，已移除的文件仍要删除
+    previous = None
+    data = target.read_state()
+    if data is not None:
+        try:
+            previous = json.loads(data)
+        except ValueError:
+            previous = None
+    result = DeployResult(first_deploy=previous is None)
+
+    diff = diff_manifests(previous or {'files': []}, manifest)
+    sizes = {e['path']: e['size'] for e in manifest['files']}
+    # 移动按“上传新路径 + 删除旧路径”处理：网站文件都很小，不值得在远端做 mv
+    result.deleted = sorted([e['path'] for e in diff.removed] + [old['path'] for old, _ in diff.moved])
+    if force:
+        result.uploaded = sorted(sizes)
+    else:
+        result.uploaded = sorted([e['path'] for e in diff.added]
+                                 + [new['path'] for _, new in diff.modified + diff.moved])
+        result.unchanged = diff.unchanged
+    result.upload_bytes = sum(sizes[p] for p in result.uploaded)
+
+    if not dry_run:
+        batches = split_batches([(p, sizes[p]) for p in result.uploaded], jobs)
+        result.batches = len(batches)
+        if len(batches) == 1:
+            target.upload(site, batches[0])
+        elif batches:
+            with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+                for future in [pool.submit(target.upload, site, batch) for batch in batches]:
+                    future.result()
+        target.delete(result.deleted)
+        if result.uploaded or result.deleted or previous is None or target.migrate_state:
+            target.write_state(dump_manifest(manifest))
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='增量部署网站发布目录')
+    parser.add_argument('--site', default=None, help=f'网站目录（默认 {DEFAULT_SITE}/，由 build_site.py 构建）')
+    parser.add_argument('--target', default=DEFAULT_TARGET, help='ssh://user@host/path 或本地目录')
+    parser.add_argument('--state', default=None,
+                        help=f'部署状态文件（目标上的路径，默认与网站目录同级的 <目录名>{STATE_SUFFIX}）')
+    parser.add_argument('--key', default=None, help='SSH 私钥（默认仓库根目录的 baota.pem，存在时使用）')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='并发连接数')
+    parser.add_argument('--exclude', action='append', default=None,
+                        help=f"排除的文件（fnmatch，可重复；默认 {' '.join(DEFAULT_EXCLUDE)}）")
+    parser.add_argument('--force', action='store_true', help='不按部署状态跳过未变化的文件，全部重新上传（已移除的文件仍会删除）')
+    parser.add_argument('--dry-run', action='store_true', help='只显示将要上传 / 删除的文件')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/manifest.json', help='构建缓存文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不使用构建缓存')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    site = Path(args.site) if args.site else repo_root / DEFAULT_SITE
+    if not site.is_dir():
+        print(f"❌ 找不到网站目录: {site}")
+        if not args.site:
+            print("   请先运行 python scripts/build_site.py 构建，或用 --site website 部署源目录")
+        return 1
+    if site.resolve() == (repo_root / 'website').resolve() and (repo_root / DEFAULT_SITE).is_dir():
+        print(f"⚠️ 正在部署未经优化的 website/ 源目录，发布流程应部署 {DEFAULT_SITE}/")
+    key = Path(args.key) if args.key else repo_root / 'baota.pem'
+    try:
+        target = make_target(args.target, key if key.exists() else None, args.state)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    cache = None
+    if not args.no_cache:
+        cache = BuildCache.load(repo_root / args.cache)
+
+    print(f"🚀 部署 {site} → {target.name}")
+    try:
+        result = deploy(site, target, jobs=args.jobs, exclude=tuple(args.exclude or DEFAULT_EXCLUDE),
+                        cache=cache, force=args.force, dry_run=args.dry_run)
+    except (DeployError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    if cache is not None:
+        cache.save()
+
+    if result.first_deploy and not args.force:
+        print("ℹ️ 目标上没有部署记录，上传全部文件")
+    action = '将上传' if args.dry_run else '已上传'
+    for path in result.uploaded:
+        print(f"   📤 {path}")
+    for path in result.deleted:
+        print(f"   🗑️ {path}")
+    print(f"{'🔍' if args.dry_run else '✅'} {action} {len(result.uploaded)} 个文件（{format_size(result.upload_bytes)}），"
+          f"删除 {len(result.deleted)} 个，未变化 {result.unchanged} 个，耗时 {result.seconds:.2f} s")
+    if result.batches > 1:
+        print(f"   分 {result.batches} 批并发上传")
+    if not args.dry_run and isinstance(target, SshTarget):
+        print("🌐 访问 https://hudawang.cn 查看更新")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
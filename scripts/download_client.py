@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+分段并行、可断点续传、边下载边校验的发布包下载器
+
+功能：
+- 先用 Range: bytes=0-0 探测文件大小、ETag 与是否支持 Range
+- 支持 Range 时把文件切成若干段并行下载，各段直接写入 <目标>.part 的对应偏移
+- 进度保存在 <目标>.part.json（定期 fsync 后原子写出）；中断后再次运行只下载未完成的部分，
+  服务器上的文件变化（大小 / ETag / Last-Modified 不同）时从头开始
+- SHA-256 由单独的哈希线程按文件顺序边下载边计算，写入线程从不等待它：
+  紧接在“已校验前沿”之后到达的数据直接在内存中计算；前沿之后先到的数据（其他段）
+  也留在内存中，按段排好，等前沿追上时直接计算。只有超出内存上限（HASH_BUFFER_LIMIT）
+  而未能留下的部分，才在前沿追上时从 .part 读回（刚写入，通常还在页缓存中）。
+  DownloadStats.reread 记录实际读回的字节数，文件小于内存上限时为 0；
+  最后一段到达后只需算完剩余部分。
+  hashlib 的中间状态无法保存，续传时会把已下载的部分读一遍重新计算
+- 连接断开、超时、5xx、响应被截断时从断点重试（指数退避），4xx 直接失败
+- 哈希不符时删除 .part 与进度文件并报错，目标文件不会被创建
+- 服务器不支持 Range 时退化为单连接下载（无法续传）
+
+期望的哈希与大小可用 --sha256/--size 指定，或用 --manifest + --entry 从 manifest 中取得。
+
+使用方法：
+    python scripts/download_client.py https://example.com/HuGeScreenshot-2.9.2-Setup.exe \\
+        -o dist/HuGeScreenshot-2.9.2-Setup.exe --sha256 <hex> --segments 8
+    python scripts/download_client.py http://127.0.0.1:8765/虎哥截图.exe -o /tmp/虎哥截图.exe \\
+        --manifest resources/manifest.json --entry 虎哥截图.exe
+
+    from download_client import download
+    stats = download(url, Path('out.exe'), sha256=expected, segments=8)
+"""
+
+import bisect
+import hashlib
+import http.client
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+
+DEFAULT_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 1024 * 1024
+READ_BLOCK = 64 * 1024
+HASH_READ_BLOCK = 1024 * 1024
+# 交给哈希线程、尚未计算的内存数据上限；超出时改为稍后从 .part 读回
+HASH_QUEUE_LIMIT = 16 * 1024 * 1024  # 紧接在前沿之后、按顺序到达的数据
+HASH_BUFFER_LIMIT = 64 * 1024 * 1024  # 前沿之后先到的其他段的数据
+STATE_INTERVAL = 1.0
+DEFAULT_RETRIES = 5
+DEFAULT_TIMEOUT = 30.0
+
+STATE_FORMAT = 1
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+# 可重试的 HTTP 状态码
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DownloadError(Exception):
+    """下载失败（进度已保存，可再次运行续传）"""
+
+
+class HashMismatch(DownloadError):
+    """下载完成但 SHA-256 与期望值不符"""
+
+
+@dataclass
+class Segment:
+    """文件中的一段 [start, end)，done 为已写入到的绝对偏移"""
+    start: int
+    end: int
+    done: int
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.done
+
+
+@dataclass
+class RemoteInfo:
+    size: int
+    ranges: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class DownloadStats:
+    """下载统计"""
+    size: int = 0
+    sha256: str = ''
+    downloaded: int = 0  # 本次实际传输的字节数
+    resumed: int = 0  # 续传时已有的字节数
+    reread: int = 0  # 计算哈希时从 .part 读回的字节数（超出内存上限的乱序数据与续传前已有的数据）
+    segments: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+
+def split_segments(size: int, count: int, min_size: int = MIN_SEGMENT_SIZE) -> list[Segment]:
+    """把 [0, size) 均分为至多 count 段（每段不小于 min_size）"""
+    count = max(1, min(count, size // max(min_size, 1) or 1))
+    bounds = [size * i // count for i in range(count + 1)]
+    return [Segment(bounds[i], bounds[i + 1], bounds[i]) for i in range(count)]
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code in RETRY_STATUS
+    return isinstance(exc, (OSError, http.client.HTTPException))
+
+
+def probe(url: str, timeout: float = DEFAULT_TIMEOUT) -> RemoteInfo:
+    """用 Range: bytes=0-0 探测大小与 Range 支持（一次请求，不依赖 HEAD）"""
+    request = urllib.request.Request(url, headers={'Range': 'bytes=0-0'})
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if resp.status == 206:
+            match = _CONTENT_RANGE_RE.match(resp.headers.get('Content-Range', ''))
+            if not match or match.group(3) == '*':
+                raise DownloadError(f"无法解析 Content-Range: {resp.headers.get('Content-Range')}")
+            resp.read()
+            return RemoteInfo(int(match.group(3)), True, etag, last_modified)
+        length = resp.headers.get('Content-Length')
+        if length is None:
+            raise DownloadError('服务器未返回 Content-Length，无法分段下载')
+        return RemoteInfo(int(length), False, etag, last_modified)
+
+
+class _StreamHasher:
+    """按文件顺序计算 SHA-256 的后台线程，已校验前沿随各段写入推进
+
+    写入线程只登记进度（feed），从不等待哈希计算：紧接在已交付位置之后的数据放进内存队列；
+    乱序先到的数据按段各自接成一串连续的内存块，前沿到达该串起点时整串交给哈希线程。
+    内存超出上限时新到的乱序数据只留在 .part 中，该段之后的数据也不再入串，
+    前沿推进到这些位置时由哈希线程读回。
+    """
+
+    def __init__(self, part_path: Path, segments: list[Segment], size: int,
+                 buffer_limit: int = HASH_BUFFER_LIMIT):
+        self.size = size
+        self.segments = segments
+        self.buffer_limit = buffer_limit
+        self._starts = [s.start for s in segments]
+        self._cond = threading.Condition()
+        # 不能带缓冲：缓冲读会把 seg.done 之后还没写入的区域一起预读进来，之后读到的是旧数据
+        self._reader = open(part_path, 'rb', buffering=0)
+        self._closed = False
+        self._generation = 0
+        self.error: Optional[BaseException] = None
+        self._reset()
+        self._thread = threading.Thread(target=self._run, name='sha256', daemon=True)
+        self._thread.start()
+
+    def _reset(self):
+        self.sha = hashlib.sha256()
+        self.frontier = 0  # 已计算哈希的字节数
+        self.reread = 0  # 从 .part 读回的字节数
+        self._tail = 0  # 已计算、正在读回或已在队列中的字节数
+        self._queue: list[bytes] = []
+        self._queued = 0
+        # 段起点 → [串起点, 内存块列表, 串终点]，乱序到达、尚未交给哈希线程的数据
+        self._runs: dict[int, list] = {}
+        self._buffered = 0
+        self._generation += 1
+
+    def reset(self):
+        """从头重新计算（不支持 Range 的下载重新开始时）"""
+        with self._cond:
+            self._reset()
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._reader.close()
+
+    def feed(self, seg: Segment, offset: int, data: bytes):
+        """段 seg 在 offset 处写入了 data（已写入 .part）"""
+        with self._cond:
+            seg.done = offset + len(data)
+            if offset == self._tail and self._queued < HASH_QUEUE_LIMIT:
+                self._queue.append(data)
+                self._queued += len(data)
+                self._tail += len(data)
+            elif offset > self._tail and self._buffered + len(data) <= self.buffer_limit:
+                run = self._runs.get(seg.start)
+                if run is None:
+                    self._runs[seg.start] = [offset, [data], offset + len(data)]
+                    self._buffered += len(data)
+                elif run[2] == offset:
+                    run[1].append(data)
+                    run[2] += len(data)
+                    self._buffered += len(data)
+                # 接不上（之前有数据因超限没留下）的只在 .part 中，稍后读回
+            self._cond.notify_all()
+
+    def _next_job(self):
+        """等到前沿处有可计算的数据，返回 (代数, 哈希对象, 内存数据或 None, 读回的结束偏移)"""
+        with self._cond:
+            while not self._closed and self.frontier < self.size:
+                if self._queue:
+                    blocks, self._queue, self._queued = self._queue, [], 0
+                    return self._generation, self.sha, blocks, 0
+                seg = self.segments[bisect.bisect_right(self._starts, self.frontier) - 1]
+                run = self._runs.get(seg.start)
+                if run is not None and run[0] == self.frontier:
+                    # 队列为空时 _tail 等于前沿；之后接着到达的数据排在串的终点之后
+                    del self._runs[seg.start]
+                    self._buffered -= run[2] - run[0]
+                    self._tail = run[2]
+                    return self._generation, self.sha, run[1], 0
+                if seg.done > self.frontier:
+                    # 只读回内存中没有的部分：读到本段内存串的起点为止
+                    end = seg.done if run is None else min(seg.done, run[0])
+                    self._tail = end
+                    return self._generation, self.sha, None, end
+                self._cond.wait()
+            return None
+
+    def _run(self):
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    return
+                generation, sha, blocks, end = job
+                if blocks is not None:
+                    count = 0
+                    for block in blocks:
+                        sha.update(block)
+                        count += len(block)
+                    reread = 0
+                else:
+                    with self._cond:
+                        position = self.frontier
+                    self._reader.seek(position)
+                    count = 0
+                    while position + count < end:
+                        block = self._reader.read(min(HASH_READ_BLOCK, end - position - count))
+                        if not block:
+                            raise DownloadError('.part 文件被截断')
+                        sha.update(block)
+                        count += len(block)
+                    reread = count
+                with self._cond:
+                    if generation == self._generation:
+                        self.frontier += count
+                        self.reread += reread
+                    self._cond.notify_all()
+        except BaseException as exc:
+            with self._cond:
+                self.error = exc
+                self._cond.notify_all()
+
+    def hexdigest(self) -> str:
+        """等哈希线程追上文件末尾后返回摘要"""
+        with self._cond:
+            while self.frontier < self.size and self.error is None and not self._closed:
+                self._cond.wait()
+            if self.error is not None:
+                raise DownloadError(f"计算 SHA-256 失败: {self.error}") from self.error
+            if self.frontier != self.size:
+                raise DownloadError(f"校验前沿停在 {self.frontier}/{self.size}")
+            return self.sha.hexdigest()
+
+
+def _state_paths(dest: Path) -> tuple[Path, Path]:
+    return dest.with_name(dest.name + '.part'), dest.with_name(dest.name + '.part.json')
+
+
+def _load_state(state_path: Path, part_path: Path, url: str, info: RemoteInfo,
+                sha256: Optional[str]) -> Optional[list[Segment]]:
+    """读取进度文件；与当前远端文件不一致时返回 None"""
+    try:
+        state = json.loads(state_path.read_text(encoding='utf-8'))
+        if (state.get('format') != STATE_FORMAT or state.get('url') != url
+                or state.get('size') != info.size or state.get('etag') != info.etag
+                or state.get('last_modified') != info.last_modified
+                or state.get('sha256') != sha256 or not info.ranges
+                or part_path.stat().st_size != info.size):
+            return None
+        segments = [Segment(*s) for s in state['segments']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    expected = 0
+    for seg in segments:
+        if seg.start != expected or not seg.start <= seg.done <= seg.end:
+            return None
+        expected = seg.end
+    return segments if expected == info.size else None
+
+
+def _save_state(state_path: Path, url: str, info: RemoteInfo, sha256: Optional[str],
+                segments: list[Segment]):
+    """原子写出进度文件"""
+    state = {
+        'format': STATE_FORMAT,
+        'url': url,
+        'size': info.size,
+        'etag': info.etag,
+        'last_modified': info.last_modified,
+        'sha256': sha256,
+        'segments': [[s.start, s.end, s.done] for s in segments],
+    }
+    fd, tmp = tempfile.mkstemp(dir=state_path.parent, prefix=state_path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, state_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class _Transfer:
+    """一次下载的共享状态"""
+
+    def __init__(self, url: str, part_path: Path, info: RemoteInfo, segments: list[Segment],
+                 hasher: _StreamHasher, retries: int, timeout: float):
+        self.url = url
+        self.part_path = part_path
+        self.info = info
+        self.segments = segments
+        self.hasher = hasher
+        self.retries = retries
+        self.timeout = timeout
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.downloaded = 0
+        self.retry_count = 0
+        self.errors: list[str] = []
+
+    def fetch_segment(self, seg: Segment):
+        """下载一段，失败时从断点重试"""
+        failures = 0
+        while seg.remaining > 0 and not self.stop.is_set():
+            try:
+                self._stream(seg)
+                failures = 0
+            except DownloadError:
+                raise
+            except Exception as exc:
+                if not _is_retryable(exc):
+                    raise DownloadError(f"{self.url}: {exc}") from exc
+                failures += 1
+                with self.lock:
+                    self.errors.append(f"{type(exc).__name__}: {exc}")
+                    if failures > self.retries:
+                        raise DownloadError(f"连续重试 {self.retries} 次仍失败: {exc}") from exc
+                    self.retry_count += 1
+                if not self.info.ranges:
+                    # 不支持 Range 只能从头再来
+                    seg.done = 0
+                    self.hasher.reset()
+                self.stop.wait(min(0.25 * 2 ** (failures - 1), 8.0))
+
+    def _stream(self, seg: Segment):
+        headers = {}
+        if self.info.ranges:
+            headers['Range'] = f'bytes={seg.done}-{seg.end - 1}'
+            if self.info.etag and not self.info.etag.startswith('W/'):
+                headers['If-Range'] = self.info.etag
+        request = urllib.request.Request(self.url, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            if self.info.ranges:
+                if resp.status != 206:
+                    raise DownloadError('服务器上的文件已变化（Range 请求返回了完整文件），请重新下载')
+                match = _CONTENT_RANGE_RE.match(resp.headers.get('Content-Range', ''))
+                if not match or int(match.group(1)) != seg.done:
+                    raise DownloadError(f"Content-Range 与请求不符: {resp.headers.get('Content-Range')}")
+            with open(self.part_path, 'r+b', buffering=0) as f:
+                f.seek(seg.done)
+                while seg.remaining > 0:
+                    if self.stop.is_set():
+                        return
+                    data = resp.read(min(READ_BLOCK, seg.remaining))
+                    if not data:
+                        raise http.client.IncompleteRead(b'', seg.remaining)
+                    view = memoryview(data)
+                    while view:
+                        view = view[f.write(view):]
+                    self.hasher.feed(seg, seg.done, data)
+                    with self.lock:
+                        self.downloaded += len(data)
+
+
+def download(url: str, dest: Path, sha256: Optional[str] = None, size: Optional[int] = None,
+             segments: int = DEFAULT_SEGMENTS, retries: int = DEFAULT_RETRIES,
+             timeout: float = DEFAULT_TIMEOUT, min_segment_size: int = MIN_SEGMENT_SIZE,
+             progress: Optional[Callable[[int, int, float], None]] = None) -> DownloadStats:
+    """下载 url 到 dest，边下载边校验 SHA-256
+
+    progress(已完成字节, 总字节, 本次平均速度 B/s) 约每秒调用一次。
+    失败时抛出 DownloadError，进度保留在 <dest>.part(.json) 中，再次调用即续传。
+    """
+    dest = Path(dest)
+    sha256 = sha256.lower() if sha256 else None
+    part_path, state_path = _state_paths(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    info = probe(url, timeout)
+    if size is not None and info.size != size:
+        raise DownloadError(f"远端文件大小 {info.size} 与期望 {size} 不符")
+
+    plan = _load_state(state_path, part_path, url, info, sha256)
+    if plan is None:
+        with open(part_path, 'wb') as f:
+            f.truncate(info.size)
+        plan = split_segments(info.size, segments if info.ranges else 1, min_segment_size)
+        _save_state(state_path, url, info, sha256, plan)
+
+    stats = DownloadStats(size=info.size, segments=len(plan))
+    hasher = _StreamHasher(part_path, plan, info.size)
+    stats.resumed = sum(s.done - s.start for s in plan)
+    transfer = _Transfer(url, part_path, info, plan, hasher, retries, timeout)
+    sync = open(part_path, 'r+b')
+
+    def checkpoint():
+        # 先记下进度再 fsync，保存的进度不会超前于已落盘的数据
+        snapshot = [Segment(s.start, s.end, s.done) for s in plan]
+        os.fsync(sync.fileno())
+        _save_state(state_path, url, info, sha256, snapshot)
+
+    try:
+        pending = [s for s in plan if s.remaining > 0]
+        with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+            futures = {pool.submit(transfer.fetch_segment, seg) for seg in pending}
+            try:
+                while futures:
+                    finished, futures = wait(futures, timeout=STATE_INTERVAL, return_when=FIRST_EXCEPTION)
+                    failed = next((f.exception() for f in finished if f.exception()), None)
+                    if failed is not None:
+                        if isinstance(failed, DownloadError):
+                            raise failed
+                        raise DownloadError(str(failed)) from failed
+                    checkpoint()
+                    if progress:
+                        elapsed = time.perf_counter() - started
+                        progress(stats.resumed + transfer.downloaded, info.size,
+                                 transfer.downloaded / max(elapsed, 1e-9))
+            except BaseException:
+                # 通知其余段尽快停下；线程池退出时会等它们结束
+                transfer.stop.set()
+                raise
+        stats.sha256 = hasher.hexdigest()
+    finally:
+        try:
+            checkpoint()
+        finally:
+            sync.close()
+            hasher.close()
+            stats.downloaded = transfer.downloaded
+            stats.reread = hasher.reread
+            stats.retries = transfer.retry_count
+            stats.errors = transfer.errors
+            stats.seconds = time.perf_counter() - started
+
+    if sha256 and stats.sha256 != sha256:
+        part_path.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise HashMismatch(f"SHA-256 不符：期望 {sha256}，实际 {stats.sha256}")
+    os.replace(part_path, dest)
+    state_path.unlink(missing_ok=True)
+    return stats
+
+
+def expected_from_manifest(manifest_path: Path, entry: str) -> tuple[str, int]:
+    """从 manifest 中取得某个文件的 (sha256, size)"""
+    from manifest_bin import load_any_manifest
+    manifest = load_any_manifest(manifest_path)
+    for item in manifest.get('files', []):
+        if item['path'] == entry:
+            return item['hash'], item['size']
+    raise KeyError(f"manifest 中没有 {entry}")
+
+
+def main():
+    import argparse
+    from manifest_diff import format_size
+    parser = argparse.ArgumentParser(description='分段并行、可续传、边下载边校验的下载器')
+    parser.add_argument('url', help='下载地址')
+    parser.add_argument('-o', '--output', required=True, help='保存路径')
+    parser.add_argument('--sha256', default=None, help='期望的 SHA-256')
+    parser.add_argument('--size', type=int, default=None, help='期望的字节数')
+    parser.add_argument('--manifest', default=None, help='从该 manifest 中读取期望的哈希与大小')
+    parser.add_argument('--entry', default=None, help='配合 --manifest：条目路径')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='并行段数')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='每段连续失败的重试次数')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='连接 / 读取超时（秒）')
+    parser.add_argument('--quiet', action='store_true', help='不显示进度')
+    args = parser.parse_args()
+
+    sha256, size = args.sha256, args.size
+    if args.manifest:
+        if not args.entry:
+            parser.error('--manifest 需要同时指定 --entry')
+        try:
+            sha256, size = expected_from_manifest(Path(args.manifest), args.entry)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ {e}")
+            return 1
+    if not sha256:
+        print("⚠️ 未提供期望的 SHA-256，只计算不校验")
+
+    def show(done: int, total: int, speed: float):
+        percent = done * 100 / max(total, 1)
+        print(f"\r   {percent:5.1f}%  {format_size(done)} / {format_size(total)}  {format_size(speed)}/s   ",
+              end='', flush=True)
+
+    print(f"📥 {args.url}")
+    try:
+        stats = download(args.url, Path(args.output), sha256=sha256, size=size, segments=args.segments,
+                         retries=args.retries, timeout=args.timeout, progress=None if args.quiet else show)
+    except HashMismatch as e:
+        print(f"\n❌ {e}")
+        return 1
+    except (DownloadError, OSError, urllib.error.URLError) as e:
+        print(f"\n❌ 下载失败: {e}")
+        print("   再次运行同一命令即可从断点续传")
+        return 1
+    if not args.quiet:
+        print()
+
+    speed = stats.downloaded / max(stats.seconds, 1e-9)
+    print(f"✅ {args.output}（{format_size(stats.size)}，{stats.segments} 段，{stats.seconds:.1f} s，"
+          f"{format_size(speed)}/s）")
+    if stats.resumed:
+        print(f"   续传：已有 {format_size(stats.resumed)}，本次下载 {format_size(stats.downloaded)}")
+    if stats.retries:
+        print(f"   重试 {stats.retries} 次")
+    print(f"   SHA-256: {stats.sha256}{'（已校验）' if sha256 else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,914 @@
+#!/usr/bin/env python3
+"""
+本地边缘节点模拟：worker.js 路由 + _redirects + _headers + HTTP 缓存，附带压测
+
+线上 hudawang.cn 的请求先经过 Cloudflare Worker（website/worker.js）：SUPABASE_PATHS 前缀转发到 Supabase，
+其余交给 Pages 静态站点，Pages 再按 _redirects 改写 / 重定向、按 _headers 添加响应头。
+这些规则在本地无法运行，缓存策略的改动只能部署后观察。本脚本用 asyncio 在本地复现这条链路：
+
+- 路由：从 worker.js 读取 SUPABASE_PATHS（与线上代码保持一致），匹配的请求交给内置的 Supabase 桩
+  （回显请求的 JSON，可设延迟），并像 Worker 一样加上 Access-Control-Allow-Origin
+- Pages：以 website/（或构建后的 site-dist/）为根目录提供静态文件
+  - _redirects：占位符 :name、通配 *（:splat）、3xx 重定向、200 改写、404；带 ! 的规则总是生效，
+    不带 ! 的规则只在没有对应文件时生效
+  - _headers：按路径模式（含 * 与 :name）逐条匹配，同名响应头用逗号拼接，"! 名称" 删除之前规则添加的头；
+    没有 Cache-Control 时使用 Pages 的默认值
+  - 强 ETag 与 If-None-Match → 304；有 .br / .gz 预压缩副本时按 Accept-Encoding 发送（precompress.py）
+- 缓存模拟（HttpCache）：内存中的 HTTP 缓存，遵守 Cache-Control（max-age / s-maxage / no-store / private /
+  no-cache / must-revalidate / immutable）、Vary: Accept-Encoding、ETag 条件请求重新验证，按字节数 LRU 淘汰。
+  既用作边缘节点的共享缓存，也用作压测中每个虚拟用户的浏览器缓存
+- 压测：虚拟用户反复"打开页面"（请求 HTML，再并发请求页面引用的资源，每用户最多 6 个连接），
+  报告每秒请求数、网络请求与整页加载的延迟分位数、边缘缓存与浏览器缓存命中率（只计直接命中）
+  与回源比例（重新验证和未命中都要往返一次上游），
+  可在部署前比较不同缓存策略（例如 website/ 与 build_site.py 生成的 site-dist/）
+
+只用标准库；不模拟 Pages 的 .html 去扩展名重定向、Cloudflare 的默认按扩展名缓存和请求合并。
+服务器与压测在同一事件循环中运行时，绝对数值受本机单核性能限制，主要用于比较。
+
+使用方法：
+    python scripts/edge_emulator.py serve --site site-dist --port 8787
+    python scripts/edge_emulator.py bench --site site-dist --users 20 --duration 10
+    python scripts/edge_emulator.py bench --site website --no-browser-cache
+    python scripts/edge_emulator.py bench --url http://127.0.0.1:8787 --pages / /guide
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Pages 未设置 Cache-Control 时的默认值
+PAGES_DEFAULT_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+DEFAULT_CACHE_CAPACITY = 64 * 1024 * 1024
+
+# 浏览器对同一主机的最大并发连接数
+BROWSER_CONNECTIONS = 6
+
+MAX_HEADER_BYTES = 64 * 1024
+
+# 可以缓存的状态码（RFC 9111 中默认可缓存的状态码）
+CACHEABLE_STATUS = (200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501)
+
+# Pages 不对外提供的文件
+HIDDEN_FILES = ('_headers', '_redirects')
+
+_SUPABASE_PATHS_RE = re.compile(r'const\s+SUPABASE_PATHS\s*=\s*\[(.*?)\]', re.DOTALL)
+_JS_STRING_RE = re.compile(r'''['"]([^'"]*)['"]''')
+
+REASONS = {200: 'OK', 204: 'No Content', 301: 'Moved Permanently', 302: 'Found', 303: 'See Other',
+           304: 'Not Modified', 307: 'Temporary Redirect', 308: 'Permanent Redirect', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error', 502: 'Bad Gateway'}
+
+
+@dataclass
+class Request:
+    """一个 HTTP 请求；headers 的键为小写"""
+    method: str
+    path: str
+    query: str = ''
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+
+    @property
+    def target(self) -> str:
+        return self.path + ('?' + self.query if self.query else '')
+
+
+@dataclass
+class Response:
+    """一个 HTTP 响应；headers 的键为小写"""
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+
+    def copy(self) -> 'Response':
+        return Response(self.status, dict(self.headers), self.body)
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+def parse_cache_control(value: str) -> dict[str, Optional[str]]:
+    """"public, max-age=60" → {'public': None, 'max-age': '60'}"""
+    directives = {}
+    for part in value.split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _int_directive(directives: dict, name: str) -> Optional[int]:
+    try:
+        return int(directives[name]) if directives.get(name) is not None else None
+    except ValueError:
+        return None
+
+
+# ---- worker.js ----
+
+def load_supabase_paths(worker_js: Path) -> list[str]:
+    """从 worker.js 中读取 SUPABASE_PATHS"""
+    match = _SUPABASE_PATHS_RE.search(worker_js.read_text(encoding='utf-8'))
+    if not match:
+        raise ValueError(f'{worker_js} 中没有 SUPABASE_PATHS')
+    return _JS_STRING_RE.findall(match.group(1))
+
+
+# ---- _redirects / _headers ----
+
+def compile_path_pattern(pattern: str) -> re.Pattern:
+    """Pages 的路径模式 → 正则：* 匹配任意字符（命名为 splat），:name 匹配一段路径"""
+    out = []
+    for token in re.split(r'(\*|:[A-Za-z_]\w*)', pattern):
+        if token == '*':
+            out.append('(?P<splat>.*)' if '(?P<splat>' not in ''.join(out) else '.*')
+        elif token.startswith(':') and len(token) > 1:
+            out.append(f'(?P<{token[1:]}>[^/]+)')
+        else:
+            out.append(re.escape(token))
+    return re.compile(''.join(out))
+
+
+@dataclass
+class RedirectRule:
+    """_redirects 中的一条规则"""
+    source: str
+    target: str
+    status: int = 301
+    force: bool = False
+    pattern: re.Pattern = None
+
+    def apply(self, path: str) -> Optional[str]:
+        match = self.pattern.fullmatch(path)
+        if not match:
+            return None
+        target = self.target
+        for name, value in match.groupdict().items():
+            target = target.replace(f':{name}', value or '')
+        return target
+
+
+def parse_redirects(text: str) -> list[RedirectRule]:
+    """解析 _redirects：每行"来源 目标 [状态码][!]"，# 开头为注释"""
+    rules = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or parts[0].startswith('#'):
+            continue
+        status, force = 301, False
+        if len(parts) >= 3:
+            force = parts[2].endswith('!')
+            status = int(parts[2].rstrip('!'))
+        rules.append(RedirectRule(parts[0], parts[1], status, force, compile_path_pattern(parts[0])))
+    return rules
+
+
+@dataclass
+class HeaderRule:
+    """_headers 中的一条规则"""
+    source: str
+    pattern: re.Pattern
+    set: list[tuple[str, str]] = field(default_factory=list)
+    detach: list[str] = field(default_factory=list)
+
+
+def parse_headers(text: str) -> list[HeaderRule]:
+    """解析 _headers：不缩进的行为路径模式，其下缩进的"名称: 值"为响应头，"! 名称"删除响应头"""
+    rules = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if not line[0].isspace():
+            path = urlsplit(stripped).path if stripped.startswith(('http://', 'https://')) else stripped
+            rules.append(HeaderRule(stripped, compile_path_pattern(path)))
+        elif rules:
+            if stripped.startswith('!'):
+                rules[-1].detach.append(stripped[1:].strip().lower())
+            else:
+                name, _, value = stripped.partition(':')
+                rules[-1].set.append((name.strip().lower(), value.strip()))
+    return rules
+
+
+def apply_header_rules(rules: list[HeaderRule], path: str, headers: dict[str, str]):
+    """按顺序应用匹配 path 的规则（规则之间同名头用逗号拼接，与 Pages 一致）"""
+    added: dict[str, str] = {}
+    for rule in rules:
+        if not rule.pattern.fullmatch(path):
+            continue
+        for name in rule.detach:
+            added.pop(name, None)
+            headers.pop(name, None)
+        for name, value in rule.set:
+            added[name] = f'{added[name]}, {value}' if name in added else value
+    headers.update(added)
+
+
+# ---- Pages 与 Supabase ----
+
+class PagesOrigin:
+    """以目录为根的 Pages 静态站点"""
+
+    def __init__(self, site: Path):
+        self.site = Path(site)
+        self.redirects = self._load('_redirects', parse_redirects)
+        self.header_rules = self._load('_headers', parse_headers)
+        self._files: dict[Path, tuple[int, bytes, str]] = {}  # 路径 → (mtime_ns, 内容, ETag)
+
+    def _load(self, name: str, parse):
+        path = self.site / name
+        return parse(path.read_text(encoding='utf-8')) if path.is_file() else []
+
+    def _file(self, rel: str) -> Optional[Path]:
+        if not rel or any(part.startswith('.') or part == '..' for part in rel.split('/')):
+            return None
+        if rel in HIDDEN_FILES:
+            return None
+        path = self.site / rel
+        return path if path.is_file() else None
+
+    def resolve(self, path: str) -> Optional[Path]:
+        """URL 路径 → 文件：/ → index.html，/a/ → a/index.html，/guide → guide.html"""
+        rel = path.lstrip('/')
+        if rel == '' or rel.endswith('/'):
+            return self._file(rel + 'index.html')
+        return self._file(rel) or self._file(rel + '.html')
+
+    def _read(self, path: Path) -> tuple[bytes, str]:
+        """读取文件（按修改时间缓存在内存中），返回 (内容, ETag)"""
+        mtime = path.stat().st_mtime_ns
+        cached = self._files.get(path)
+        if cached is None or cached[0] != mtime:
+            data = path.read_bytes()
+            cached = (mtime, data, hashlib.sha256(data).hexdigest()[:20])
+            self._files[path] = cached
+        return cached[1], cached[2]
+
+    async def handle(self, request: Request) -> Response:
+        if request.method not in ('GET', 'HEAD'):
+            return Response(405, {'allow': 'GET, HEAD', 'content-type': 'text/plain; charset=utf-8'},
+                            b'Method Not Allowed')
+        serve_path, status = request.path, 200
+        for rule in self.redirects:
+            target = rule.apply(request.path)
+            if target is None:
+                continue
+            if not rule.force and self.resolve(request.path) is not None:
+                continue
+            if rule.status in (301, 302, 303, 307, 308):
+                location = target + ('?' + request.query if request.query and '?' not in target else '')
+                response = Response(rule.status, {'location': location})
+                apply_header_rules(self.header_rules, request.path, response.headers)
+                return response
+            serve_path, status = urlsplit(target).path, rule.status
+            break
+
+        file = self.resolve(serve_path)
+        if file is None:
+            status = 404
+            file = self._file('404.html')
+            if file is None:
+                response = Response(404, {'content-type': 'text/plain; charset=utf-8'}, b'Not Found')
+                apply_header_rules(self.header_rules, request.path, response.headers)
+                return response
+
+        data, etag = self._read(file)
+        content_type = mimetypes.guess_type(file.name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        headers = {'content-type': content_type, 'vary': 'Accept-Encoding'}
+        encoding = negotiate_encoding(request.headers.get('accept-encoding', ''),
+                                      [enc for enc, ext in (('br', '.br'), ('gzip', '.gz'))
+                                       if file.with_name(file.name + ext).is_file()])
+        if encoding:
+            data, _ = self._read(file.with_name(file.name + ('.br' if encoding == 'br' else '.gz')))
+            headers['content-encoding'] = encoding
+        headers['etag'] = f'"{etag}{"-" + encoding if encoding else ""}"'
+        apply_header_rules(self.header_rules, request.path, headers)
+        headers.setdefault('cache-control', PAGES_DEFAULT_CACHE_CONTROL)
+        if status == 200 and etag_matches(request.headers.get('if-none-match', ''), headers['etag']):
+            return Response(304, headers)
+        return Response(status, headers, data)
+
+
+def negotiate_encoding(accept: str, available: list[str]) -> Optional[str]:
+    """按 Accept-Encoding 选择预压缩副本（q=0 的排除；br 优先）"""
+    accepted = set()
+    for part in accept.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            accepted.add(name)
+    return next((enc for enc in available if enc in accepted or '*' in accepted), None)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == bare for tag in if_none_match.split(','))
+
+
+class SupabaseStub:
+    """Supabase 的替身：回显请求，可设固定延迟（秒）"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    async def handle(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = json.dumps({'stub': 'supabase', 'method': request.method, 'path': request.path,
+                           'query': request.query, 'body_bytes': len(request.body)}).encode('utf-8')
+        return Response(200, {'content-type': 'application/json'}, body)
+
+
+class EdgeWorker:
+    """worker.js 的路由逻辑"""
+
+    def __init__(self, pages: PagesOrigin, supabase: SupabaseStub, supabase_paths: list[str]):
+        self.pages = pages
+        self.supabase = supabase
+        self.supabase_paths = supabase_paths
+
+    def is_supabase(self, path: str) -> bool:
+        return any(path.startswith(prefix) for prefix in self.supabase_paths)
+
+    async def fetch(self, request: Request) -> Response:
+        if self.is_supabase(request.path):
+            response = await self.supabase.handle(request)
+            response.headers['access-control-allow-origin'] = '*'
+            return response
+        return await self.pages.handle(request)
+
+
+# ---- 缓存模拟 ----
+
+@dataclass
+class CacheStats:
+    """缓存统计"""
+    hits: int = 0
+    revalidated: int = 0  # 过期后条件请求得到 304，继续使用缓存内容
+    misses: int = 0
+    bypass: int = 0  # 不可缓存的请求（非 GET / HEAD）
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.revalidated + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        """直接用缓存内容响应、不访问上游的比例（重新验证要往返上游，不计为命中）"""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def origin_ratio(self) -> float:
+        """需要访问上游的比例：重新验证（条件请求）与未命中"""
+        return (self.revalidated + self.misses) / self.lookups if self.lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    response: Response
+    stored_at: float
+    freshness: float
+    size: int
+
+
+class HttpCache:
+    """内存中的 HTTP 缓存
+
+    shared=True 时按共享缓存（CDN 边缘节点）处理：s-maxage 优先、private 不存；
+    shared=False 时按浏览器私有缓存处理。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_CAPACITY, shared: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.shared = shared
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._vary: dict[str, tuple[str, ...]] = {}
+        self._size = 0
+
+    @staticmethod
+    def _vary_value(request: Request, name: str) -> str:
+        value = request.headers.get(name, '')
+        if name == 'accept-encoding':
+            # 与 CDN 一样归一化，避免同一资源因浏览器差异被存成许多份
+            return negotiate_encoding(value, ['br', 'gzip']) or ''
+        return value
+
+    def _key(self, request: Request) -> tuple:
+        primary = request.target
+        names = self._vary.get(primary, ())
+        return (primary,) + tuple(self._vary_value(request, name) for name in names)
+
+    def _freshness(self, directives: dict) -> Optional[float]:
+        """可存储时返回新鲜期（秒），不可存储返回 None"""
+        if 'no-store' in directives or (self.shared and 'private' in directives):
+            return None
+        max_age = _int_directive(directives, 's-maxage') if self.shared else None
+        if max_age is None:
+            max_age = _int_directive(directives, 'max-age')
+        if 'no-cache' in directives:
+            max_age = 0
+        return float(max_age) if max_age is not None else None
+
+    def _store(self, key: tuple, request: Request, response: Response):
+        if request.method != 'GET' or response.status not in CACHEABLE_STATUS:
+            return
+        vary = response.headers.get('vary', '')
+        if '*' in vary:
+            return
+        freshness = self._freshness(parse_cache_control(response.headers.get('cache-control', '')))
+        if freshness is None or (freshness <= 0 and 'etag' not in response.headers):
+            return
+        names = tuple(sorted(n.strip().lower() for n in vary.split(',') if n.strip()))
+        primary = key[0]
+        if self._vary.get(primary, ()) != names:
+            self._vary[primary] = names
+            key = self._key(request)
+        self._remove(key)
+        size = len(response.body) + sum(len(k) + len(v) for k, v in response.headers.items())
+        if size > self.capacity:
+            return
+        self._entries[key] = _Entry(response.copy(), self.clock(), freshness, size)
+        self._size += size
+        self.stats.stores += 1
+        while self._size > self.capacity:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.stats.evictions += 1
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    async def fetch(self, request: Request, upstream: Handler) -> tuple[Response, str]:
+        """经过缓存取得响应，返回 (响应, 'HIT' / 'REVALIDATED' / 'MISS' / 'BYPASS')"""
+        if request.method not in ('GET', 'HEAD'):
+            self.stats.bypass += 1
+            # 不安全的方法使该 URL 的缓存失效
+            for key in [k for k in self._entries if k[0] == request.target]:
+                self._remove(key)
+            return await upstream(request), 'BYPASS'
+
+        # 客户端自己的条件请求在缓存这一层处理，向上游总是取完整响应（或重新验证缓存的副本）
+        client_inm = request.headers.get('if-none-match', '')
+        forward = Request(request.method, request.path, request.query,
+                          {k: v for k, v in request.headers.items() if k != 'if-none-match'}, request.body)
+        key = self._key(forward)
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is not None and now - entry.stored_at < entry.freshness:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            response, state = entry.response.copy(), 'HIT'
+        elif entry is not None and 'etag' in entry.response.headers:
+            conditional = Request(forward.method, forward.path, forward.query,
+                                  {**forward.headers, 'if-none-match': entry.response.headers['etag']})
+            upstream_response = await upstream(conditional)
+            if upstream_response.status == 304:
+                entry.stored_at = self.clock()
+                for name, value in upstream_response.headers.items():
+                    if name not in ('content-length', 'content-encoding', 'content-type'):
+                        entry.response.headers[name] = value
+                entry.freshness = self._freshness(
+                    parse_cache_control(entry.response.headers.get('cache-control', ''))) or 0.0
+                self._entries.move_to_end(key)
+                self.stats.revalidated += 1
+                response, state = entry.response.copy(), 'REVALIDATED'
+            else:
+                self.stats.misses += 1
+                self._store(key, forward, upstream_response)
+                response, state = upstream_response, 'MISS'
+        else:
+            self.stats.misses += 1
+            response = await upstream(forward)
+            self._store(key, forward, response)
+            state = 'MISS'
+
+        if entry is not None and state == 'HIT':
+            response.headers['age'] = str(int(now - entry.stored_at))
+        if response.status == 200 and etag_matches(client_inm, response.headers.get('etag', '')):
+            response = Response(304, response.headers)
+        return response, state
+
+
+# ---- HTTP 服务器 ----
+
+class EdgeServer:
+    """asyncio HTTP/1.1 服务器：边缘缓存 → Worker 路由 → Pages / Supabase 桩"""
+
+    def __init__(self, site: Path, supabase_paths: list[str], supabase_latency: float = 0.0,
+                 cache: Optional[HttpCache] = None, log: bool = False):
+        self.pages = PagesOrigin(site)
+        self.supabase = SupabaseStub(supabase_latency)
+        self.worker = EdgeWorker(self.pages, self.supabase, supabase_paths)
+        self.cache = cache
+        self.log = log
+        self.requests = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def handle(self, request: Request) -> Response:
+        self.requests += 1
+        if self.cache is None:
+            response, state = await self.worker.fetch(request), 'DYNAMIC'
+        else:
+            response, state = await self.cache.fetch(request, self.worker.fetch)
+            response = response.copy()
+        response.headers['x-cache'] = state
+        return response
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """开始监听，返回基础 URL"""
+        self._server = await asyncio.start_server(self._client, host, port, limit=MAX_HEADER_BYTES)
+        port = self._server.sockets[0].getsockname()[1]
+        return f'http://{host}:{port}'
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request, keep_alive = await read_request(reader)
+                if request is None:
+                    break
+                start = time.perf_counter()
+                try:
+                    response = await self.handle(request)
+                except Exception as e:  # 单个请求出错不影响连接上的其他请求
+                    response = Response(500, {'content-type': 'text/plain; charset=utf-8'},
+                                        f'{type(e).__name__}: {e}'.encode('utf-8'))
+                if self.log:
+                    print(f"   {request.method} {request.target} → {response.status} "
+                          f"{response.headers.get('x-cache', '')} {(time.perf_counter() - start) * 1000:.1f} ms")
+                writer.write(encode_response(response, head=request.method == 'HEAD', keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[Optional[Request], bool]:
+    """读取一个请求；连接已关闭时返回 (None, False)"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None, False
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    body = b''
+    if headers.get('content-length'):
+        body = await reader.readexactly(int(headers['content-length']))
+    parts = urlsplit(target)
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return Request(method.upper(), parts.path or '/', parts.query, headers, body), keep_alive
+
+
+def encode_response(response: Response, head: bool = False, keep_alive: bool = True) -> bytes:
+    """序列化响应（HEAD 与 304 不带正文，Content-Length 仍为完整正文的长度）"""
+    headers = dict(response.headers)
+    if response.status != 304:
+        headers['content-length'] = str(len(response.body))
+    headers['connection'] = 'keep-alive' if keep_alive else 'close'
+    lines = [f'HTTP/1.1 {response.status} {REASONS.get(response.status, "")}']
+    lines += [f"{'-'.join(p.capitalize() for p in name.split('-'))}: {value}" for name, value in headers.items()]
+    data = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', errors='replace')
+    if not head and response.status not in (204, 304):
+        data += response.body
+    return data
+
+
+# ---- 压测 ----
+
+class _Connection:
+    """一个 keep-alive 客户端连接"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, host: str, request: Request) -> Response:
+        lines = [f'{request.method} {request.target} HTTP/1.1', f'Host: {host}']
+        lines += [f'{name}: {value}' for name, value in request.headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        status = int(status_line.split(' ', 2)[1])
+        headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        body = b''
+        if request.method != 'HEAD' and status not in (204, 304):
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        return Response(status, headers, body)
+
+    def close(self):
+        self.writer.close()
+
+
+class _ConnectionPool:
+    """每个虚拟用户的连接池（最多 BROWSER_CONNECTIONS 个并发连接）"""
+
+    def __init__(self, base_url: str, size: int = BROWSER_CONNECTIONS):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.netloc = parts.netloc
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, request: Request) -> Response:
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else _Connection(
+                *await asyncio.open_connection(self.host, self.port, limit=MAX_HEADER_BYTES))
+            try:
+                response = await conn.request(self.netloc, request)
+            except BaseException:
+                conn.close()
+                raise
+            if response.headers.get('connection', '').lower() == 'close':
+                conn.close()
+            else:
+                self._idle.append(conn)
+            return response
+
+    def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+
+
+@dataclass
+class LoadReport:
+    """压测结果"""
+    seconds: float = 0.0
+    page_loads: int = 0
+    requests: int = 0  # 页面与资源的请求总数（含浏览器缓存命中）
+    network_requests: int = 0  # 实际发到服务器的请求
+    errors: int = 0
+    bytes_received: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+    edge: dict[str, int] = field(default_factory=dict)  # X-Cache → 次数
+    request_latencies: list[float] = field(default_factory=list)  # 网络请求（秒）
+    page_latencies: list[float] = field(default_factory=list)  # 整页（HTML + 资源）
+    browser: CacheStats = field(default_factory=CacheStats)
+
+    @property
+    def rps(self) -> float:
+        return self.network_requests / self.seconds if self.seconds else 0.0
+
+    @property
+    def edge_lookups(self) -> int:
+        return sum(v for k, v in self.edge.items() if k in ('HIT', 'REVALIDATED', 'MISS'))
+
+    @property
+    def edge_hit_ratio(self) -> float:
+        """边缘节点直接响应、不回源的比例"""
+        return self.edge.get('HIT', 0) / self.edge_lookups if self.edge_lookups else 0.0
+
+    @property
+    def edge_origin_ratio(self) -> float:
+        """边缘节点回源的比例（重新验证与未命中都要往返一次源站）"""
+        origin = self.edge.get('REVALIDATED', 0) + self.edge.get('MISS', 0)
+        return origin / self.edge_lookups if self.edge_lookups else 0.0
+
+
+def percentile(values: list[float], p: float) -> float:
+    """最近秩法分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _decode_body(response: Response) -> bytes:
+    encoding = response.headers.get('content-encoding', '')
+    if encoding == 'gzip':
+        return gzip.decompress(response.body)
+    if encoding == 'br':
+        return brotli.decompress(response.body)
+    return response.body
+
+
+async def run_load(base_url: str, pages: list[str], users: int = 10, duration: float = 10.0,
+                   browser_cache: bool = True, seed: int = 0) -> LoadReport:
+    """虚拟用户反复打开 pages 中的页面，统计到 duration 秒为止"""
+    from page_budget import page_resources
+    report = LoadReport()
+    accept_encoding = 'br, gzip' if brotli is not None else 'gzip'
+    resources_of: dict[str, list[str]] = {}
+    origin = urlsplit(base_url).netloc
+    deadline = time.perf_counter() + duration
+
+    async def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        pool = _ConnectionPool(base_url)
+        cache = HttpCache(shared=False) if browser_cache else None
+
+        async def network(request: Request) -> Response:
+            start = time.perf_counter()
+            response = await pool.request(request)
+            report.request_latencies.append(time.perf_counter() - start)
+            report.network_requests += 1
+            report.bytes_received += len(response.body)
+            report.statuses[response.status] = report.statuses.get(response.status, 0) + 1
+            state = response.headers.get('x-cache')
+            if state:
+                report.edge[state] = report.edge.get(state, 0) + 1
+            return response
+
+        async def get(path: str) -> Response:
+            parts = urlsplit(path)
+            request = Request('GET', parts.path or '/', parts.query, {'accept-encoding': accept_encoding})
+            report.requests += 1
+            if cache is None:
+                return await network(request)
+            response, _ = await cache.fetch(request, network)
+            return response
+
+        try:
+            while time.perf_counter() < deadline:
+                page = rng.choice(pages)
+                start = time.perf_counter()
+                try:
+                    response = await get(page)
+                    if page not in resources_of and response.status == 200:
+                        html = _decode_body(response).decode('utf-8', errors='replace')
+                        urls = []
+                        for url in page_resources(html):
+                            absolute = urlsplit(urljoin(base_url + page, url))
+                            target = absolute.path + ('?' + absolute.query if absolute.query else '')
+                            if absolute.netloc == origin and target not in urls:
+                                urls.append(target)
+                        resources_of[page] = urls
+                    await asyncio.gather(*(get(url) for url in resources_of.get(page, [])))
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    report.errors += 1
+                    continue
+                report.page_latencies.append(time.perf_counter() - start)
+                report.page_loads += 1
+                # 全部命中浏览器缓存时没有任何 await，主动让出事件循环，避免其他用户与服务器饿死
+                await asyncio.sleep(0)
+        finally:
+            pool.close()
+            if cache is not None:
+                for name in ('hits', 'revalidated', 'misses', 'bypass', 'stores', 'evictions'):
+                    setattr(report.browser, name, getattr(report.browser, name) + getattr(cache.stats, name))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_load_report(report: LoadReport, browser_cache: bool):
+    """打印压测结果"""
+    from manifest_diff import format_size
+
+    def ms(values: list[float], p: float) -> str:
+        return f"{percentile(values, p) * 1000:.1f}"
+
+    print(f"📈 {report.seconds:.1f} s 内打开页面 {report.page_loads} 次，请求 {report.requests} 个，"
+          f"发到服务器 {report.network_requests} 个（{report.rps:.0f} 请求/s），"
+          f"接收 {format_size(report.bytes_received)}，错误 {report.errors} 个")
+    for label, values in (('网络请求', report.request_latencies), ('整页加载', report.page_latencies)):
+        if values:
+            print(f"   ⏱️ {label}延迟 p50 {ms(values, 50)} ms，p90 {ms(values, 90)} ms，"
+                  f"p99 {ms(values, 99)} ms，最大 {max(values) * 1000:.1f} ms")
+    statuses = '，'.join(f'{status} × {count}' for status, count in sorted(report.statuses.items()))
+    print(f"   📨 状态码: {statuses}")
+    if report.edge:
+        states = '，'.join(f'{state} {count}' for state, count in sorted(report.edge.items()))
+        print(f"   🗄️ 边缘缓存命中率 {report.edge_hit_ratio:.1%}，回源 {report.edge_origin_ratio:.1%}（{states}）")
+    if browser_cache:
+        b = report.browser
+        print(f"   🧭 浏览器缓存命中率 {b.hit_ratio:.1%}，发出请求 {b.origin_ratio:.1%}"
+              f"（命中 {b.hits}，重新验证 {b.revalidated}，未命中 {b.misses}）")
+    if report.page_loads:
+        print(f"   🔁 平均每次打开页面发出 {report.network_requests / report.page_loads:.2f} 个网络请求")
+
+
+def main():
+    import argparse
+    repo_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description='本地模拟 worker.js 路由、_redirects、_headers 与 HTTP 缓存，并压测')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def common(p):
+        p.add_argument('--site', default='website', help='网站目录（默认 website/，可用构建后的 site-dist/）')
+        p.add_argument('--worker', default='website/worker.js', help='读取 SUPABASE_PATHS 的 worker.js')
+        p.add_argument('--supabase-latency', type=float, default=20.0, help='Supabase 桩的响应延迟（毫秒）')
+        p.add_argument('--no-edge-cache', action='store_true', help='不启用边缘缓存')
+        p.add_argument('--cache-size', default='64MB', help='边缘缓存容量')
+
+    p = sub.add_parser('serve', help='启动本地边缘服务器')
+    common(p)
+    p.add_argument('--host', default='127.0.0.1', help='监听地址')
+    p.add_argument('--port', type=int, default=8787, help='端口')
+    p.add_argument('--quiet', action='store_true', help='不打印每个请求')
+
+    p = sub.add_parser('bench', help='压测（默认在进程内启动服务器）')
+    common(p)
+    p.add_argument('--url', help='压测已运行的服务器（不在进程内启动）')
+    p.add_argument('--pages', nargs='+', default=['/', '/guide'], help='虚拟用户随机打开的页面')
+    p.add_argument('--users', type=int, default=10, help='虚拟用户数')
+    p.add_argument('--duration', type=float, default=10.0, help='持续时间（秒）')
+    p.add_argument('--no-browser-cache', action='store_true', help='虚拟用户不使用浏览器缓存（每次都是首次访问）')
+    p.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    from manifest_budget import parse_size
+
+    async def start_server(log: bool) -> tuple[EdgeServer, str]:
+        site = repo_root / args.site
+        if not site.is_dir():
+            raise FileNotFoundError(f'找不到网站目录: {site}')
+        supabase_paths = load_supabase_paths(repo_root / args.worker)
+        cache = None if args.no_edge_cache else HttpCache(parse_size(args.cache_size))
+        server = EdgeServer(site, supabase_paths, args.supabase_latency / 1000, cache, log=log)
+        host, port = (args.host, args.port) if args.command == 'serve' else ('127.0.0.1', 0)
+        return server, await server.start(host, port)
+
+    async def serve():
+        server, base_url = await start_server(log=not args.quiet)
+        print(f"🌐 {base_url}/ → {args.site}（Supabase 路径: {' '.join(server.worker.supabase_paths)}，"
+              f"边缘缓存{'关闭' if server.cache is None else '开启'}，Ctrl+C 停止）")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    async def bench():
+        server = None
+        base_url = args.url.rstrip('/') if args.url else None
+        if base_url is None:
+            server, base_url = await start_server(log=False)
+        browser_cache = not args.no_browser_cache
+        print(f"🚀 {args.users} 个虚拟用户，{args.duration:.0f} s，页面 {' '.join(args.pages)}，"
+              f"浏览器缓存{'开启' if browser_cache else '关闭'} → {base_url}")
+        try:
+            report = await run_load(base_url, args.pages, args.users, args.duration, browser_cache, args.seed)
+        finally:
+            if server is not None:
+                await server.close()
+        print_load_report(report, browser_cache)
+        if server is not None and server.cache is not None:
+            s = server.cache.stats
+            print(f"   🗄️ 边缘缓存存入 {s.stores} 次，淘汰 {s.evictions} 次")
+        return 1 if report.errors else 0
+
+    try:
+        return asyncio.run(serve() if args.command == 'serve' else bench())
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+文件变更监听
+
+Linux 上通过 inotify（ctypes 调用 libc）阻塞等待事件；不可用时
+（其他平台、容器限制、inotify 实例数用尽）退回按间隔轮询 stat。
+监听的是文件所在目录，编辑器"先写临时文件再改名"的保存方式也能捕获。
+
+一次保存往往触发多个事件（截断、写入、关闭、改名），
+changes() 在首个事件后等待一段静默期（debounce）再产出一次变更。
+
+使用方法：
+    from file_watch import FileWatcher
+
+    with FileWatcher([Path('README.md')], debounce=0.02) as watcher:
+        for first_event_at in watcher.changes():
+            ...
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class _InotifyBackend:
+    """inotify 后端：每个目录一个 watch，按文件名过滤事件"""
+
+    name = 'inotify'
+
+    def __init__(self, paths: list[Path]):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify 仅在 Linux 上可用')
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        # watch 描述符 → 该目录下关心的文件名
+        self._names: dict[int, set[bytes]] = {}
+        try:
+            for path in paths:
+                directory = os.fsencode(path.parent.resolve())
+                wd = libc.inotify_add_watch(self._fd, directory, _WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f'inotify_add_watch 失败: {path.parent}')
+                self._names.setdefault(wd, set()).add(os.fsencode(path.name))
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """等待事件；timeout 内有关心的文件变化时返回 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def _drain(self) -> bool:
+        """读空事件队列，返回其中是否有关心的文件"""
+        matched = False
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return matched
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(buf):
+                wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, pos)
+                pos += _EVENT_HEADER.size
+                name = buf[pos:pos + length].rstrip(b'\0')
+                pos += length
+                if name in self._names.get(wd, ()):
+                    matched = True
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """轮询后端：比较 (mtime_ns, size, inode)"""
+
+    name = 'polling'
+
+    def __init__(self, paths: list[Path], interval: float):
+        self._paths = paths
+        self._interval = interval
+        self._signatures = [self._signature(p) for p in paths]
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signatures = [self._signature(p) for p in self._paths]
+            if signatures != self._signatures:
+                self._signatures = signatures
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(self._interval, remaining))
+            else:
+                time.sleep(self._interval)
+
+    def close(self):
+        pass
+
+
+class FileWatcher:
+    """监听一组文件的变化，自动选择 inotify 或轮询"""
+
+    def __init__(self, paths: list[Path], debounce: float = 0.02, poll_interval: float = 0.02,
+                 force_polling: bool = False):
+        self.debounce = debounce
+        self.fallback_reason = ''
+        self._backend = None
+        if not force_polling:
+            try:
+                self._backend = _InotifyBackend(paths)
+            except (OSError, AttributeError) as e:
+                # AttributeError：libc 中没有 inotify_* 符号
+                self.fallback_reason = str(e)
+        if self._backend is None:
+            self._backend = _PollingBackend(paths, poll_interval)
+
+    @property
+    def backend(self) -> str:
+        """当前使用的后端名称"""
+        return self._backend.name
+
+    def changes(self) -> Iterator[float]:
+        """逐次产出变更；产出值为这一批事件中首个事件被察觉的 time.perf_counter() 读数"""
+        while True:
+            if not self._backend.wait(None):
+                continue
+            first = time.perf_counter()
+            # 静默期内仍有事件则继续等待，合并为一次变更
+            while self._backend.wait(self.debounce):
+                pass
+            yield first
+
+    def close(self):
+        self._backend.close()
+
+    def __enter__(self) -> 'FileWatcher':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
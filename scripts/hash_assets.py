@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+静态资源内容哈希命名 + 生成缓存头
+
+原来的 website/_headers 给图片统一 7 天、HTML 1 小时：回访时频繁重新验证，
+而 QRcode.png 改了之后又可能一周内还是旧的。本阶段：
+- 把静态资源复制为带内容哈希的文件名（QRcode.png → QRcode.1a2b3c4d5e.png），
+  已经带哈希的文件（如字体子集 NotoSansSC-400.<哈希>.woff2）保持原名
+- 改写所有页面中的引用（属性、srcset、CSS url()、脚本中的字符串）
+- 重新生成 _headers：带哈希的资源 max-age=31536000, immutable，HTML 每次重新验证，
+  其余文件短缓存。回访时页面引用的资源全部命中浏览器缓存，不再发出任何资源请求
+
+原文件名的副本保留（短缓存），外部直链与仍缓存着旧页面的浏览器不受影响。
+CSS / JS / SVG 中对其他资源的引用先改写再计算哈希；文本资源之间的相互引用（如 CSS @import）不处理。
+
+Cloudflare Pages 的 _headers 中同一响应头被多条规则匹配时会用逗号拼接，
+因此生成的规则逐个路径列出，不使用 /* 这类通配规则。
+腾讯云服务器（nginx）不读取 _headers，对应配置见 release-workflow.md。
+
+使用方法：
+    python scripts/build_site.py                  # 作为构建阶段运行（hash）
+    python scripts/hash_assets.py /tmp/site       # 就地处理一个已构建的目录
+"""
+
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from build_cache import sha256_file
+
+
+HASH_LENGTH = 10
+
+# 已带内容哈希的文件名：name.<10 位十六进制>.ext
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % HASH_LENGTH)
+
+# 文件名固定、不能改名的文件（浏览器 / 平台按固定路径请求，或不会部署）
+FIXED_NAMES = ('_headers', '_redirects', 'worker.js', 'favicon.ico', 'robots.txt', 'sitemap.xml')
+
+PAGE_EXTENSIONS = ('.html', '.htm')
+
+# 内容可能引用其他资源、需要先改写再计算哈希的文本资源
+TEXT_ASSET_EXTENSIONS = ('.css', '.js', '.mjs', '.svg', '.json', '.webmanifest')
+
+# 预压缩副本跟随源文件，不单独处理
+SKIP_EXTENSIONS = ('.br', '.gz')
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_PAGE = 'public, max-age=0, must-revalidate'
+CACHE_SHORT = 'public, max-age=3600'
+
+HEADERS_FILE = '_headers'
+REDIRECTS_FILE = '_redirects'
+
+# Cloudflare Pages 的 _headers 最多 100 条规则
+MAX_HEADER_RULES = 100
+
+# 引用两侧允许的字符：引号、括号、空白、逗号（srcset）、等号（未加引号的属性）；右侧另有 ?query 与 #fragment
+_BEFORE = r'''(?<=["'(\s,=])'''
+_AFTER = r'''(?=["')\s,?#>])'''
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    """QRcode.png + 哈希 → QRcode.1a2b3c4d5e.png"""
+    stem, ext = os.path.splitext(rel)
+    return f'{stem}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def is_hashable(rel: str) -> bool:
+    name = rel.rsplit('/', 1)[-1]
+    lower = name.lower()
+    return not (name.startswith('.') or name in FIXED_NAMES or lower.endswith(PAGE_EXTENSIONS)
+                or lower.endswith(SKIP_EXTENSIONS) or HASHED_NAME_RE.search(name))
+
+
+def rewrite_references(text: str, doc_dir: str, renames: dict[str, str]) -> tuple[str, int]:
+    """把 text 中对 renames 里资源的引用替换为新文件名，返回 (新内容, 替换次数)
+
+    doc_dir 为文档所在目录（相对网站根目录，根目录为 ''）；
+    支持相对文档的路径（含 ./ 前缀）与以 / 开头的绝对路径。
+    """
+    mapping = {}
+    for old, new in renames.items():
+        rel_old = os.path.relpath(old, doc_dir or '.').replace(os.sep, '/')
+        rel_new = os.path.relpath(new, doc_dir or '.').replace(os.sep, '/')
+        mapping[rel_old] = rel_new
+        mapping['./' + rel_old] = './' + rel_new
+        mapping['/' + old] = '/' + new
+    if not mapping:
+        return text, 0
+    # 长的优先，避免 a.png 抢先匹配 aa.png 的后半段之类的问题（边界断言已排除大部分情况）
+    alternatives = '|'.join(re.escape(ref) for ref in sorted(mapping, key=len, reverse=True))
+    pattern = re.compile(f'{_BEFORE}(?:{alternatives}){_AFTER}')
+    return pattern.subn(lambda m: mapping[m.group(0)], text)
+
+
+def rewrite_routes(site: Path) -> list[str]:
+    """_redirects 中以 200 改写到 HTML 页面的路径（如 /guide → /guide.html），这些路径同样按页面缓存"""
+    path = site / REDIRECTS_FILE
+    if not path.is_file():
+        return []
+    routes = []
+    for line in path.read_text(encoding='utf-8').splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and not parts[0].startswith('#') and parts[2].startswith('200') \
+                and parts[1].lower().endswith(PAGE_EXTENSIONS):
+            routes.append(parts[0])
+    return routes
+
+
+def is_servable(rel: str) -> bool:
+    name = rel.rsplit('/', 1)[-1]
+    return not (name.startswith('.') or name in (HEADERS_FILE, REDIRECTS_FILE, 'worker.js')
+                or name.lower().endswith(SKIP_EXTENSIONS))
+
+
+def generate_headers(files: list[str], hashed: set[str], routes: list[str]) -> str:
+    """按文件列表生成 Cloudflare Pages 的 _headers"""
+    rules: list[tuple[str, str]] = [('/', CACHE_PAGE)]
+    rules += [(route, CACHE_PAGE) for route in routes]
+    for rel in files:
+        if not is_servable(rel):
+            continue
+        if rel.lower().endswith(PAGE_EXTENSIONS):
+            rules.append(('/' + rel, CACHE_PAGE))
+        elif rel in hashed:
+            rules.append(('/' + rel, CACHE_IMMUTABLE))
+        else:
+            rules.append(('/' + rel, CACHE_SHORT))
+    lines = ['# 由 scripts/hash_assets.py 在构建时生成，修改缓存策略请改脚本',
+             f'# 带内容哈希的资源: {CACHE_IMMUTABLE}',
+             f'# 页面: {CACHE_PAGE}',
+             f'# 其他文件: {CACHE_SHORT}',
+             '']
+    for route, value in rules:
+        lines += [route, f'  Cache-Control: {value}', '']
+    return '\n'.join(lines)
+
+
+@dataclass
+class HashReport:
+    """内容哈希阶段的结果"""
+    renamed: dict[str, str] = field(default_factory=dict)  # 原路径 → 带哈希的路径
+    references: dict[str, int] = field(default_factory=dict)  # 文件 → 改写的引用数
+    immutable: int = 0  # 长缓存的文件数（含原本就带哈希的）
+    header_rules: int = 0
+    seconds: float = 0.0
+
+
+def hash_site(site: Path) -> HashReport:
+    """构建目录中的内容哈希阶段"""
+    from build_manifest import scan_tree
+    start = time.perf_counter()
+    report = HashReport()
+    files = [f.path for f in scan_tree(site)]
+    assets = [rel for rel in files if is_hashable(rel)]
+    binary = [rel for rel in assets if not rel.lower().endswith(TEXT_ASSET_EXTENSIONS)]
+    text = [rel for rel in assets if rel.lower().endswith(TEXT_ASSET_EXTENSIONS)]
+
+    def add_hashed(rel: str):
+        new = hashed_name(rel, sha256_file(site / rel))
+        shutil.copy2(site / rel, site / new)
+        report.renamed[rel] = new
+
+    def rewrite(rel: str):
+        path = site / rel
+        content = path.read_text(encoding='utf-8')
+        content, count = rewrite_references(content, os.path.dirname(rel), report.renamed)
+        if count:
+            path.write_text(content, encoding='utf-8')
+            report.references[rel] = count
+
+    # 先处理不引用其他资源的文件，再处理引用它们的文本资源，最后是页面
+    for rel in binary:
+        add_hashed(rel)
+    for rel in text:
+        try:
+            rewrite(rel)
+        except UnicodeDecodeError:
+            pass
+        add_hashed(rel)
+    for rel in files:
+        if rel.lower().endswith(PAGE_EXTENSIONS):
+            rewrite(rel)
+
+    files = [f.path for f in scan_tree(site)]
+    hashed = {rel for rel in files if HASHED_NAME_RE.search(rel.rsplit('/', 1)[-1])}
+    headers = generate_headers(files, hashed, rewrite_routes(site))
+    (site / HEADERS_FILE).write_text(headers, encoding='utf-8')
+    report.immutable = len(hashed)
+    report.header_rules = headers.count('\n  Cache-Control:')
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_report(report: HashReport, verbose: bool = True):
+    """打印改名与引用改写结果"""
+    if verbose:
+        for old, new in report.renamed.items():
+            print(f"   #️⃣ {old} → {new}")
+        for rel, count in report.references.items():
+            print(f"   🔗 {rel}: 改写 {count} 处引用")
+    print(f"#️⃣ 内容哈希 {len(report.renamed)} 个资源，长缓存文件 {report.immutable} 个，"
+          f"_headers {report.header_rules} 条规则，耗时 {report.seconds:.2f} s")
+    if report.header_rules > MAX_HEADER_RULES:
+        print(f"⚠️ _headers 超过 Cloudflare Pages 的 {MAX_HEADER_RULES} 条规则上限，多余的规则会被忽略")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='静态资源内容哈希命名并生成 _headers（就地修改目录）')
+    parser.add_argument('site', help='已构建的网站目录（不能是 website/ 源目录）')
+    parser.add_argument('--quiet', action='store_true', help='只输出汇总')
+    args = parser.parse_args()
+
+    site = Path(args.site)
+    source = Path(__file__).parent.parent / 'website'
+    if not site.is_dir():
+        print(f"❌ 找不到目录: {site}")
+        return 1
+    if site.resolve() == source.resolve():
+        print("❌ 不能就地修改 website/ 源目录，请使用 build_site.py 构建")
+        return 1
+    print_report(hash_site(site), verbose=not args.quiet)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,898 @@
+#!/usr/bin/env python3
+"""
+HTML / CSS 压缩与无用规则剔除
+
+- 解析页面标记，删除选择器匹配不到任何元素的 CSS 规则（逗号分隔的选择器逐个判断），
+  以及没有被引用的 @keyframes
+- 压缩 <style> 中的 CSS：去注释、去多余空白、去末尾分号
+- 折叠标记中的空白：块级元素边界处的空白整段删除，其余连续空白折叠为一个空格；
+  <pre>、<textarea>、<script> 内容保持原样
+- 删除普通注释（保留 <!--[if ...]> 条件注释）
+
+选择器匹配支持类型、*、#id、.class、[属性]、后代 / 子 / 相邻 / 兄弟组合符，
+以及 :first-child、:last-child、:nth-child() 等结构伪类和 :not()；
+:hover 等交互状态与 ::before 等伪元素按"可能匹配"处理。
+遇到无法识别的选择器时保留该规则。
+
+压缩前后的渲染等价检查在 bench_html_minify.py 中。
+
+使用方法：
+    python scripts/html_minify.py website/guide.html              # 只报告
+    python scripts/html_minify.py website/guide.html --write      # 原地写回
+    python scripts/html_minify.py website/*.html --keep .active   # 运行时才出现的选择器
+    python scripts/bench_html_minify.py website/*.html           # 写回前核对压缩前后渲染等价
+"""
+
+import functools
+import re
+from dataclasses import dataclass, field
+from html import unescape as html_unescape
+from typing import Iterable, Optional
+
+
+# 无结束标签的元素
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+})
+
+# 块级（或不渲染）元素：紧邻其边界的空白在渲染时会被丢弃
+BLOCK_ELEMENTS = frozenset({
+    'html', 'head', 'body', 'div', 'header', 'footer', 'main', 'section', 'article', 'nav', 'aside',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'table', 'caption',
+    'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'form', 'fieldset', 'blockquote', 'figure',
+    'figcaption', 'hr', 'br', 'pre', 'address', 'details', 'summary', 'dialog',
+    'meta', 'link', 'title', 'style', 'script', 'noscript', 'template', 'base',
+})
+
+# 空白折叠时视为块级边界的节点（含文档根）
+_BOUNDARY_TAGS = BLOCK_ELEMENTS | {'#document'}
+
+# 内容按原样保留的元素
+PRESERVE_ELEMENTS = frozenset({'pre', 'textarea', 'script'})
+
+# 交互状态伪类：静态分析时视为可能匹配
+DYNAMIC_PSEUDO_CLASSES = frozenset({
+    'hover', 'focus', 'focus-within', 'focus-visible', 'active', 'visited', 'link', 'any-link',
+    'target', 'checked', 'disabled', 'enabled', 'indeterminate', 'default', 'valid', 'invalid',
+    'required', 'optional', 'placeholder-shown', 'autofill', 'fullscreen',
+})
+
+# 旧式单冒号写法的伪元素
+LEGACY_PSEUDO_ELEMENTS = frozenset({'before', 'after', 'first-line', 'first-letter'})
+
+# 内容为选择器规则、需要递归处理的 @ 规则
+GROUPING_AT_RULES = frozenset({'media', 'supports', 'layer', 'container', 'document'})
+
+_WS_RE = re.compile(r'[ \t\n\r\f]+')
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_STRING_RE = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')''', re.S)
+
+
+class UnsupportedSelector(ValueError):
+    """选择器中含有无法静态判断的部分"""
+
+
+# ----------------------------------------------------------------------------
+# 标记树
+# ----------------------------------------------------------------------------
+
+class Text:
+    """文本节点（保留原始写法，实体不解码）"""
+    __slots__ = ('data',)
+
+    def __init__(self, data: str):
+        self.data = data
+
+
+class Raw:
+    """原样输出的片段：DOCTYPE、条件注释、孤立的结束标签等"""
+    __slots__ = ('data',)
+
+    def __init__(self, data: str):
+        self.data = data
+
+
+class Element:
+    """元素节点"""
+    __slots__ = ('tag', 'attrs', 'classes', 'raw', 'parent', 'children', 'closed', 'siblings', 'index')
+
+    def __init__(self, tag: str, attrs: dict, raw: str, parent: Optional['Element'],
+                 classes: Optional[frozenset] = None):
+        self.tag = tag
+        self.attrs = attrs
+        if classes is None:
+            classes = frozenset(attrs['class'].split()) if 'class' in attrs else frozenset()
+        self.classes = classes
+        self.raw = raw
+        self.parent = parent
+        self.children: list = []
+        self.closed = False
+        # 父元素的子元素列表与自身位置，供结构伪类使用
+        self.siblings: list['Element'] = []
+        self.index = 0
+
+    @property
+    def is_block(self) -> bool:
+        return self.tag in _BOUNDARY_TAGS
+
+
+# 标记词法：注释、声明（DOCTYPE / CDATA / 处理指令）、结束标签、开始标签
+_MARKUP_RE = re.compile(r"""
+    <!--(?P<comment>.*?)-->
+  | <(?P<decl>[!?][^>]*)>
+  | </(?P<end>[a-zA-Z][^\s/>]*)[^>]*>
+  | <(?P<start>[a-zA-Z][^\s/>]*)(?P<attrs>[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*)>
+""", re.S | re.X)
+
+_ATTR_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+# 内容不解析标记的元素
+_RAW_TEXT_ELEMENTS = ('script', 'style')
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_attrs(text: str) -> tuple[dict, frozenset]:
+    """解析属性，返回 (属性字典, 类名集合)；生成的页面里同样的属性串大量重复，结果共享且只读"""
+    attrs = {}
+    for m in _ATTR_RE.finditer(text):
+        name = m.group(1).lower()
+        if name in attrs:
+            continue
+        value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4) or ''
+        attrs[name] = html_unescape(value) if '&' in value else value
+    return attrs, frozenset(attrs['class'].split()) if 'class' in attrs else frozenset()
+
+
+def parse_html(html: str) -> Element:
+    """解析为标记树（丢弃普通注释），返回文档根节点
+
+    正则词法扫描，文本与开始标签均保留原始写法；结束标签向上闭合到最近的同名元素，
+    找不到同名元素时原样保留为孤立片段。
+    """
+    root = Element('#document', {}, '', None)
+    stack = [root]
+    children = root.children
+    pos = 0
+    length = len(html)
+    while pos < length:
+        m = _MARKUP_RE.search(html, pos)
+        end = m.start() if m else length
+        if end > pos:
+            if children and isinstance(children[-1], Text):
+                children[-1].data += html[pos:end]
+            else:
+                children.append(Text(html[pos:end]))
+        if m is None:
+            break
+        pos = m.end()
+        tag = m.group('start')
+        if tag is not None:
+            tag = tag.lower()
+            attr_text = m.group('attrs')
+            self_closing = attr_text.endswith('/')
+            if self_closing:
+                attr_text = attr_text[:-1]
+            attrs, classes = _parse_attrs(attr_text) if attr_text.strip() else ({}, frozenset())
+            el = Element(tag, attrs, m.group(0), stack[-1], classes)
+            children.append(el)
+            if self_closing or tag in VOID_ELEMENTS:
+                continue
+            if tag in _RAW_TEXT_ELEMENTS:
+                close = re.compile(rf'</{tag}\s*>', re.I).search(html, pos)
+                stop = close.start() if close else length
+                if stop > pos:
+                    el.children.append(Text(html[pos:stop]))
+                el.closed = close is not None
+                pos = close.end() if close else length
+                continue
+            stack.append(el)
+            children = el.children
+        elif m.group('end') is not None:
+            tag = m.group('end').lower()
+            for i in range(len(stack) - 1, 0, -1):
+                if stack[i].tag == tag:
+                    stack[i].closed = True
+                    del stack[i:]
+                    break
+            else:
+                children.append(Raw(m.group(0)))
+                continue
+            children = stack[-1].children
+        elif m.group('decl') is not None:
+            children.append(Raw(m.group(0)))
+        else:
+            comment = m.group('comment')
+            if comment.startswith('[if') or comment.startswith('[endif'):
+                children.append(Raw(m.group(0)))
+    _link_siblings(root)
+    return root
+
+
+def _link_siblings(node: Element):
+    elements = [c for c in node.children if isinstance(c, Element)]
+    for i, el in enumerate(elements):
+        el.siblings = elements
+        el.index = i
+        _link_siblings(el)
+
+
+def iter_elements(root: Element):
+    """按文档顺序遍历所有元素（不含根节点）"""
+    stack = list(reversed([c for c in root.children if isinstance(c, Element)]))
+    while stack:
+        el = stack.pop()
+        yield el
+        stack.extend(reversed([c for c in el.children if isinstance(c, Element)]))
+
+
+# ----------------------------------------------------------------------------
+# 选择器
+# ----------------------------------------------------------------------------
+
+_COMPOUND_PART_RE = re.compile(r'''
+    (?P<star>\*)
+  | (?P<tag>[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<val>"[^"]*"|'[^']*'|[^\]\s]+)\s*(?P<flag>[iIsS])?\s*)?\]
+  | (?P<pseudo>::?[\w-]+)(?P<arg>\((?:[^()]|\([^()]*\))*\))?
+''', re.X)
+
+_NTH_RE = re.compile(r'^([+-]?\d*)n\s*(?:([+-])\s*(\d+))?$')
+
+
+@dataclass
+class Compound:
+    """复合选择器（不含组合符的一段）"""
+    tag: Optional[str] = None
+    ids: list[str] = field(default_factory=list)
+    classes: list[str] = field(default_factory=list)
+    attrs: list[tuple] = field(default_factory=list)
+    # 结构伪类：(名称, 参数)
+    pseudos: list[tuple] = field(default_factory=list)
+
+
+@dataclass
+class Selector:
+    """复杂选择器：compounds[i] 与 compounds[i+1] 之间的组合符为 combinators[i]"""
+    text: str
+    compounds: list[Compound]
+    combinators: list[str]
+
+
+def _parse_nth(arg: str) -> tuple[int, int]:
+    arg = arg.strip().lower()
+    if arg == 'odd':
+        return 2, 1
+    if arg == 'even':
+        return 2, 0
+    if re.fullmatch(r'[+-]?\d+', arg):
+        return 0, int(arg)
+    m = _NTH_RE.match(arg)
+    if not m:
+        raise UnsupportedSelector(arg)
+    a = m.group(1)
+    a = 1 if a in ('', '+') else -1 if a == '-' else int(a)
+    b = int(m.group(3)) if m.group(3) else 0
+    if m.group(2) == '-':
+        b = -b
+    return a, b
+
+
+def _parse_compound(text: str, pos: int) -> tuple[Compound, int]:
+    compound = Compound()
+    start = pos
+    while pos < len(text):
+        m = _COMPOUND_PART_RE.match(text, pos)
+        if not m:
+            break
+        if m.group('tag'):
+            compound.tag = m.group('tag').lower()
+        elif m.group('id'):
+            compound.ids.append(m.group('id'))
+        elif m.group('cls'):
+            compound.classes.append(m.group('cls'))
+        elif m.group('attr'):
+            val = m.group('val')
+            if val and val[0] in '"\'':
+                val = val[1:-1]
+            compound.attrs.append((m.group('attr').lower(), m.group('op'), val, bool(m.group('flag'))))
+        elif m.group('pseudo'):
+            _add_pseudo(compound, m.group('pseudo'), m.group('arg'))
+        pos = m.end()
+    if pos == start:
+        raise UnsupportedSelector(text[pos:])
+    return compound, pos
+
+
+def _add_pseudo(compound: Compound, pseudo: str, arg: Optional[str]):
+    name = pseudo.lstrip(':').lower()
+    arg = arg[1:-1] if arg else None
+    if pseudo.startswith('::') or name in LEGACY_PSEUDO_ELEMENTS or name in DYNAMIC_PSEUDO_CLASSES:
+        return  # 伪元素依附于原元素；交互状态视为可能成立
+    if name in ('first-child', 'last-child', 'only-child', 'first-of-type', 'last-of-type',
+                'only-of-type', 'root', 'empty') and arg is None:
+        compound.pseudos.append((name, None))
+    elif name in ('nth-child', 'nth-last-child', 'nth-of-type', 'nth-last-of-type') and arg:
+        compound.pseudos.append((name, _parse_nth(arg)))
+    elif name == 'not' and arg:
+        compound.pseudos.append(('not', [parse_selector(s) for s in split_top_level(arg, ',')]))
+    elif name in ('is', 'where') and arg:
+        compound.pseudos.append(('is', [parse_selector(s) for s in split_top_level(arg, ',')]))
+    else:
+        raise UnsupportedSelector(pseudo)
+
+
+def parse_selector(text: str) -> Selector:
+    """解析单个复杂选择器；无法识别时抛出 UnsupportedSelector"""
+    text = text.strip()
+    compounds: list[Compound] = []
+    combinators: list[str] = []
+    pos = 0
+    pending = None
+    while pos < len(text):
+        ch = text[pos]
+        if ch in ' \t\n\r\f':
+            if compounds and pending is None:
+                pending = ' '
+            pos += 1
+            continue
+        if ch in '>+~':
+            if not compounds:
+                raise UnsupportedSelector(text)
+            pending = ch
+            pos += 1
+            continue
+        compound, pos = _parse_compound(text, pos)
+        if compounds:
+            combinators.append(pending or ' ')
+        compounds.append(compound)
+        pending = None
+    if not compounds or pending not in (None, ' '):
+        raise UnsupportedSelector(text)
+    return Selector(text, compounds, combinators)
+
+
+def _nth_match(a: int, b: int, position: int) -> bool:
+    if a == 0:
+        return position == b
+    n, rem = divmod(position - b, a)
+    return rem == 0 and n >= 0
+
+
+def _match_pseudo(el: Element, name: str, arg) -> bool:
+    siblings = el.siblings
+    if name == 'root':
+        return el.parent is not None and el.parent.tag == '#document'
+    if name == 'empty':
+        return not any(isinstance(c, Element) or (isinstance(c, Text) and c.data) for c in el.children)
+    if name == 'not':
+        return not any(matches(el, s) for s in arg)
+    if name == 'is':
+        return any(matches(el, s) for s in arg)
+    if name.endswith('of-type'):
+        siblings = [s for s in siblings if s.tag == el.tag]
+        index = siblings.index(el)
+    else:
+        index = el.index
+    if name in ('first-child', 'first-of-type'):
+        return index == 0
+    if name in ('last-child', 'last-of-type'):
+        return index == len(siblings) - 1
+    if name in ('only-child', 'only-of-type'):
+        return len(siblings) == 1
+    if name in ('nth-child', 'nth-of-type'):
+        return _nth_match(*arg, index + 1)
+    if name in ('nth-last-child', 'nth-last-of-type'):
+        return _nth_match(*arg, len(siblings) - index)
+    return True
+
+
+def _match_attr(el: Element, name: str, op: Optional[str], val: Optional[str], ignore_case: bool) -> bool:
+    if name not in el.attrs:
+        return False
+    if op is None:
+        return True
+    actual = el.attrs[name]
+    if ignore_case:
+        actual, val = actual.lower(), val.lower()
+    if op == '=':
+        return actual == val
+    if op == '~=':
+        return val in actual.split()
+    if op == '|=':
+        return actual == val or actual.startswith(val + '-')
+    if op == '^=':
+        return bool(val) and actual.startswith(val)
+    if op == '$=':
+        return bool(val) and actual.endswith(val)
+    return bool(val) and val in actual  # *=
+
+
+def _match_compound(el: Element, c: Compound) -> bool:
+    if c.tag is not None and c.tag != el.tag:
+        return False
+    if c.ids and any(el.attrs.get('id') != i for i in c.ids):
+        return False
+    if c.classes and not el.classes.issuperset(c.classes):
+        return False
+    for attr in c.attrs:
+        if not _match_attr(el, *attr):
+            return False
+    for name, arg in c.pseudos:
+        if not _match_pseudo(el, name, arg):
+            return False
+    return True
+
+
+def _match_from(el: Element, selector: Selector, i: int) -> bool:
+    if not _match_compound(el, selector.compounds[i]):
+        return False
+    if i == 0:
+        return True
+    combinator = selector.combinators[i - 1]
+    if combinator == '>':
+        parent = el.parent
+        return parent is not None and parent.tag != '#document' and _match_from(parent, selector, i - 1)
+    if combinator == ' ':
+        parent = el.parent
+        while parent is not None and parent.tag != '#document':
+            if _match_from(parent, selector, i - 1):
+                return True
+            parent = parent.parent
+        return False
+    if combinator == '+':
+        return el.index > 0 and _match_from(el.siblings[el.index - 1], selector, i - 1)
+    return any(_match_from(s, selector, i - 1) for s in el.siblings[:el.index])  # ~
+
+
+def matches(el: Element, selector: Selector) -> bool:
+    """元素是否（可能）匹配选择器"""
+    return _match_from(el, selector, len(selector.compounds) - 1)
+
+
+class ElementIndex:
+    """按标签、类名、id 索引元素，缩小选择器的候选范围"""
+
+    def __init__(self, root: Element):
+        self.elements = list(iter_elements(root))
+        self.by_tag: dict[str, list[Element]] = {}
+        self.by_class: dict[str, list[Element]] = {}
+        self.by_id: dict[str, list[Element]] = {}
+        for el in self.elements:
+            self.by_tag.setdefault(el.tag, []).append(el)
+            for cls in el.classes:
+                self.by_class.setdefault(cls, []).append(el)
+            if 'id' in el.attrs:
+                self.by_id.setdefault(el.attrs['id'], []).append(el)
+
+    def candidates(self, selector: Selector) -> list[Element]:
+        last = selector.compounds[-1]
+        if last.ids:
+            return self.by_id.get(last.ids[0], [])
+        if last.classes:
+            return self.by_class.get(last.classes[0], [])
+        if last.tag is not None:
+            return self.by_tag.get(last.tag, [])
+        return self.elements
+
+    def any_match(self, selector: Selector) -> bool:
+        return any(matches(el, selector) for el in self.candidates(selector))
+
+
+# ----------------------------------------------------------------------------
+# CSS
+# ----------------------------------------------------------------------------
+
+@dataclass
+class CssRule:
+    """普通规则"""
+    selectors: list[str]
+    declarations: str
+
+
+@dataclass
+class CssAtRule:
+    """@ 规则：分组类（@media 等）有 children；@font-face 等有 declarations；@import 等两者皆无"""
+    keyword: str
+    prelude: str
+    children: Optional[list] = None
+    declarations: Optional[str] = None
+
+
+def split_top_level(text: str, sep: str) -> list[str]:
+    """按分隔符切分，跳过字符串、圆括号和方括号内部"""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _scan_to(css: str, pos: int, stops: str) -> int:
+    """从 pos 扫描到第一个不在字符串或括号内的停止字符，返回其位置（找不到时为文末）"""
+    depth = 0
+    quote = None
+    while pos < len(css):
+        ch = css[pos]
+        if quote:
+            if ch == '\\':
+                pos += 1
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and ch in stops:
+            return pos
+        pos += 1
+    return pos
+
+
+def _matching_brace(css: str, pos: int) -> int:
+    """pos 指向 '{'，返回与之配对的 '}' 的位置"""
+    depth = 0
+    while pos < len(css):
+        pos = _scan_to(css, pos, '{}')
+        if pos >= len(css):
+            break
+        depth += 1 if css[pos] == '{' else -1
+        if depth == 0:
+            return pos
+        pos += 1
+    return len(css)
+
+
+def strip_css_comments(css: str) -> str:
+    """去掉注释（字符串内的 /* 不受影响）"""
+    parts = _CSS_STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        parts[i] = _CSS_COMMENT_RE.sub('', parts[i])
+    return ''.join(parts)
+
+
+def parse_css(css: str) -> list:
+    """把样式表解析为 CssRule / CssAtRule 列表"""
+    return _parse_block(strip_css_comments(css))
+
+
+def _parse_block(css: str) -> list:
+    items = []
+    pos = 0
+    while pos < len(css):
+        while pos < len(css) and css[pos] in ' \t\n\r\f;':
+            pos += 1
+        if pos >= len(css):
+            break
+        stop = _scan_to(css, pos, '{;' if css[pos] == '@' else '{')
+        head = css[pos:stop].strip()
+        if css[pos] == '@':
+            keyword = re.match(r'@([\w-]+)', head)
+            keyword = keyword.group(1).lower() if keyword else ''
+            prelude = head[len(keyword) + 1:].strip()
+            if stop >= len(css) or css[stop] == ';':
+                items.append(CssAtRule(keyword, prelude))
+                pos = stop + 1
+                continue
+            end = _matching_brace(css, stop)
+            body = css[stop + 1:end]
+            if keyword in GROUPING_AT_RULES or keyword.endswith('keyframes'):
+                items.append(CssAtRule(keyword, prelude, children=_parse_block(body)))
+            else:
+                items.append(CssAtRule(keyword, prelude, declarations=body))
+            pos = end + 1
+            continue
+        if stop >= len(css):
+            break  # 残缺的规则
+        end = _matching_brace(css, stop)
+        items.append(CssRule([s.strip() for s in split_top_level(head, ',')], css[stop + 1:end]))
+        pos = end + 1
+    return items
+
+
+def _minify_outside_strings(text: str, fn) -> str:
+    parts = _CSS_STRING_RE.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = fn(parts[i])
+    return ''.join(parts)
+
+
+def _squeeze_value(text: str) -> str:
+    text = _WS_RE.sub(' ', text)
+    text = re.sub(r' ?([,(]) ?', r'\1', text)
+    text = re.sub(r' ?\)', ')', text)
+    return re.sub(r' ?! ?important', '!important', text)
+
+
+def minify_value(value: str) -> str:
+    """压缩属性值中的空白"""
+    return _minify_outside_strings(value.strip(), _squeeze_value)
+
+
+def minify_declarations(declarations: str) -> str:
+    """压缩声明块：prop:value;prop:value（不带末尾分号）"""
+    out = []
+    for decl in split_top_level(declarations, ';'):
+        name, sep, value = decl.partition(':')
+        name = name.strip()
+        if not sep or not name:
+            continue
+        out.append(f'{name}:{minify_value(value)}')
+    return ';'.join(out)
+
+
+def minify_selector(selector: str) -> str:
+    """压缩选择器中的空白"""
+    def squeeze(text):
+        text = _WS_RE.sub(' ', text)
+        return re.sub(r' ?([>+~,]) ?', r'\1', text)
+    return _minify_outside_strings(selector.strip(), squeeze)
+
+
+def minify_prelude(prelude: str) -> str:
+    """压缩 @ 规则的前导部分，如 @media 条件"""
+    def squeeze(text):
+        text = _WS_RE.sub(' ', text)
+        text = re.sub(r' ?([:,]) ?', r'\1', text)
+        return re.sub(r'\( ', '(', re.sub(r' \)', ')', text))
+    return _minify_outside_strings(prelude.strip(), squeeze)
+
+
+def serialize_css(items: list) -> str:
+    """输出压缩后的样式表"""
+    out = []
+    for item in items:
+        if isinstance(item, CssRule):
+            out.append(f"{','.join(minify_selector(s) for s in item.selectors)}"
+                       f"{{{minify_declarations(item.declarations)}}}")
+        elif item.children is not None:
+            out.append(f"@{item.keyword} {minify_prelude(item.prelude)}{{{serialize_css(item.children)}}}")
+        elif item.declarations is not None:
+            prelude = f' {minify_prelude(item.prelude)}' if item.prelude else ''
+            out.append(f"@{item.keyword}{prelude}{{{minify_declarations(item.declarations)}}}")
+        else:
+            out.append(f"@{item.keyword} {item.prelude};")
+    return ''.join(out)
+
+
+def _animation_names(declarations: str) -> set[str]:
+    names = set()
+    for decl in split_top_level(declarations, ';'):
+        name, _, value = decl.partition(':')
+        if name.strip().lower() in ('animation', 'animation-name', '-webkit-animation', '-webkit-animation-name'):
+            names.update(re.split(r'[\s,]+', value.strip()))
+    return names
+
+
+def _used_animation_names(items: list, names: set[str]):
+    for item in items:
+        if isinstance(item, CssRule):
+            names |= _animation_names(item.declarations)
+        elif item.children is not None and not item.keyword.endswith('keyframes'):
+            _used_animation_names(item.children, names)
+
+
+# ----------------------------------------------------------------------------
+# 压缩
+# ----------------------------------------------------------------------------
+
+@dataclass
+class MinifyStats:
+    """压缩统计"""
+    original_bytes: int = 0
+    minified_bytes: int = 0
+    css_original_bytes: int = 0
+    css_minified_bytes: int = 0
+    # 被删除的选择器与 @keyframes
+    removed_selectors: list[str] = field(default_factory=list)
+    removed_keyframes: list[str] = field(default_factory=list)
+    # 无法静态判断、按原样保留的选择器
+    unsupported_selectors: list[str] = field(default_factory=list)
+    # 未剔除规则的原因（页面含脚本等）
+    prune_skipped: str = ''
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.minified_bytes
+
+
+def prune_css(items: list, index: ElementIndex, stats: MinifyStats, keep: frozenset = frozenset()) -> list:
+    """删除匹配不到任何元素的选择器与规则，以及空的分组 @ 规则"""
+    kept = []
+    for item in items:
+        if isinstance(item, CssRule):
+            selectors = []
+            for text in item.selectors:
+                if minify_selector(text) in keep:
+                    selectors.append(text)
+                    continue
+                try:
+                    used = index.any_match(parse_selector(text))
+                except UnsupportedSelector:
+                    stats.unsupported_selectors.append(text)
+                    used = True
+                if used:
+                    selectors.append(text)
+                else:
+                    stats.removed_selectors.append(text)
+            if selectors:
+                kept.append(CssRule(selectors, item.declarations))
+        elif item.children is not None and item.keyword in GROUPING_AT_RULES:
+            children = prune_css(item.children, index, stats, keep)
+            if children:
+                kept.append(CssAtRule(item.keyword, item.prelude, children=children))
+        else:
+            kept.append(item)
+    return kept
+
+
+def _prune_keyframes(items: list, used: set[str], stats: MinifyStats) -> list:
+    kept = []
+    for item in items:
+        if isinstance(item, CssAtRule) and item.keyword.endswith('keyframes'):
+            if item.prelude.strip() not in used:
+                stats.removed_keyframes.append(item.prelude.strip())
+                continue
+        elif isinstance(item, CssAtRule) and item.children is not None:
+            item = CssAtRule(item.keyword, item.prelude, children=_prune_keyframes(item.children, used, stats))
+        kept.append(item)
+    return kept
+
+
+def minify_css(css: str, index: Optional[ElementIndex], stats: MinifyStats, keep: frozenset = frozenset(),
+               inline_styles: Iterable[str] = ()) -> str:
+    """压缩一段样式表；传入 index 时同时剔除无用规则"""
+    items = parse_css(css)
+    if index is not None:
+        items = prune_css(items, index, stats, keep)
+        used = set()
+        _used_animation_names(items, used)
+        for style in inline_styles:
+            used |= _animation_names(style)
+        items = _prune_keyframes(items, used, stats)
+    return serialize_css(items)
+
+
+def _collapse_children(parent: Element, out: list[str], ctx: dict):
+    children = parent.children
+    last = len(children) - 1
+    for i, child in enumerate(children):
+        if child.__class__ is Text:
+            text = _WS_RE.sub(' ', child.data)
+            # 左右是否为块级边界（越界即父元素边界）
+            left = children[i - 1] if i > 0 else parent
+            right = children[i + 1] if i < last else parent
+            left_block = left.__class__ is Element and left.tag in _BOUNDARY_TAGS
+            right_block = right.__class__ is Element and right.tag in _BOUNDARY_TAGS
+            if text.strip(' '):
+                if left_block:
+                    text = text.lstrip(' ')
+                if right_block:
+                    text = text.rstrip(' ')
+                out.append(text)
+            elif not (left_block or right_block):
+                out.append(' ')
+        elif child.__class__ is Raw:
+            out.append(child.data)
+        else:
+            _serialize(child, out, ctx)
+
+
+def _serialize(el: Element, out: list[str], ctx: dict):
+    out.append(el.raw)
+    if el.tag == 'style':
+        css = ''.join(c.data for c in el.children if isinstance(c, Text))
+        ctx['stats'].css_original_bytes += len(css.encode('utf-8'))
+        minified = minify_css(css, ctx['index'], ctx['stats'], ctx['keep'], ctx['inline_styles'])
+        ctx['stats'].css_minified_bytes += len(minified.encode('utf-8'))
+        out.append(minified)
+    elif el.tag in PRESERVE_ELEMENTS:
+        for child in el.children:
+            if isinstance(child, Element):
+                _serialize_raw(child, out)
+            else:
+                out.append(child.data)
+    else:
+        _collapse_children(el, out, ctx)
+    if el.closed:
+        out.append(f'</{el.tag}>')
+
+
+def _serialize_raw(el: Element, out: list[str]):
+    out.append(el.raw)
+    for child in el.children:
+        if isinstance(child, Element):
+            _serialize_raw(child, out)
+        else:
+            out.append(child.data)
+    if el.closed:
+        out.append(f'</{el.tag}>')
+
+
+def minify_html(html: str, prune: bool = True, keep: Iterable[str] = (),
+                prune_with_scripts: bool = False) -> tuple[str, MinifyStats]:
+    """压缩页面，返回 (压缩后的 HTML, 统计)
+
+    prune 为 False 时只压缩，不剔除规则；keep 为始终保留的选择器。
+    页面含 <script> 时脚本可能在运行时添加类名或属性，默认不剔除规则，
+    确认 keep 已覆盖动态选择器后可传 prune_with_scripts=True。
+    """
+    stats = MinifyStats(original_bytes=len(html.encode('utf-8')))
+    root = parse_html(html)
+    index = ElementIndex(root) if prune else None
+    if index is not None and index.by_tag.get('script') and not prune_with_scripts:
+        stats.prune_skipped = '页面含 <script>，运行时可能添加类名'
+        index = None
+    inline_styles = [el.attrs['style'] for el in index.elements if 'style' in el.attrs] if index else []
+    ctx = {
+        'stats': stats,
+        'index': index,
+        'keep': frozenset(minify_selector(s) for s in keep),
+        'inline_styles': inline_styles,
+    }
+    out: list[str] = []
+    _collapse_children(root, out, ctx)
+    result = ''.join(out)
+    stats.minified_bytes = len(result.encode('utf-8'))
+    return result, stats
+
+
+def main():
+    import argparse
+    from pathlib import Path
+    parser = argparse.ArgumentParser(description='压缩 HTML/CSS 并剔除无用 CSS 规则')
+    parser.add_argument('files', nargs='+', help='HTML 文件')
+    parser.add_argument('--write', action='store_true', help='原地写回压缩结果')
+    parser.add_argument('--no-prune', action='store_true', help='只压缩，不剔除规则')
+    parser.add_argument('--keep', action='append', default=[], help='始终保留的选择器（可多次指定）')
+    parser.add_argument('--prune-with-scripts', action='store_true',
+                        help='页面含 <script> 时也剔除规则（需用 --keep 列出脚本添加的选择器）')
+    args = parser.parse_args()
+
+    for name in args.files:
+        path = Path(name)
+        html = path.read_text(encoding='utf-8')
+        minified, stats = minify_html(html, prune=not args.no_prune, keep=args.keep,
+                                      prune_with_scripts=args.prune_with_scripts)
+        ratio = stats.minified_bytes / max(stats.original_bytes, 1)
+        print(f"📦 {path}: {stats.original_bytes:,} → {stats.minified_bytes:,} 字节（{ratio:.1%}），"
+              f"CSS {stats.css_original_bytes:,} → {stats.css_minified_bytes:,} 字节")
+        if stats.prune_skipped:
+            print(f"   ⚠️ 未剔除 CSS 规则: {stats.prune_skipped}")
+        if stats.removed_selectors:
+            print(f"   🧹 删除 {len(stats.removed_selectors)} 个无用选择器: {', '.join(stats.removed_selectors)}")
+        if stats.removed_keyframes:
+            print(f"   🧹 删除 @keyframes: {', '.join(stats.removed_keyframes)}")
+        if stats.unsupported_selectors:
+            print(f"   ⚠️ 无法判断、已保留: {', '.join(stats.unsupported_selectors)}")
+        if args.write and minified != html:
+            path.write_text(minified, encoding='utf-8')
+            print("   💾 已写回")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
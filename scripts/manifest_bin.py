@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+二进制 manifest 格式（manifest.bin）
+
+manifest.json 逐条保存 path / size / hash 对象，哈希是 64 个十六进制字符，路径有大量公共前缀
+（如 _internal/PySide6/），读取时必须整体解析成字典。二进制格式：
+- 定长记录：每个文件 8 字节大小 + 32 字节原始 SHA-256
+- 路径表按路径排序并做前缀压缩，每 16 条设一个重启点保存完整路径
+- 文件可直接 mmap：按路径查找时在重启点上二分，再在块内顺序解码不超过 16 条，只触及少数几页
+- 与 JSON 可无损互转：顶层字段（含顺序）原样保存，转回后与 dump_manifest 的输出逐字节一致
+
+文件布局（小端）：
+    头部     magic "HGMF", 格式版本 u16, 保留 u16, 条目数 u32, 重启间隔 u32,
+             各区段偏移/长度 u64 × 6
+    记录区   条目数 × (大小 u64, 哈希 32 字节)
+    重启点   u32 × ceil(条目数 / 重启间隔)，为路径区内的偏移
+    路径区   每条：公共前缀长度 u16, 后缀长度 u16, 后缀（UTF-8）；重启点处公共前缀长度为 0
+    元数据   JSON：[[键, 值], ...]，按原顺序保存除 files 以外的顶层字段，files 的位置记为 ["files", null]
+
+使用方法：
+    python scripts/manifest_bin.py encode resources/manifest.json -o resources/manifest.bin
+    python scripts/manifest_bin.py decode resources/manifest.bin -o manifest.json
+    python scripts/manifest_bin.py lookup resources/manifest.bin 虎哥截图.exe
+    python scripts/manifest_bin.py verify resources/manifest.json
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+from build_manifest import dump_manifest, load_manifest
+
+
+MAGIC = b'HGMF'
+BINARY_FORMAT_VERSION = 1
+RESTART_INTERVAL = 16
+
+_HEADER = struct.Struct('<4sHHII6Q')
+_RECORD = struct.Struct('<Q32s')
+_RESTART = struct.Struct('<I')
+_PATH_HEADER = struct.Struct('<HH')
+_MAX_PATH_BYTES = 0xFFFF
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _check_entry(entry: dict) -> tuple[bytes, int, bytes]:
+    """校验条目能无损编码，返回 (路径 UTF-8, 大小, 原始哈希)"""
+    if list(entry) != ['path', 'size', 'hash']:
+        raise ValueError(f"条目字段须为 path/size/hash: {entry}")
+    path, size, digest = entry['path'], entry['size'], entry['hash']
+    encoded = path.encode('utf-8')
+    if len(encoded) > _MAX_PATH_BYTES:
+        raise ValueError(f"路径过长: {path}")
+    if type(size) is not int or not 0 <= size < 1 << 64:
+        raise ValueError(f"大小须为 64 位无符号整数: {path}")
+    try:
+        raw = bytes.fromhex(digest)
+    except (TypeError, ValueError):
+        raw = b''
+    if len(raw) != 32 or raw.hex() != digest:
+        raise ValueError(f"哈希须为 64 位小写十六进制 SHA-256: {path}")
+    return encoded, size, raw
+
+
+def encode_manifest(manifest: dict) -> bytes:
+    """把 manifest 字典编码为二进制格式（files 须按路径排序且不重复）"""
+    files = manifest.get('files', [])
+    records = bytearray()
+    restarts = bytearray()
+    paths = bytearray()
+    prev = None
+    for i, entry in enumerate(files):
+        encoded, size, raw = _check_entry(entry)
+        if prev is not None and encoded <= prev:
+            raise ValueError(f"files 须按路径严格递增排序: {entry['path']}")
+        records += _RECORD.pack(size, raw)
+        if i % RESTART_INTERVAL == 0:
+            restarts += _RESTART.pack(len(paths))
+            shared = 0
+        else:
+            shared = min(_common_prefix(prev, encoded), _MAX_PATH_BYTES)
+        suffix = encoded[shared:]
+        paths += _PATH_HEADER.pack(shared, len(suffix))
+        paths += suffix
+        prev = encoded
+
+    meta = [[key, None if key == 'files' else value] for key, value in manifest.items()]
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    records_off = _HEADER.size
+    restarts_off = records_off + len(records)
+    paths_off = restarts_off + len(restarts)
+    meta_off = paths_off + len(paths)
+    header = _HEADER.pack(MAGIC, BINARY_FORMAT_VERSION, 0, len(files), RESTART_INTERVAL,
+                          records_off, restarts_off, paths_off, len(paths), meta_off, len(meta_bytes))
+    return b''.join((header, records, restarts, paths, meta_bytes))
+
+
+class BinaryManifest:
+    """二进制 manifest 的只读视图
+
+    数据可以是 bytes 或 mmap；按路径查找、按序号取条目都只解码需要的部分。
+    """
+
+    def __init__(self, data, _file=None):
+        self._data = data
+        self._file = _file
+        if len(data) < _HEADER.size:
+            raise ValueError('不是二进制 manifest：文件过短')
+        (magic, version, _reserved, self._count, self._interval, self._records_off, self._restarts_off,
+         self._paths_off, paths_len, meta_off, meta_len) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('不是二进制 manifest：magic 不符')
+        if version != BINARY_FORMAT_VERSION:
+            raise ValueError(f'不支持的二进制 manifest 版本: {version}')
+        if meta_off + meta_len > len(data) or self._paths_off + paths_len > meta_off:
+            raise ValueError('二进制 manifest 已损坏：区段越界')
+        self._restart_count = -(-self._count // self._interval) if self._count else 0
+        self.meta: list[list] = json.loads(bytes(data[meta_off:meta_off + meta_len]).decode('utf-8'))
+
+    @classmethod
+    def open(cls, path: Path) -> 'BinaryManifest':
+        """mmap 打开文件"""
+        f = open(path, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        try:
+            return cls(mm, f)
+        except BaseException:
+            mm.close()
+            f.close()
+            raise
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'BinaryManifest':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def field(self, key: str, default=None):
+        """顶层字段（version、build_time、total_size 等）"""
+        for k, v in self.meta:
+            if k == key:
+                return v
+        return default
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.field('version')
+
+    def _restart_path(self, k: int) -> bytes:
+        off = self._paths_off + _RESTART.unpack_from(self._data, self._restarts_off + k * _RESTART.size)[0]
+        _shared, length = _PATH_HEADER.unpack_from(self._data, off)
+        start = off + _PATH_HEADER.size
+        return self._data[start:start + length]
+
+    def _iter_block(self, k: int) -> Iterator[tuple[int, bytes]]:
+        """解码第 k 个重启块，产出 (序号, 路径 UTF-8)"""
+        data = self._data
+        off = self._paths_off + _RESTART.unpack_from(data, self._restarts_off + k * _RESTART.size)[0]
+        first = k * self._interval
+        prev = b''
+        for i in range(first, min(first + self._interval, self._count)):
+            shared, length = _PATH_HEADER.unpack_from(data, off)
+            off += _PATH_HEADER.size
+            prev = prev[:shared] + data[off:off + length]
+            off += length
+            yield i, prev
+
+    def _record(self, i: int) -> tuple[int, str]:
+        size, raw = _RECORD.unpack_from(self._data, self._records_off + i * _RECORD.size)
+        return size, raw.hex()
+
+    def find(self, path: str) -> int:
+        """返回路径的序号，不存在时返回 -1（在重启点上二分，块内顺序比较）"""
+        target = path.encode('utf-8')
+        lo, hi = 0, self._restart_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._restart_path(mid) <= target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return -1
+        for i, encoded in self._iter_block(lo - 1):
+            if encoded == target:
+                return i
+            if encoded > target:
+                break
+        return -1
+
+    def lookup(self, path: str) -> Optional[dict]:
+        """按路径取条目，不存在时返回 None"""
+        i = self.find(path)
+        if i < 0:
+            return None
+        size, digest = self._record(i)
+        return {'path': path, 'size': size, 'hash': digest}
+
+    def __contains__(self, path: str) -> bool:
+        return self.find(path) >= 0
+
+    def __iter__(self) -> Iterator[dict]:
+        """按路径顺序产出全部条目"""
+        for k in range(self._restart_count):
+            for i, encoded in self._iter_block(k):
+                size, digest = self._record(i)
+                yield {'path': encoded.decode('utf-8'), 'size': size, 'hash': digest}
+
+    def to_manifest(self) -> dict:
+        """还原为与原 JSON 完全相同的字典（字段顺序一致）"""
+        manifest = {}
+        for key, value in self.meta:
+            manifest[key] = list(self) if key == 'files' else value
+        return manifest
+
+
+def decode_manifest(data: bytes) -> dict:
+    """二进制 → manifest 字典"""
+    return BinaryManifest(data).to_manifest()
+
+
+def load_any_manifest(path: Path) -> dict:
+    """读取 manifest.json 或二进制 manifest.bin（按扩展名区分）"""
+    if path.suffix == '.bin':
+        with BinaryManifest.open(path) as bm:
+            return bm.to_manifest()
+    return load_manifest(path)
+
+
+def write_binary_manifest(path: Path, manifest: dict):
+    """原子写出二进制 manifest"""
+    data = encode_manifest(manifest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='manifest.json 与二进制 manifest 互转、查询')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('encode', help='JSON → 二进制')
+    p.add_argument('input', help='manifest.json')
+    p.add_argument('-o', '--output', help='输出路径（默认同名 .bin）')
+    p = sub.add_parser('decode', help='二进制 → JSON')
+    p.add_argument('input', help='manifest.bin')
+    p.add_argument('-o', '--output', help='输出路径（默认同名 .json）')
+    p = sub.add_parser('lookup', help='按路径查询条目')
+    p.add_argument('input', help='manifest.bin')
+    p.add_argument('paths', nargs='+', help='文件相对路径')
+    p = sub.add_parser('verify', help='检查 JSON → 二进制 → JSON 逐字节一致')
+    p.add_argument('input', help='manifest.json')
+    args = parser.parse_args()
+
+    src = Path(args.input)
+    try:
+        if args.command == 'encode':
+            manifest = load_manifest(src)
+            out = Path(args.output) if args.output else src.with_suffix('.bin')
+            write_binary_manifest(out, manifest)
+            print(f"✅ {src}（{src.stat().st_size:,} 字节）→ {out}（{out.stat().st_size:,} 字节，"
+                  f"{len(manifest.get('files', []))} 个文件）")
+        elif args.command == 'decode':
+            with BinaryManifest.open(src) as bm:
+                data = dump_manifest(bm.to_manifest())
+            out = Path(args.output) if args.output else src.with_suffix('.json')
+            out.write_bytes(data)
+            print(f"✅ {src} → {out}（{len(data):,} 字节）")
+        elif args.command == 'lookup':
+            missing = 0
+            with BinaryManifest.open(src) as bm:
+                for path in args.paths:
+                    entry = bm.lookup(path)
+                    if entry is None:
+                        missing += 1
+                        print(f"❌ {path}: 不在清单中")
+                    else:
+                        print(f"{entry['hash']}  {entry['size']:>12,}  {path}")
+            return 1 if missing else 0
+        else:
+            original = src.read_bytes()
+            binary = encode_manifest(json.loads(original.decode('utf-8')))
+            if dump_manifest(decode_manifest(binary)) != original:
+                print(f"❌ 往返转换结果与原文件不一致: {src}")
+                return 1
+            print(f"✅ 往返转换逐字节一致：JSON {len(original):,} 字节 → 二进制 {len(binary):,} 字节"
+                  f"（{len(binary) / len(original):.1%}）")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+发布清单的重复内容与体积预算检查
+
+功能：
+- 按哈希分组找出重复文件（同一份内容在多个路径各打包一次），按浪费的字节数排序
+- 按目录前缀汇总大小（一次遍历累加到每一级父目录），列出最大的包
+- 与预算文件（默认 scripts/size_budgets.json）比较：
+  - total：发布目录总大小上限
+  - packages：各目录前缀的大小上限
+  - duplicates：重复内容浪费的字节数上限
+  - forbidden：不允许出现的文件（fnmatch 模式）
+  - max_total_growth / max_package_growth：相对上一版本允许的增长比例
+    （增长超过 growth_min_bytes 才检查，避免小包的噪声）
+  - watch：只报告大小、不判失败的可疑文件（如未使用的可选模块）
+- 任一预算超出即以非零状态退出，可直接作为发布检查
+
+大小可写成字节数或带单位的字符串（"680 MB"，按 1024 进位）。
+
+使用方法：
+    python scripts/manifest_budget.py
+    python scripts/manifest_budget.py resources/manifest.json --previous old-manifest.json
+    python scripts/manifest_budget.py --depth 3 --top 30 --json budget-report.json
+"""
+
+import fnmatch
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from manifest_diff import format_size
+from manifest_bin import load_any_manifest
+
+
+ROOT_PACKAGE = '(根目录)'
+
+_SIZE_RE = re.compile(r'^\s*([\d.]+)\s*([KMGT]?B?)\s*$', re.IGNORECASE)
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+          'G': 1024 ** 3, 'GB': 1024 ** 3, 'T': 1024 ** 4, 'TB': 1024 ** 4}
+
+
+def parse_size(value) -> int:
+    """把 123、"680 MB"、"1.5G" 解析为字节数"""
+    if isinstance(value, int):
+        return value
+    match = _SIZE_RE.match(str(value))
+    if not match:
+        raise ValueError(f"无法解析的大小: {value!r}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+@dataclass
+class DuplicateGroup:
+    """内容相同的一组文件"""
+    hash: str
+    size: int
+    paths: list[str]
+
+    @property
+    def wasted(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+
+@dataclass
+class Violation:
+    """一项超出的预算"""
+    kind: str  # total / package / duplicates / forbidden / total_growth / package_growth
+    subject: str
+    actual: int
+    limit: int
+    detail: str = ''
+
+
+@dataclass
+class BudgetReport:
+    """分析结果"""
+    version: str = ''
+    previous_version: str = ''
+    files: int = 0
+    total_size: int = 0
+    previous_total_size: Optional[int] = None
+    duplicates: list[DuplicateGroup] = field(default_factory=list)
+    wasted_bytes: int = 0
+    # 目录前缀 → [文件数, 字节数]
+    rollup: dict[str, list[int]] = field(default_factory=dict)
+    previous_rollup: dict[str, list[int]] = field(default_factory=dict)
+    watch: list[tuple[str, int]] = field(default_factory=list)
+    violations: list[Violation] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+
+def find_duplicates(manifest: dict) -> list[DuplicateGroup]:
+    """按哈希分组，返回出现在多个路径的非空文件，按浪费字节数降序"""
+    by_hash: dict[str, list[dict]] = {}
+    for entry in manifest.get('files', []):
+        if entry['size']:
+            by_hash.setdefault(entry['hash'], []).append(entry)
+    groups = [DuplicateGroup(digest, entries[0]['size'], [e['path'] for e in entries])
+              for digest, entries in by_hash.items() if len(entries) > 1]
+    groups.sort(key=lambda g: (-g.wasted, g.paths[0]))
+    return groups
+
+
+def rollup_sizes(manifest: dict) -> dict[str, list[int]]:
+    """按目录前缀汇总：每个文件的大小累加到它的每一级父目录；根目录下的文件归入 ROOT_PACKAGE"""
+    totals: dict[str, list[int]] = {}
+    for entry in manifest.get('files', []):
+        parts = entry['path'].split('/')[:-1]
+        if not parts:
+            parts_keys = [ROOT_PACKAGE]
+        else:
+            parts_keys = ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+        for key in parts_keys:
+            item = totals.get(key)
+            if item is None:
+                totals[key] = [1, entry['size']]
+            else:
+                item[0] += 1
+                item[1] += entry['size']
+    return totals
+
+
+def packages_at_depth(rollup: dict[str, list[int]], depth: int) -> dict[str, list[int]]:
+    """取目录深度不超过 depth 的叶子层级（更浅的目录里没有更深一层时也保留）"""
+    parents = {key.rsplit('/', 1)[0] for key in rollup if '/' in key}
+    result = {}
+    for key, value in rollup.items():
+        level = key.count('/') + 1
+        if level == depth or (level < depth and key not in parents):
+            result[key] = value
+    return result
+
+
+def analyze(manifest: dict, budgets: dict, previous: Optional[dict] = None, depth: int = 2) -> BudgetReport:
+    """重复分析、目录汇总与预算检查（与上一版本按 depth 层级的包比较增长）"""
+    report = BudgetReport(version=manifest.get('version', ''))
+    files = manifest.get('files', [])
+    report.files = len(files)
+    report.total_size = sum(e['size'] for e in files)
+    report.duplicates = find_duplicates(manifest)
+    report.wasted_bytes = sum(g.wasted for g in report.duplicates)
+    report.rollup = rollup_sizes(manifest)
+
+    for pattern in budgets.get('watch', []):
+        matched = sum(e['size'] for e in files if fnmatch.fnmatch(e['path'], pattern))
+        report.watch.append((pattern, matched))
+
+    violations = report.violations
+    if 'total' in budgets:
+        limit = parse_size(budgets['total'])
+        if report.total_size > limit:
+            violations.append(Violation('total', '总大小', report.total_size, limit))
+    for prefix, value in budgets.get('packages', {}).items():
+        limit = parse_size(value)
+        actual = report.rollup.get(prefix, [0, 0])[1]
+        if actual > limit:
+            violations.append(Violation('package', prefix, actual, limit))
+    if 'duplicates' in budgets:
+        limit = parse_size(budgets['duplicates'])
+        if report.wasted_bytes > limit:
+            violations.append(Violation('duplicates', '重复内容', report.wasted_bytes, limit,
+                                        f"{len(report.duplicates)} 组"))
+    for pattern in budgets.get('forbidden', []):
+        for entry in files:
+            if fnmatch.fnmatch(entry['path'], pattern):
+                violations.append(Violation('forbidden', entry['path'], entry['size'], 0, f"匹配 {pattern}"))
+
+    if previous is not None:
+        report.previous_version = previous.get('version', '')
+        report.previous_total_size = sum(e['size'] for e in previous.get('files', []))
+        report.previous_rollup = rollup_sizes(previous)
+        min_bytes = parse_size(budgets.get('growth_min_bytes', 0))
+        growth = budgets.get('max_total_growth')
+        if growth is not None and report.previous_total_size:
+            limit = int(report.previous_total_size * (1 + growth))
+            if report.total_size > limit and report.total_size - report.previous_total_size > min_bytes:
+                violations.append(Violation('total_growth', '总大小', report.total_size, limit,
+                                            f"上一版本 {format_size(report.previous_total_size)}"))
+        growth = budgets.get('max_package_growth')
+        if growth is not None:
+            # 按汇总层级逐包比较；预算中单独列出的前缀也检查
+            prefixes = set(packages_at_depth(report.rollup, depth)) | set(budgets.get('packages', {}))
+            for prefix in sorted(prefixes):
+                size = report.rollup.get(prefix, [0, 0])[1]
+                prev = report.previous_rollup.get(prefix)
+                if not prev or prefix == ROOT_PACKAGE:
+                    continue
+                limit = int(prev[1] * (1 + growth))
+                if size > limit and size - prev[1] > min_bytes:
+                    violations.append(Violation('package_growth', prefix, size, limit,
+                                                f"上一版本 {format_size(prev[1])}"))
+    return report
+
+
+VIOLATION_LABELS = {
+    'total': '总大小超出预算',
+    'package': '包大小超出预算',
+    'duplicates': '重复内容超出预算',
+    'forbidden': '出现禁止打包的文件',
+    'total_growth': '总大小增长过快',
+    'package_growth': '包大小增长过快',
+}
+
+
+def print_report(report: BudgetReport, budgets: dict, depth: int, top: int):
+    """打印分析报告"""
+    prev_note = ''
+    if report.previous_total_size is not None:
+        delta = report.total_size - report.previous_total_size
+        prev_note = f"，相比 v{report.previous_version} {'+' if delta >= 0 else '-'}{format_size(abs(delta))}"
+    print(f"📦 v{report.version}: {report.files} 个文件，{format_size(report.total_size)}{prev_note}")
+
+    packages = packages_at_depth(report.rollup, depth)
+    limits = {k: parse_size(v) for k, v in budgets.get('packages', {}).items()}
+    print(f"\n📁 最大的包（目录深度 {depth}）:")
+    for prefix, (count, size) in sorted(packages.items(), key=lambda kv: -kv[1][1])[:top]:
+        line = f"   {format_size(size):>10}  {size / max(report.total_size, 1):6.1%}  {count:>5} 个  {prefix}"
+        if prefix in limits:
+            line += f"（预算 {format_size(limits[prefix])}）"
+        prev = report.previous_rollup.get(prefix)
+        if report.previous_rollup:
+            if prev is None:
+                line += "  🆕"
+            elif prev[1] != size:
+                delta = size - prev[1]
+                line += f"  {'+' if delta > 0 else '-'}{format_size(abs(delta))}"
+        print(line)
+    if report.previous_rollup:
+        removed = [k for k in packages_at_depth(report.previous_rollup, depth) if k not in report.rollup]
+        for prefix in removed[:top]:
+            print(f"   {'-':>10}  {'':6}  {'':>5}    {prefix}（已移除）")
+
+    print(f"\n🔁 重复内容: {len(report.duplicates)} 组，浪费 {format_size(report.wasted_bytes)}")
+    for group in report.duplicates[:top]:
+        print(f"   {format_size(group.wasted):>10}  {len(group.paths)} 份 × {format_size(group.size)}  {group.paths[0]}")
+        for path in group.paths[1:4]:
+            print(f"   {'':>10}  {path}")
+        if len(group.paths) > 4:
+            print(f"   {'':>10}  ... 另有 {len(group.paths) - 4} 处")
+
+    if report.watch:
+        print("\n👀 关注的文件:")
+        for pattern, size in report.watch:
+            print(f"   {format_size(size):>10}  {pattern}")
+
+    print()
+    for v in report.violations:
+        detail = f"（{v.detail}）" if v.detail else ''
+        limit = f"，上限 {format_size(v.limit)}" if v.kind != 'forbidden' else ''
+        print(f"❌ {VIOLATION_LABELS[v.kind]}: {v.subject} {format_size(v.actual)}{limit}{detail}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='发布清单的重复内容与体积预算检查')
+    parser.add_argument('manifest', nargs='?', default='resources/manifest.json',
+                        help='清单路径（.json 或 .bin，相对仓库根目录，默认 resources/manifest.json）')
+    parser.add_argument('--previous', help='上一版本的清单，用于比较增长')
+    parser.add_argument('--budgets', default='scripts/size_budgets.json', help='预算文件（相对仓库根目录）')
+    parser.add_argument('--depth', type=int, default=2, help='汇总列表的目录深度')
+    parser.add_argument('--top', type=int, default=15, help='每个列表最多显示的条数')
+    parser.add_argument('--json', help='把完整报告写入 JSON 文件')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    try:
+        manifest = load_any_manifest(repo_root / args.manifest)
+        previous = load_any_manifest(repo_root / args.previous) if args.previous else None
+        budgets = json.loads((repo_root / args.budgets).read_text(encoding='utf-8'))
+        report = analyze(manifest, budgets, previous, args.depth)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_report(report, budgets, args.depth, args.top)
+    if args.json:
+        data = asdict(report)
+        data['violations'] = [asdict(v) for v in report.violations]
+        Path(args.json).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"📝 报告已写入: {args.json}")
+    if not report.ok:
+        print(f"❌ 体积检查未通过：{len(report.violations)} 项超出预算")
+        return 1
+    print("✅ 体积检查通过")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
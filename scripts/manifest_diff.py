@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+比较两个版本的 manifest.json，生成增量更新计划
+
+功能：
+- 找出新增、删除、修改、移动（重命名）的文件；移动按哈希配对识别
+- 按路径和哈希各建一次索引，整体 O(n)
+- 本地已有的内容（旧版本任意路径上哈希相同的文件）不需要下载，改为本地复制
+- 新版本中多个路径内容相同时只下载一次
+- 输出紧凑的更新计划 JSON，并报告客户端实际需要下载的字节数
+
+更新计划格式（from 均指旧版本中的文件内容）：
+    {
+      "format": 1,
+      "from_version": "2.3.0", "to_version": "2.3.1",
+      "download_bytes": 12345, "download_files": 3,
+      "move":     [[旧路径, 新路径], ...],             # 旧路径在新版本中不再存在，可直接改名
+      "copy":     [[旧路径, 新路径], ...],             # 旧路径在新版本中仍需保留
+      "download": [[哈希, 大小, [新路径, ...]], ...],   # 需下载的内容，写到所列路径
+      "delete":   [旧路径, ...]                        # 删除（不含 move 的源路径）
+    }
+更新器应先把 copy / download 的结果写到暂存位置，全部就绪后再改名替换和删除，
+这样交换文件名等环形移动也能正确处理，失败时可以撤销（见 apply_update_plan）。
+
+使用方法：
+    python scripts/manifest_diff.py old/manifest.json resources/manifest.json
+    python scripts/manifest_diff.py old.json new.json -o update-2.3.0-2.3.1.json
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from build_manifest import load_manifest
+
+
+PLAN_FORMAT_VERSION = 1
+
+
+@dataclass
+class ManifestDiff:
+    """两个 manifest 的差异（元素均为 manifest 中的文件条目）"""
+    added: list[dict] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+    # (旧条目, 新条目)，路径相同、哈希不同
+    modified: list[tuple[dict, dict]] = field(default_factory=list)
+    # (旧条目, 新条目)，哈希相同、路径不同，旧路径在新版本中不存在
+    moved: list[tuple[dict, dict]] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.modified or self.moved)
+
+
+def diff_manifests(old: dict, new: dict) -> ManifestDiff:
+    """按路径比较两个 manifest，再用哈希把"删除 + 新增"配对为移动"""
+    old_by_path = {e['path']: e for e in old.get('files', [])}
+    new_paths = set()
+    diff = ManifestDiff()
+    added = []
+    for entry in new.get('files', []):
+        path = entry['path']
+        new_paths.add(path)
+        prev = old_by_path.get(path)
+        if prev is None:
+            added.append(entry)
+        elif prev['hash'] != entry['hash']:
+            diff.modified.append((prev, entry))
+        else:
+            diff.unchanged += 1
+
+    # 被删除的路径按哈希索引，供移动配对；同一哈希可能对应多个被删路径
+    removed_by_hash: dict[str, list[dict]] = {}
+    for path, entry in old_by_path.items():
+        if path not in new_paths:
+            removed_by_hash.setdefault(entry['hash'], []).append(entry)
+
+    for entry in added:
+        candidates = removed_by_hash.get(entry['hash'])
+        if candidates:
+            diff.moved.append((candidates.pop(), entry))
+        else:
+            diff.added.append(entry)
+    diff.removed = sorted((e for entries in removed_by_hash.values() for e in entries), key=lambda e: e['path'])
+    return diff
+
+
+def make_update_plan(diff: ManifestDiff, old: dict, new: dict) -> dict:
+    """根据差异生成更新计划：本地能找到的内容复制或移动，其余按哈希去重后下载"""
+    # 旧版本中每个哈希任取一个仍可读取的路径作为本地来源
+    old_source: dict[str, str] = {}
+    for entry in old.get('files', []):
+        old_source.setdefault(entry['hash'], entry['path'])
+
+    moves = [[o['path'], n['path']] for o, n in diff.moved]
+    copies = []
+    downloads: dict[str, list] = {}
+    for entry in diff.added + [n for _, n in diff.modified]:
+        source = old_source.get(entry['hash'])
+        if source is not None:
+            copies.append([source, entry['path']])
+        elif entry['hash'] in downloads:
+            downloads[entry['hash']][2].append(entry['path'])
+        else:
+            downloads[entry['hash']] = [entry['hash'], entry['size'], [entry['path']]]
+
+    download_list = sorted(downloads.values(), key=lambda d: d[2][0])
+    return {
+        'format': PLAN_FORMAT_VERSION,
+        'from_version': old.get('version', ''),
+        'to_version': new.get('version', ''),
+        'download_bytes': sum(d[1] for d in download_list),
+        'download_files': len(download_list),
+        'move': sorted(moves, key=lambda m: m[1]),
+        'copy': sorted(copies, key=lambda c: c[1]),
+        'download': download_list,
+        'delete': [e['path'] for e in diff.removed],
+    }
+
+
+def dump_plan(plan: dict) -> bytes:
+    """紧凑序列化"""
+    return json.dumps(plan, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class UpdateError(Exception):
+    """更新失败且未能完全回滚"""
+
+
+def apply_update_plan(plan: dict, install_dir: Path, fetch: Callable[[str, int, Path], None]):
+    """把更新计划应用到安装目录
+
+    fetch(哈希, 大小, 目标路径) 负责把需要下载的内容写到目标路径（并自行校验）。
+    分两个阶段：
+    - 暂存：复制与下载的内容写入安装目录下的暂存目录，安装目录本身不动；这一阶段失败（下载出错等）
+      安装目录保持原样
+    - 替换：移动的源文件、要删除的文件和将被覆盖的旧文件都改名到暂存目录（同一文件系统内的 rename，
+      不复制内容），再把新内容改名到位，每一步记入日志。这一阶段失败（如 Windows 上文件被占用）时
+      按日志倒序撤销，安装目录恢复原样后重新抛出原异常；撤销也失败时保留暂存目录并抛出 UpdateError
+    进程在替换阶段被强行终止时不保证一致，需要由调用方重新校验安装目录。
+    """
+    staging = Path(tempfile.mkdtemp(prefix='.update-', dir=install_dir))
+    keep_staging = False
+    try:
+        staged: list[tuple[Path, str]] = []  # (暂存文件, 目标相对路径)
+        n = 0
+
+        def stage_path() -> Path:
+            nonlocal n
+            n += 1
+            return staging / str(n)
+
+        # 暂存阶段：来源均为旧版本内容，在任何改名发生之前复制完
+        for source, target in plan['copy']:
+            tmp = stage_path()
+            shutil.copyfile(install_dir / source, tmp)
+            staged.append((tmp, target))
+        for digest, size, targets in plan['download']:
+            tmp = stage_path()
+            fetch(digest, size, tmp)
+            staged.append((tmp, targets[0]))
+            for target in targets[1:]:
+                extra = stage_path()
+                shutil.copyfile(tmp, extra)
+                staged.append((extra, target))
+
+        # 替换阶段：journal 记录 (当前位置, 原位置)，撤销时倒序改名回去
+        journal: list[tuple[Path, Path]] = []
+
+        def rename(src: Path, dest: Path):
+            os.replace(src, dest)
+            journal.append((dest, src))
+
+        created_dirs: list[Path] = []
+        try:
+            # 移动的源路径在新版本中不再存在，也不是任何复制的来源（复制已暂存完），直接改名进暂存目录
+            for source, target in plan['move']:
+                tmp = stage_path()
+                rename(install_dir / source, tmp)
+                staged.append((tmp, target))
+            for path in plan['delete']:
+                if (install_dir / path).exists():
+                    rename(install_dir / path, stage_path())
+            for tmp, target in staged:
+                dest = install_dir / target
+                if dest.exists():
+                    rename(dest, stage_path())
+                else:
+                    missing = [d for d in [dest.parent, *dest.parent.parents] if not d.exists()]
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    created_dirs += missing
+                rename(tmp, dest)
+        except BaseException:
+            failed = []
+            for current, original in reversed(journal):
+                try:
+                    os.replace(current, original)
+                except OSError as e:
+                    failed.append(f'{original}: {e}')
+            for d in sorted(created_dirs, key=lambda d: len(d.parts), reverse=True):
+                try:
+                    d.rmdir()
+                except OSError:
+                    pass
+            if failed:
+                keep_staging = True
+                raise UpdateError(f"更新失败且有 {len(failed)} 个文件未能恢复（原文件保留在 {staging}）: "
+                                  + '; '.join(failed[:5]))
+            raise
+        remove_empty_dirs(install_dir, [p for p, _ in plan['move']] + plan['delete'])
+    finally:
+        if not keep_staging:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def remove_empty_dirs(root: Path, removed_paths: list[str]):
+    """删除因文件移走而变空的目录"""
+    dirs = {Path(p).parent for p in removed_paths}
+    for d in sorted(dirs, key=lambda d: len(d.parts), reverse=True):
+        while d.parts:
+            try:
+                (root / d).rmdir()
+            except OSError:
+                break
+            d = d.parent
+
+
+def format_size(size: int) -> str:
+    """人类可读的大小"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:,.0f} {unit}' if unit == 'B' else f'{size:,.1f} {unit}'
+        size /= 1024
+
+
+def print_summary(diff: ManifestDiff, plan: dict, old: dict, new: dict, elapsed: float, top: int = 10):
+    """打印差异摘要"""
+    full = new.get('total_size') or sum(e['size'] for e in new.get('files', []))
+    print(f"🔍 v{plan['from_version']} → v{plan['to_version']}（比较耗时 {elapsed * 1000:.1f} ms）")
+    print(f"   未变化: {diff.unchanged} 个")
+    print(f"   新增: {len(diff.added)} 个，修改: {len(diff.modified)} 个，"
+          f"删除: {len(diff.removed)} 个，移动: {len(diff.moved)} 个")
+    print(f"   本地复制: {len(plan['copy'])} 个，移动: {len(plan['move'])} 个")
+    print(f"   📥 需下载: {plan['download_files']} 份内容，{format_size(plan['download_bytes'])}"
+          f"（完整版本 {format_size(full)}，{plan['download_bytes'] / max(full, 1):.2%}）")
+    largest = sorted(plan['download'], key=lambda d: d[1], reverse=True)[:top]
+    for digest, size, targets in largest:
+        more = f" 等 {len(targets)} 处" if len(targets) > 1 else ''
+        print(f"      {format_size(size):>10}  {targets[0]}{more}")
+    for old_entry, new_entry in diff.moved[:top]:
+        print(f"      ↪ {old_entry['path']} → {new_entry['path']}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='比较两个 manifest.json 并生成增量更新计划')
+    parser.add_argument('old', help='旧版本 manifest.json')
+    parser.add_argument('new', help='新版本 manifest.json')
+    parser.add_argument('-o', '--output', help='更新计划输出路径（JSON）')
+    parser.add_argument('--top', type=int, default=10, help='列出最大的下载项数量')
+    args = parser.parse_args()
+
+    try:
+        old = load_manifest(Path(args.old))
+        new = load_manifest(Path(args.new))
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取 manifest 失败: {e}")
+        return 1
+
+    start = time.perf_counter()
+    diff = diff_manifests(old, new)
+    plan = make_update_plan(diff, old, new)
+    elapsed = time.perf_counter() - start
+    print_summary(diff, plan, old, new, elapsed, args.top)
+
+    if args.output:
+        data = dump_plan(plan)
+        Path(args.output).write_bytes(data)
+        print(f"✅ 更新计划已写入: {args.output}（{len(data):,} 字节）")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
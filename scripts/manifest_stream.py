@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+流式读写 manifest.json（内存占用与条目数无关）
+
+读取：ManifestReader 边读边解析，files 中的条目逐个产出；
+      files 之前的顶层字段（version、build_time、total_size）打开后即可取得，之后的字段在遍历结束后可用。
+写入：ManifestWriter 逐条追加，total_size 边写边累加；
+      条目先写入同目录的临时文件，关闭时再拼上头部（含 total_size）原子替换目标文件，
+      输出与 build_manifest.dump_manifest 逐字节一致。
+
+使用方法：
+    from manifest_stream import ManifestReader, ManifestWriter
+
+    with ManifestReader(Path('resources/manifest.json')) as reader:
+        print(reader.fields['version'])
+        for entry in reader:
+            ...
+
+    with ManifestWriter(Path('manifest.json'), {'version': '2.3.1', 'build_time': ...}) as writer:
+        for path, size, digest in ...:
+            writer.add(path, size, digest)
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+READ_CHUNK_CHARS = 64 * 1024
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+
+class ManifestReader:
+    """流式解析 manifest.json，逐个产出 files 中的条目"""
+
+    def __init__(self, path: Path, chunk_chars: int = READ_CHUNK_CHARS):
+        self._file = open(path, 'r', encoding='utf-8')
+        self._chunk = chunk_chars
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._state = 'start'
+        # 已解析的顶层字段（不含 files）
+        self.fields: dict = {}
+        self.count = 0
+        self.total_size = 0
+        try:
+            self._read_header()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'ManifestReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 缓冲区 ----
+
+    def _fill(self) -> bool:
+        """再读一块；到达文件末尾时返回 False"""
+        if self._eof:
+            return False
+        data = self._file.read(self._chunk)
+        if not data:
+            self._eof = True
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += data
+        return True
+
+    def _peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            buf = self._buf
+            pos = self._pos = _WHITESPACE_RE.match(buf, self._pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"manifest 格式错误：期望 {' 或 '.join(chars)}，实际 {ch or '文件结束'}")
+        self._pos += 1
+        return ch
+
+    def _value(self):
+        """解析一个完整的 JSON 值；值恰好停在缓冲区末尾时多读一块再解析（数字可能被截断）"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise ValueError('manifest 格式错误：JSON 不完整') from None
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    # ---- 结构 ----
+
+    def _next_key(self) -> Optional[str]:
+        """读取下一个顶层键；对象结束时返回 None"""
+        if self._state == 'start':
+            self._expect('{')
+            if self._peek() == '}':
+                self._pos += 1
+                return None
+        else:
+            if self._expect(',}') == '}':
+                return None
+        key = self._value()
+        if not isinstance(key, str):
+            raise ValueError('manifest 格式错误：键必须是字符串')
+        self._expect(':')
+        return key
+
+    def _read_header(self):
+        """解析到 files 数组开头为止"""
+        while True:
+            key = self._next_key()
+            self._state = 'fields'
+            if key is None:
+                self._state = 'done'
+                return
+            if key == 'files':
+                self._expect('[')
+                self._state = 'files_start'
+                return
+            self.fields[key] = self._value()
+
+    def __iter__(self) -> Iterator[dict]:
+        while self._state in ('files_start', 'files'):
+            if self._state == 'files_start':
+                if self._peek() == ']':
+                    self._pos += 1
+                    self._state = 'fields'
+                    break
+            elif self._expect(',]') == ']':
+                self._state = 'fields'
+                break
+            self._state = 'files'
+            entry = self._value()
+            self.count += 1
+            self.total_size += entry['size']
+            yield entry
+        if self._state == 'fields':
+            self._read_header()
+            if self._state != 'done':
+                raise ValueError('manifest 格式错误：files 出现多次')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _indent(text: str, prefix: str) -> str:
+    return text.replace('\n', '\n' + prefix)
+
+
+class ManifestWriter:
+    """逐条写出 manifest.json，格式与 dump_manifest 一致
+
+    fields 为 files 之前的顶层字段（按给出的顺序）；total_size 自动累加并写在 fields 之后、files 之前。
+    """
+
+    def __init__(self, path: Path, fields: dict, require_sorted: bool = True):
+        self.path = Path(path)
+        self.fields = {k: v for k, v in fields.items() if k not in ('total_size', 'files')}
+        self.require_sorted = require_sorted
+        self.count = 0
+        self.total_size = 0
+        self._last_path: Optional[str] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._body = tempfile.TemporaryFile(dir=self.path.parent)
+
+    def add(self, path: str, size: int, digest: str):
+        """追加一个条目"""
+        if self.require_sorted and self._last_path is not None and path <= self._last_path:
+            raise ValueError(f"条目须按路径严格递增: {path}")
+        if type(size) is not int:
+            raise ValueError(f"大小须为整数: {path}")
+        # 与 json.dumps(entry, indent=2) 缩进 4 格后的结果相同；indent 会退回纯 Python 编码器，这里手工拼接快得多
+        sep = ',\n' if self.count else ''
+        text = (f'{sep}    {{\n      "path": {_dumps(path)},\n'
+                f'      "size": {size},\n      "hash": {_dumps(digest)}\n    }}')
+        self._body.write(text.encode('utf-8'))
+        self._last_path = path
+        self.count += 1
+        self.total_size += size
+
+    def close(self):
+        """拼接头部与条目，原子写出目标文件"""
+        body = self._body
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                head = '{'
+                for key, value in {**self.fields, 'total_size': self.total_size}.items():
+                    text = _indent(json.dumps(value, ensure_ascii=False, indent=2), '  ')
+                    head += f'\n  {_dumps(key)}: {text},'
+                if self.count:
+                    out.write((head + '\n  "files": [\n').encode('utf-8'))
+                    body.seek(0)
+                    shutil.copyfileobj(body, out, COPY_BUFFER_SIZE)
+                    out.write(b'\n  ]\n}')
+                else:
+                    out.write((head + '\n  "files": []\n}').encode('utf-8'))
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        finally:
+            body.close()
+
+    def abort(self):
+        """放弃写出，目标文件保持原样"""
+        self._body.close()
+
+    def __enter__(self) -> 'ManifestWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
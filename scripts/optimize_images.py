@@ -0,0 +1,726 @@
+#!/usr/bin/env python3
+"""
+网站与文档图片优化
+
+功能：
+- 无损重压缩（只用标准库）：
+  - PNG：去掉文本、时间戳等不影响显示的块，像素数不大时尝试无损降级颜色类型
+    （RGBA 全不透明 → RGB、RGB 全灰 → 灰度、不超过 256 色 → 调色板），以最高级别重新 deflate，取最小者
+  - JPEG：去掉 XMP、Photoshop、注释等元数据段（Exif 方向不为 1 时保留 Exif），扫描数据原样保留
+- 安装了 Pillow 时额外生成 WebP / AVIF 变体与响应式宽度（小于原图时才保留）；
+  未安装时只做无损重压缩并给出提示（pip install pillow）
+- 把 HTML 中引用本地图片的 <img> 改写为 <picture>（有变体时），
+  并补上 width / height（按图片实际尺寸）、loading="lazy"、decoding="async"
+- 结果按输入内容哈希缓存（产物存放在 .build_cache/blobs/），输入未变时直接取出，不重新编码
+
+网站目录的优化由 build_site.py 在构建目录中调用；单独运行时只对给出的文件或目录做原地无损重压缩。
+
+使用方法：
+    python scripts/optimize_images.py image/ website/QRcode.png     # 原地无损重压缩
+    python scripts/optimize_images.py image/ --dry-run              # 只报告可节省的字节数
+"""
+
+import io
+import os
+import re
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from build_cache import DEFAULT_BLOB_DIR, DEFAULT_CACHE_DIR, BlobStore, BuildCache, hash_key, sha256_bytes
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+
+# 算法或参数改动时递增，使旧缓存失效
+OPTIMIZER_VERSION = 1
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# 响应式宽度（只生成小于原图的宽度）
+DEFAULT_WIDTHS = (480, 960, 1440)
+
+DEFAULT_FORMATS = ('avif', 'webp')
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpeg': 'image/jpeg'}
+
+# 超过该像素数的 PNG 不做颜色类型降级（纯 Python 反滤波太慢），只重新 deflate
+MAX_REDUCE_PIXELS = 2_000_000
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 影响显示的 PNG 块；其余辅助块（tEXt、zTXt、iTXt、tIME、bKGD 等）丢弃
+PNG_KEEP_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'sBIT', b'pHYs', b'IEND'}
+
+# 每个像素的通道数（按颜色类型）
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+# ---- PNG ----
+
+def _png_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError('不是 PNG 文件')
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        chunks.append((kind, data[pos + 8:pos + 8 + length]))
+        pos += 12 + length
+        if kind == b'IEND':
+            break
+    return chunks
+
+
+def _png_pack(chunks: list[tuple[bytes, bytes]]) -> bytes:
+    out = [PNG_SIGNATURE]
+    for kind, payload in chunks:
+        out.append(struct.pack('>I', len(payload)))
+        out.append(kind + payload)
+        out.append(struct.pack('>I', zlib.crc32(kind + payload)))
+    return b''.join(out)
+
+
+def _deflate(raw: bytes) -> bytes:
+    """以最高级别压缩，默认与 FILTERED 两种策略取较小者"""
+    best = None
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        c = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        out = c.compress(raw) + c.flush()
+        if best is None or len(out) < len(best):
+            best = out
+    return best
+
+
+def _swar_masks(n: int) -> tuple[int, int]:
+    high = int.from_bytes(b'\x80' * n, 'big')
+    return high, int.from_bytes(b'\x7f' * n, 'big')
+
+
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    """逐字节 (a + b) mod 256，用大整数一次算完整行"""
+    n = len(a)
+    high, low = _swar_masks(n)
+    x, y = int.from_bytes(a, 'big'), int.from_bytes(b, 'big')
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(n, 'big')
+
+
+def _sub_bytes(a: bytes, b: bytes) -> bytes:
+    """逐字节 (a - b) mod 256"""
+    n = len(a)
+    high, low = _swar_masks(n)
+    x, y = int.from_bytes(a, 'big'), int.from_bytes(b, 'big')
+    return (((x | high) - (y & low)) ^ ((x ^ ~y) & high)).to_bytes(n, 'big')
+
+
+def _unfilter(raw: bytes, height: int, stride: int, bpp: int) -> bytes:
+    """还原 PNG 扫描行滤波，返回不含滤波字节的像素数据"""
+    out = bytearray()
+    prev = bytes(stride)
+    pos = 0
+    for _ in range(height):
+        kind = raw[pos]
+        line = raw[pos + 1:pos + 1 + stride]
+        pos += 1 + stride
+        if kind == 0:
+            cur = line
+        elif kind == 2:
+            cur = _add_bytes(line, prev)
+        else:
+            cur = bytearray(line)
+            for i in range(stride):
+                left = cur[i - bpp] if i >= bpp else 0
+                if kind == 1:
+                    cur[i] = (cur[i] + left) & 0xFF
+                elif kind == 3:
+                    cur[i] = (cur[i] + ((left + prev[i]) >> 1)) & 0xFF
+                elif kind == 4:
+                    up = prev[i]
+                    upper_left = prev[i - bpp] if i >= bpp else 0
+                    p = left + up - upper_left
+                    pa, pb, pc = abs(p - left), abs(p - up), abs(p - upper_left)
+                    pred = left if pa <= pb and pa <= pc else (up if pb <= pc else upper_left)
+                    cur[i] = (cur[i] + pred) & 0xFF
+                else:
+                    raise ValueError(f'未知的 PNG 滤波类型 {kind}')
+            cur = bytes(cur)
+        out += cur
+        prev = cur
+    return bytes(out)
+
+
+def _filter_rows(pixels: bytes, height: int, stride: int, kind: int) -> bytes:
+    """整图使用同一种滤波（0 = None，2 = Up）"""
+    out = bytearray()
+    prev = bytes(stride)
+    for y in range(height):
+        row = pixels[y * stride:(y + 1) * stride]
+        out.append(kind)
+        out += row if kind == 0 else _sub_bytes(row, prev)
+        prev = row
+    return bytes(out)
+
+
+def _pack_indices(indices: bytes, width: int, height: int, depth: int) -> bytes:
+    """把每像素一个字节的索引按 depth 位打包成扫描行"""
+    if depth == 8:
+        return indices
+    per_byte = 8 // depth
+    out = bytearray()
+    for y in range(height):
+        row = indices[y * width:(y + 1) * width]
+        for i in range(0, width, per_byte):
+            value = 0
+            group = row[i:i + per_byte]
+            for v in group:
+                value = (value << depth) | v
+            out.append(value << (depth * (per_byte - len(group))))
+    return bytes(out)
+
+
+def _png_reductions(width: int, height: int, color_type: int, pixels: bytes, has_icc: bool):
+    """产出 (颜色类型, 位深, 每行字节数, 像素数据, PLTE, tRNS) 的无损降级候选"""
+    channels = _PNG_CHANNELS[color_type]
+    if color_type in (4, 6) and pixels[channels - 1::channels].count(255) == width * height:
+        # 全不透明，去掉 alpha 通道
+        buf = bytearray(width * height * (channels - 1))
+        for c in range(channels - 1):
+            buf[c::channels - 1] = pixels[c::channels]
+        pixels, color_type, channels = bytes(buf), (0 if color_type == 4 else 2), channels - 1
+        yield color_type, 8, width * channels, pixels, None, None
+
+    if color_type == 2 and not has_icc:
+        r = pixels[0::3]
+        if r == pixels[1::3] == pixels[2::3]:
+            pixels, color_type, channels = r, 0, 1
+            yield 0, 8, width, pixels, None, None
+
+    if color_type in (2, 6):
+        colors = zip(*(pixels[c::channels] for c in range(channels)))
+        palette: dict[tuple, int] = {}
+        for color in colors:
+            if color not in palette:
+                if len(palette) == 256:
+                    return
+                palette[color] = len(palette)
+        # 有透明度的颜色排在前面，tRNS 可以更短
+        ordered = sorted(palette, key=lambda c: (c[3] if channels == 4 else 255))
+        index = {c: i for i, c in enumerate(ordered)}
+        pixel_iter = zip(*(pixels[c::channels] for c in range(channels)))
+        indices = bytes(index[c] for c in pixel_iter)
+        depth = next(d for d in (1, 2, 4, 8) if len(ordered) <= 1 << d)
+        plte = b''.join(bytes(c[:3]) for c in ordered)
+        trns = None
+        if channels == 4:
+            alphas = bytes(c[3] for c in ordered).rstrip(b'\xff')
+            trns = alphas or None
+        stride = (width * depth + 7) // 8
+        yield 3, depth, stride, _pack_indices(indices, width, height, depth), plte, trns
+
+    if color_type == 0 and not has_icc:
+        levels = set(pixels)
+        if len(levels) <= 16:
+            depth = next(d for d in (1, 2, 4) if len(levels) <= 1 << d)
+            ordered = sorted(levels)
+            table = bytes(ordered.index(v) if v in levels else 0 for v in range(256))
+            plte = b''.join(bytes((v, v, v)) for v in ordered)
+            indices = pixels.translate(table)
+            stride = (width * depth + 7) // 8
+            yield 3, depth, stride, _pack_indices(indices, width, height, depth), plte, None
+
+
+def recompress_png(data: bytes, max_reduce_pixels: int = MAX_REDUCE_PIXELS) -> bytes:
+    """无损重压缩 PNG；无法更小时返回原数据"""
+    chunks = _png_chunks(data)
+    kinds = {k for k, _ in chunks}
+    if b'acTL' in kinds or chunks[0][0] != b'IHDR':
+        return data  # APNG 或异常文件不处理
+    ihdr = chunks[0][1]
+    width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+    idat = b''.join(p for k, p in chunks if k == b'IDAT')
+    raw = zlib.decompress(idat)
+    head = [(k, p) for k, p in chunks if k in PNG_KEEP_CHUNKS and k not in (b'IDAT', b'IEND')]
+    best = data
+
+    def consider(candidate: list[tuple[bytes, bytes]]):
+        nonlocal best
+        packed = _png_pack(candidate)
+        if len(packed) < len(best):
+            best = packed
+
+    # 1. 保留原滤波结果，只重新 deflate
+    consider(head + [(b'IDAT', _deflate(raw)), (b'IEND', b'')])
+
+    # 2. 颜色类型降级（8 位、非隔行、原图没有 tRNS 关键色）
+    if (depth == 8 and interlace == 0 and color_type in _PNG_CHANNELS and color_type != 3
+            and b'tRNS' not in kinds and width * height <= max_reduce_pixels):
+        channels = _PNG_CHANNELS[color_type]
+        stride = width * channels
+        pixels = _unfilter(raw, height, stride, channels)
+        has_icc = b'iCCP' in kinds
+        for new_type, new_depth, new_stride, new_pixels, plte, trns in _png_reductions(
+                width, height, color_type, pixels, has_icc):
+            new_ihdr = struct.pack('>IIBBBBB', width, height, new_depth, new_type, 0, 0, 0)
+            extra = [(k, p) for k, p in head if k not in (b'IHDR', b'sBIT', b'PLTE', b'tRNS')]
+            if plte is not None:
+                extra.append((b'PLTE', plte))
+            if trns is not None:
+                extra.append((b'tRNS', trns))
+            filters = (0,) if new_depth < 8 or new_type == 3 else (0, 2)
+            for kind in filters:
+                stream = _filter_rows(new_pixels, height, new_stride, kind)
+                consider([(b'IHDR', new_ihdr)] + extra + [(b'IDAT', _deflate(stream)), (b'IEND', b'')])
+    return best
+
+
+# ---- JPEG ----
+
+def _exif_orientation(payload: bytes) -> Optional[int]:
+    """从 APP1 Exif 段读取方向标签（0x0112）"""
+    if not payload.startswith(b'Exif\x00\x00') or len(payload) < 14:
+        return None
+    tiff = payload[6:]
+    order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if order is None:
+        return None
+    try:
+        (ifd,) = struct.unpack(order + 'I', tiff[4:8])
+        (count,) = struct.unpack(order + 'H', tiff[ifd:ifd + 2])
+        for i in range(count):
+            entry = tiff[ifd + 2 + i * 12:ifd + 14 + i * 12]
+            tag, _, _, value = struct.unpack(order + 'HHI4s', entry)
+            if tag == 0x0112:
+                return struct.unpack(order + 'H', value[:2])[0]
+    except struct.error:
+        return None
+    return None
+
+
+def strip_jpeg(data: bytes) -> bytes:
+    """去掉 JPEG 中不影响显示的元数据段；保留 JFIF、ICC、Adobe 与方向不为 1 的 Exif"""
+    if not data.startswith(b'\xff\xd8'):
+        raise ValueError('不是 JPEG 文件')
+    out = [data[:2]]
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return data
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xDA:
+            out.append(data[pos:])
+            break
+        (length,) = struct.unpack('>H', data[pos + 2:pos + 4])
+        segment = data[pos:pos + 2 + length]
+        payload = segment[4:]
+        keep = True
+        if marker == 0xFE:
+            keep = False  # COM
+        elif 0xE1 <= marker <= 0xEF:
+            if marker == 0xE1:
+                keep = _exif_orientation(payload) not in (None, 1)
+            elif marker == 0xE2:
+                keep = payload.startswith(b'ICC_PROFILE\x00')
+            elif marker == 0xEE:
+                keep = payload.startswith(b'Adobe')
+            else:
+                keep = False
+        if keep:
+            out.append(segment)
+        pos += 2 + length
+    else:
+        return data
+    result = b''.join(out)
+    return result if len(result) < len(data) else data
+
+
+def image_size(data: bytes) -> Optional[tuple[int, int]]:
+    """读取 PNG / JPEG / GIF 的像素尺寸（不解码）"""
+    if data.startswith(PNG_SIGNATURE):
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', data[6:10])
+    if data.startswith(b'\xff\xd8'):
+        pos = 2
+        while pos + 9 <= len(data):
+            if data[pos] != 0xFF:
+                return None
+            marker = data[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            (length,) = struct.unpack('>H', data[pos + 2:pos + 4])
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + length
+    return None
+
+
+def optimize_bytes(data: bytes, suffix: str) -> bytes:
+    """按扩展名做无损重压缩"""
+    if suffix.lower() == '.png':
+        return recompress_png(data)
+    return strip_jpeg(data)
+
+
+# ---- 变体（需要 Pillow） ----
+
+def available_formats(wanted: tuple[str, ...] = DEFAULT_FORMATS) -> list[str]:
+    """当前 Pillow 能编码的现代格式"""
+    if Image is None:
+        return []
+    formats = []
+    for fmt in wanted:
+        try:
+            if features.check(fmt):
+                formats.append(fmt)
+        except ValueError:
+            pass  # 旧版 Pillow 不认识 avif
+    return formats
+
+
+def _encode(img, fmt: str, lossless_source: bool) -> bytes:
+    buf = io.BytesIO()
+    if fmt == 'webp':
+        options = {'lossless': True} if lossless_source else {'quality': 80}
+        img.save(buf, 'WEBP', method=6, **options)
+    elif fmt == 'avif':
+        img.save(buf, 'AVIF', quality=80 if lossless_source else 60)
+    elif fmt == 'png':
+        img.save(buf, 'PNG', optimize=True)
+    else:
+        img.convert('RGB').save(buf, 'JPEG', quality=85, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def make_variants(data: bytes, suffix: str, size: tuple[int, int], widths: tuple[int, ...],
+                  formats: list[str]) -> list[tuple[int, str, bytes]]:
+    """生成 (宽度, 格式, 数据) 变体；现代格式只保留比同宽度原格式更小的"""
+    if Image is None:
+        return []
+    lossless_source = suffix.lower() == '.png'
+    base_fmt = 'png' if lossless_source else 'jpeg'
+    width, height = size
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    variants = []
+    for w in sorted({w for w in widths if w < width} | {width}):
+        resized = img if w == width else img.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+        fallback = len(data) if w == width else None
+        if w != width:
+            encoded = _encode(resized, base_fmt, lossless_source)
+            variants.append((w, base_fmt, encoded))
+            fallback = len(encoded)
+        for fmt in formats:
+            encoded = _encode(resized, fmt, lossless_source)
+            if len(encoded) < fallback:
+                variants.append((w, fmt, encoded))
+    return variants
+
+
+def variant_name(rel: str, width: int, full_width: int, fmt: str) -> str:
+    """QRcode.png → QRcode.webp / QRcode-480w.webp / QRcode-480w.png"""
+    stem, ext = os.path.splitext(rel)
+    new_ext = ext if fmt in ('png', 'jpeg') else '.' + fmt
+    return f'{stem}{new_ext}' if width == full_width else f'{stem}-{width}w{new_ext}'
+
+
+# ---- 处理单个文件 ----
+
+@dataclass
+class ImageResult:
+    """单张图片的处理结果"""
+    path: str
+    width: int = 0
+    height: int = 0
+    original_bytes: int = 0
+    optimized_bytes: int = 0
+    # (相对路径, 格式, 宽度, 字节数)
+    variants: list[tuple[str, str, int, int]] = field(default_factory=list)
+    cached: bool = False
+    error: str = ''
+
+
+@dataclass
+class ImageReport:
+    """一次图片优化的汇总"""
+    images: list[ImageResult] = field(default_factory=list)
+    html_rewritten: list[str] = field(default_factory=list)
+    formats: list[str] = field(default_factory=list)
+    pillow: bool = Image is not None
+    seconds: float = 0.0
+
+    @property
+    def saved_bytes(self) -> int:
+        return sum(r.original_bytes - r.optimized_bytes for r in self.images)
+
+
+def _cache_key(digest: str, suffix: str, widths: tuple[int, ...], formats: list[str]) -> str:
+    pillow_version = getattr(Image, '__version__', None) if Image is not None else None
+    return hash_key(OPTIMIZER_VERSION, digest, suffix.lower(), list(widths), formats, pillow_version)
+
+
+def process_image(root: Path, rel: str, store: BlobStore, cached: Optional[dict], widths: tuple[int, ...],
+                  formats: list[str], variants: bool) -> tuple[ImageResult, Optional[dict]]:
+    """优化 root/rel（原地写回）并写出变体；返回 (结果, 新的缓存记录)"""
+    path = root / rel
+    data = path.read_bytes()
+    suffix = path.suffix
+    result = ImageResult(rel, original_bytes=len(data))
+    if cached is not None and all(store.has(b) for b in [cached['output']] + [v[3] for v in cached['variants']]):
+        optimized = store.get(cached['output'])
+        produced = [(v[0], v[1], v[2], store.get(v[3])) for v in cached['variants']]
+        result.width, result.height = cached['size']
+        result.cached = True
+        entry = None
+    else:
+        optimized = optimize_bytes(data, suffix)
+        size = image_size(optimized) or (0, 0)
+        result.width, result.height = size
+        produced = []
+        if variants and size[0]:
+            for w, fmt, encoded in make_variants(optimized, suffix, size, widths, formats):
+                produced.append((variant_name(rel, w, size[0], fmt), fmt, w, encoded))
+        entry = {
+            'size': list(size),
+            'output': store.put(optimized),
+            'variants': [[name, fmt, w, store.put(encoded)] for name, fmt, w, encoded in produced],
+        }
+    if optimized != data:
+        path.write_bytes(optimized)
+    result.optimized_bytes = len(optimized)
+    for name, fmt, w, encoded in produced:
+        (root / name).write_bytes(encoded)
+        result.variants.append((name, fmt, w, len(encoded)))
+    return result, entry
+
+
+def optimize_images(root: Path, paths: list[str], cache: Optional[BuildCache], store: BlobStore,
+                    widths: tuple[int, ...] = DEFAULT_WIDTHS, formats: tuple[str, ...] = DEFAULT_FORMATS,
+                    variants: bool = True, jobs: Optional[int] = None) -> ImageReport:
+    """并行优化 root 下的若干图片（相对路径）"""
+    start = time.perf_counter()
+    report = ImageReport(formats=available_formats(formats) if variants else [])
+    keys = {}
+    for rel in paths:
+        digest = sha256_bytes((root / rel).read_bytes())
+        keys[rel] = _cache_key(digest, Path(rel).suffix, widths if variants else (), report.formats)
+
+    def run(rel: str):
+        cached = cache.get('images', keys[rel]) if cache is not None else None
+        try:
+            return process_image(root, rel, store, cached, widths, report.formats, variants)
+        except (OSError, ValueError, zlib.error, struct.error) as e:
+            return ImageResult(rel, error=str(e)), None
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel, (result, entry) in zip(paths, pool.map(run, paths)):
+            report.images.append(result)
+            if entry is not None and cache is not None:
+                cache.set('images', keys[rel], entry)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+# ---- HTML 改写 ----
+
+_PICTURE_RE = re.compile(r'<picture\b.*?</picture\s*>', re.IGNORECASE | re.DOTALL)
+_IMG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+
+
+def _attributes(tag: str) -> dict[str, str]:
+    body = tag[4:].rstrip('>').rstrip('/')
+    return {m.group(1).lower(): next((g for g in m.group(2, 3, 4) if g is not None), '')
+            for m in _ATTR_RE.finditer(body)}
+
+
+def _srcset(items: list[tuple[str, int]], base: str, rel_of: Callable[[str, str], str]) -> str:
+    if len(items) == 1:
+        return rel_of(items[0][0], base)
+    return ', '.join(f'{rel_of(name, base)} {w}w' for name, w in items)
+
+
+def rewrite_img_tags(html: str, page_dir: str, images: dict[str, ImageResult]) -> tuple[str, int]:
+    """改写 HTML 中引用已处理图片的 <img>，返回 (新 HTML, 改写数)"""
+    skip = [m.span() for m in _PICTURE_RE.finditer(html)]
+    count = 0
+
+    def relative(name: str, src: str) -> str:
+        # 变体与原图在同一目录，沿用原 src 的目录前缀
+        prefix = src[:src.rfind('/') + 1]
+        return prefix + name.rsplit('/', 1)[-1]
+
+    def replace(match: re.Match) -> str:
+        nonlocal count
+        if any(a <= match.start() < b for a, b in skip):
+            return match.group(0)
+        tag = match.group(0)
+        attrs = _attributes(tag)
+        src = attrs.get('src', '')
+        if not src or re.match(r'^([a-z][a-z0-9+.-]*:|//|#)', src, re.IGNORECASE):
+            return tag
+        target = os.path.normpath(os.path.join(page_dir, src.split('?')[0].split('#')[0])).replace(os.sep, '/')
+        info = images.get(target)
+        if info is None or not info.width:
+            return tag
+
+        extra = []
+        if 'width' not in attrs and 'height' not in attrs:
+            extra.append(f'width="{info.width}" height="{info.height}"')
+        elif 'height' not in attrs and attrs['width'].isdigit():
+            extra.append(f'height="{round(int(attrs["width"]) * info.height / info.width)}"')
+        elif 'width' not in attrs and attrs['height'].isdigit():
+            extra.append(f'width="{round(int(attrs["height"]) * info.width / info.height)}"')
+        if 'loading' not in attrs and attrs.get('fetchpriority') != 'high':
+            extra.append('loading="lazy"')
+        if 'decoding' not in attrs:
+            extra.append('decoding="async"')
+
+        by_format: dict[str, list[tuple[str, int]]] = {}
+        for name, fmt, w, _ in info.variants:
+            by_format.setdefault(fmt, []).append((name, w))
+        base_fmt = 'png' if info.path.lower().endswith('.png') else 'jpeg'
+        sizes = attrs.get('sizes') or f'(max-width: {info.width}px) 100vw, {info.width}px'
+        fallback = sorted(by_format.pop(base_fmt, []) + [(info.path, info.width)], key=lambda v: v[1])
+        if len(fallback) > 1 and 'srcset' not in attrs:
+            extra.append(f'srcset="{_srcset(fallback, src, relative)}"')
+            if 'sizes' not in attrs:
+                extra.append(f'sizes="{sizes}"')
+
+        close = '/>' if tag.endswith('/>') else '>'
+        new_tag = tag[:-len(close)].rstrip()
+        if extra:
+            new_tag += ' ' + ' '.join(extra)
+        new_tag += close
+        if not by_format:
+            count += new_tag != tag
+            return new_tag
+        count += 1
+        sources = []
+        for fmt in DEFAULT_FORMATS:
+            items = sorted(by_format.get(fmt, []), key=lambda v: v[1])
+            if items:
+                size_attr = f' sizes="{sizes}"' if len(items) > 1 else ''
+                sources.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{_srcset(items, src, relative)}"{size_attr}>')
+        return '<picture>' + ''.join(sources) + new_tag + '</picture>'
+
+    return _IMG_RE.sub(replace, html), count
+
+
+def optimize_site(site: Path, cache: Optional[BuildCache], store: BlobStore,
+                  widths: tuple[int, ...] = DEFAULT_WIDTHS, formats: tuple[str, ...] = DEFAULT_FORMATS,
+                  jobs: Optional[int] = None) -> ImageReport:
+    """构建目录中的图片阶段：优化全部图片、生成变体并改写 HTML"""
+    from build_manifest import scan_tree
+    files = [f.path for f in scan_tree(site)]
+    images = [p for p in files if p.lower().endswith(IMAGE_EXTENSIONS)]
+    report = optimize_images(site, images, cache, store, widths, formats, variants=True, jobs=jobs)
+    by_path = {r.path: r for r in report.images if not r.error}
+    for rel in files:
+        if not rel.lower().endswith('.html'):
+            continue
+        path = site / rel
+        html = path.read_text(encoding='utf-8')
+        new_html, count = rewrite_img_tags(html, os.path.dirname(rel), by_path)
+        if count:
+            path.write_text(new_html, encoding='utf-8')
+            report.html_rewritten.append(rel)
+    return report
+
+
+def print_report(report: ImageReport, verbose: bool = True):
+    """打印优化结果"""
+    from manifest_diff import format_size
+    if verbose:
+        for r in report.images:
+            if r.error:
+                print(f"   ⚠️ {r.path}: {r.error}")
+                continue
+            saved = r.original_bytes - r.optimized_bytes
+            percent = saved * 100 / r.original_bytes if r.original_bytes else 0
+            line = (f"   {r.path}: {format_size(r.original_bytes)} → {format_size(r.optimized_bytes)}"
+                    f"（-{percent:.0f}%）{r.width}×{r.height}")
+            if r.variants:
+                line += f"，{len(r.variants)} 个变体 {format_size(sum(v[3] for v in r.variants))}"
+            if r.cached:
+                line += '（缓存）'
+            print(line)
+    hits = sum(r.cached for r in report.images)
+    print(f"🖼️ 图片 {len(report.images)} 张，无损节省 {format_size(report.saved_bytes)}，"
+          f"缓存命中 {hits} 张，耗时 {report.seconds:.2f} s")
+    if not report.pillow:
+        print("ℹ️ 未安装 Pillow，跳过 WebP / AVIF 与响应式尺寸（pip install pillow）")
+    elif report.formats:
+        print(f"   变体格式: {', '.join(report.formats)}")
+    for rel in report.html_rewritten:
+        print(f"   ✏️ 改写 {rel} 中的 <img>")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='图片无损重压缩（原地）')
+    parser.add_argument('paths', nargs='+', help='图片文件或目录')
+    parser.add_argument('--dry-run', action='store_true', help='只报告，不改写文件')
+    parser.add_argument('--jobs', type=int, default=None, help='并行数（默认 CPU 核数）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/images.json', help='构建缓存文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不使用缓存')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    files = []
+    for arg in args.paths:
+        path = Path(arg)
+        if path.is_dir():
+            files += sorted(p for p in path.rglob('*') if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+        elif path.is_file():
+            files.append(path)
+        else:
+            print(f"❌ 找不到 {arg}")
+            return 1
+    if not files:
+        print("ℹ️ 没有需要处理的图片")
+        return 0
+
+    cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+    store = BlobStore(repo_root / DEFAULT_BLOB_DIR)
+    if args.dry_run:
+        start = time.perf_counter()
+        report = ImageReport()
+        for path in files:
+            data = path.read_bytes()
+            optimized = optimize_bytes(data, path.suffix)
+            size = image_size(optimized) or (0, 0)
+            report.images.append(ImageResult(os.fspath(path), size[0], size[1], len(data), len(optimized)))
+        report.seconds = time.perf_counter() - start
+    else:
+        # 以各文件所在目录为根逐个处理，路径保持与命令行一致
+        report = ImageReport()
+        start = time.perf_counter()
+        groups: dict[Path, list[str]] = {}
+        for path in files:
+            groups.setdefault(path.parent, []).append(path.name)
+        for parent, names in groups.items():
+            sub = optimize_images(parent, names, cache, store, variants=False, jobs=args.jobs)
+            for r in sub.images:
+                r.path = os.fspath(parent / r.path)
+            report.images += sub.images
+        report.seconds = time.perf_counter() - start
+        if cache is not None:
+            cache.save()
+    print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
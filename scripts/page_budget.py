@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+网站页面的体积与阻塞渲染预算检查
+
+离线解析 website/*.html（guide.html 用 README.md 重新生成的内容代替仓库中的文件，
+检查的是下次发布的页面），逐页统计：
+- html：页面本身的字节数
+- inline_css：<style> 内容与 style 属性
+- inline_js：<script> 内容（不含外部脚本）与 on* 事件属性
+- inline_svg：内联 <svg> 元素（含标签本身）
+- assets：页面加载时引用的本地资源（<img> / <source> / <link> / <script src> / <video>，
+  srcset 取最大的候选，@font-face 等 CSS url()），同一文件只计一次；脚本中动态加载的资源不计
+- total：html + assets
+- render_blocking：阻塞渲染的外部资源数（<head> 中的样式表，未加 async / defer / type=module 的外部脚本，
+  media="print" 等不匹配屏幕的样式表除外），例如 fonts.loli.net 的字体样式表
+- external：第三方域名资源数（离线无法计算其大小，只计数）
+
+与预算文件（默认 scripts/page_budgets.json）比较，"default" 对所有页面生效，
+"pages" 中按文件名覆盖；任一页面的任一项超出即以非零状态退出，可直接作为发布检查。
+
+使用方法：
+    python scripts/page_budget.py                       # website/ + 重新生成的 guide.html
+    python scripts/page_budget.py --site site-dist      # 检查构建后的发布目录（不重新生成 guide）
+    python scripts/page_budget.py --json page-report.json
+"""
+
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+from manifest_budget import parse_size
+from manifest_diff import format_size
+
+
+# 字节数类的检查项；render_blocking / external 为数量
+SIZE_CATEGORIES = ('html', 'inline_css', 'inline_js', 'inline_svg', 'assets', 'total')
+COUNT_CATEGORIES = ('render_blocking', 'external')
+CATEGORIES = SIZE_CATEGORIES + COUNT_CATEGORIES
+
+CATEGORY_LABELS = {
+    'html': 'HTML',
+    'inline_css': '内联 CSS',
+    'inline_js': '内联 JS',
+    'inline_svg': '内联 SVG',
+    'assets': '引用的资源',
+    'total': '合计',
+    'render_blocking': '阻塞渲染的资源',
+    'external': '第三方资源',
+}
+
+# 用 README.md 重新生成的页面
+GUIDE_PAGE = 'guide.html'
+
+_CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_BLOCKING_MEDIA = ('', 'all', 'screen')
+
+
+@dataclass
+class PageReport:
+    """单个页面的统计"""
+    path: str
+    sizes: dict[str, int] = field(default_factory=lambda: dict.fromkeys(CATEGORIES, 0))
+    assets: list[tuple[str, int]] = field(default_factory=list)  # (本地路径, 字节数)
+    missing: list[str] = field(default_factory=list)  # 引用了但不存在的本地文件
+    blocking: list[str] = field(default_factory=list)
+    external: list[str] = field(default_factory=list)
+    regenerated: bool = False
+
+
+@dataclass
+class Violation:
+    """一项超出的预算"""
+    page: str
+    category: str
+    actual: int
+    limit: int
+
+
+class _PageParser(HTMLParser):
+    """按类别累加字节数，收集引用的资源"""
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=False)
+        self.text = text
+        self._line_offsets = [0]
+        for line in text.splitlines(keepends=True):
+            self._line_offsets.append(self._line_offsets[-1] + len(line))
+        self.inline_css = 0
+        self.inline_js = 0
+        self.svg_spans: list[tuple[int, int]] = []
+        self.refs: list[str] = []  # 加载时请求的 URL
+        self.srcsets: list[list[tuple[str, float]]] = []
+        self.blocking: list[str] = []
+        self._svg_depth = 0
+        self._svg_start = 0
+        self._in_head = True
+        self._raw: Optional[str] = None  # 'style' / 'script'（内联）
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_offsets[line - 1] + col
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs)
+        if tag == 'svg' and self._svg_depth:
+            # <svg/> 自闭合
+            self._end_svg(self._offset() + len(self.get_starttag_text() or ''))
+
+    def _start(self, tag, attrs):
+        a = {k: (v or '') for k, v in attrs}
+        for name, value in a.items():
+            if name.startswith('on'):
+                self.inline_js += len(value.encode('utf-8'))
+            elif name == 'style':
+                self.inline_css += len(value.encode('utf-8'))
+                self.refs += [m.group(2) for m in _CSS_URL_RE.finditer(value)]
+        if tag == 'svg':
+            if self._svg_depth == 0:
+                self._svg_start = self._offset()
+            self._svg_depth += 1
+        elif tag == 'body':
+            self._in_head = False
+        elif tag == 'style':
+            self._raw = 'style'
+        elif tag == 'script':
+            if a.get('src'):
+                self.refs.append(a['src'])
+                module = a.get('type') == 'module'
+                if self._in_head and not ('async' in a or 'defer' in a or module):
+                    self.blocking.append(a['src'])
+            else:
+                self._raw = 'script'
+        elif tag == 'link':
+            rel = a.get('rel', '').lower().split()
+            href = a.get('href', '')
+            if 'stylesheet' in rel:
+                self.refs.append(href)
+                if a.get('media', '').strip().lower() in _BLOCKING_MEDIA and 'disabled' not in a:
+                    self.blocking.append(href)
+            elif rel and set(rel) & {'icon', 'preload', 'modulepreload', 'manifest'}:
+                self.refs.append(href)
+        elif tag in ('img', 'source', 'video', 'audio', 'input', 'embed', 'iframe'):
+            if a.get('src'):
+                self.refs.append(a['src'])
+            if tag == 'video' and a.get('poster'):
+                self.refs.append(a['poster'])
+            if a.get('srcset'):
+                self.srcsets.append(parse_srcset(a['srcset']))
+
+    def handle_endtag(self, tag):
+        if tag == 'svg' and self._svg_depth:
+            self._svg_depth -= 1
+            if self._svg_depth == 0:
+                start = self._offset()
+                end = self.text.find('>', start)
+                self._end_svg(end + 1 if end >= 0 else len(self.text))
+        elif tag == 'head':
+            self._in_head = False
+        elif tag in ('style', 'script'):
+            self._raw = None
+
+    def _end_svg(self, end: int):
+        self._svg_depth = 0
+        self.svg_spans.append((self._svg_start, end))
+
+    def handle_data(self, data):
+        if self._raw == 'style':
+            self.inline_css += len(data.encode('utf-8'))
+            self.refs += [m.group(2) for m in _CSS_URL_RE.finditer(data)]
+        elif self._raw == 'script':
+            self.inline_js += len(data.encode('utf-8'))
+
+
+def parse_srcset(value: str) -> list[tuple[str, float]]:
+    """"a.webp 480w, b.webp 960w" → [(url, 描述符数值)]"""
+    candidates = []
+    for item in value.split(','):
+        parts = item.split()
+        if not parts:
+            continue
+        descriptor = parts[1] if len(parts) > 1 else '1x'
+        try:
+            weight = float(descriptor[:-1])
+        except ValueError:
+            weight = 1.0
+        candidates.append((parts[0], weight))
+    return candidates
+
+
+def _is_external(url: str) -> bool:
+    return url.startswith(('http://', 'https://', '//'))
+
+
+def resolve_local(url: str, page_dir: Path, site: Path) -> Optional[Path]:
+    """页面中的 URL → 本地文件路径；外部、data: 与锚点链接返回 None"""
+    if not url or _is_external(url) or url.startswith(('data:', '#', 'mailto:', 'javascript:', 'blob:')):
+        return None
+    path = unquote(urlsplit(url).path)
+    if not path:
+        return None
+    return site / path.lstrip('/') if path.startswith('/') else page_dir / path
+
+
+def _load_urls(parser: _PageParser) -> list[str]:
+    # srcset 只会下载一个候选，按最坏情况取最大的
+    urls = list(parser.refs)
+    for candidates in parser.srcsets:
+        if candidates:
+            urls.append(max(candidates, key=lambda c: c[1])[0])
+    return urls
+
+
+def page_resources(html: str) -> list[str]:
+    """页面加载时请求的资源 URL（与 assets 统计口径相同，含第三方资源，按出现顺序、不去重）"""
+    parser = _PageParser(html)
+    parser.feed(html)
+    parser.close()
+    return _load_urls(parser)
+
+
+def analyze_page(rel: str, html: bytes, site: Path) -> PageReport:
+    """统计一个页面"""
+    report = PageReport(rel)
+    text = html.decode('utf-8')
+    parser = _PageParser(text)
+    parser.feed(text)
+    parser.close()
+
+    sizes = report.sizes
+    sizes['html'] = len(html)
+    sizes['inline_css'] = parser.inline_css
+    sizes['inline_js'] = parser.inline_js
+    sizes['inline_svg'] = sum(len(text[start:end].encode('utf-8')) for start, end in parser.svg_spans)
+
+    urls = _load_urls(parser)
+    page_dir = (site / rel).parent
+    seen = set()
+    for url in urls:
+        if _is_external(url):
+            if url not in report.external:
+                report.external.append(url)
+            continue
+        path = resolve_local(url, page_dir, site)
+        if path is None:
+            continue
+        key = os.path.normpath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        display = os.path.relpath(key, site).replace(os.sep, '/')
+        if path.is_file():
+            report.assets.append((display, path.stat().st_size))
+        else:
+            report.missing.append(display)
+    sizes['assets'] = sum(size for _, size in report.assets)
+    sizes['total'] = sizes['html'] + sizes['assets']
+    report.blocking = parser.blocking
+    sizes['render_blocking'] = len(report.blocking)
+    sizes['external'] = len(report.external)
+    return report
+
+
+def page_limits(budgets: dict, page: str) -> dict[str, int]:
+    """某个页面生效的预算（default 与 pages 中的覆盖合并）"""
+    merged = dict(budgets.get('default', {}))
+    merged.update(budgets.get('pages', {}).get(page, {}))
+    unknown = set(merged) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"未知的预算项: {', '.join(sorted(unknown))}")
+    return {k: (int(v) if k in COUNT_CATEGORIES else parse_size(v)) for k, v in merged.items()}
+
+
+def check(reports: list[PageReport], budgets: dict) -> list[Violation]:
+    """逐页逐项与预算比较"""
+    violations = []
+    for report in reports:
+        for category, limit in page_limits(budgets, report.path).items():
+            actual = report.sizes[category]
+            if actual > limit:
+                violations.append(Violation(report.path, category, actual, limit))
+    return violations
+
+
+def regenerate_guide(readme: Path) -> bytes:
+    """用 README.md 重新生成 guide.html（与 readme_to_guide.py 默认的压缩输出一致）"""
+    from readme_to_guide import render_guide
+    html, _, _ = render_guide(readme.read_bytes())
+    return html
+
+
+def analyze_site(site: Path, readme: Optional[Path] = None) -> list[PageReport]:
+    """统计 site 下的全部页面；给出 readme 时 guide.html 用重新生成的内容代替"""
+    reports = []
+    for path in sorted(site.glob('*.html')):
+        rel = path.name
+        regenerated = readme is not None and rel == GUIDE_PAGE
+        html = regenerate_guide(readme) if regenerated else path.read_bytes()
+        report = analyze_page(rel, html, site)
+        report.regenerated = regenerated
+        reports.append(report)
+    return reports
+
+
+def _format(category: str, value: int) -> str:
+    return str(value) if category in COUNT_CATEGORIES else format_size(value)
+
+
+def print_report(reports: list[PageReport], violations: list[Violation], budgets: dict, verbose: bool = True):
+    """逐页打印各项统计（超出预算的项标 ❌）"""
+    over = {(v.page, v.category) for v in violations}
+    for report in reports:
+        note = '（由 README.md 重新生成）' if report.regenerated else ''
+        print(f"📄 {report.path}{note}")
+        limits = page_limits(budgets, report.path)
+        for category in CATEGORIES:
+            value = report.sizes[category]
+            limit = limits.get(category)
+            mark = '❌' if (report.path, category) in over else '  '
+            budget = f"（预算 {_format(category, limit)}）" if limit is not None else ''
+            print(f"   {mark} {_format(category, value):>10}  {CATEGORY_LABELS[category]}{budget}")
+        if verbose:
+            for rel, size in sorted(report.assets, key=lambda a: -a[1]):
+                print(f"        📎 {rel}  {format_size(size)}")
+            for url in report.blocking:
+                print(f"        🚧 阻塞渲染: {url}")
+            for url in report.external:
+                if url not in report.blocking:
+                    print(f"        🌐 第三方: {url}")
+        for rel in report.missing:
+            print(f"        ⚠️ 引用的文件不存在: {rel}")
+    for v in violations:
+        print(f"❌ {v.page} {CATEGORY_LABELS[v.category]}超出预算: "
+              f"{_format(v.category, v.actual)}，上限 {_format(v.category, v.limit)}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='网站页面的体积与阻塞渲染预算检查')
+    parser.add_argument('--site', default='website', help='网站目录（相对仓库根目录，默认 website/）')
+    parser.add_argument('--readme', default='README.md',
+                        help='用于重新生成 guide.html 的 README（相对仓库根目录；--site 不是 website/ 时不重新生成）')
+    parser.add_argument('--no-regenerate', action='store_true', help='直接检查目录中的 guide.html')
+    parser.add_argument('--budgets', default='scripts/page_budgets.json', help='预算文件（相对仓库根目录）')
+    parser.add_argument('--json', help='把完整报告写入 JSON 文件')
+    parser.add_argument('--quiet', action='store_true', help='不列出各页面引用的资源')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    site = repo_root / args.site
+    regenerate = not args.no_regenerate and site.resolve() == (repo_root / 'website').resolve()
+    try:
+        budgets = json.loads((repo_root / args.budgets).read_text(encoding='utf-8'))
+        reports = analyze_site(site, repo_root / args.readme if regenerate else None)
+        violations = check(reports, budgets)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    if not reports:
+        print(f"❌ {site} 中没有页面")
+        return 1
+
+    print_report(reports, violations, budgets, verbose=not args.quiet)
+    if args.json:
+        data = {'pages': [asdict(r) for r in reports], 'violations': [asdict(v) for v in violations]}
+        Path(args.json).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"📝 报告已写入: {args.json}")
+    if violations:
+        print(f"❌ 页面预算检查未通过：{len(violations)} 项超出预算")
+        return 1
+    print(f"✅ 页面预算检查通过（{len(reports)} 个页面）")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
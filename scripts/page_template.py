@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+极简页面模板引擎
+
+模板语法只有一种：`{{ 名称 }}`，渲染时替换为同名参数的字符串值。
+CSS/JS 中的花括号无需转义。
+
+模板在首次使用时编译为一个渲染函数：字面量片段作为常量，
+渲染只剩一次 ''.join()；编译结果按文件路径和修改时间缓存在内存中。
+
+使用方法：
+    from page_template import load_template
+
+    template = load_template(Path('scripts/templates/guide.html'))
+    html = template.render(version='2.9.2', steps_html='...')
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable
+
+
+_PLACEHOLDER_RE = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+
+class TemplateError(Exception):
+    """模板编译或渲染错误"""
+
+
+class Template:
+    """编译后的模板"""
+
+    def __init__(self, source: str, name: str = '<template>'):
+        self.source = source
+        self.name = name
+        self.literals: list[str] = []
+        self.names: list[str] = []
+        self._render = self._compile()
+
+    def _compile(self) -> Callable[[dict], str]:
+        """把模板拆成字面量与变量，生成并编译渲染函数"""
+        pos = 0
+        for m in _PLACEHOLDER_RE.finditer(self.source):
+            self.literals.append(self.source[pos:m.start()])
+            self.names.append(m.group(1))
+            pos = m.end()
+        self.literals.append(self.source[pos:])
+
+        parts = []
+        for i, var in enumerate(self.names):
+            if self.literals[i]:
+                parts.append(f'_L[{i}]')
+            parts.append(f'ctx[{var!r}]')
+        if self.literals[-1]:
+            parts.append(f'_L[{len(self.names)}]')
+        code = f"def render(ctx):\n    return ''.join(({', '.join(parts)},))\n"
+        namespace = {'_L': tuple(self.literals)}
+        exec(compile(code, self.name, 'exec'), namespace)
+        return namespace['render']
+
+    @property
+    def variables(self) -> set[str]:
+        """模板中用到的变量名"""
+        return set(self.names)
+
+    def render(self, **context: str) -> str:
+        """渲染模板；缺少变量时抛出 TemplateError"""
+        try:
+            return self._render(context)
+        except KeyError as e:
+            raise TemplateError(f'{self.name}: 缺少模板变量 {e.args[0]}') from None
+        except TypeError as e:
+            raise TemplateError(f'{self.name}: 模板变量必须是字符串（{e}）') from None
+
+
+# 已编译模板缓存：路径 → (mtime_ns, Template)
+_compiled: dict[str, tuple[int, Template]] = {}
+
+
+def load_template(path: Path) -> Template:
+    """读取并编译模板文件；文件未修改时直接返回缓存的编译结果"""
+    key = os.fspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    cached = _compiled.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    template = Template(Path(key).read_text(encoding='utf-8'), name=key)
+    _compiled[key] = (mtime, template)
+    return template
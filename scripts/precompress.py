@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+预压缩网站文本资源
+
+为每个文本资源（HTML / JS / CSS / SVG / JSON 等）在旁边生成最高压缩级别的 .br 与 .gz，
+服务器直接发送预压缩文件（nginx 的 brotli_static / gzip_static），不必每次请求实时压缩，
+也不受服务器实时压缩级别的限制。
+
+- gzip：标准库，级别 9，文件头不含文件名与时间（内容相同则输出逐字节相同）
+- Brotli：quality 11、最大窗口；依赖 brotli 包（pip install brotli），未安装时只生成 .gz
+- 压缩后不比原文件小的不生成（小文件压缩后可能反而更大）
+- 按（源文件哈希、算法）缓存，源文件未变时直接取缓存的结果
+- 多个文件并行压缩（zlib / brotli 压缩时释放 GIL，线程池即可并行）
+
+使用方法：
+    python scripts/build_site.py                      # 作为构建阶段运行（compress）
+    python scripts/precompress.py site-dist           # 为目录中的文本资源生成 .br / .gz
+    python scripts/precompress.py website/guide.html --dry-run
+"""
+
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from build_cache import (DEFAULT_BLOB_DIR, DEFAULT_CACHE_DIR, BlobStore, BuildCache, hash_key, sha256_bytes,
+                         write_if_changed)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# 算法或参数改动时递增，使旧缓存失效
+COMPRESSOR_VERSION = 1
+
+TEXT_EXTENSIONS = ('.html', '.htm', '.js', '.mjs', '.css', '.svg', '.json', '.xml', '.txt', '.webmanifest')
+
+# (扩展名, 算法)；未安装 brotli 时跳过 br
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+# 小于此大小的文件不压缩（一个 TCP 包内就能发完，压缩收益可以忽略）
+MIN_SIZE = 256
+
+
+def available_encodings() -> list[str]:
+    """当前环境可以生成的压缩格式"""
+    return [name for _, name in ENCODINGS if name != 'br' or brotli is not None]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """以最高级别压缩"""
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11, lgwin=24)
+    raise ValueError(f'未知的压缩格式: {encoding}')
+
+
+def is_text_asset(rel: str) -> bool:
+    return rel.lower().endswith(TEXT_EXTENSIONS)
+
+
+@dataclass
+class CompressResult:
+    """单个文件的压缩结果"""
+    path: str
+    original_bytes: int
+    # 算法 → 压缩后字节数；不值得压缩的算法不出现
+    sizes: dict[str, int] = field(default_factory=dict)
+    cached: bool = False
+    error: str = ''
+
+    def ratio(self, encoding: str) -> Optional[float]:
+        size = self.sizes.get(encoding)
+        return size / self.original_bytes if size is not None and self.original_bytes else None
+
+
+@dataclass
+class CompressReport:
+    """一次预压缩的汇总"""
+    files: list[CompressResult] = field(default_factory=list)
+    encodings: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def precompress_file(root: Path, rel: str, encodings: list[str], cache: Optional[BuildCache],
+                     store: BlobStore, write: bool = True) -> tuple[CompressResult, Optional[tuple[str, dict]]]:
+    """为一个文件生成压缩副本，返回 (结果, 需要写入缓存的 (键, 记录))"""
+    path = root / rel
+    data = path.read_bytes()
+    result = CompressResult(rel, len(data))
+    key = hash_key(COMPRESSOR_VERSION, sha256_bytes(data), encodings, getattr(brotli, '__version__', None))
+    entry = cache.get('compress', key) if cache is not None else None
+    outputs: dict[str, bytes] = {}
+    if entry and all(store.has(digest) for digest in entry['blobs'].values()):
+        result.cached = True
+        for encoding, digest in entry['blobs'].items():
+            outputs[encoding] = store.get(digest)
+        new_entry = None
+    else:
+        if len(data) >= MIN_SIZE:
+            for encoding in encodings:
+                packed = compress(data, encoding)
+                if len(packed) < len(data):
+                    outputs[encoding] = packed
+        new_entry = (key, {'blobs': {encoding: store.put(packed) for encoding, packed in outputs.items()}})
+
+    for ext, encoding in ENCODINGS:
+        sibling = path.with_name(path.name + ext)
+        if encoding in outputs:
+            result.sizes[encoding] = len(outputs[encoding])
+            if write:
+                write_if_changed(sibling, outputs[encoding])
+        elif write and encoding in encodings:
+            # 源文件变得不值得压缩时，删除旧的压缩副本，避免发送过期内容
+            sibling.unlink(missing_ok=True)
+    return result, new_entry
+
+
+def precompress(root: Path, paths: list[str], cache: Optional[BuildCache], store: BlobStore,
+                jobs: Optional[int] = None, write: bool = True) -> CompressReport:
+    """并行压缩 root 下的若干文件（相对路径）"""
+    start = time.perf_counter()
+    report = CompressReport(encodings=available_encodings())
+
+    def run(rel: str):
+        try:
+            return precompress_file(root, rel, report.encodings, cache, store, write)
+        except OSError as e:
+            return CompressResult(rel, 0, error=str(e)), None
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result, new_entry in pool.map(run, paths):
+            report.files.append(result)
+            if new_entry is not None and cache is not None:
+                cache.set('compress', *new_entry)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def precompress_site(site: Path, cache: Optional[BuildCache], store: BlobStore,
+                     jobs: Optional[int] = None) -> CompressReport:
+    """构建目录中的压缩阶段：为全部文本资源生成 .br / .gz"""
+    from build_manifest import scan_tree
+    paths = [f.path for f in scan_tree(site) if is_text_asset(f.path)]
+    return precompress(site, paths, cache, store, jobs=jobs)
+
+
+def print_report(report: CompressReport, verbose: bool = True):
+    """打印每个文件的压缩率与汇总"""
+    from manifest_diff import format_size
+    total = sum(r.original_bytes for r in report.files if not r.error)
+    if verbose:
+        for r in report.files:
+            if r.error:
+                print(f"   ⚠️ {r.path}: {r.error}")
+                continue
+            parts = []
+            for encoding in report.encodings:
+                ratio = r.ratio(encoding)
+                if ratio is not None:
+                    parts.append(f"{encoding} {format_size(r.sizes[encoding])}（{ratio:.1%}）")
+            line = f"   {r.path}: {format_size(r.original_bytes)} → {'，'.join(parts) if parts else '不压缩'}"
+            print(line + ('（缓存）' if r.cached else ''))
+    summary = []
+    for encoding in report.encodings:
+        packed = sum(r.sizes.get(encoding, r.original_bytes) for r in report.files if not r.error)
+        summary.append(f"{encoding} {format_size(packed)}（{packed / total:.1%}）" if total else encoding)
+    cached = sum(r.cached for r in report.files)
+    print(f"🗜️ 预压缩 {len(report.files)} 个文件 {format_size(total)} → {'，'.join(summary)}，"
+          f"缓存命中 {cached} 个，耗时 {report.seconds:.2f} s")
+    if 'br' not in report.encodings:
+        print("ℹ️ 未安装 brotli，只生成 .gz（pip install brotli）")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='为文本资源生成 .br / .gz 预压缩副本')
+    parser.add_argument('paths', nargs='+', help='文件或目录')
+    parser.add_argument('--jobs', type=int, default=None, help='并行数（默认 CPU 核数）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/site.json', help='构建缓存文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不使用缓存')
+    parser.add_argument('--dry-run', action='store_true', help='只报告压缩率，不写文件')
+    args = parser.parse_args()
+
+    from build_manifest import scan_tree
+    repo_root = Path(__file__).parent.parent
+    cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+    store = BlobStore(repo_root / DEFAULT_BLOB_DIR)
+    for target in map(Path, args.paths):
+        if target.is_dir():
+            root, paths = target, [f.path for f in scan_tree(target) if is_text_asset(f.path)]
+        elif target.is_file():
+            root, paths = target.parent, [target.name]
+        else:
+            print(f"❌ 找不到: {target}")
+            return 1
+        report = precompress(root, paths, cache, store, jobs=args.jobs, write=not args.dry_run)
+        print_report(report)
+    if cache is not None:
+        cache.save()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
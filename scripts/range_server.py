@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+支持 HTTP Range 的本地静态文件服务器（可注入故障），用于测试 download_client.py
+
+功能：
+- GET / HEAD，单段 Range（bytes=a-b、bytes=a-、bytes=-n），If-Range，ETag / Last-Modified
+- 故障注入：
+  - throttle：每个连接的限速（字节/秒），模拟慢速链路
+  - drop_rate：按概率在响应中途断开连接
+  - error_rate：按概率返回 503
+  - stop_after：全部连接累计发送这么多字节后，之后的请求都在发送前断开（模拟下载中断）
+  - corrupt_offset：发送的数据在该文件偏移处翻转一个字节
+  - no_range：忽略 Range，总是返回整个文件
+
+使用方法：
+    python scripts/range_server.py dist/ --port 8765 --throttle 2MB --drop-rate 0.2
+
+    from range_server import Faults, serve
+    server, base_url = serve(Path('dist'), Faults(drop_rate=0.2))
+    ...
+    server.shutdown()
+"""
+
+import email.utils
+import os
+import random
+import re
+import socket
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+
+SEND_BLOCK = 16 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class Faults:
+    """故障注入配置"""
+    throttle: int = 0  # 每连接字节/秒，0 为不限速
+    drop_rate: float = 0.0
+    error_rate: float = 0.0
+    stop_after: Optional[int] = None
+    corrupt_offset: Optional[int] = None
+    no_range: bool = False
+    seed: int = 0
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, root: Path, faults: Faults):
+        super().__init__(address, _Handler)
+        self.root = root.resolve()
+        self.faults = faults
+        self.rng = random.Random(faults.seed)
+        self.lock = threading.Lock()
+        self.sent_bytes = 0
+        self.requests = 0
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: _Server
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _resolve(self) -> Optional[Path]:
+        rel = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip('/')
+        path = (self.server.root / rel).resolve()
+        if self.server.root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _serve(self, send_body: bool):
+        server = self.server
+        faults = server.faults
+        with server.lock:
+            server.requests += 1
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        if server.roll(faults.error_rate):
+            self.send_error(503, 'injected error')
+            return
+
+        st = path.stat()
+        size = st.st_size
+        etag = f'"{size:x}-{st.st_mtime_ns:x}"'
+        start, end, status = 0, size, 200
+        header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if header and not faults.no_range and (if_range is None or if_range == etag):
+            match = _RANGE_RE.match(header.strip())
+            if not match or not (match.group(1) or match.group(2)):
+                self.send_error(416)
+                return
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)) + 1, size) if match.group(2) else size
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size or start >= end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(st.st_mtime, usegmt=True))
+        if not faults.no_range:
+            self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        self.end_headers()
+        if send_body:
+            self._send_body(path, start, end)
+
+    def _abort(self):
+        self.close_connection = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _send_body(self, path: Path, start: int, end: int):
+        server = self.server
+        faults = server.faults
+        drop_at = None
+        if server.roll(faults.drop_rate):
+            with server.lock:
+                drop_at = start + int(server.rng.random() * (end - start))
+        began = time.monotonic()
+        sent = 0
+        with open(path, 'rb') as f:
+            f.seek(start)
+            pos = start
+            while pos < end:
+                if faults.stop_after is not None:
+                    with server.lock:
+                        exhausted = server.sent_bytes >= faults.stop_after
+                    if exhausted:
+                        self._abort()
+                        return
+                block = f.read(min(SEND_BLOCK, end - pos))
+                if drop_at is not None and pos + len(block) > drop_at:
+                    block = block[:drop_at - pos]
+                if faults.corrupt_offset is not None and pos <= faults.corrupt_offset < pos + len(block):
+                    i = faults.corrupt_offset - pos
+                    block = block[:i] + bytes([block[i] ^ 0xFF]) + block[i + 1:]
+                try:
+                    self.wfile.write(block)
+                except OSError:
+                    return
+                pos += len(block)
+                sent += len(block)
+                with server.lock:
+                    server.sent_bytes += len(block)
+                if drop_at is not None and pos >= drop_at:
+                    self._abort()
+                    return
+                if faults.throttle:
+                    delay = sent / faults.throttle - (time.monotonic() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+
+
+def serve(root: Path, faults: Optional[Faults] = None, host: str = '127.0.0.1', port: int = 0
+          ) -> tuple[_Server, str]:
+    """在后台线程启动服务器，返回 (服务器, 基础 URL)；用 server.shutdown() 停止"""
+    server = _Server((host, port), Path(root), faults or Faults())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}/'
+
+
+def main():
+    import argparse
+    from manifest_budget import parse_size
+    parser = argparse.ArgumentParser(description='支持 Range 与故障注入的本地文件服务器')
+    parser.add_argument('root', help='提供下载的目录')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='端口')
+    parser.add_argument('--throttle', default='0', help='每连接限速（如 2MB，表示每秒）')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='响应中途断开的概率')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的概率')
+    parser.add_argument('--stop-after', default=None, help='累计发送该字节数后断开所有后续传输')
+    parser.add_argument('--corrupt-offset', type=int, default=None, help='在该偏移处翻转一个字节')
+    parser.add_argument('--no-range', action='store_true', help='忽略 Range 请求')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    faults = Faults(throttle=parse_size(args.throttle), drop_rate=args.drop_rate, error_rate=args.error_rate,
+                    stop_after=parse_size(args.stop_after) if args.stop_after else None,
+                    corrupt_offset=args.corrupt_offset, no_range=args.no_range, seed=args.seed)
+    server = _Server((args.host, args.port), Path(args.root), faults)
+    print(f"🌐 http://{args.host}:{server.server_address[1]}/ → {os.path.abspath(args.root)}（Ctrl+C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
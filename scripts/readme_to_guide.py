@@ -6,16 +6,40 @@ README.md 转换为 guide.html 的脚本
 - 解析 README.md 内容
 - 生成美观的 guide.html 页面
 - 自动提取版本号、功能特性、快捷键等
+- 按内容哈希缓存解析结果与产物，输入未变化时不改写 guide.html
+- --watch 常驻监听 README，保存后只重新处理变化的段落
+- 默认压缩输出：剔除用不到的 CSS 规则、压缩内联 CSS、折叠空白（--no-minify 关闭）
 
 使用方法：
     python scripts/readme_to_guide.py
+    python scripts/readme_to_guide.py --no-cache    # 强制重新生成
+    python scripts/readme_to_guide.py --batch guides.json            # 批量生成
+    python scripts/readme_to_guide.py --batch-glob "docs/README*.md" --out-template "website/guide-{stem}.html"
+    python scripts/readme_to_guide.py --no-cache --timings --trace trace.json   # 阶段耗时
+    python scripts/readme_to_guide.py --profile guide.prof                     # cProfile
+    python scripts/readme_to_guide.py --watch                                  # 保存后自动重新生成
 """
 
+import bisect
+import functools
+import itertools
+import json
+import os
 import re
+import time
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from typing import Optional
 
+import build_trace
+from build_cache import DEFAULT_CACHE_DIR, BuildCache, hash_key, sha256_bytes, sha256_file, write_if_changed
+from html_minify import minify_html
+from page_template import Template, load_template
+
+
+# 页面模板
+GUIDE_TEMPLATE = Path(__file__).parent / 'templates' / 'guide.html'
+
 
 @dataclass
 class Feature:
@@ -45,6 +69,21 @@ class ReadmeContent:
     subscription_vip: str = ""
 
 
+# 解析逻辑变化时递增，使构建缓存中的解析结果失效
+PARSER_VERSION = 3
+
+# 批量模式的进程池启动开销（秒，按 multiprocessing 启动方式）：
+# fork 复制当前进程，约 30 ms；spawn / forkserver 的子进程要重新导入本模块，单核实测两个进程约 0.3 s
+POOL_STARTUP_SECONDS = {'fork': 0.05, 'forkserver': 0.3, 'spawn': 0.3}
+
+# README 中没有快速开始步骤时使用的默认步骤
+DEFAULT_QUICK_START = (
+    "下载安装包（Windows: `.exe` / macOS: `.dmg`）",
+    "按照向导完成安装（macOS 拖入 Applications 即可）",
+    "默认热键 `Alt+X`（macOS: `Option+X`）开始截图",
+    "系统托盘会显示虎哥截图图标",
+)
+
 # 功能图标到 SVG 的映射
 FEATURE_ICONS = {
     "📸": "screenshot",
@@ -83,114 +122,492 @@ SVG_ICONS = {
     "clock": '''<circle cx="12" cy="12" r="10"/><polyline points="12 6 12 12 16 14"/>''',
     "update": '''<path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/>''',
     "user": '''<path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/>''',
+    # 以下为页面固定位置使用的图标
+    "back": '''<path d="m15 18-6-6 6-6"/>''',
+    "rocket": '''<path d="M4.5 16.5c-1.5 1.26-2 5-2 5s3.74-.5 5-2c.71-.84.7-2.13-.09-2.91a2.18 2.18 0 0 0-2.91-.09z"/><path d="m12 15-3-3a22 22 0 0 1 2-3.95A12.88 12.88 0 0 1 22 2c0 2.72-.78 7.5-6 11a22.35 22.35 0 0 1-4 2z"/><path d="M9 12H4s.55-3.03 2-4c1.62-1.08 5 0 5 0"/><path d="M12 15v5s3.03-.55 4-2c1.08-1.62 0-5 0-5"/>''',
+    "alert": '''<path d="m21.73 18-8-14a2 2 0 0 0-3.48 0l-8 14A2 2 0 0 0 4 21h16a2 2 0 0 0 1.73-3Z"/><line x1="12" y1="9" x2="12" y2="13"/><line x1="12" y1="17" x2="12.01" y2="17"/>''',
+    "star": '''<polygon points="12 2 15.09 8.26 22 9.27 17 14.14 18.18 21.02 12 17.77 5.82 21.02 7 14.14 2 9.27 8.91 8.26 12 2"/>''',
+    "keyboard": '''<rect x="2" y="4" width="20" height="16" rx="2" ry="2"/><path d="M6 8h.001"/><path d="M10 8h.001"/><path d="M14 8h.001"/><path d="M18 8h.001"/><path d="M8 12h.001"/><path d="M12 12h.001"/><path d="M16 12h.001"/><path d="M7 16h10"/>''',
 }
 
+# 页面模板中以 {{ icon_<名称> }} 引用的固定图标
+PAGE_ICONS = ("back", "screenshot", "rocket", "alert", "star", "keyboard", "tool", "user")
 
-def parse_readme(readme_path: Path) -> ReadmeContent:
-    """解析 README.md 文件"""
-    content = readme_path.read_text(encoding='utf-8')
-    result = ReadmeContent()
-    
-    # 提取版本号
+# 所有图标共用的描边属性
+SVG_STROKE_ATTRS = 'fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"'
+
+
+# 索引扫描只关心三类行首：一、二级标题、分隔线、代码块围栏
+# 以换行符开头，让正则引擎走字面量前缀的快速查找
+_BLOCK_LINE_RE = re.compile(r'\n(?:(```)|(---)|(#{1,2})[ \t]+([^\n]*))')
+
+# 三级及以下标题行中标题文本之前的部分
+_DEEP_HEADING_PREFIX_RE = re.compile(r'(#{3,6})[ \t]+')
+
+# 层级 3..n 的标题行（n 为键），用于确定 n 级标题正文的结束位置
+_DEEP_HEADING_RES = {level: re.compile(r'\n#{3,%d}[ \t]' % level) for level in range(3, 7)}
+
+
+@dataclass(slots=True)
+class Section:
+    """README 中的一个标题段落，start/end 为正文在原文中的偏移"""
+    level: int
+    title: str
+    start: int
+    end: int
+
+
+class SectionIndex:
+    """README 标题索引
+
+    单次线性扫描整篇文档，只记录一、二级标题、分隔线与代码块围栏的位置，
+    段落的结束位置与 Section 对象在查找时才用二分查找得出；
+    三级及以下标题（功能特性下每个功能一个）数量多、却只会查找其中一两个，
+    查找时才用 str.find 定位。
+    之后各段落提取器只在自己的切片上工作，不再反复全文正则搜索。
+
+    段落正文到下一个同级或更高级标题、或 `---` 分隔线为止；
+    代码块（```）中的行不参与识别。
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        # 一、二级标题 → (层级, 行首偏移, 正文起始偏移)，同名时保留第一个
+        self._by_title: dict[str, tuple[int, int, int]] = {}
+        # 以下均为所在行的起始偏移（升序）
+        self._breaks: list[int] = []  # 二级标题与分隔线：按文本定位的兜底查找在此结束
+        self._bounds: list[int] = []  # 一、二级标题与分隔线：二级及以下标题的正文最晚在此结束
+        self._top_bounds: list[int] = []  # 一级标题与分隔线：一级标题的正文在此结束
+        self._fences: list[int] = []  # 代码块围栏：某位置之前有奇数个围栏即位于代码块中
+        self._build()
+
+    def _build(self):
+        content = self.content
+        end_of_doc = len(content)
+        by_title = self._by_title
+        breaks = self._breaks
+        bounds = self._bounds
+        top_bounds = self._top_bounds
+        fences = self._fences
+        in_fence = False
+        # 首行前没有换行：只给首行补一个换行单独匹配，不复制全文。
+        # 首行的匹配位置即行首；其余匹配从行首前的换行开始，行首与正文偏移都要加 1
+        newline = content.find('\n')
+        first = _BLOCK_LINE_RE.match('\n' + (content[:newline] if newline >= 0 else content))
+        matches = ((m, 1) for m in _BLOCK_LINE_RE.finditer(content))
+        if first:
+            matches = itertools.chain([(first, 0)], matches)
+        for m, shift in matches:
+            fence, rule, hashes, title = m.groups()
+            line_start = m.start() + shift
+            if fence:
+                fences.append(line_start)
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            bounds.append(line_start)
+            if rule or len(hashes) == 1:
+                top_bounds.append(line_start)
+            if rule or len(hashes) == 2:
+                breaks.append(line_start)
+            if rule:
+                continue
+            title = title.strip()
+            if title not in by_title:
+                # 正文从标题行末的换行之后开始
+                by_title[title] = (len(hashes), line_start, min(m.end() + shift, end_of_doc))
+
+    def _in_fence(self, pos: int) -> bool:
+        return bisect.bisect_left(self._fences, pos) % 2 == 1
+
+    def _section(self, level: int, title: str, line_start: int, start: int) -> Section:
+        """正文从 start 开始，到下一个层级不低于它的标题或分隔线为止"""
+        content = self.content
+        bounds = self._top_bounds if level == 1 else self._bounds
+        i = bisect.bisect_right(bounds, line_start)
+        end = bounds[i] if i < len(bounds) else None
+        if level >= 3:
+            # 三级及以下的标题不在索引中，在到达索引中的边界之前逐个检查
+            limit = len(content) if end is None else end
+            for m in _DEEP_HEADING_RES[level].finditer(content, start - 1, limit):
+                if not self._in_fence(m.start() + 1):
+                    end = m.start() + 1
+                    break
+        if end is None:
+            return Section(level, title, start, len(content))
+        return Section(level, title, start, _trim_end(content, start, end))
+
+    def _find_deep(self, title: str) -> Optional[Section]:
+        """查找首个标题为 title 的三级及以下标题"""
+        content = self.content
+        pos = content.find(title)
+        while pos >= 0:
+            line_start = content.rfind('\n', 0, pos) + 1
+            line_end = content.find('\n', pos)
+            if line_end < 0:
+                line_end = len(content)
+            prefix = _DEEP_HEADING_PREFIX_RE.fullmatch(content, line_start, pos)
+            if prefix and not content[pos + len(title):line_end].strip() and not self._in_fence(line_start):
+                return self._section(len(prefix.group(1)), title, line_start, min(line_end + 1, len(content)))
+            pos = content.find(title, pos + 1)
+        return None
+
+    def find(self, title: str) -> Optional[Section]:
+        """按完整标题查找：优先首个同名的一、二级标题，没有时再找三级及以下的首个同名标题"""
+        entry = self._by_title.get(title)
+        if entry is not None:
+            return self._section(entry[0], title, entry[1], entry[2])
+        return self._find_deep(title)
+
+    def body(self, title: str) -> Optional[str]:
+        """按完整标题获取正文切片"""
+        section = self.find(title)
+        if section is None:
+            return None
+        return self.content[section.start:section.end]
+
+    def body_after_text(self, text: str) -> Optional[str]:
+        """兜底：从任意位置的文本开始，截取到下一个二级标题或分隔线"""
+        pos = self.content.find(text)
+        if pos < 0:
+            return None
+        start = pos + len(text)
+        i = bisect.bisect_right(self._breaks, pos)
+        end = self._breaks[i] if i < len(self._breaks) else len(self.content)
+        return self.content[start:_trim_end(self.content, start, end)]
+
+
+def _trim_end(content: str, start: int, end: int) -> int:
+    """去掉正文末尾紧邻下一标题的换行"""
+    if end > start and content[end - 1] == '\n':
+        end -= 1
+    return max(start, end)
+
+
+# 有序列表项：行首（可缩进）的 `1. 内容`，每行只尝试一次匹配
+_ORDERED_ITEM_RE = re.compile(r'[ \t]*\d+\.[ \t]+(.+)')
+
+
+def _parse_version(content: str) -> str:
+    """提取版本号"""
     version_match = re.search(r'badge/version-(\d+\.\d+\.\d+)-', content)
-    if version_match:
-        result.version = version_match.group(1)
-    
-    # 提取功能特性
-    features_section = re.search(r'## ✨ 功能特性\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
-    if features_section:
-        features_text = features_section.group(1)
-        # 匹配每个功能块：### 图标 标题 + 列表项
-        feature_blocks = re.findall(
-            r'### ([^\n]+)\n((?:- [^\n]+\n?)+)',
-            features_text
-        )
-        for title_line, items in feature_blocks:
+    return version_match.group(1) if version_match else ""
+
+
+# 功能块的列表项在第一个"后面不是 `- ` 列表项行"的换行处结束。
+# 只有单个字面量前缀加一个定长前瞻，没有嵌套量词
+_ITEMS_END_RE = re.compile(r'\n(?!- [^\n])')
+
+# 命中时说明某些列表项首尾带有多余的 `-`/空格（或整项为空），需要逐项处理：
+# 行首 `- ` 之后紧跟 `-`/空格，或换行之前是 `-`/空格。以换行开头，走字面量前缀的快速查找
+_ITEM_EDGE_RE = re.compile(r'\n(?:- [- ]|(?<=[- ]\n))')
+
+
+def _join_items(block: str, plain: bool) -> str:
+    """列表块（每行以 `- ` 开头）→ 各项去掉首尾的 `-`/空格、忽略空项后以“、”连接
+
+    plain 为真表示已确认各项首尾都没有多余的 `-`/空格，可整块一次替换。
+    """
+    body = block.rstrip('\n')
+    if plain:
+        return body[2:].replace('\n- ', '、')
+    lines = body.split('\n')
+    return '、'.join(filter(None, map(str.strip, lines, itertools.repeat('- ', len(lines)))))
+
+
+def _parse_features(features_text: str) -> list[Feature]:
+    """提取功能特性
+
+    逐块扫描：`### 图标 标题` 行之后紧跟的 `- ` 列表项构成一个功能块，遇到其它行即结束当前块。
+    标题行用 str.find 定位，列表项的结束位置用 _ITEMS_END_RE 一次找到，不逐行循环。
+    """
+    text = features_text
+    find = text.find
+    items_end_search = _ITEMS_END_RE.search
+    # 整段检查一次，不逐块检查；功能块都从换行之后开始，块首的项也被覆盖
+    plain = not (text.endswith((' ', '-')) or _ITEM_EDGE_RE.search(text))
+    features = []
+    # 标题行的起始偏移；首行前没有换行，单独判断
+    at_start = text.startswith('### ')
+    pos = 0 if at_start else find('\n### ') + 1
+    while pos or at_start:
+        at_start = False
+        title_end = find('\n', pos)
+        if title_end < 0:
+            break
+        m = items_end_search(text, title_end)
+        items_end = m.start() if m else len(text)
+        if items_end > title_end:
             # 提取图标和标题
-            icon_match = re.match(r'([^\s]+)\s+(.+)', title_line.strip())
-            if icon_match:
-                icon = icon_match.group(1)
-                title = icon_match.group(2)
+            parts = text[pos + 4:title_end].strip().split(None, 1)
+            if len(parts) == 2:
                 # 合并列表项为描述
-                items_list = [item.strip('- \n') for item in items.strip().split('\n') if item.strip()]
-                description = '、'.join(items_list)
-                result.features.append(Feature(icon=icon, title=title, description=description))
-    
-    # 提取快捷键
-    shortcuts_section = re.search(r'## ⌨️ 快捷键\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
-    if shortcuts_section:
-        shortcuts_text = shortcuts_section.group(1)
-        # 匹配表格行
-        shortcut_rows = re.findall(r'\|\s*`([^`]+)`\s*\|\s*([^|]+)\s*\|', shortcuts_text)
-        for key, action in shortcut_rows:
-            if key and action.strip():
-                result.shortcuts.append(Shortcut(key=key, action=action.strip()))
-    
-    # 提取快速开始
-    quick_start_section = re.search(r'## 🚀 快速开始\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
-    if quick_start_section:
-        quick_start_text = quick_start_section.group(1)
-        steps = re.findall(r'\d+\.\s+(.+)', quick_start_text)
-        result.quick_start = steps
-    
+                if plain:
+                    description = text[title_end + 3:items_end].replace('\n- ', '、')
+                else:
+                    description = _join_items(text[title_end + 1:items_end], False)
+                if description:
+                    # 按位置传参：每个功能块创建一次，关键字参数的开销在大 README 上可见
+                    features.append(Feature(parts[0], parts[1], description))
+        # 下一块从列表项之后（没有列表项时从标题的下一行）开始
+        pos = find('\n### ', items_end) + 1
+    return features
+
+
+def _parse_shortcuts(shortcuts_text: str) -> list[Shortcut]:
+    """提取快捷键（表格行）"""
+    shortcuts = []
+    shortcut_rows = re.findall(r'\|\s*`([^`]+)`\s*\|\s*([^|]+)\s*\|', shortcuts_text)
+    for key, action in shortcut_rows:
+        if key and action.strip():
+            shortcuts.append(Shortcut(key=key, action=action.strip()))
+    return shortcuts
+
+
+def _parse_quick_start(quick_start_text: str) -> list[str]:
+    """提取快速开始步骤（有序列表项）"""
+    steps = []
+    for line in quick_start_text.split('\n'):
+        m = _ORDERED_ITEM_RE.match(line)
+        if m:
+            steps.append(m.group(1))
+    return steps
+
+
+def _parse_config(config_text: str, result: ReadmeContent):
+    """提取配置信息"""
+    config_path_match = re.search(r'配置文件位置：`([^`]+)`', config_text)
+    if config_path_match:
+        result.config_path = config_path_match.group(1)
+    portable_match = re.search(r'支持便携模式：(.+?)(?:\n|$)', config_text)
+    if portable_match:
+        result.portable_mode = portable_match.group(1).strip()
+
+
+def _parse_subscription(sub_text: str, result: ReadmeContent):
+    """提取订阅信息"""
+    free_match = re.search(r'免费版[：:]\s*(.+?)(?:\n|$)', sub_text)
+    if free_match:
+        result.subscription_free = free_match.group(1).strip()
+    vip_match = re.search(r'终身 VIP[：:]\s*(.+?)(?:\n|$)', sub_text)
+    if vip_match:
+        result.subscription_vip = vip_match.group(1).strip()
+
+
+def parse_readme_text(content: str) -> ReadmeContent:
+    """解析 README 文本"""
+    result = ReadmeContent()
+    with build_trace.stage('parse.index'):
+        index = SectionIndex(content)
+
+    with build_trace.stage('parse.version'):
+        result.version = _parse_version(content)
+
+    with build_trace.stage('parse.features'):
+        features_text = index.body('✨ 功能特性')
+        if features_text is not None:
+            result.features = _parse_features(features_text)
+
+    with build_trace.stage('parse.shortcuts'):
+        shortcuts_text = index.body('⌨️ 快捷键')
+        if shortcuts_text is not None:
+            result.shortcuts = _parse_shortcuts(shortcuts_text)
+
+    with build_trace.stage('parse.quick_start'):
+        quick_start_text = index.body('🚀 快速开始')
+        if quick_start_text is not None:
+            result.quick_start = _parse_quick_start(quick_start_text)
+
     # 如果没有用户友好的步骤，使用默认步骤
     if not result.quick_start:
-        result.quick_start = [
-            "下载安装包（Windows: `.exe` / macOS: `.dmg`）",
-            "按照向导完成安装（macOS 拖入 Applications 即可）",
-            "默认热键 `Alt+X`（macOS: `Option+X`）开始截图",
-            "系统托盘会显示虎哥截图图标",
-        ]
-    
-    # 提取配置信息
-    config_section = re.search(r'## 🔧 配置\s*(.*?)(?=\n---|\n## )', content, re.DOTALL)
-    if config_section:
-        config_text = config_section.group(1)
-        config_path_match = re.search(r'配置文件位置：`([^`]+)`', config_text)
-        if config_path_match:
-            result.config_path = config_path_match.group(1)
-        portable_match = re.search(r'支持便携模式：(.+?)(?:\n|$)', config_text)
-        if portable_match:
-            result.portable_mode = portable_match.group(1).strip()
-    
-    # 提取订阅信息
-    subscription_section = re.search(r'### 👤 账户与订阅\s*(.*?)(?=\n---|\n## |\n###|$)', content, re.DOTALL)
-    if not subscription_section:
-        subscription_section = re.search(r'账户与订阅\s*(.*?)(?=\n---|\n## |$)', content, re.DOTALL)
-    if subscription_section:
-        sub_text = subscription_section.group(1)
-        free_match = re.search(r'免费版[：:]\s*(.+?)(?:\n|$)', sub_text)
-        if free_match:
-            result.subscription_free = free_match.group(1).strip()
-        vip_match = re.search(r'终身 VIP[：:]\s*(.+?)(?:\n|$)', sub_text)
-        if vip_match:
-            result.subscription_vip = vip_match.group(1).strip()
-    
+        result.quick_start = list(DEFAULT_QUICK_START)
+
+    with build_trace.stage('parse.config'):
+        config_text = index.body('🔧 配置')
+        if config_text is not None:
+            _parse_config(config_text, result)
+
+    with build_trace.stage('parse.subscription'):
+        sub_text = index.body('👤 账户与订阅')
+        if sub_text is None:
+            sub_text = index.body_after_text('账户与订阅')
+        if sub_text is not None:
+            _parse_subscription(sub_text, result)
+
     return result
 
 
+def parse_readme(readme_path: Path) -> ReadmeContent:
+    """解析 README.md 文件"""
+    return parse_readme_text(readme_path.read_text(encoding='utf-8'))
+
+
+@functools.lru_cache(maxsize=None)
 def get_svg_icon(emoji: str) -> str:
-    """根据 emoji 获取对应的 SVG 图标"""
+    """根据 emoji 获取对应的 SVG 图标（完整内联）"""
     icon_name = FEATURE_ICONS.get(emoji, "screenshot")
     svg_content = SVG_ICONS.get(icon_name, SVG_ICONS["screenshot"])
-    return f'''<svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">{svg_content}</svg>'''
+    return f'''<svg viewBox="0 0 24 24" {SVG_STROKE_ATTRS}>{svg_content}</svg>'''
+
+
+class SvgSprite:
+    """SVG 精灵图
+
+    收集页面实际用到的图标，只输出一份隐藏的 <symbol> 定义，
+    各处以 <use href="#..."> 引用；图形完全相同的图标共用一个 symbol。
+    描边样式由页面 CSS 的 svg 规则统一提供，symbol 上不再重复。
+    """
+
+    def __init__(self):
+        self._ids: dict[str, str] = {}  # 图形内容 → symbol id
+        self.uses = 0
+        # 逐处完整内联时的字节数，用于统计节省量
+        self.inline_bytes = 0
+        self.reference_bytes = 0
+
+    def use(self, icon_name: str) -> str:
+        """引用一个图标，返回 <svg><use/></svg> 片段"""
+        shapes = SVG_ICONS.get(icon_name, SVG_ICONS["screenshot"])
+        symbol_id = self._ids.get(shapes)
+        if symbol_id is None:
+            symbol_id = self._ids[shapes] = f'i-{icon_name}'
+        ref = f'<svg><use href="#{symbol_id}"/></svg>'
+        self.uses += 1
+        self.inline_bytes += len(f'<svg viewBox="0 0 24 24" {SVG_STROKE_ATTRS}>{shapes}</svg>'.encode('utf-8'))
+        self.reference_bytes += len(ref.encode('utf-8'))
+        return ref
+
+    def use_emoji(self, emoji: str) -> str:
+        """按 README 中的功能图标 emoji 引用图标"""
+        return self.use(FEATURE_ICONS.get(emoji, "screenshot"))
+
+    @property
+    def symbol_count(self) -> int:
+        return len(self._ids)
+
+    def render(self) -> str:
+        """输出隐藏的 symbol 定义"""
+        symbols = ''.join(
+            f'<symbol id="{symbol_id}" viewBox="0 0 24 24">{shapes}</symbol>'
+            for shapes, symbol_id in self._ids.items()
+        )
+        return f'<svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" style="display:none">{symbols}</svg>'
+
+    @property
+    def saved_bytes(self) -> int:
+        """相对逐处完整内联节省的字节数（已扣除 symbol 定义本身）"""
+        return self.inline_bytes - self.reference_bytes - len(self.render().encode('utf-8'))
 
 
+# 可能开始行内格式的字符
+_INLINE_SPECIAL_RE = re.compile(r'[`*\[]')
+
+
+class _MarkerFinder:
+    """带记忆的标记查找
+
+    记住每种标记最近一次查找的结果，查找位置单调前进时可直接复用。
+    同一标记的所有查找合计只扫描原文一遍，
+    大量未闭合的标记（如成千上万个 `**`）也不会退化为平方复杂度。
+    """
+
+    __slots__ = ('text', '_next')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._next: dict[str, int] = {}
+
+    def find(self, marker: str, start: int, end: int) -> int:
+        """查找 [start, end) 内第一个 marker，找不到返回 -1"""
+        pos = self._next.get(marker)
+        if pos is None or 0 <= pos < start:
+            pos = self.text.find(marker, start)
+            self._next[marker] = pos
+        if pos < 0 or pos + len(marker) > end:
+            return -1
+        return pos
+
+
+def _render_inline(text: str, start: int, end: int, finder: _MarkerFinder, out: list[str]):
+    """把 text[start:end] 的行内格式渲染进 out
+
+    每个位置最多被扫描常数次：成功匹配后直接跳过整个片段，
+    匹配失败只把当前标记当作普通字符。
+    """
+    plain = start
+    i = start
+    while i < end:
+        m = _INLINE_SPECIAL_RE.search(text, i, end)
+        if not m:
+            break
+        i = m.start()
+        ch = text[i]
+        if ch == '`':
+            # `代码`：内容原样输出
+            q = finder.find('`', i + 1, end)
+            if q > i + 1:
+                out.append(text[plain:i])
+                out.append(f'<code>{text[i + 1:q]}</code>')
+                i = plain = q + 1
+            else:
+                i += 1
+        elif ch == '[':
+            # [文字](链接)
+            q = finder.find(']', i + 1, end)
+            r = finder.find(')', q + 2, end) if q > i + 1 and text.startswith('(', q + 1) else -1
+            if r > q + 2:
+                href = text[q + 2:r].replace('"', '&quot;')
+                out.append(text[plain:i])
+                out.append(f'<a href="{href}">')
+                _render_inline(text, i + 1, q, finder, out)
+                out.append('</a>')
+                i = plain = r + 1
+            else:
+                i += 1
+        elif text.startswith('**', i):
+            # **粗体**
+            q = finder.find('**', i + 2, end)
+            if q > i + 2:
+                out.append(text[plain:i])
+                out.append('<strong>')
+                _render_inline(text, i + 2, q, finder, out)
+                out.append('</strong>')
+                i = plain = q + 2
+            else:
+                i += 2
+        else:
+            # *斜体*：闭合的 * 不能紧挨另一个 *
+            q = finder.find('*', i + 1, end)
+            if q > i + 1 and not text.startswith('*', q + 1):
+                out.append(text[plain:i])
+                out.append('<em>')
+                _render_inline(text, i + 1, q, finder, out)
+                out.append('</em>')
+                i = plain = q + 1
+            else:
+                i += 1
+    out.append(text[plain:end])
+
+
+@functools.lru_cache(maxsize=4096)
 def convert_markdown_inline(text: str) -> str:
     """将 Markdown 行内格式转换为 HTML
-    
-    支持: **粗体** → <strong>, `代码` → <code>
+
+    支持: **粗体** → <strong>, *斜体* → <em>, `代码` → <code>, [文字](链接) → <a>
+
+    手写的单遍扫描器，耗时与输入长度成线性关系；代码内的标记不再转换。
     """
-    # 先处理 **粗体**（必须在 `code` 之前，避免 code 内的 ** 被误转）
-    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
-    # 处理 `code` 标记
-    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
-    return text
+    if not _INLINE_SPECIAL_RE.search(text):
+        return text
+    out: list[str] = []
+    _render_inline(text, 0, len(text), _MarkerFinder(text), out)
+    return ''.join(out)
 
 
-def generate_feature_html(feature: Feature) -> str:
-    """生成单个功能特性的 HTML"""
-    svg = get_svg_icon(feature.icon)
+def generate_feature_html(feature: Feature, sprite: Optional[SvgSprite] = None) -> str:
+    """生成单个功能特性的 HTML；传入 sprite 时图标以 <use> 引用"""
+    svg = sprite.use_emoji(feature.icon) if sprite else get_svg_icon(feature.icon)
     # 处理描述中的 Markdown 行内格式
     description = convert_markdown_inline(feature.description)
     return f'''                <div class="feature-item">
@@ -216,451 +633,422 @@ def generate_step_html(index: int, step: str) -> str:
                 </div>'''
 
 
-def generate_guide_html(content: ReadmeContent) -> str:
-    """生成完整的 guide.html"""
+def generate_guide_html(content: ReadmeContent, template: Optional[Template] = None,
+                        sprite: Optional[SvgSprite] = None) -> str:
+    """生成完整的 guide.html
+
+    批量渲染时可传入已编译的 template，省去每次检查模板文件；
+    传入 sprite 可在生成后读取图标统计。
+    """
+    if sprite is None:
+        sprite = SvgSprite()
+
+    # 页面固定图标
+    icons = {f'icon_{name}': sprite.use(name) for name in PAGE_ICONS}
+
     # 生成功能特性 HTML
-    features_html = '\n'.join(generate_feature_html(f) for f in content.features)
+    with build_trace.stage('render.features', count=len(content.features)):
+        features_html = '\n'.join(generate_feature_html(f, sprite) for f in content.features)
     
     # 生成快捷键表格行
-    shortcuts_html = '\n'.join(generate_shortcut_row(s) for s in content.shortcuts)
+    with build_trace.stage('render.shortcuts', count=len(content.shortcuts)):
+        shortcuts_html = '\n'.join(generate_shortcut_row(s) for s in content.shortcuts)
     
     # 生成快速开始步骤
-    steps_html = '\n'.join(generate_step_html(i+1, s) for i, s in enumerate(content.quick_start))
+    with build_trace.stage('render.steps', count=len(content.quick_start)):
+        steps_html = '\n'.join(generate_step_html(i+1, s) for i, s in enumerate(content.quick_start))
     
-    return f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="虎哥截图使用说明 - 功能介绍、快捷键、配置指南">
-    <meta name="theme-color" content="#f8fafc">
-    <title>虎哥截图 - 使用说明</title>
-    <link rel="preconnect" href="https://fonts.loli.net" crossorigin>
-    <link href="https://fonts.loli.net/css2?family=Noto+Sans+SC:wght@400;500;600;700;800&display=swap" rel="stylesheet">
-    <style>
-        :root {{
-            --bg-body: #f8fafc;
-            --card-bg: rgba(255, 255, 255, 0.85);
-            --card-border: #e2e8f0;
-            --primary: #f59e0b;
-            --primary-dark: #d97706;
-            --text-main: #1e293b;
-            --text-muted: #64748b;
-        }}
-
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            -webkit-font-smoothing: antialiased;
-        }}
-
-        body {{
-            font-family: "Noto Sans SC", -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-            background-color: var(--bg-body);
-            color: var(--text-main);
-            line-height: 1.7;
-        }}
-
-        .container {{
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 40px 24px;
-        }}
-
-        @media (max-width: 640px) {{
-            .container {{ padding: 24px 16px; }}
-        }}
-
-        .back-link {{
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            color: var(--text-muted);
-            text-decoration: none;
-            font-size: 14px;
-            font-weight: 500;
-            margin-bottom: 32px;
-            transition: color 0.2s ease;
-            cursor: pointer;
-        }}
-
-        .back-link:hover {{ color: var(--text-main); }}
-
-        .back-link svg {{
-            width: 16px;
-            height: 16px;
-        }}
-
-        header {{
-            text-align: center;
-            margin-bottom: 48px;
-            animation: fadeIn 0.5s ease-out;
-        }}
-
-        .logo {{
-            width: 72px;
-            height: 72px;
-            background: linear-gradient(135deg, #fbbf24 0%, #f59e0b 100%);
-            border-radius: 18px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin: 0 auto 20px;
-            box-shadow: 0 8px 24px -4px rgba(245, 158, 11, 0.3);
-        }}
-
-        .logo svg {{
-            width: 36px;
-            height: 36px;
-            color: #fff;
-        }}
-
-        h1 {{
-            font-size: 32px;
-            font-weight: 800;
-            margin-bottom: 12px;
-            background: linear-gradient(135deg, #f59e0b, #d97706);
-            -webkit-background-clip: text;
-            background-clip: text;
-            -webkit-text-fill-color: transparent;
-        }}
-
-        .version {{
-            display: inline-block;
-            padding: 5px 14px;
-            background: rgba(245, 158, 11, 0.1);
-            color: var(--primary-dark);
-            border-radius: 20px;
-            font-size: 13px;
-            font-weight: 600;
-        }}
-
-        .section {{
-            background: var(--card-bg);
-            border: 1px solid var(--card-border);
-            border-radius: 16px;
-            padding: 24px;
-            margin-bottom: 20px;
-            animation: fadeInUp 0.5s ease-out backwards;
-        }}
-
-        .section:nth-child(2) {{ animation-delay: 0.05s; }}
-        .section:nth-child(3) {{ animation-delay: 0.1s; }}
-        .section:nth-child(4) {{ animation-delay: 0.15s; }}
-        .section:nth-child(5) {{ animation-delay: 0.2s; }}
-
-        h2 {{
-            font-size: 17px;
-            font-weight: 700;
-            margin-bottom: 18px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            color: var(--text-main);
-        }}
-
-        h2 svg {{
-            width: 20px;
-            height: 20px;
-            color: var(--primary);
-        }}
-
-        p, li {{
-            font-size: 14px;
-            color: var(--text-muted);
-        }}
-
-        ul {{
-            padding-left: 20px;
-            margin: 10px 0;
-        }}
-
-        li {{ margin: 8px 0; }}
-
-        .feature-grid {{
-            display: grid;
-            grid-template-columns: repeat(2, 1fr);
-            gap: 12px;
-        }}
-
-        @media (max-width: 600px) {{
-            .feature-grid {{ grid-template-columns: 1fr; }}
-        }}
-
-        .feature-item {{
-            padding: 14px;
-            background: rgba(0, 0, 0, 0.02);
-            border-radius: 12px;
-            transition: background 0.2s ease;
-        }}
-
-        .feature-item:hover {{
-            background: rgba(0, 0, 0, 0.04);
-        }}
-
-        .feature-item strong {{
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-size: 14px;
-            margin-bottom: 6px;
-            color: var(--text-main);
-        }}
-
-        .feature-item strong svg {{
-            width: 18px;
-            height: 18px;
-            color: var(--primary);
-            flex-shrink: 0;
-        }}
-
-        .feature-item span {{
-            font-size: 13px;
-            color: var(--text-muted);
-            display: block;
-            padding-left: 26px;
-        }}
-
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 14px;
-        }}
-
-        th, td {{
-            padding: 12px 14px;
-            text-align: left;
-            border-bottom: 1px solid var(--card-border);
-        }}
-
-        th {{
-            font-weight: 600;
-            color: var(--text-main);
-            background: rgba(0, 0, 0, 0.02);
-        }}
-
-        td {{ color: var(--text-muted); }}
-
-        code {{
-            background: rgba(0, 0, 0, 0.05);
-            padding: 3px 8px;
-            border-radius: 6px;
-            font-family: "SF Mono", "Cascadia Code", Consolas, monospace;
-            font-size: 13px;
-        }}
-
-        .tip {{
-            background: rgba(245, 158, 11, 0.08);
-            border-left: 3px solid var(--primary);
-            padding: 14px 18px;
-            border-radius: 0 10px 10px 0;
-            margin: 18px 0;
-        }}
-
-        .tip strong {{
-            color: var(--primary-dark);
-            display: flex;
-            align-items: center;
-            gap: 6px;
-            margin-bottom: 6px;
-            font-size: 14px;
-        }}
-
-        .tip strong svg {{
-            width: 16px;
-            height: 16px;
-        }}
-
-        .tip p {{
-            margin: 0;
-        }}
-
-        .steps {{
-            counter-reset: step;
-        }}
-
-        .step {{
-            display: flex;
-            gap: 14px;
-            margin: 14px 0;
-        }}
-
-        .step-num {{
-            width: 28px;
-            height: 28px;
-            background: linear-gradient(135deg, #f59e0b, #d97706);
-            color: white;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 13px;
-            font-weight: 600;
-            flex-shrink: 0;
-            box-shadow: 0 2px 8px rgba(245, 158, 11, 0.3);
-        }}
-
-        .step-content {{
-            flex: 1;
-            padding-top: 4px;
-            font-size: 14px;
-            color: var(--text-muted);
-        }}
-
-        footer {{
-            text-align: center;
-            padding: 32px 0;
-            font-size: 13px;
-            color: var(--text-muted);
-        }}
-
-        footer a {{
-            color: var(--primary);
-            text-decoration: none;
-            transition: color 0.2s ease;
-            cursor: pointer;
-        }}
-
-        footer a:hover {{
-            color: var(--primary-dark);
-        }}
-
-        @keyframes fadeIn {{
-            from {{ opacity: 0; }}
-            to {{ opacity: 1; }}
-        }}
-
-        @keyframes fadeInUp {{
-            from {{ opacity: 0; transform: translateY(12px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-
-        @media (prefers-reduced-motion: reduce) {{
-            *, *::before, *::after {{
-                animation-duration: 0.01ms !important;
-                transition-duration: 0.01ms !important;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <a href="index.html" class="back-link">
-            <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                <path d="m15 18-6-6 6-6"/>
-            </svg>
-            返回首页
-        </a>
-
-        <header>
-            <div class="logo">
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <path d="M14.5 4h-5L7 7H4a2 2 0 0 0-2 2v9a2 2 0 0 0 2 2h16a2 2 0 0 0 2-2V9a2 2 0 0 0-2-2h-3l-2.5-3z"/>
-                    <circle cx="12" cy="13" r="3"/>
-                </svg>
-            </div>
-            <h1>虎哥截图</h1>
-            <span class="version">v{content.version}</span>
-        </header>
-
-        <!-- 快速开始 -->
-        <div class="section">
-            <h2>
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <path d="M4.5 16.5c-1.5 1.26-2 5-2 5s3.74-.5 5-2c.71-.84.7-2.13-.09-2.91a2.18 2.18 0 0 0-2.91-.09z"/>
-                    <path d="m12 15-3-3a22 22 0 0 1 2-3.95A12.88 12.88 0 0 1 22 2c0 2.72-.78 7.5-6 11a22.35 22.35 0 0 1-4 2z"/>
-                    <path d="M9 12H4s.55-3.03 2-4c1.62-1.08 5 0 5 0"/>
-                    <path d="M12 15v5s3.03-.55 4-2c1.08-1.62 0-5 0-5"/>
-                </svg>
-                快速开始
-            </h2>
-            <div class="steps">
-{steps_html}
-            </div>
-            <div class="tip">
-                <strong>
-                    <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                        <path d="m21.73 18-8-14a2 2 0 0 0-3.48 0l-8 14A2 2 0 0 0 4 21h16a2 2 0 0 0 1.73-3Z"/>
-                        <line x1="12" y1="9" x2="12" y2="13"/>
-                        <line x1="12" y1="17" x2="12.01" y2="17"/>
-                    </svg>
-                    重要提示
-                </strong>
-                <p>安装版会自动处理更新，无需手动操作。</p>
-            </div>
-        </div>
-
-        <!-- 功能特性 -->
-        <div class="section">
-            <h2>
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <polygon points="12 2 15.09 8.26 22 9.27 17 14.14 18.18 21.02 12 17.77 5.82 21.02 7 14.14 2 9.27 8.91 8.26 12 2"/>
-                </svg>
-                功能特性
-            </h2>
-            <div class="feature-grid">
-{features_html}
-            </div>
-        </div>
-
-        <!-- 快捷键 -->
-        <div class="section">
-            <h2>
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <rect x="2" y="4" width="20" height="16" rx="2" ry="2"/>
-                    <path d="M6 8h.001"/>
-                    <path d="M10 8h.001"/>
-                    <path d="M14 8h.001"/>
-                    <path d="M18 8h.001"/>
-                    <path d="M8 12h.001"/>
-                    <path d="M12 12h.001"/>
-                    <path d="M16 12h.001"/>
-                    <path d="M7 16h10"/>
-                </svg>
-                快捷键
-            </h2>
-            <table>
-                <tr><th>快捷键</th><th>功能</th></tr>
-{shortcuts_html}
-            </table>
-        </div>
-
-        <!-- 配置 -->
-        <div class="section">
-            <h2>
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <circle cx="12" cy="12" r="3"/>
-                    <path d="M19.4 15a1.65 1.65 0 0 0 .33 1.82l.06.06a2 2 0 0 1 0 2.83 2 2 0 0 1-2.83 0l-.06-.06a1.65 1.65 0 0 0-1.82-.33 1.65 1.65 0 0 0-1 1.51V21a2 2 0 0 1-2 2 2 2 0 0 1-2-2v-.09A1.65 1.65 0 0 0 9 19.4a1.65 1.65 0 0 0-1.82.33l-.06.06a2 2 0 0 1-2.83 0 2 2 0 0 1 0-2.83l.06-.06a1.65 1.65 0 0 0 .33-1.82 1.65 1.65 0 0 0-1.51-1H3a2 2 0 0 1-2-2 2 2 0 0 1 2-2h.09A1.65 1.65 0 0 0 4.6 9a1.65 1.65 0 0 0-.33-1.82l-.06-.06a2 2 0 0 1 0-2.83 2 2 0 0 1 2.83 0l.06.06a1.65 1.65 0 0 0 1.82.33H9a1.65 1.65 0 0 0 1-1.51V3a2 2 0 0 1 2-2 2 2 0 0 1 2 2v.09a1.65 1.65 0 0 0 1 1.51 1.65 1.65 0 0 0 1.82-.33l.06-.06a2 2 0 0 1 2.83 0 2 2 0 0 1 0 2.83l-.06.06a1.65 1.65 0 0 0-.33 1.82V9a1.65 1.65 0 0 0 1.51 1H21a2 2 0 0 1 2 2 2 2 0 0 1-2 2h-.09a1.65 1.65 0 0 0-1.51 1z"/>
-                </svg>
-                配置
-            </h2>
-            <p>配置文件位置：<code>{content.config_path}</code></p>
-            <p style="margin-top: 10px;">支持便携模式：将 <code>config.json</code> 放在程序同目录下即可。</p>
-        </div>
-
-        <!-- 订阅说明 -->
-        <div class="section">
-            <h2>
-                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/>
-                    <circle cx="12" cy="7" r="4"/>
-                </svg>
-                账户与订阅
-            </h2>
-            <ul>
-                <li><strong>免费版</strong>：{content.subscription_free}</li>
-                <li><strong>终身 VIP</strong>：{content.subscription_vip}</li>
-            </ul>
-        </div>
-
-        <footer>
-            <p>© 2024-2026 虎哥飞行空间 · <a href="index.html">返回首页</a></p>
-        </footer>
-    </div>
-</body>
-</html>
-'''
+    with build_trace.stage('render.template'):
+        if template is None:
+            template = load_template(GUIDE_TEMPLATE)
+        return template.render(
+            svg_sprite=sprite.render(),
+            **icons,
+            version=content.version,
+            steps_html=steps_html,
+            features_html=features_html,
+            shortcuts_html=shortcuts_html,
+            config_path=content.config_path,
+            subscription_free=content.subscription_free,
+            subscription_vip=content.subscription_vip,
+        )
+
+
+def content_from_dict(data: dict) -> ReadmeContent:
+    """从 asdict() 的结果还原 ReadmeContent（用于构建缓存）"""
+    data = dict(data)
+    data['features'] = [Feature(**f) for f in data.get('features', [])]
+    data['shortcuts'] = [Shortcut(**s) for s in data.get('shortcuts', [])]
+    return ReadmeContent(**data)
+
+
+def generator_fingerprint() -> str:
+    """生成器脚本、压缩器、模板编译器与页面模板的指纹，任一改动后渲染缓存随之失效"""
+    script_dir = Path(__file__).parent
+    return hash_key(sha256_bytes(Path(__file__).read_bytes()),
+                    sha256_bytes((script_dir / 'html_minify.py').read_bytes()),
+                    sha256_bytes((script_dir / 'page_template.py').read_bytes()),
+                    sha256_bytes(GUIDE_TEMPLATE.read_bytes()))
+
+
+@dataclass
+class BuildResult:
+    """单个 guide 页面的生成结果"""
+    status: str  # 'skipped' | 'unchanged' | 'written'
+    content: ReadmeContent
+    stats: dict = field(default_factory=dict)
+
+
+@dataclass
+class GuideJob:
+    """一个 README → guide 的生成任务（缓存检查之后的状态）"""
+    readme_path: Path
+    guide_path: Path
+    cache_key: str
+    readme_bytes: bytes = b''
+    readme_hash: str = ''
+    render_key: str = ''
+    # README 未变时可复用的解析结果（asdict 形式）
+    cached_content: Optional[dict] = None
+    minify: bool = True
+
+
+def plan_guide(readme_path: Path, guide_path: Path, cache: Optional[BuildCache] = None,
+               cache_key: Optional[str] = None, minify: bool = True) -> tuple[GuideJob, Optional[BuildResult]]:
+    """检查构建缓存；输入与输出均未变化时返回 'skipped' 结果，否则只返回待执行的任务"""
+    with build_trace.stage('read', path=str(readme_path)):
+        readme_bytes = readme_path.read_bytes()
+    job = GuideJob(readme_path, guide_path, cache_key or str(guide_path), readme_bytes,
+                   readme_hash=sha256_bytes(readme_bytes), minify=minify)
+    job.render_key = hash_key(job.readme_hash, generator_fingerprint(), str(guide_path), minify)
+    entry = cache.get('guide', job.cache_key) if cache else None
+
+    if entry and entry.get('render_key') == job.render_key and guide_path.exists():
+        with build_trace.stage('cache.check'):
+            up_to_date = sha256_file(guide_path) == entry.get('output_hash')
+        if up_to_date:
+            return job, BuildResult('skipped', content_from_dict(entry['content']), entry.get('stats', {}))
+
+    if entry and entry.get('readme_hash') == job.readme_hash and entry.get('parser_version') == PARSER_VERSION:
+        job.cached_content = entry['content']
+    return job, None
+
+
+def render_guide(readme_bytes: bytes, cached_content: Optional[dict] = None,
+                 minify: bool = True) -> tuple[bytes, dict, dict]:
+    """解析（或复用解析结果）并渲染，返回 (HTML 字节, 解析结果, 统计)
+
+    只处理数据、不读写文件，可在进程池中执行；结果均为可 pickle 的基本类型。
+    """
+    if cached_content is not None:
+        content = content_from_dict(cached_content)
+    else:
+        with build_trace.stage('parse'):
+            content = parse_readme_text(readme_bytes.decode('utf-8'))
+
+    sprite = SvgSprite()
+    with build_trace.stage('render'):
+        html = generate_guide_html(content, sprite=sprite)
+    stats = {
+        'svg_symbols': sprite.symbol_count,
+        'svg_uses': sprite.uses,
+        'svg_saved_bytes': sprite.saved_bytes,
+    }
+    if minify:
+        with build_trace.stage('minify'):
+            html, minify_stats = minify_html(html)
+        stats['unminified_bytes'] = minify_stats.original_bytes
+        stats['css_removed_selectors'] = len(minify_stats.removed_selectors)
+    html_bytes = html.encode('utf-8')
+    stats['html_bytes'] = len(html_bytes)
+    return html_bytes, asdict(content), stats
+
+
+def finish_guide(job: GuideJob, html_bytes: bytes, content: dict, stats: dict,
+                 cache: Optional[BuildCache] = None) -> BuildResult:
+    """写出页面（内容不同才改写）并更新构建缓存"""
+    with build_trace.stage('write', path=str(job.guide_path)):
+        written = write_if_changed(job.guide_path, html_bytes)
+    if cache is not None:
+        cache.set('guide', job.cache_key, {
+            'readme_hash': job.readme_hash,
+            'parser_version': PARSER_VERSION,
+            'content': content,
+            'render_key': job.render_key,
+            'output_hash': sha256_bytes(html_bytes),
+            'stats': stats,
+        })
+    return BuildResult('written' if written else 'unchanged', content_from_dict(content), stats)
+
+
+def build_guide(readme_path: Path, guide_path: Path, cache: Optional[BuildCache] = None,
+                cache_key: Optional[str] = None, minify: bool = True) -> BuildResult:
+    """生成单个 guide 页面
+
+    状态为 'skipped'（README、生成器与输出均未变化）、'unchanged'（重新渲染但内容相同）
+    或 'written'。传入 cache 时：
+    - README 与 PARSER_VERSION 未变 → 复用缓存的解析结果
+    - 渲染键与输出文件哈希都一致 → 直接跳过
+    """
+    job, skipped = plan_guide(readme_path, guide_path, cache, cache_key, minify)
+    if skipped:
+        return skipped
+    html_bytes, content, stats = render_guide(job.readme_bytes, job.cached_content, minify)
+    return finish_guide(job, html_bytes, content, stats, cache)
+
+
+class IncrementalGuide:
+    """增量生成器（--watch 使用）
+
+    常驻内存，按段落正文缓存解析结果与渲染好的 HTML 片段：
+    每次保存后只重新解析、渲染正文发生变化的段落，其余段落直接复用。
+    输出与 generate_guide_html(parse_readme_text(text)) 逐字节一致。
+    """
+
+    def __init__(self, template: Optional[Template] = None):
+        self.template = template
+        # 段落名 → (正文, 解析与渲染结果)
+        self._parts: dict[str, tuple[Optional[str], tuple]] = {}
+
+    def _section(self, name: str, source: Optional[str], build, changed: list[str]) -> tuple:
+        """正文与上次相同时复用结果，否则重新构建并记入 changed"""
+        cached = self._parts.get(name)
+        if cached is not None and cached[0] == source:
+            return cached[1]
+        value = build(source)
+        self._parts[name] = (source, value)
+        changed.append(name)
+        return value
+
+    @staticmethod
+    def _page_sprite() -> tuple[SvgSprite, dict[str, str]]:
+        """新建精灵图并先引用页面固定图标（与 generate_guide_html 的引用顺序一致）"""
+        sprite = SvgSprite()
+        return sprite, {f'icon_{name}': sprite.use(name) for name in PAGE_ICONS}
+
+    @classmethod
+    def _build_features(cls, text: Optional[str]) -> tuple:
+        features = _parse_features(text) if text is not None else []
+        # 片段中的 symbol id 只取决于之前引用过的图标，用同样顺序的临时精灵图生成即可
+        sprite, _ = cls._page_sprite()
+        html = '\n'.join(generate_feature_html(f, sprite) for f in features)
+        return features, html
+
+    @staticmethod
+    def _build_shortcuts(text: Optional[str]) -> tuple:
+        shortcuts = _parse_shortcuts(text) if text is not None else []
+        return shortcuts, '\n'.join(generate_shortcut_row(s) for s in shortcuts)
+
+    @staticmethod
+    def _build_steps(text: Optional[str]) -> tuple:
+        steps = _parse_quick_start(text) if text is not None else []
+        if not steps:
+            steps = list(DEFAULT_QUICK_START)
+        return steps, '\n'.join(generate_step_html(i+1, s) for i, s in enumerate(steps))
+
+    @staticmethod
+    def _build_config(text: Optional[str]) -> tuple:
+        result = ReadmeContent()
+        if text is not None:
+            _parse_config(text, result)
+        return result.config_path, result.portable_mode
+
+    @staticmethod
+    def _build_subscription(text: Optional[str]) -> tuple:
+        result = ReadmeContent()
+        if text is not None:
+            _parse_subscription(text, result)
+        return result.subscription_free, result.subscription_vip
+
+    def build(self, text: str) -> tuple[str, ReadmeContent, list[str]]:
+        """生成页面，返回 (HTML, 解析结果, 本次重新处理的段落名)"""
+        changed: list[str] = []
+        index = SectionIndex(text)
+        content = ReadmeContent(version=_parse_version(text))
+
+        content.features, features_html = self._section(
+            'features', index.body('✨ 功能特性'), self._build_features, changed)
+        content.shortcuts, shortcuts_html = self._section(
+            'shortcuts', index.body('⌨️ 快捷键'), self._build_shortcuts, changed)
+        content.quick_start, steps_html = self._section(
+            'quick_start', index.body('🚀 快速开始'), self._build_steps, changed)
+        content.config_path, content.portable_mode = self._section(
+            'config', index.body('🔧 配置'), self._build_config, changed)
+        sub_text = index.body('👤 账户与订阅')
+        if sub_text is None:
+            sub_text = index.body_after_text('账户与订阅')
+        content.subscription_free, content.subscription_vip = self._section(
+            'subscription', sub_text, self._build_subscription, changed)
+
+        # 复用的功能片段不经过本次的精灵图，按原顺序补记引用以生成相同的 symbol 定义
+        sprite, icons = self._page_sprite()
+        for feature in content.features:
+            sprite.use_emoji(feature.icon)
+
+        # 模板文件改动后 load_template 会重新编译
+        template = self.template or load_template(GUIDE_TEMPLATE)
+        html = template.render(
+            svg_sprite=sprite.render(),
+            **icons,
+            version=content.version,
+            steps_html=steps_html,
+            features_html=features_html,
+            shortcuts_html=shortcuts_html,
+            config_path=content.config_path,
+            subscription_free=content.subscription_free,
+            subscription_vip=content.subscription_vip,
+        )
+        return html, content, changed
+
+
+def watch_guide(readme_path: Path, guide_path: Path, debounce: float = 0.02,
+                force_polling: bool = False, minify: bool = False) -> int:
+    """监听 README，保存后增量重新生成 guide.html，直到 Ctrl+C"""
+    from file_watch import FileWatcher
+
+    builder = IncrementalGuide()
+
+    def rebuild(first_event_at: float):
+        start = time.perf_counter()
+        try:
+            text = readme_path.read_text(encoding='utf-8')
+            html, content, changed = builder.build(text)
+            if minify:
+                html, _ = minify_html(html)
+            written = write_if_changed(guide_path, html.encode('utf-8'))
+        except (OSError, UnicodeDecodeError) as e:
+            # 编辑器保存过程中文件可能短暂缺失或不完整，等下一次事件
+            print(f"⚠️ 读取失败，等待下一次保存: {e}")
+            return
+        done = time.perf_counter()
+        sections = '、'.join(changed) if changed else '无段落变化'
+        note = '' if written else '（内容未变化，未改写文件）'
+        print(f"🔄 {time.strftime('%H:%M:%S')} v{content.version} 重新生成: {sections}  "
+              f"生成 {(done - start) * 1000:.1f} ms，距察觉保存 {(done - first_event_at) * 1000:.1f} ms{note}")
+
+    rebuild(time.perf_counter())
+    with FileWatcher([readme_path], debounce=debounce, force_polling=force_polling) as watcher:
+        backend = watcher.backend
+        if watcher.fallback_reason:
+            backend += f'，inotify 不可用: {watcher.fallback_reason}'
+        print(f"👀 正在监听 {readme_path}（{backend}，防抖 {debounce * 1000:.0f} ms），Ctrl+C 退出")
+        try:
+            for first_event_at in watcher.changes():
+                rebuild(first_event_at)
+        except KeyboardInterrupt:
+            print("👋 已停止监听")
+    return 0
+
+
+def load_batch_pairs(repo_root: Path, manifest: Optional[str] = None, pattern: Optional[str] = None,
+                     out_template: str = 'website/guide-{stem}.html') -> list[tuple[Path, Path]]:
+    """读取批量任务列表
+
+    - manifest：JSON 文件，内容为 [{"readme": "...", "guide": "..."}, ...]，路径相对仓库根目录
+    - pattern：README 的 glob 模式，输出路径由 out_template 生成（{stem} 为 README 文件名去掉扩展名）
+    """
+    pairs = []
+    if manifest:
+        entries = json.loads((repo_root / manifest).read_text(encoding='utf-8'))
+        for entry in entries:
+            pairs.append((repo_root / entry['readme'], repo_root / entry['guide']))
+    if pattern:
+        for readme_path in sorted(repo_root.glob(pattern)):
+            pairs.append((readme_path, repo_root / out_template.format(stem=readme_path.stem)))
+    return pairs
+
+
+def _render_timed(readme_bytes: bytes, cached_content: Optional[dict] = None,
+                  minify: bool = True) -> tuple[bytes, dict, dict, float]:
+    """render_guide 并附上在执行进程内测得的耗时（不含排队与进程启动）"""
+    start = time.perf_counter()
+    html_bytes, content, stats = render_guide(readme_bytes, cached_content, minify)
+    return html_bytes, content, stats, time.perf_counter() - start
+
+
+def _pool_startup_seconds() -> float:
+    """进程池的启动开销估计：fork 约 30 ms；spawn（Windows / macOS）每个子进程要重新导入本模块，约 0.3 s"""
+    import multiprocessing
+    return POOL_STARTUP_SECONDS.get(multiprocessing.get_start_method(), POOL_STARTUP_SECONDS['spawn'])
+
+
+def build_batch(pairs: list[tuple[Path, Path]], cache: Optional[BuildCache] = None,
+                jobs: Optional[int] = None, minify: bool = True) -> list[tuple[GuideJob, BuildResult, float]]:
+    """批量生成：在进程池中解析和渲染，按完成顺序写出并打印每个文件的渲染耗时
+
+    返回 [(任务, 结果, 渲染耗时秒), ...]，顺序与完成顺序一致；渲染耗时在执行渲染的进程内测量，
+    跳过的任务为检查缓存的耗时。总吞吐按墙钟时间由调用方计算。
+
+    进程池只在能抵消启动开销时使用：并行进程数不超过 CPU 核数；先在本进程渲染第一个任务，
+    按实测吞吐估计剩余工作量，并行节省的时间不超过进程池启动开销（POOL_STARTUP_SECONDS）时
+    其余任务也在本进程顺序渲染。单核机器、少量小 README 时都不会启动进程池。
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = []
+    pending = []
+    for readme_path, guide_path in pairs:
+        start = time.perf_counter()
+        job, skipped = plan_guide(readme_path, guide_path, cache, minify=minify)
+        if skipped:
+            results.append((job, skipped, time.perf_counter() - start))
+            _print_batch_line(job, skipped, time.perf_counter() - start)
+        else:
+            pending.append(job)
+
+    def finish(job: GuideJob, html_bytes: bytes, content: dict, stats: dict, seconds: float):
+        result = finish_guide(job, html_bytes, content, stats, cache)
+        results.append((job, result, seconds))
+        _print_batch_line(job, result, seconds)
+
+    cpus = os.cpu_count() or 1
+    workers = min(jobs or cpus, cpus, len(pending))
+    if workers > 1:
+        first = pending.pop(0)
+        rendered = _render_timed(first.readme_bytes, first.cached_content, minify)
+        finish(first, *rendered)
+        # 按第一个任务的每字节耗时估计其余任务（小 README 的固定开销占比更高，估计偏低，倾向于不开进程池）
+        estimate = rendered[3] / max(len(first.readme_bytes), 1) * sum(len(job.readme_bytes) for job in pending)
+        startup = _pool_startup_seconds()
+        if estimate * (1 - 1 / workers) <= startup:
+            print(f"   ℹ️ 剩余 {len(pending)} 个预计渲染 {estimate * 1000:.0f} ms，"
+                  f"并行节省不足以抵消进程池启动（约 {startup * 1000:.0f} ms），在本进程内渲染")
+            workers = 1
+
+    if workers <= 1:
+        for job in pending:
+            finish(job, *_render_timed(job.readme_bytes, job.cached_content, minify))
+        return results
+
+    # 子进程不继承追踪（fork 时会带上 tracemalloc，拖慢渲染）
+    with ProcessPoolExecutor(max_workers=workers, initializer=build_trace.disable) as pool:
+        started = {}
+        futures = {}
+        for job in pending:
+            future = pool.submit(_render_timed, job.readme_bytes, job.cached_content, minify)
+            futures[future] = job
+            started[future] = time.perf_counter()
+        tracer = build_trace.active()
+        for future in as_completed(futures):
+            job = futures[future]
+            html_bytes, content, stats, seconds = future.result()
+            if tracer:
+                # 子进程内的阶段无法回传，这里记录每个任务从提交到完成的区间（含排队）与子进程内的渲染耗时
+                tracer.add_event('batch.render', started[future], time.perf_counter(),
+                                 tid=len(results) + 1, readme=str(job.readme_path), render_ms=round(seconds * 1000, 1))
+            finish(job, html_bytes, content, stats, seconds)
+    return results
+
+
+def _print_batch_line(job: GuideJob, result: BuildResult, seconds: float):
+    """打印单个批量任务的结果；渲染过的任务附带渲染耗时与吞吐"""
+    icon = {'skipped': '⏭️', 'unchanged': '✅', 'written': '✅'}[result.status]
+    if result.status == 'skipped':
+        timing = f"检查 {seconds * 1000:.1f} ms"
+    else:
+        mb = len(job.readme_bytes) / 1024 / 1024
+        timing = f"渲染 {seconds * 1000:.1f} ms  {mb / max(seconds, 1e-9):.2f} MB/s"
+    print(f"   {icon} {job.readme_path.name} → {job.guide_path.name}  {timing}  ({result.status})")
 
 
 def main():
@@ -668,37 +1056,100 @@ def main():
     parser = argparse.ArgumentParser(description='将 README.md 转换为 guide.html')
     parser.add_argument('--readme', default='README.md', help='README.md 路径')
     parser.add_argument('--guide', default='website/guide.html', help='guide.html 输出路径')
+    parser.add_argument('--no-cache', action='store_true', help='忽略构建缓存，强制重新解析和生成')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/readme_to_guide.json', help='构建缓存文件路径')
+    parser.add_argument('--batch', help='批量模式：JSON 任务清单 [{"readme": ..., "guide": ...}, ...]')
+    parser.add_argument('--batch-glob', help='批量模式：README 的 glob 模式（相对仓库根目录）')
+    parser.add_argument('--out-template', default='website/guide-{stem}.html',
+                        help='--batch-glob 的输出路径模板，{stem} 为 README 文件名去掉扩展名')
+    parser.add_argument('--jobs', type=int, default=None, help='批量模式的并行进程数（默认且最多为 CPU 核数；工作量抵不过进程池启动开销时在本进程内渲染）')
+    parser.add_argument('--minify', action=argparse.BooleanOptionalAction, default=None,
+                        help='压缩输出并剔除无用 CSS（默认开启，--watch 时默认关闭）')
+    parser.add_argument('--watch', action='store_true', help='监听 README，保存后增量重新生成')
+    parser.add_argument('--debounce', type=float, default=20, help='--watch 的防抖静默期（毫秒）')
+    parser.add_argument('--poll', action='store_true', help='--watch 强制使用轮询（不用 inotify）')
+    parser.add_argument('--timings', action='store_true', help='打印各阶段耗时与内存分配')
+    parser.add_argument('--trace', help='把各阶段耗时写成 Chrome trace-event JSON')
+    parser.add_argument('--profile', help='用 cProfile 分析整个运行过程，统计结果写入该文件')
     args = parser.parse_args()
-    
+    if args.minify is None:
+        args.minify = not args.watch
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        exit_code = profiler.runcall(_run, args)
+        profiler.dump_stats(args.profile)
+        print(f"📊 cProfile 统计已写入: {args.profile}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+        return exit_code
+    return _run(args)
+
+
+def _run(args) -> int:
+    """按命令行参数执行一次生成（单个或批量），按需开启阶段追踪"""
+    tracer = build_trace.enable(track_memory=True) if (args.timings or args.trace) else None
+    try:
+        exit_code = _generate(args)
+    finally:
+        build_trace.disable()
+    if tracer:
+        if args.timings:
+            tracer.print_summary()
+        if args.trace:
+            tracer.write_chrome_trace(Path(args.trace))
+            print(f"📈 追踪文件已写入: {args.trace}（可用 chrome://tracing 或 Perfetto 打开）")
+    return exit_code
+
+
+def _generate(args) -> int:
+    """生成 guide 页面"""
     # 确定脚本所在目录
     script_dir = Path(__file__).parent
     repo_root = script_dir.parent
     
+    if args.batch or args.batch_glob:
+        return run_batch(args, repo_root)
+
     readme_path = repo_root / args.readme
     guide_path = repo_root / args.guide
     
     if not readme_path.exists():
         print(f"❌ 找不到 README: {readme_path}")
         return 1
+
+    if args.watch:
+        return watch_guide(readme_path, guide_path, args.debounce / 1000, args.poll, args.minify)
     
     try:
-        # 解析 README
+        cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+
+        # 解析 README 并生成 HTML（输入未变化时直接跳过）
         print(f"📖 解析 {readme_path.name}...")
-        content = parse_readme(readme_path)
+        result = build_guide(readme_path, guide_path, cache, minify=args.minify)
+        content, status, stats = result.content, result.status, result.stats
         print(f"   版本号: v{content.version}")
         print(f"   功能特性: {len(content.features)} 个")
         print(f"   快捷键: {len(content.shortcuts)} 个")
         print(f"   快速开始: {len(content.quick_start)} 步")
-        
-        # 生成 HTML
-        print(f"🔨 生成 {guide_path.name}...")
-        html = generate_guide_html(content)
-        
-        # 写入文件
-        guide_path.parent.mkdir(parents=True, exist_ok=True)
-        guide_path.write_text(html, encoding='utf-8')
-        
-        print(f"✅ 转换完成: {guide_path}")
+        if cache is not None:
+            cache.save()
+        if stats.get('unminified_bytes'):
+            print(f"   页面大小: {stats['unminified_bytes']:,} → {stats['html_bytes']:,} 字节（压缩，"
+                  f"剔除 {stats['css_removed_selectors']} 个无用 CSS 选择器）")
+        elif stats:
+            print(f"   页面大小: {stats['html_bytes']:,} 字节")
+        if stats:
+            print(f"   SVG 图标: {stats['svg_uses']} 处引用 / {stats['svg_symbols']} 个 symbol，"
+                  f"比逐处内联节省 {stats['svg_saved_bytes']:,} 字节")
+
+        if status == 'skipped':
+            print(f"⏭️ 无变化，跳过生成: {guide_path}")
+        elif status == 'unchanged':
+            print(f"✅ 转换完成（内容未变化，未改写文件）: {guide_path}")
+        else:
+            print(f"✅ 转换完成: {guide_path}")
         return 0
         
     except Exception as e:
@@ -708,5 +1159,45 @@ def main():
         return 1
 
 
+def run_batch(args, repo_root: Path) -> int:
+    """批量模式入口"""
+    try:
+        pairs = load_batch_pairs(repo_root, args.batch, args.batch_glob, args.out_template)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ 读取批量任务失败: {e}")
+        return 1
+    missing = [readme for readme, _ in pairs if not readme.exists()]
+    if missing:
+        for readme in missing:
+            print(f"❌ 找不到 README: {readme}")
+        return 1
+    if not pairs:
+        print("⚠️ 没有匹配的 README")
+        return 0
+
+    cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+    print(f"📚 批量生成 {len(pairs)} 个 guide...")
+    start = time.perf_counter()
+    try:
+        results = build_batch(pairs, cache, args.jobs, args.minify)
+    except Exception as e:
+        print(f"❌ 错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        cache.save()
+
+    total_mb = sum(len(job.readme_bytes) for job, _, _ in results) / 1024 / 1024
+    written = sum(1 for _, result, _ in results if result.status == 'written')
+    skipped = sum(1 for _, result, _ in results if result.status == 'skipped')
+    render = sum(seconds for _, result, seconds in results if result.status != 'skipped')
+    print(f"✅ 完成 {len(results)} 个（写入 {written}，跳过 {skipped}），"
+          f"墙钟 {elapsed * 1000:.0f} ms，{len(results) / elapsed:.1f} 个/秒，{total_mb / elapsed:.2f} MB/s"
+          f"（各文件渲染耗时合计 {render * 1000:.0f} ms）")
+    return 0
+
+
 if __name__ == '__main__':
     exit(main())
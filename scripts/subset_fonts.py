@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+按页面子集化 Noto Sans SC，自托管字体
+
+website/index.html 与 guide.html 通过 fonts.loli.net 加载 Noto Sans SC（400–800 五个字重），
+这是阻塞渲染的第三方样式表，完整的中文字体每个字重都有数 MB。本阶段：
+- 收集每个页面实际用到的字符（文本、属性值、内联脚本中的字符串，另加 ASCII 与常用中文标点）
+- 从页面 CSS 中找出用到的字重（与原链接请求的字重取交集）
+- 用本地提供的字体文件（可变字体 NotoSansSC[wght].ttf，或各字重的静态 NotoSansSC-*.otf/ttf）
+  为每个字重生成只含这些字符的子集，输出 fonts/NotoSansSC-<字重>.<哈希>.woff2
+  （未安装 brotli 时输出 woff）
+- 把 <link> 与对应的 preconnect 替换为本地 @font-face（font-display: swap），并 preload 正文字重
+- 报告每个页面的字体字节数与相对完整字体文件节省的字节数
+
+子集化依赖 fontTools（pip install fonttools brotli）；未安装或找不到字体文件时保持原链接不变并给出提示。
+子集按（字体文件哈希、字重、字符集）缓存，页面文字不变时重复构建不再子集化。
+
+同一页面的各字重使用同一字符集（不按 CSS 层叠计算每个字重实际覆盖的文字）。
+
+使用方法：
+    python scripts/build_site.py --font-dir resources/fonts        # 作为构建阶段运行
+    python scripts/subset_fonts.py website/index.html --font-dir resources/fonts   # 只报告子集大小
+"""
+
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+
+from build_cache import BlobStore, BuildCache, hash_key, sha256_bytes, sha256_file
+
+try:
+    import fontTools
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    fontTools = None
+
+try:
+    import brotli  # noqa: F401  fontTools 写 woff2 需要
+    DEFAULT_FLAVOR = 'woff2'
+except ImportError:
+    DEFAULT_FLAVOR = 'woff'
+
+
+# 算法或参数改动时递增，使旧缓存失效
+SUBSETTER_VERSION = 2
+
+FAMILY = 'Noto Sans SC'
+
+FILE_PREFIX = 'NotoSansSC'
+
+DEFAULT_FONT_DIR = 'resources/fonts'
+
+FONT_EXTENSIONS = ('.ttf', '.otf')
+
+# 输出目录（相对网站根目录）
+OUTPUT_DIR = 'fonts'
+
+# 正文字重，preload 这一个
+BODY_WEIGHT = 400
+
+# 即使页面中没有出现也保留的字符：ASCII 可打印字符与常用中文标点（脚本动态插入的文字多半用到）
+ALWAYS_INCLUDE = ''.join(chr(c) for c in range(0x20, 0x7F)) + '，。、；：？！“”‘’（）《》【】…—·￥'
+
+_FONT_LINK_RE = re.compile(
+    r'[ \t]*<link\b[^>]*href="(https://fonts\.[^"]+/css2\?family=Noto\+Sans\+SC[^"]*)"[^>]*>[ \t]*\n?', re.IGNORECASE)
+_PRECONNECT_RE = re.compile(r'[ \t]*<link\b[^>]*rel="preconnect"[^>]*href="https://fonts\.[^"]+"[^>]*>[ \t]*\n?',
+                            re.IGNORECASE)
+_WEIGHTS_RE = re.compile(r'wght@([\d;.]+)')
+_FONT_WEIGHT_RE = re.compile(r'font-weight\s*:\s*([a-z]+|\d{3})', re.IGNORECASE)
+_CSS_CONTENT_RE = re.compile(r'''content\s*:\s*(?:"([^"]*)"|'([^']*)')''')
+_WEIGHT_KEYWORDS = {'normal': 400, 'bold': 700, 'bolder': 700, 'lighter': 300}
+# 浏览器默认加粗的元素
+_BOLD_TAGS = {'b', 'strong', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+_TEXT_ATTRS = {'alt', 'title', 'placeholder', 'value', 'aria-label', 'label'}
+
+
+class _PageScanner(HTMLParser):
+    """收集页面文字与样式"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chars: set[str] = set()
+        self.css: list[str] = []
+        self.bold_tags = False
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'style':
+            self._in_style = True
+        if tag in _BOLD_TAGS:
+            self.bold_tags = True
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name in _TEXT_ATTRS:
+                self.chars.update(value)
+            elif name == 'style':
+                self.css.append(value)
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.css.append(data)
+        else:
+            # 脚本内容也计入：其中的中文字符串会被动态插入页面
+            self.chars.update(data)
+
+
+@dataclass
+class PageFonts:
+    """页面的字体需求"""
+    chars: str  # 排序后的字符
+    weights: list[int]
+    link: Optional[str] = None
+
+
+def scan_page(html: str) -> PageFonts:
+    """找出页面引用的 Noto Sans SC 链接、用到的字符与字重"""
+    scanner = _PageScanner()
+    scanner.feed(html)
+    scanner.close()
+    css = '\n'.join(scanner.css)
+    chars = set(ALWAYS_INCLUDE) | scanner.chars
+    for match in _CSS_CONTENT_RE.finditer(css):
+        chars.update(match.group(1) or match.group(2) or '')
+    chars = {c for c in chars if c.isprintable() or c == ' '}
+
+    used = {BODY_WEIGHT}
+    for match in _FONT_WEIGHT_RE.finditer(css):
+        value = match.group(1).lower()
+        weight = int(value) if value.isdigit() else _WEIGHT_KEYWORDS.get(value)
+        if weight:
+            used.add(weight)
+    if scanner.bold_tags:
+        used.add(700)
+
+    link_match = _FONT_LINK_RE.search(html)
+    link = link_match.group(1) if link_match else None
+    requested = None
+    if link:
+        weights_match = _WEIGHTS_RE.search(link)
+        if weights_match:
+            requested = {int(float(w)) for w in weights_match.group(1).split(';') if w}
+    if requested:
+        # CSS 中的字重未被请求时，浏览器用最接近的已加载字重合成，这里同样就近映射
+        used = {min(requested, key=lambda r: (abs(r - w), r)) for w in used}
+    return PageFonts(''.join(sorted(chars)), sorted(used), link)
+
+
+# ---- 字体源 ----
+
+@dataclass
+class FontSource:
+    """一个字体文件：可变字体覆盖一个字重区间，静态字体只有一个字重"""
+    path: Path
+    weight_range: tuple[float, float]
+    variable: bool
+    digest: str = ''
+
+    def covers(self, weight: int) -> bool:
+        return self.weight_range[0] <= weight <= self.weight_range[1]
+
+
+def find_sources(font_dir: Path) -> list[FontSource]:
+    """读取目录下的 Noto Sans SC 字体文件（需要 fontTools）"""
+    if fontTools is None or not font_dir.is_dir():
+        return []
+    sources = []
+    for path in sorted(font_dir.iterdir()):
+        if path.suffix.lower() not in FONT_EXTENSIONS:
+            continue
+        font = TTFont(path, lazy=True)
+        try:
+            family = font['name'].getBestFamilyName() or ''
+            if 'Noto Sans SC' not in family and 'Noto Sans CJK SC' not in family:
+                continue
+            axes = {a.axisTag: a for a in font['fvar'].axes} if 'fvar' in font else {}
+            if 'wght' in axes:
+                sources.append(FontSource(path, (axes['wght'].minValue, axes['wght'].maxValue), True))
+            else:
+                weight = font['OS/2'].usWeightClass
+                sources.append(FontSource(path, (weight, weight), False))
+        finally:
+            font.close()
+    for source in sources:
+        source.digest = sha256_file(source.path)
+    # 静态字体优先（字形为该字重专门设计，不需要实例化）
+    sources.sort(key=lambda s: s.variable)
+    return sources
+
+
+def pick_source(sources: list[FontSource], weight: int) -> Optional[FontSource]:
+    return next((s for s in sources if s.covers(weight)), None)
+
+
+def make_subsets(font_path: str, variable: bool, weights: list[int], chars: str, flavor: str) -> list[bytes]:
+    """为一个字体文件生成各字重的子集（在进程池中运行，只传基本类型）
+
+    可变字体先按字符集子集化一次（保留 wght 轴），再为每个字重实例化，
+    避免对完整字体重复子集化。
+    """
+    options = ft_subset.Options()
+    options.desubroutinize = True  # CFF 去子程序化后 woff2 压缩率更高
+    options.notdef_outline = True
+    options.name_IDs = [0, 1, 2, 3, 4, 5, 6]
+    options.drop_tables += ['DSIG'] if variable else ['DSIG', 'STAT']
+    # 不更新 head.modified，相同输入得到逐字节相同的文件（文件名中的哈希才稳定）
+    font = TTFont(font_path, lazy=False, recalcTimestamp=False)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=chars)
+    subsetter.subset(font)
+
+    outputs = []
+    for weight in weights:
+        instance = font
+        if variable:
+            from fontTools.varLib import instancer
+            limits = {axis.axisTag: (weight if axis.axisTag == 'wght' else axis.defaultValue)
+                      for axis in font['fvar'].axes}
+            instance = instancer.instantiateVariableFont(font, limits, inplace=False)
+        instance.flavor = flavor
+        buf = io.BytesIO()
+        instance.save(buf)
+        outputs.append(buf.getvalue())
+    return outputs
+
+
+def _subset_task(args: tuple) -> list[bytes]:
+    return make_subsets(*args)
+
+
+# ---- 页面改写 ----
+
+def font_face_css(faces: list[tuple[int, str, str]], indent: str = '') -> str:
+    """(字重, URL, 格式) → @font-face 规则"""
+    rules = []
+    for weight, url, flavor in faces:
+        rules.append(f'{indent}@font-face{{font-family:"{FAMILY}";font-style:normal;font-weight:{weight};'
+                     f'font-display:swap;src:url({url}) format("{flavor}")}}')
+    return '\n'.join(rules)
+
+
+def rewrite_page(html: str, faces: list[tuple[int, str, str]], preload: Optional[tuple[str, str]]) -> str:
+    """把 Noto Sans SC 的 <link>（及其 preconnect）替换为本地 @font-face"""
+    match = _FONT_LINK_RE.search(html)
+    if not match:
+        return html
+    indent = re.match(r'[ \t]*', match.group(0)).group(0)
+    block = ''
+    if preload:
+        url, flavor = preload
+        block += f'{indent}<link rel="preload" href="{url}" as="font" type="font/{flavor}" crossorigin>\n'
+    rules = font_face_css(faces, indent + '    ')
+    block += f'{indent}<style>\n{rules}\n{indent}</style>\n'
+    html = html[:match.start()] + block + html[match.end():]
+    if not _FONT_LINK_RE.search(html):
+        # 没有其他页面字体链接时，preconnect 也不再需要
+        html = _PRECONNECT_RE.sub('', html)
+    return html
+
+
+# ---- 阶段 ----
+
+@dataclass
+class PageFontResult:
+    """单个页面的字体处理结果"""
+    path: str
+    chars: int = 0
+    weights: list[int] = field(default_factory=list)
+    # (字重, 相对网站根目录的文件, 字节数, 是否来自缓存)
+    files: list[tuple[int, str, int, bool]] = field(default_factory=list)
+    full_bytes: int = 0  # 同字重完整字体文件的大小
+    missing_weights: list[int] = field(default_factory=list)
+
+    @property
+    def subset_bytes(self) -> int:
+        return sum(f[2] for f in self.files)
+
+
+@dataclass
+class FontReport:
+    """字体阶段汇总"""
+    pages: list[PageFontResult] = field(default_factory=list)
+    skipped: str = ''  # 整个阶段跳过的原因
+    flavor: str = DEFAULT_FLAVOR
+    seconds: float = 0.0
+
+
+def subset_site(site: Path, font_dir: Path, cache: Optional[BuildCache], store: BlobStore,
+                jobs: Optional[int] = None, write: bool = True) -> FontReport:
+    """为 site 下引用 Noto Sans SC 的每个页面生成字体子集并改写页面"""
+    start = time.perf_counter()
+    report = FontReport()
+    pages = sorted(p for p in site.rglob('*.html') if p.is_file())
+    scanned = {}
+    for page in pages:
+        html = page.read_text(encoding='utf-8')
+        info = scan_page(html)
+        if info.link:
+            scanned[page] = (html, info)
+    if not scanned:
+        report.skipped = '没有页面引用 Noto Sans SC'
+        return report
+    if fontTools is None:
+        report.skipped = '未安装 fontTools（pip install fonttools brotli），保留 CDN 字体链接'
+        return report
+    sources = find_sources(font_dir)
+    if not sources:
+        report.skipped = f'{font_dir} 中没有 Noto Sans SC 字体文件，保留 CDN 字体链接'
+        return report
+
+    # 需要生成的子集按（字体文件, 字符集）分组，同一组只子集化一次
+    groups: dict[tuple[str, str], list[tuple[int, str]]] = {}
+    plans = []
+    for page, (html, info) in scanned.items():
+        result = PageFontResult(os.path.relpath(page, site).replace(os.sep, '/'), len(info.chars), info.weights)
+        keys = []
+        full_sources = set()
+        chars_digest = sha256_bytes(info.chars.encode('utf-8'))
+        for weight in info.weights:
+            source = pick_source(sources, weight)
+            if source is None:
+                result.missing_weights.append(weight)
+                continue
+            full_sources.add(source.path)
+            key = hash_key(SUBSETTER_VERSION, source.digest, weight, chars_digest, report.flavor, fontTools.version)
+            keys.append((weight, key))
+            entry = cache.get('fonts', key) if cache is not None else None
+            pending = groups.setdefault((os.fspath(source.path), info.chars), [])
+            if not (entry and store.has(entry['blob'])) and (weight, key) not in pending:
+                pending.append((weight, key))
+        result.full_bytes = sum(p.stat().st_size for p in full_sources)
+        plans.append((page, html, result, keys))
+
+    produced: dict[str, str] = {}
+    variable = {os.fspath(s.path): s.variable for s in sources}
+    items = [(path, chars, pending) for (path, chars), pending in groups.items() if pending]
+    if items:
+        tasks = [(path, variable[path], [w for w, _ in pending], chars, report.flavor)
+                 for path, chars, pending in items]
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_subset_task, tasks))
+        else:
+            outputs = [_subset_task(task) for task in tasks]
+        for (_, _, pending), datas in zip(items, outputs):
+            for (_, key), data in zip(pending, datas):
+                produced[key] = store.put(data)
+                if cache is not None:
+                    cache.set('fonts', key, {'blob': produced[key], 'size': len(data)})
+
+    for page, html, result, keys in plans:
+        faces = []
+        for weight, key in keys:
+            digest = produced.get(key) or cache.get('fonts', key)['blob']
+            data = store.get(digest)
+            name = f'{OUTPUT_DIR}/{FILE_PREFIX}-{weight}.{digest[:10]}.{report.flavor}'
+            if write:
+                out = site / name
+                out.parent.mkdir(parents=True, exist_ok=True)
+                out.write_bytes(data)
+            result.files.append((weight, name, len(data), key not in produced))
+            faces.append((weight, name, report.flavor))
+        if write and faces:
+            # 页面可能在子目录中，URL 相对页面所在目录
+            prefix = os.path.relpath(site, page.parent).replace(os.sep, '/')
+            prefix = '' if prefix == '.' else prefix + '/'
+            faces = [(w, prefix + url, flavor) for w, url, flavor in faces]
+            body = next((f for f in faces if f[0] == BODY_WEIGHT), faces[0])
+            page.write_text(rewrite_page(html, faces, (body[1], body[2])), encoding='utf-8')
+        report.pages.append(result)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_report(report: FontReport):
+    """打印字体阶段结果"""
+    from manifest_diff import format_size
+    if report.skipped:
+        print(f"ℹ️ 字体子集：{report.skipped}")
+        return
+    for page in report.pages:
+        saved = page.full_bytes - page.subset_bytes
+        print(f"   🔤 {page.path}: {page.chars} 个字符，字重 {'/'.join(map(str, page.weights))}，"
+              f"子集 {format_size(page.subset_bytes)}（完整字体 {format_size(page.full_bytes)}，"
+              f"节省 {format_size(saved)}）")
+        for weight, name, size, cached in page.files:
+            print(f"      {name}  {format_size(size)}{'（缓存）' if cached else ''}")
+        if page.missing_weights:
+            print(f"      ⚠️ 没有覆盖字重 {page.missing_weights} 的字体文件，浏览器改用最接近的字重")
+    total_subset = sum(p.subset_bytes for p in report.pages)
+    total_full = sum(p.full_bytes for p in report.pages)
+    print(f"🔤 字体子集 {len(report.pages)} 个页面，共 {format_size(total_subset)}"
+          f"（完整字体 {format_size(total_full)}），格式 {report.flavor}，耗时 {report.seconds:.2f} s")
+
+
+def main():
+    import argparse
+    import shutil
+    import tempfile
+    from build_cache import DEFAULT_BLOB_DIR, DEFAULT_CACHE_DIR
+    parser = argparse.ArgumentParser(description='报告页面的 Noto Sans SC 子集大小（不修改页面）')
+    parser.add_argument('pages', nargs='+', help='HTML 页面')
+    parser.add_argument('--font-dir', default=DEFAULT_FONT_DIR, help='字体文件目录')
+    parser.add_argument('--jobs', type=int, default=None, help='并行进程数（默认 CPU 核数）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/site.json', help='构建缓存文件路径')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    cache = BuildCache.load(repo_root / args.cache)
+    store = BlobStore(repo_root / DEFAULT_BLOB_DIR)
+    with tempfile.TemporaryDirectory(prefix='font-subset-') as tmp:
+        for page in args.pages:
+            shutil.copy(page, Path(tmp) / Path(page).name)
+        report = subset_site(Path(tmp), Path(args.font_dir), cache, store, jobs=args.jobs, write=False)
+    cache.save()
+    print_report(report)
+    return 1 if report.skipped and fontTools is None else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+校验安装目录与 manifest.json 是否一致
+
+用于发现损坏或只更新了一半的安装目录。
+
+流程：
+1. 遍历安装目录，先比较每个文件是否存在、大小是否一致（只需 stat，代价很低）
+2. 大小一致的文件中，只对"可疑"的文件计算 SHA-256：
+   上次校验通过后大小或修改时间变过、或上次校验时对应的清单哈希不同；--full 时全部计算
+   （校验结果按安装目录记录在构建缓存 .build_cache/verify.json 中）
+3. 哈希在线程池中并行计算（大文件 mmap，见 build_manifest.hash_file），大文件优先
+4. --fail-fast 时发现第一个问题即停止，否则完整报告；最后输出 MB/s 与 files/s
+
+清单中没有、但安装目录里存在的文件列为"多余文件"，默认只提示，--strict 时视为失败。
+
+使用方法：
+    python scripts/verify_install.py D:/虎哥截图
+    python scripts/verify_install.py D:/虎哥截图 --full --jobs 8
+    python scripts/verify_install.py D:/虎哥截图 --manifest resources/manifest.bin --fail-fast
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from build_cache import DEFAULT_CACHE_DIR, BuildCache
+from build_manifest import FileStat, hash_file, scan_tree
+from manifest_bin import load_any_manifest
+
+
+@dataclass
+class VerifyIssue:
+    """一处不一致"""
+    kind: str  # missing / size / hash / error
+    path: str
+    detail: str = ''
+
+
+@dataclass
+class VerifyResult:
+    """校验结果与统计"""
+    issues: list[VerifyIssue] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+    files: int = 0
+    total_bytes: int = 0
+    hashed_files: int = 0
+    hashed_bytes: int = 0
+    trusted_files: int = 0
+    stopped_early: bool = False
+    scan_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+
+def _cache_key(root: Path) -> str:
+    return os.fspath(root.resolve())
+
+
+# 小文件合批：每批累计不少于该字节数或达到该文件数
+BATCH_BYTES = 8 * 1024 * 1024
+BATCH_FILES = 256
+
+
+def _make_batches(pending: list[tuple[FileStat, str]]) -> list[list[tuple[FileStat, str]]]:
+    batches = []
+    batch = []
+    batch_bytes = 0
+    for item in pending:
+        batch.append(item)
+        batch_bytes += item[0].size
+        if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+            batches.append(batch)
+            batch = []
+            batch_bytes = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _hash_batch(root: str, batch: list[tuple[FileStat, str]]) -> list[tuple[FileStat, str, object]]:
+    """计算一批文件的哈希，返回 (文件, 清单哈希, 实际哈希或 OSError)"""
+    out = []
+    for stat, digest in batch:
+        try:
+            actual = hash_file(os.path.join(root, stat.path), stat.size)
+        except OSError as e:
+            actual = e
+        out.append((stat, digest, actual))
+    return out
+
+
+def verify_install(root: Path, manifest: dict, full: bool = False, jobs: Optional[int] = None,
+                   fail_fast: bool = False, cache: Optional[BuildCache] = None) -> VerifyResult:
+    """校验安装目录，返回结果
+
+    cache 中记录了上次校验通过的文件 [大小, mtime_ns, 哈希]；非 full 模式下，
+    大小、修改时间和清单哈希都与记录相同的文件视为可信，不再计算哈希。
+    """
+    result = VerifyResult()
+    start = time.perf_counter()
+    on_disk = {f.path: f for f in scan_tree(root)}
+    result.scan_seconds = time.perf_counter() - start
+
+    namespace = 'verify'
+    key = _cache_key(root)
+    trusted = (cache.get(namespace, key) or {}) if cache is not None else {}
+    verified: dict[str, list] = {}
+
+    expected = manifest.get('files', [])
+    listed = set()
+    pending = []
+    for entry in expected:
+        path = entry['path']
+        listed.add(path)
+        result.files += 1
+        result.total_bytes += entry['size']
+        stat = on_disk.get(path)
+        if stat is None:
+            result.issues.append(VerifyIssue('missing', path))
+        elif stat.size != entry['size']:
+            result.issues.append(VerifyIssue('size', path, f"应为 {entry['size']:,} 字节，实际 {stat.size:,} 字节"))
+        else:
+            hit = trusted.get(path)
+            if not full and hit and hit[0] == stat.size and hit[1] == stat.mtime_ns and hit[2] == entry['hash']:
+                result.trusted_files += 1
+                verified[path] = hit
+            else:
+                pending.append((stat, entry['hash']))
+            continue
+        if fail_fast:
+            result.stopped_early = True
+            result.seconds = time.perf_counter() - start
+            return result
+    result.extra = sorted(p for p in on_disk if p not in listed)
+
+    hash_start = time.perf_counter()
+    if pending:
+        # 大文件优先；小文件按批提交，避免每个文件一个 future 的调度开销
+        pending.sort(key=lambda item: item[0].size, reverse=True)
+        root_str = os.fspath(root)
+        batches = _make_batches(pending)
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(batches)))
+        if workers == 1:
+            outcomes = (_hash_batch(root_str, batch) for batch in batches)
+            pool = None
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            futures = [pool.submit(_hash_batch, root_str, batch) for batch in batches]
+            outcomes = (future.result() for future in as_completed(futures))
+        processed = 0
+        try:
+            for outcome in outcomes:
+                for stat, digest, actual in outcome:
+                    if isinstance(actual, OSError):
+                        result.issues.append(VerifyIssue('error', stat.path, str(actual)))
+                        continue
+                    result.hashed_files += 1
+                    result.hashed_bytes += stat.size
+                    if actual == digest:
+                        verified[stat.path] = [stat.size, stat.mtime_ns, digest]
+                    else:
+                        result.issues.append(VerifyIssue('hash', stat.path, f"应为 {digest[:12]}…，实际 {actual[:12]}…"))
+                processed += len(outcome)
+                if fail_fast and result.issues:
+                    result.stopped_early = processed < len(pending)
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    result.hash_seconds = time.perf_counter() - hash_start
+
+    if cache is not None:
+        # 只保留本次确认过的文件；fail-fast 中途停止时保留未检查文件的旧记录
+        if result.stopped_early:
+            failed = {issue.path for issue in result.issues}
+            merged = {p: v for p, v in trusted.items() if p in listed and p not in failed}
+            merged.update(verified)
+            verified = merged
+        cache.set(namespace, key, verified)
+
+    result.issues.sort(key=lambda issue: issue.path)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+ISSUE_LABELS = {
+    'missing': '缺失',
+    'size': '大小不符',
+    'hash': '哈希不符',
+    'error': '读取失败',
+}
+
+
+def print_result(result: VerifyResult, max_report: int = 20, strict: bool = False):
+    """打印校验结果"""
+    mb = result.hashed_bytes / 1024 / 1024
+    seconds = max(result.hash_seconds, 1e-9)
+    print(f"   文件: {result.files} 个，{result.total_bytes / 1024 / 1024:,.1f} MB"
+          f"（遍历 {result.scan_seconds * 1000:.0f} ms）")
+    print(f"   可信跳过: {result.trusted_files} 个")
+    print(f"   计算哈希: {result.hashed_files} 个，{mb:,.1f} MB，耗时 {result.hash_seconds:.2f} s"
+          f"（{mb / seconds:,.0f} MB/s，{result.hashed_files / seconds:,.0f} files/s）")
+    for issue in result.issues[:max_report]:
+        detail = f"：{issue.detail}" if issue.detail else ''
+        print(f"   ❌ {ISSUE_LABELS[issue.kind]} {issue.path}{detail}")
+    if len(result.issues) > max_report:
+        print(f"   ... 另有 {len(result.issues) - max_report} 处问题")
+    if result.extra:
+        mark = '❌' if strict else '⚠️'
+        print(f"   {mark} 多余文件: {len(result.extra)} 个")
+        for path in result.extra[:max_report]:
+            print(f"      {path}")
+    if result.stopped_early:
+        print("   ⏹ fail-fast：已在第一处问题后停止")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='校验安装目录与 manifest 是否一致')
+    parser.add_argument('root', help='安装目录')
+    parser.add_argument('--manifest', default='resources/manifest.json',
+                        help='清单路径（.json 或 .bin，相对仓库根目录，默认 resources/manifest.json）')
+    parser.add_argument('--full', action='store_true', help='对所有文件计算哈希（忽略上次的校验记录）')
+    parser.add_argument('--fail-fast', action='store_true', help='发现第一处问题即停止')
+    parser.add_argument('--strict', action='store_true', help='多余文件也视为失败')
+    parser.add_argument('--jobs', type=int, default=None, help='哈希线程数（默认 CPU 核数）')
+    parser.add_argument('--cache', default=f'{DEFAULT_CACHE_DIR}/verify.json', help='校验记录文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不读写校验记录')
+    parser.add_argument('--max-report', type=int, default=20, help='最多列出的问题数')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"❌ 找不到安装目录: {root}")
+        return 1
+    try:
+        manifest = load_any_manifest(repo_root / args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取 manifest 失败: {e}")
+        return 1
+
+    cache = None if args.no_cache else BuildCache.load(repo_root / args.cache)
+    mode = '完整' if args.full else '快速'
+    print(f"🔍 校验 {root}（v{manifest.get('version', '?')}，{mode}模式）...")
+    result = verify_install(root, manifest, full=args.full, jobs=args.jobs, fail_fast=args.fail_fast, cache=cache)
+    if cache is not None:
+        cache.save()
+    print_result(result, args.max_report, args.strict)
+
+    failed = not result.ok or (args.strict and result.extra)
+    if failed:
+        print(f"❌ 校验未通过（{result.seconds:.2f} s）")
+        return 1
+    print(f"✅ 安装目录与清单一致（{result.seconds:.2f} s）")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())